@@ -258,6 +258,114 @@ class TestDataclass:
             == b'{"name":"a","number":1,"sub":null}'
         )
 
+    def test_dataclass_slots_unset(self):
+        """
+        dumps() raises on a dataclass with an unset slot
+        """
+        obj = Slotsdataclass("a", 1, "c", "d")
+        del obj.b
+        with pytest.raises(AttributeError):
+            pyyjson.dumps(obj)
+        obj.b = 2
+        assert pyyjson.dumps([obj, obj]) == b'[{"a":"a","b":2},{"a":"a","b":2}]'
+
+    def test_dataclass_non_ascii_indent(self):
+        """
+        dumps() writes non-ASCII field names and indents them
+        """
+
+        @dataclass
+        class NonAscii:
+            __slots__ = ("caf\u00e9",)
+            café: int
+
+        obj = NonAscii(1)
+        assert pyyjson.dumps(obj) == '{"caf\u00e9":1}'.encode()
+        assert (
+            pyyjson.dumps([obj], option=pyyjson.OPT_INDENT_2)
+            == '[\n  {\n    "caf\u00e9": 1\n  }\n]'.encode()
+        )
+
+    def test_dataclass_modified(self):
+        """
+        dumps() follows changes to a dataclass after it was serialized
+        """
+
+        @dataclass
+        class Modified:
+            __slots__ = ("a", "b")
+            a: int
+            b: int
+
+        obj = Modified(1, 2)
+        assert pyyjson.dumps(obj) == b'{"a":1,"b":2}'
+        fields = dict(Modified.__dataclass_fields__)
+        del fields["b"]
+        Modified.__dataclass_fields__ = fields
+        assert pyyjson.dumps(obj) == b'{"a":1}'
+        Modified.a = property(lambda self: 3)
+        assert pyyjson.dumps(obj) == b'{"a":3}'
+
+    def test_dataclass_many_types(self):
+        """
+        dumps() serializes more dataclass types than it caches
+        """
+        types = [
+            dataclass(type(f"Many{i}", (), {"__annotations__": {"x": int}}))
+            for i in range(200)
+        ]
+        objs = [cls(i) for i, cls in enumerate(types)]
+        expected = b"[" + b",".join(b'{"x":%d}' % i for i in range(200)) + b"]"
+        for _ in range(3):
+            assert pyyjson.dumps(objs) == expected
+
+    def test_dataclass_iter_evicted(self):
+        """
+        dumps_iter() writes a dataclass whose cached plan was evicted meanwhile
+        """
+        obj = [Slotsdataclass("a" * 100, i, "c", "d") for i in range(100)]
+        chunks = pyyjson.dumps_iter(obj, chunk_size=64)
+        first = next(chunks)
+        types = [
+            dataclass(type(f"Evict{i}", (), {"__annotations__": {"x": int}}))
+            for i in range(200)
+        ]
+        pyyjson.dumps([cls(1) for cls in types])
+        assert first + b"".join(chunks) == pyyjson.dumps(obj)
+
+    def test_dataclass_dump_evicted(self):
+        """
+        dump() writes a dataclass whose cached plan is evicted by a dumps()
+        in the write() of its file
+        """
+
+        @dataclass
+        class Evicted:
+            __slots__ = ("a", "b")
+            a: int
+            b: int
+
+        def slot(cls):
+            return (id(cls) >> 4) & 63
+
+        others = []
+        while not others or slot(others[-1]) != slot(Evicted):
+            cls = type("Colliding", (), {"__annotations__": {"x": int}})
+            others.append(dataclass(cls))
+        colliding = others[-1](1)
+        chunks = []
+
+        class Writer:
+            def write(self, data):
+                pyyjson.dumps(colliding)
+                chunks.append(data)
+
+        for size in range(13100, 13115):
+            obj = [True] * size + [Evicted(1, 2)]
+            chunks.clear()
+            pyyjson.dump(obj, Writer())
+            assert b"".join(chunks).endswith(b',{"a":1,"b":2}]')
+
 
 class TestDataclassPassthrough:
     def test_dataclass_passthrough_raise(self):
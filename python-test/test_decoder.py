@@ -0,0 +1,308 @@
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+import gc
+import json
+import sys
+import weakref
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import pytest
+
+import pyyjson
+
+
+@dataclass
+class Point:
+    x: int
+    y: int = 0
+    tags: list = field(default_factory=list)
+
+
+# dataclass(slots=True) needs Python 3.10
+@dataclass(**({"slots": True} if sys.version_info >= (3, 10) else {}))
+class Shape:
+    name: str
+    points: List[Point]
+    origin: Optional[Point] = None
+
+
+@dataclass(frozen=True)
+class Frozen:
+    value: int
+
+
+@dataclass
+class PostInit:
+    value: int
+
+    def __post_init__(self):
+        self.doubled = self.value * 2
+
+
+@dataclass
+class Node:
+    value: int
+    children: "List[Node]" = field(default_factory=list)
+
+
+class TestDecoder:
+    def test_decoder_no_type(self):
+        """
+        Decoder() without a type decodes like loads()
+        """
+        decoder = pyyjson.Decoder()
+        assert decoder.type is None
+        assert decoder.decode(b'[1, {"a": null}]') == [1, {"a": None}]
+
+    def test_decoder_dataclass(self):
+        """
+        Decoder(type=dataclass) fills fields and defaults
+        """
+        decoder = pyyjson.Decoder(type=Point)
+        assert decoder.type is Point
+        assert decoder.decode('{"x": 1}') == Point(1)
+        assert decoder.decode('{"y": 2, "x": 1, "tags": ["a"]}') == Point(1, 2, ["a"])
+
+    def test_decoder_default_factory(self):
+        """
+        default_factory is called for each instance
+        """
+        decoder = pyyjson.Decoder(type=Point)
+        a = decoder.decode('{"x": 1}')
+        b = decoder.decode('{"x": 1}')
+        assert a.tags == [] and a.tags is not b.tags
+
+    def test_decoder_slots_nested(self):
+        """
+        slots dataclass with nested list[dataclass] and Optional[dataclass]
+        """
+        decoder = pyyjson.Decoder(type=Shape)
+        assert decoder.decode(
+            '{"name": "s", "points": [{"x": 1}, {"x": 2, "y": 3}], "origin": {"x": 0}}'
+        ) == Shape("s", [Point(1), Point(2, 3)], Point(0))
+        assert decoder.decode('{"name": "s", "points": [], "origin": null}') == Shape(
+            "s", []
+        )
+
+    def test_decoder_unknown_field(self):
+        """
+        unknown fields are ignored
+        """
+        for skip_unknown in (False, True):
+            decoder = pyyjson.Decoder(type=Point, skip_unknown=skip_unknown)
+            assert decoder.skip_unknown is skip_unknown
+            assert decoder.decode('{"x": 1, "z": {"a": [1, 2]}}') == Point(1)
+            doc = '{"z": "]", "x": 1, "w": [{"}": "\\""}]}'
+            assert decoder.decode(doc) == Point(1)
+
+    def test_decoder_unknown_field_invalid(self):
+        """
+        unknown fields are validated like any other value
+        """
+        decoder = pyyjson.Decoder(type=Point)
+        for doc, pos in [
+            ('{"x": 1, "z": [tru, {}]}', 15),
+            ('{"x": 1, "z": {"a": 01}}', 20),
+            (b'{"x": 1, "z": ["\xff"]}', 16),
+            ('{"x": 1, "z": "a\tb"}', 16),
+            ('{"x": 1, "z": [1}', 16),
+            ('{"x": 1, "z": "abc', 18),
+        ]:
+            with pytest.raises(pyyjson.JSONDecodeError) as exc:
+                decoder.decode(doc)
+            assert str(exc.value).endswith(f"at {pos}"), doc
+        with pytest.raises(pyyjson.JSONDecodeError):
+            decoder.decode('{"x": 1, "z": [],}')
+
+    def test_decoder_skip_unknown_invalid(self):
+        """
+        skipped unknown fields must still be terminated, errors point at the bad byte
+        """
+        decoder = pyyjson.Decoder(type=Point, skip_unknown=True)
+        for doc, pos in [
+            ('{"x": 1, "z": [1, {]}', 19),
+            ('{"x": 1, "z": "abc', 18),
+            ('{"x": 1, "z": [[1]', 18),
+        ]:
+            with pytest.raises(pyyjson.JSONDecodeError) as exc:
+                decoder.decode(doc)
+            assert str(exc.value).endswith(f"at {pos}"), doc
+        with pytest.raises(pyyjson.JSONDecodeError):
+            decoder.decode('{"x": 1, "z": [],}')
+
+    def test_decoder_str_surrogates(self):
+        """
+        a str with surrogates raises JSONDecodeError
+        """
+        with pytest.raises(pyyjson.JSONDecodeError):
+            pyyjson.Decoder().decode('"\ud800"')
+
+    def test_decoder_duplicate_field(self):
+        """
+        the last duplicate field wins
+        """
+        decoder = pyyjson.Decoder(type=Point)
+        assert decoder.decode('{"x": 1, "x": 2}') == Point(2)
+
+    def test_decoder_frozen(self):
+        """
+        frozen dataclass
+        """
+        assert pyyjson.Decoder(type=Frozen).decode('{"value": 1}') == Frozen(1)
+
+    def test_decoder_post_init(self):
+        """
+        __post_init__ is called
+        """
+        obj = pyyjson.Decoder(type=PostInit).decode('{"value": 2}')
+        assert obj.doubled == 4
+
+    def test_decoder_recursive(self):
+        """
+        recursive dataclass
+        """
+        decoder = pyyjson.Decoder(type=Node)
+        assert decoder.decode(
+            '{"value": 1, "children": [{"value": 2, "children": [{"value": 3}]}]}'
+        ) == Node(1, [Node(2, [Node(3)])])
+
+    def test_decoder_list_root(self):
+        """
+        list[dataclass] as the root type
+        """
+        decoder = pyyjson.Decoder(type=List[Point])
+        assert decoder.decode('[{"x": 1}, {"x": 2}]') == [Point(1), Point(2)]
+
+    def test_decoder_missing_field(self):
+        """
+        missing required field raises JSONDecodeError
+        """
+        with pytest.raises(pyyjson.JSONDecodeError):
+            pyyjson.Decoder(type=Point).decode('{"y": 1}')
+
+    def test_decoder_container_mismatch(self):
+        """
+        container type not matching the target type raises JSONDecodeError
+        """
+        with pytest.raises(pyyjson.JSONDecodeError):
+            pyyjson.Decoder(type=Point).decode("[1]")
+        with pytest.raises(pyyjson.JSONDecodeError):
+            pyyjson.Decoder(type=Point).decode("1")
+        with pytest.raises(pyyjson.JSONDecodeError):
+            pyyjson.Decoder(type=Shape).decode('{"name": "s", "points": {}}')
+
+    def test_decoder_scalar_mismatch(self):
+        """
+        scalars where a dataclass or list is expected raise JSONDecodeError
+        """
+        decoder = pyyjson.Decoder(type=Shape)
+        for doc in (
+            '{"name": "s", "points": [1, 2]}',
+            '{"name": "s", "points": [{"x": 1}, "a"]}',
+            '{"name": "s", "points": 1}',
+            '{"name": "s", "points": [], "origin": 1}',
+        ):
+            with pytest.raises(pyyjson.JSONDecodeError):
+                decoder.decode(doc)
+        with pytest.raises(pyyjson.JSONDecodeError):
+            pyyjson.Decoder(type=List[Point]).decode("[[]]")
+        assert decoder.decode('{"name": "s", "points": [null]}') == Shape("s", [None])
+
+    def test_decoder_unsupported_type(self):
+        """
+        unsupported type raises TypeError
+        """
+        with pytest.raises(TypeError):
+            pyyjson.Decoder(type=int)
+
+    def test_decoder_failed_init(self):
+        """
+        a failed __init__ leaves the Decoder uninitialized and frees what it built
+        """
+
+        @dataclass
+        class Unresolved:
+            value: "Missing"  # noqa: F821
+
+        key = "".join(["date", "_key"])
+        refs = sys.getrefcount(key)
+        decoder = pyyjson.Decoder.__new__(pyyjson.Decoder)
+        with pytest.raises(TypeError):
+            decoder.__init__(datetime_keys=[key], uuid_keys=5)
+        assert sys.getrefcount(key) == refs
+        with pytest.raises(NameError):
+            decoder.__init__(type=Unresolved, datetime_keys=[key])
+        assert sys.getrefcount(key) == refs
+        with pytest.raises(RuntimeError, match="not initialized"):
+            decoder.decode("{}")
+        decoder.__init__(type=Point, datetime_keys=[key])
+        assert decoder.decode('{"x": 1}') == Point(1)
+        with pytest.raises(RuntimeError, match="already initialized"):
+            decoder.__init__()
+
+    def test_decoder_cycle(self):
+        """
+        a Decoder in a reference cycle through its type is collected
+        """
+
+        @dataclass
+        class Cyclic:
+            items: list = field(default_factory=list)
+
+        Cyclic.decoder = pyyjson.Decoder(type=Cyclic)
+        ref = weakref.ref(Cyclic)
+        assert Cyclic.decoder.decode("{}") == Cyclic()
+        del Cyclic
+        gc.collect()
+        assert ref() is None
+
+    def test_decoder_reuse(self):
+        """
+        a Decoder can be reused for inputs of any size
+        """
+        decoder = pyyjson.Decoder(type=Point)
+        big = b"[" + b",".join(b'{"x": %d, "tags": ["t"]}' % i for i in range(20000)) + b"]"
+        for _ in range(3):
+            assert decoder.decode('{"x": 1}') == Point(1)
+            assert pyyjson.Decoder().decode(big)[-1] == {"x": 19999, "tags": ["t"]}
+
+    def test_decoder_key_cache(self):
+        """
+        repeated keys decode to the same interned str
+        """
+        decoder = pyyjson.Decoder()
+        first = decoder.decode(b'{"symbol": 1}')
+        second = decoder.decode(b'[{"symbol": 2}, {"symbol": 3}]')
+        keys = [next(iter(first))] + [next(iter(d)) for d in second]
+        assert all(k is keys[0] for k in keys)
+
+    def test_decoder_reentrant(self):
+        """
+        decoding from inside a hook of the same Decoder works
+        """
+        @dataclass
+        class Outer:
+            raw: str
+
+            def __post_init__(self):
+                self.inner = decoder.decode(self.raw) if self.raw else None
+
+        decoder = pyyjson.Decoder(type=Outer)
+        inner = json.dumps({"raw": json.dumps({"raw": ""})})
+        result = decoder.decode(json.dumps({"raw": inner}))
+        assert result.inner.inner.inner is None
+
+    def test_loads_arguments(self):
+        """
+        loads() accepts option by position or keyword only
+        """
+        assert pyyjson.loads("[1]", pyyjson.OPT_PARSE_FROZEN) == (1,)
+        assert pyyjson.loads("[1]", option=pyyjson.OPT_PARSE_FROZEN) == (1,)
+        assert pyyjson.loads("[1]", option=None) == [1]
+        with pytest.raises(TypeError):
+            pyyjson.loads()
+        with pytest.raises(TypeError):
+            pyyjson.loads("[1]", opt=0)
+        with pytest.raises(TypeError):
+            pyyjson.loads("[1]", 0, option=0)
@@ -1,5 +1,8 @@
 # SPDX-License-Identifier: (Apache-2.0 OR MIT)
 
+import json
+import sys
+
 import pytest
 
 import pyyjson
@@ -167,3 +170,16 @@ class TestDict:
                 self.b = 1
 
         assert pyyjson.dumps(C().__dict__) == b'{"a":0,"b":1}'
+
+    def test_dict_repeated_keys(self):
+        """
+        keys repeated across dicts, more than the key cache holds
+        """
+        keys = [sys.intern("k\\\"é%d" % i) for i in range(3000)] + ["x" * 100]
+        obj = [{key: i for i, key in enumerate(keys)}] * 3
+        assert pyyjson.dumps(obj) == json.dumps(
+            obj, ensure_ascii=False, separators=(",", ":")
+        ).encode("utf-8")
+        assert pyyjson.dumps(obj, option=pyyjson.OPT_INDENT_2) == json.dumps(
+            obj, ensure_ascii=False, indent=2
+        ).encode("utf-8")
@@ -0,0 +1,96 @@
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+import io
+import os
+import sys
+
+import pytest
+
+import pyyjson
+
+DATA = [{"id": i, "text": "x" * i, "values": [1.5, None, True]} for i in range(2000)]
+
+
+class TestDump:
+    def test_dump_file_object(self):
+        """
+        dump() writes the same bytes as dumps() to a file object
+        """
+        fp = io.BytesIO()
+        assert pyyjson.dump(DATA, fp) is None
+        assert fp.getvalue() == pyyjson.dumps(DATA)
+
+    def test_dump_flushes(self):
+        """
+        dump() writes large output in bounded chunks
+        """
+        chunks = []
+
+        class Writer:
+            def write(self, data):
+                chunks.append(data)
+
+        pyyjson.dump(DATA, Writer())
+        assert len(chunks) > 1
+        assert max(len(chunk) for chunk in chunks) <= 65536
+        assert b"".join(chunks) == pyyjson.dumps(DATA)
+
+    def test_dump_large_value(self):
+        """
+        dump() writes a str larger than its buffer
+        """
+        obj = [1, "y" * 300000, 2]
+        fp = io.BytesIO()
+        pyyjson.dump(obj, fp)
+        assert fp.getvalue() == pyyjson.dumps(obj)
+
+    def test_dump_uncached_keys(self):
+        """
+        dump() flushes while writing interned keys not in the key cache
+        """
+        obj = {sys.intern("dump_key_%05d" % i): 1 for i in range(10000)}
+        fp = io.BytesIO()
+        pyyjson.dump(obj, fp)
+        assert fp.getvalue() == pyyjson.dumps(obj)
+        assert len(fp.getvalue()) > 65536
+
+    def test_dump_reentrant_write(self):
+        """
+        dump() to a file whose write() calls dumps() with the same keys
+        """
+        obj = [{sys.intern("reentrant_%03d" % (i % 500)): i} for i in range(20000)]
+        other = {sys.intern("reentrant_%03d" % i): "x" for i in range(500, 1000)}
+        chunks = []
+
+        class Writer:
+            def write(self, data):
+                pyyjson.dumps(other)
+                chunks.append(data)
+
+        pyyjson.dump(obj, Writer())
+        assert b"".join(chunks) == pyyjson.dumps(obj)
+
+    def test_dump_fd(self, tmp_path):
+        """
+        dump() writes to a file descriptor, with options
+        """
+        path = tmp_path / "out.json"
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT)
+        try:
+            pyyjson.dump(DATA, fd, option=pyyjson.OPT_APPEND_NEWLINE)
+        finally:
+            os.close(fd)
+        assert path.read_bytes() == pyyjson.dumps(DATA) + b"\n"
+
+    def test_dump_errors(self):
+        """
+        dump() rejects bad files and propagates encode errors
+        """
+        with pytest.raises(TypeError):
+            pyyjson.dump(1, "out.json")
+        with pytest.raises(TypeError):
+            pyyjson.dump(1)
+        with pytest.raises(OSError):
+            pyyjson.dump(1, 99999)
+        with pytest.raises(pyyjson.JSONEncodeError):
+            pyyjson.dump([object()], io.BytesIO())
@@ -0,0 +1,79 @@
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+import mmap
+import sys
+
+import pytest
+
+import pyyjson
+
+DATA = [{"id": i, "text": "é" * i} for i in range(200)]
+
+
+class TestDumpsInto:
+    def test_dumps_into(self):
+        """
+        dumps_into() writes the same bytes as dumps() and returns their length
+        """
+        ref = pyyjson.dumps(DATA)
+        buf = bytearray(len(ref) + 10)
+        assert pyyjson.dumps_into(DATA, buf, 5) == len(ref)
+        assert buf[5 : 5 + len(ref)] == ref
+        assert buf[:5] == bytearray(5)
+
+    def test_dumps_into_exact(self):
+        """
+        dumps_into() fills a buffer of exactly the needed size
+        """
+        for obj in (DATA, "é" * 1000, [], 1):
+            ref = pyyjson.dumps(obj, option=pyyjson.OPT_APPEND_NEWLINE)
+            buf = bytearray(len(ref))
+            assert (
+                pyyjson.dumps_into(obj, buf, option=pyyjson.OPT_APPEND_NEWLINE)
+                == len(ref)
+            )
+            assert buf == ref
+
+    def test_dumps_into_too_small(self):
+        """
+        dumps_into() returns minus the number of bytes missing
+        """
+        ref = pyyjson.dumps(DATA)
+        for size in (0, 1, 100, len(ref) - 1):
+            assert pyyjson.dumps_into(DATA, bytearray(size)) == size - len(ref)
+        assert pyyjson.dumps_into(DATA, bytearray(100), offset=100) == -len(ref)
+
+    def test_dumps_into_uncached_keys(self):
+        """
+        dumps_into() into a too small buffer leaves the key cache correct
+        """
+        obj = {sys.intern("into_key_%d" % i): i for i in range(50)}
+        assert pyyjson.dumps_into(obj, bytearray(8)) < 0
+        assert pyyjson.dumps_into({sys.intern("into_a"): 1}, bytearray(8)) < 0
+        assert pyyjson.dumps({sys.intern("into_a"): 1}) == b'{"into_a":1}'
+        assert pyyjson.loads(pyyjson.dumps(obj)) == obj
+
+    def test_dumps_into_buffer_types(self):
+        """
+        dumps_into() takes any writable buffer
+        """
+        ref = pyyjson.dumps(DATA)
+        mm = mmap.mmap(-1, len(ref))
+        assert pyyjson.dumps_into(DATA, mm) == len(ref)
+        assert mm[:] == ref
+        buf = bytearray(len(ref) + 4)
+        assert pyyjson.dumps_into(DATA, memoryview(buf)[4:]) == len(ref)
+        assert buf[4:] == ref
+
+    def test_dumps_into_errors(self):
+        """
+        dumps_into() rejects read-only buffers and bad offsets
+        """
+        with pytest.raises(BufferError):
+            pyyjson.dumps_into(1, b"   ")
+        with pytest.raises(ValueError):
+            pyyjson.dumps_into(1, bytearray(3), 4)
+        with pytest.raises(ValueError):
+            pyyjson.dumps_into(1, bytearray(3), -1)
+        with pytest.raises(pyyjson.JSONEncodeError):
+            pyyjson.dumps_into([object()], bytearray(10))
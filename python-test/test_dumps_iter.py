@@ -0,0 +1,98 @@
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+import dataclasses
+
+import pytest
+
+import pyyjson
+
+
+@dataclasses.dataclass
+class Record:
+    id: int
+    tags: list
+
+
+DATA = [{"id": i, "text": "é" * i, "record": Record(i, [1, (2, 3)])} for i in range(300)]
+
+
+class TestDumpsIter:
+    def test_dumps_iter(self):
+        """
+        dumps_iter() yields the bytes of dumps() in chunks of chunk_size
+        """
+        ref = pyyjson.dumps(DATA)
+        for chunk_size in (1, 7, 4096, 65536, len(ref), len(ref) + 1):
+            chunks = list(pyyjson.dumps_iter(DATA, chunk_size=chunk_size))
+            assert b"".join(chunks) == ref
+            assert all(len(chunk) == chunk_size for chunk in chunks[:-1])
+            assert 0 < len(chunks[-1]) <= chunk_size
+
+    def test_dumps_iter_option(self):
+        """
+        dumps_iter() with options
+        """
+        option = (
+            pyyjson.OPT_INDENT_2 | pyyjson.OPT_SORT_KEYS | pyyjson.OPT_APPEND_NEWLINE
+        )
+        ref = pyyjson.dumps(DATA, option=option)
+        assert b"".join(pyyjson.dumps_iter(DATA, chunk_size=100, option=option)) == ref
+
+    def test_dumps_iter_lazy(self):
+        """
+        dumps_iter() encodes only as far as the chunks taken
+        """
+        calls = []
+
+        def default(obj):
+            calls.append(obj)
+            return None
+
+        it = pyyjson.dumps_iter([object()] * 1000, chunk_size=10, default=default)
+        assert next(it) == b"[null,null"
+        assert len(calls) < 10
+        assert b"".join(it).endswith(b",null]")
+        assert len(calls) == 1000
+
+    def test_dumps_iter_scalar(self):
+        """
+        dumps_iter() of values other than containers
+        """
+        assert list(pyyjson.dumps_iter("abcdefgh", chunk_size=3)) == [
+            b'"ab',
+            b"cde",
+            b'fgh',
+            b'"',
+        ]
+        assert list(pyyjson.dumps_iter([])) == [b"[]"]
+
+    def test_dumps_iter_errors(self):
+        """
+        dumps_iter() raises encode errors while iterating, then stops
+        """
+        it = pyyjson.dumps_iter([1, [object()]], chunk_size=1)
+        assert next(it) == b"["
+        with pytest.raises(pyyjson.JSONEncodeError):
+            list(it)
+        assert list(it) == []
+        with pytest.raises(ValueError):
+            pyyjson.dumps_iter(1, chunk_size=0)
+        with pytest.raises(pyyjson.JSONEncodeError):
+            pyyjson.dumps_iter(1, option=-1)
+
+    def test_dumps_iter_reentrant(self):
+        """
+        dumps_iter() raises if default calls next() on the same iterator
+        """
+        it = pyyjson.dumps_iter([{1}, "x"], default=lambda obj: (list(it), "y")[1])
+        with pytest.raises(ValueError):
+            list(it)
+        assert list(it) == []
+
+        def default(obj):
+            with pytest.raises(ValueError, match="already executing"):
+                next(it)
+            return "y"
+
+        it = pyyjson.dumps_iter([{1}, "x"], chunk_size=2, default=default)
+        assert b"".join(it) == b'["y","x"]'
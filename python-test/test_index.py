@@ -0,0 +1,130 @@
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+import json
+import mmap
+
+import pytest
+
+import pyyjson
+
+DATA = [
+    {"id": i, "text": 'x]}"\\' * i, "nested": [[], {"a": [i]}]} for i in range(100)
+]
+
+
+class TestIndex:
+    def test_index_array(self, tmp_path):
+        """
+        build_index() and load_at() on the elements of a root array
+        """
+        path = tmp_path / "data.json"
+        path.write_text(json.dumps(DATA, indent=2))
+        index = pyyjson.build_index(path)
+        assert len(index) == 8 * (len(DATA) + 1)
+        assert [pyyjson.load_at(path, index, i) for i in range(len(DATA))] == DATA
+        assert pyyjson.load_at(path, index, -1) == DATA[-1]
+
+    def test_index_lines(self, tmp_path):
+        """
+        build_index() lines=True indexes non-blank lines
+        """
+        path = tmp_path / "data.ndjson"
+        path.write_text("\n".join(json.dumps(d) for d in DATA) + "\n\n")
+        index = pyyjson.build_index(str(path), lines=True)
+        assert len(index) == 8 * (len(DATA) + 1)
+        assert [pyyjson.load_at(path, index, i) for i in range(len(DATA))] == DATA
+
+    def test_index_format(self, tmp_path):
+        """
+        the index is little-endian u64 offsets and works from a sidecar file
+        """
+        path = tmp_path / "data.json"
+        path.write_bytes(b'[1, "a",\n{"b": 2} ]')
+        index = pyyjson.build_index(path)
+        assert [int.from_bytes(index[i : i + 8], "little") for i in range(0, len(index), 8)] == [1, 4, 9, 17]
+        sidecar = tmp_path / "data.json.idx"
+        sidecar.write_bytes(index)
+        with open(sidecar, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            assert pyyjson.load_at(path, m, 2) == {"b": 2}
+
+    def test_index_empty(self, tmp_path):
+        """
+        build_index() of an empty array or an empty NDJSON file
+        """
+        path = tmp_path / "data.json"
+        path.write_bytes(b" [ ] ")
+        index = pyyjson.build_index(path)
+        assert len(index) == 8
+        with pytest.raises(IndexError):
+            pyyjson.load_at(path, index, 0)
+        path.write_bytes(b"")
+        assert len(pyyjson.build_index(path, lines=True)) == 8
+
+    def test_index_invalid(self, tmp_path):
+        """
+        build_index() raises JSONDecodeError on broken structure
+        """
+        path = tmp_path / "data.json"
+        for data in (b"{}", b"[1,", b"[[1}]", b'["a]', b"[1 2]"):
+            path.write_bytes(data)
+            with pytest.raises(pyyjson.JSONDecodeError):
+                pyyjson.build_index(path)
+
+    def test_load_at_option(self, tmp_path):
+        """
+        load_at() option
+        """
+        path = tmp_path / "data.json"
+        path.write_bytes(b"[[1.5], [2]]")
+        index = pyyjson.build_index(path)
+        assert pyyjson.load_at(path, index, 0, option=pyyjson.OPT_PARSE_FROZEN) == (1.5,)
+
+    def test_load_at_bad_index(self, tmp_path):
+        """
+        load_at() rejects an index that does not fit the file
+        """
+        path = tmp_path / "data.json"
+        path.write_bytes(b"[1]")
+        with pytest.raises(ValueError):
+            pyyjson.load_at(path, b"\x00" * 7, 0)
+        with pytest.raises(ValueError):
+            pyyjson.load_at(path, (1).to_bytes(8, "little") + (100).to_bytes(8, "little"), 0)
+
+    def test_index_object(self, tmp_path):
+        """
+        Index maps the file once and decodes elements by position
+        """
+        path = tmp_path / "data.json"
+        path.write_text(json.dumps(DATA, indent=2))
+        with pyyjson.Index(path) as index:
+            assert len(index) == len(DATA)
+            assert [index[i] for i in range(len(DATA))] == DATA
+            assert index[-1] == DATA[-1]
+            assert index.index == pyyjson.build_index(path)
+            with pytest.raises(IndexError):
+                index[len(DATA)]
+            with pytest.raises(TypeError):
+                index["a"]
+        with pytest.raises(ValueError):
+            index[0]
+        with pytest.raises(ValueError):
+            len(index)
+        index.close()
+
+    def test_index_object_options(self, tmp_path):
+        """
+        Index with a sidecar index, lines=True and option
+        """
+        path = tmp_path / "data.ndjson"
+        path.write_text("\n".join(json.dumps(d) for d in DATA))
+        sidecar = pyyjson.build_index(path, lines=True)
+        index = pyyjson.Index(path, bytearray(sidecar), option=pyyjson.OPT_PARSE_FROZEN)
+        frozen = pyyjson.loads(json.dumps(DATA[3]), option=pyyjson.OPT_PARSE_FROZEN)
+        assert index[3] == frozen
+        assert type(index[3]) is pyyjson.FrozenMapping
+        index.close()
+        assert pyyjson.Index(path, lines=True)[5] == DATA[5]
+        with pytest.raises(ValueError):
+            pyyjson.Index(path, b"\x00" * 7)
+        with pytest.raises(pyyjson.JSONDecodeError):
+            pyyjson.Index(path)
@@ -0,0 +1,223 @@
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+import asyncio
+import concurrent.futures
+import json
+import os
+import threading
+
+import pytest
+
+import pyyjson
+
+LARGE = [{"id": i, "name": "名前 %d" % i, "tags": ["a", "é"]} for i in range(5000)]
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class TestLoadsAsync:
+    def test_loads_async_small(self):
+        """
+        loads_async() small input
+        """
+
+        async def main():
+            return await pyyjson.loads_async(b'{"a": [1, 2]}')
+
+        assert run(main()) == {"a": [1, 2]}
+
+    def test_loads_async_large(self):
+        """
+        loads_async() large input of each type is decoded off the loop thread
+        """
+        data = json.dumps(LARGE, ensure_ascii=False)
+        assert len(data.encode()) >= 64 * 1024
+
+        async def main():
+            return await asyncio.gather(
+                pyyjson.loads_async(data),
+                pyyjson.loads_async(data.encode()),
+                pyyjson.loads_async(bytearray(data.encode())),
+                pyyjson.loads_async(memoryview(data.encode())),
+            )
+
+        assert run(main()) == [LARGE] * 4
+
+    def test_loads_async_option(self):
+        """
+        loads_async() option
+        """
+        data = json.dumps(LARGE).encode()
+
+        async def main():
+            return await pyyjson.loads_async(data, option=pyyjson.OPT_PARSE_FROZEN)
+
+        result = run(main())
+        assert type(result) is tuple and result[0]["tags"] == ("a", "é")
+
+    def test_loads_async_invalid(self):
+        """
+        loads_async() raises JSONDecodeError from the future
+        """
+        large = json.dumps(LARGE).encode()
+
+        async def main(data):
+            return await pyyjson.loads_async(data)
+
+        for data in (b"[1,", large[:-1], large[:100] + b"\xff" + large[100:]):
+            with pytest.raises(pyyjson.JSONDecodeError):
+                run(main(data))
+
+    def test_loads_async_no_executor(self):
+        """
+        loads_async() does not use the default executor, even when it is blocked
+        """
+        submitted = []
+        release = threading.Event()
+
+        class Executor(concurrent.futures.ThreadPoolExecutor):
+            def submit(self, fn, *args, **kwargs):
+                submitted.append(fn)
+                return super().submit(fn, *args, **kwargs)
+
+        data = json.dumps(LARGE).encode()
+
+        async def main():
+            loop = asyncio.get_running_loop()
+            loop.set_default_executor(Executor(1))
+            blocked = loop.run_in_executor(None, release.wait)
+            try:
+                large = await asyncio.wait_for(
+                    asyncio.gather(*[pyyjson.loads_async(data) for _ in range(3)]), 10
+                )
+            finally:
+                release.set()
+            await blocked
+            return large
+
+        assert run(main()) == [LARGE] * 3
+        assert len(submitted) == 1
+
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="no fork")
+    def test_loads_async_fork(self):
+        """
+        loads_async() starts a new worker in a forked child
+        """
+        data = json.dumps(LARGE).encode()
+
+        async def main():
+            return await pyyjson.loads_async(data)
+
+        assert run(main()) == LARGE
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                code = 0 if run(asyncio.wait_for(main(), 10)) == LARGE else 1
+            finally:
+                os._exit(code)
+        _, status = os.waitpid(pid, 0)
+        assert os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0
+
+    def test_loads_async_same_as_loads(self):
+        """
+        loads_async() builds the same objects as loads() for every option
+        """
+        doc = [
+            {
+                "s": "é\\n\\u00e9中😀\\ud83d\\ude00 %d" % i,
+                "d": "2020-01-02T03:04:05Z",
+                "u": "12345678-1234-5678-1234-567812345678",
+                "n": [i, -i, 1.5, 10**30, None, True, False],
+            }
+            for i in range(2000)
+        ]
+        data = json.dumps(doc, ensure_ascii=False).encode()
+        options = [
+            pyyjson.OPT_PARSE_DECIMAL,
+            pyyjson.OPT_PARSE_BIG_INT,
+            pyyjson.OPT_PARSE_RAW_NUMBER,
+            pyyjson.OPT_PARSE_DATETIME | pyyjson.OPT_PARSE_UUID,
+            pyyjson.OPT_PARSE_CACHE_STR | pyyjson.OPT_PARSE_FROZEN,
+            pyyjson.OPT_PARSE_SHARE_SUBTREES,
+        ]
+
+        async def main(option):
+            return await pyyjson.loads_async(data, option=option)
+
+        for option in options:
+            expected = pyyjson.loads(data, option=option)
+            result = run(main(option))
+            assert repr(result) == repr(expected)
+        result = run(main(pyyjson.OPT_PARSE_CACHE_STR))
+        assert result[0]["d"] is result[1]["d"]
+        assert run(main(pyyjson.OPT_PARSE_DATETIME))[0]["d"].year == 2020
+
+    def test_loads_async_invalid_same_as_loads(self):
+        """
+        loads_async() reports the same error and position as loads()
+        """
+        large = json.dumps(LARGE, ensure_ascii=False).encode()
+
+        async def main(data):
+            return await pyyjson.loads_async(data)
+
+        for data in (
+            large[:1000] + b"\x01" + large[1000:],
+            large[:1000] + b"\xff" + large[1000:],
+            large[:-1] + b", tru]",
+            b"[" * 1025 + b"]" * 1025 + b" " * 70000,
+            b'"' + b"a" * 70000,
+        ):
+            with pytest.raises(pyyjson.JSONDecodeError) as expected:
+                pyyjson.loads(data)
+            with pytest.raises(pyyjson.JSONDecodeError) as exc:
+                run(main(data))
+            assert str(exc.value) == str(expected.value)
+
+    def test_loads_async_scalar(self):
+        """
+        loads_async() large scalar root
+        """
+        data = json.dumps("é" * 50000)
+
+        async def main():
+            return await asyncio.gather(
+                pyyjson.loads_async(data), pyyjson.loads_async(" 1" + " " * 70000)
+            )
+
+        assert run(main()) == ["é" * 50000, 1]
+
+    def test_loads_async_str_surrogates(self):
+        """
+        loads_async() raises JSONDecodeError for a str with surrogates
+        """
+
+        async def main():
+            return await pyyjson.loads_async('"\ud800"')
+
+        with pytest.raises(pyyjson.JSONDecodeError):
+            run(main())
+
+    def test_loads_async_no_loop(self):
+        """
+        loads_async() outside of a running loop raises RuntimeError
+        """
+        with pytest.raises(RuntimeError):
+            pyyjson.loads_async(b"[]")
+
+    def test_loads_async_cancel(self):
+        """
+        a cancelled loads_async() future is left alone
+        """
+        data = json.dumps(LARGE).encode()
+
+        async def main():
+            future = pyyjson.loads_async(data)
+            future.cancel()
+            await asyncio.sleep(0.05)
+            return future.cancelled()
+
+        assert run(main())
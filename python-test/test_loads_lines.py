@@ -0,0 +1,104 @@
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+from dataclasses import dataclass
+
+import pytest
+
+import pyyjson
+
+
+@dataclass
+class Record:
+    id: int
+
+
+class TestLoadsLines:
+    def test_loads_lines(self):
+        """
+        loads_lines() decodes one value per line
+        """
+        assert pyyjson.loads_lines(b'{"a": 1}\n[1, 2]\n"x"\n3\nnull') == (
+            [{"a": 1}, [1, 2], "x", 3, None],
+            [],
+        )
+
+    def test_loads_lines_blank(self):
+        """
+        loads_lines() skips blank lines and accepts CRLF
+        """
+        assert pyyjson.loads_lines("\n1\r\n\r\n  \n2\n") == ([1, 2], [])
+        assert pyyjson.loads_lines(b"") == ([], [])
+
+    def test_loads_lines_str_surrogates(self):
+        """
+        loads_lines() raises JSONDecodeError for a str with surrogates
+        """
+        with pytest.raises(pyyjson.JSONDecodeError):
+            pyyjson.loads_lines('1\n"\ud800"')
+
+    def test_loads_lines_errors(self):
+        """
+        loads_lines() reports bad lines and keeps going
+        """
+        data = b'{"a": 1}\n[1, 2\n{"b": tru}\n\xff\n4'
+        values, errors = pyyjson.loads_lines(data)
+        assert values == [{"a": 1}, 4]
+        assert [(line, offset) for line, offset, _, _ in errors] == [
+            (2, 14),
+            (3, 21),
+            (4, 26),
+        ]
+        assert [code for _, _, code, _ in errors] == [5, 11, 6]
+        assert all(isinstance(msg, str) and msg for _, _, _, msg in errors)
+
+    def test_loads_lines_option(self):
+        """
+        loads_lines() option
+        """
+        assert pyyjson.loads_lines(b"[1]\n[2]", option=pyyjson.OPT_PARSE_FROZEN) == (
+            [(1,), (2,)],
+            [],
+        )
+
+    def test_loads_lines_invalid_input(self):
+        """
+        loads_lines() still raises on invalid arguments
+        """
+        with pytest.raises(pyyjson.JSONDecodeError):
+            pyyjson.loads_lines(1)
+        with pytest.raises(pyyjson.JSONDecodeError):
+            pyyjson.loads_lines(b"1", option=1 << 30)
+
+    def test_decoder_decode_lines(self):
+        """
+        Decoder.decode_lines() reports conversion errors with code 0
+        """
+        values, errors = pyyjson.Decoder(type=Record).decode_lines(
+            '{"id": 1}\n{"name": "x"}\n{"id": 3}\n'
+        )
+        assert values == [Record(1), Record(3)]
+        assert len(errors) == 1
+        assert errors[0][0] == 2 and errors[0][2] == 0
+        assert "id" in errors[0][3]
+
+    def test_decoder_decode_lines_propagates(self):
+        """
+        Decoder.decode_lines() only reports ValueError, other exceptions propagate
+        """
+
+        @dataclass
+        class Checked:
+            id: int
+
+            def __post_init__(self):
+                if self.id == 2:
+                    raise ValueError("bad id")
+                if self.id == 3:
+                    raise KeyboardInterrupt
+
+        decoder = pyyjson.Decoder(type=Checked)
+        values, errors = decoder.decode_lines('{"id": 1}\n{"id": 2}\n')
+        assert values == [Checked(1)]
+        assert errors[0][0] == 2 and errors[0][3] == "bad id"
+        with pytest.raises(KeyboardInterrupt):
+            decoder.decode_lines('{"id": 1}\n{"id": 3}\n')
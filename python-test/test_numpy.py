@@ -149,6 +149,21 @@ class TestNumpy:
         deserialized = numpy.array(pyyjson.loads(serialized), numpy.float16)  # type: ignore
         assert numpy.array_equal(obj, deserialized)
 
+    def test_numpy_array_f32_roundtrip(self):
+        bits = numpy.random.randint(0, 2**32, 100000, dtype=numpy.uint64)
+        obj = bits.astype(numpy.uint32).view(numpy.float32)
+        obj = obj[numpy.isfinite(obj)]
+        serialized = pyyjson.dumps(obj, option=pyyjson.OPT_SERIALIZE_NUMPY)
+        deserialized = numpy.array(pyyjson.loads(serialized), numpy.float32)
+        assert numpy.array_equal(obj, deserialized)
+
+        def digits(text):
+            return text.split("e")[0].strip("-").replace(".", "").strip("0")
+
+        for val, text in zip(obj[:1000], serialized.decode()[1:-1].split(",")):
+            shortest = numpy.format_float_scientific(val, unique=True)
+            assert len(digits(text)) <= len(digits(shortest))
+
     def test_numpy_array_f16_edge(self):
         assert (
             pyyjson.dumps(
@@ -241,7 +256,10 @@ class TestNumpy:
                 ),
                 option=pyyjson.OPT_SERIALIZE_NUMPY,
             )
-            == b'["0001-01-01T00:00:00","0970-01-01T00:00:00","1920-01-01T00:00:00","1971-01-01T00:00:00","2021-01-01T00:00:00","2022-01-01T00:00:00","2023-01-01T00:00:00","9999-01-01T00:00:00"]'
+            == (
+                b'["0001-01-01T00:00:00","0970-01-01T00:00:00","1920-01-01T00:00:00","1971-01-01T00:00:00",'
+                b'"2021-01-01T00:00:00","2022-01-01T00:00:00","2023-01-01T00:00:00","9999-01-01T00:00:00"]'
+            )
         )
 
     def test_numpy_array_d1_datetime64_months(self):
@@ -734,7 +752,12 @@ class TestNumpy:
                 },
                 option=pyyjson.OPT_SERIALIZE_NUMPY,
             )
-            == b'{"year":"2021-01-01T00:00:00","month":"2021-01-01T00:00:00","day":"2021-01-01T00:00:00","hour":"2021-01-01T00:00:00","minute":"2021-01-01T00:00:00","second":"2021-01-01T00:00:00","milli":"2021-01-01T00:00:00.172000","micro":"2021-01-01T00:00:00.172576","nano":"2021-01-01T00:00:00.172576"}'
+            == (
+                b'{"year":"2021-01-01T00:00:00","month":"2021-01-01T00:00:00","day":"2021-01-01T00:00:00",'
+                b'"hour":"2021-01-01T00:00:00","minute":"2021-01-01T00:00:00","second":"2021-01-01T00:00:00",'
+                b'"milli":"2021-01-01T00:00:00.172000","micro":"2021-01-01T00:00:00.172576",'
+                b'"nano":"2021-01-01T00:00:00.172576"}'
+            )
         )
 
     def test_numpy_datetime_naive_utc(self):
@@ -753,7 +776,13 @@ class TestNumpy:
                 },
                 option=pyyjson.OPT_SERIALIZE_NUMPY | pyyjson.OPT_NAIVE_UTC,
             )
-            == b'{"year":"2021-01-01T00:00:00+00:00","month":"2021-01-01T00:00:00+00:00","day":"2021-01-01T00:00:00+00:00","hour":"2021-01-01T00:00:00+00:00","minute":"2021-01-01T00:00:00+00:00","second":"2021-01-01T00:00:00+00:00","milli":"2021-01-01T00:00:00.172000+00:00","micro":"2021-01-01T00:00:00.172576+00:00","nano":"2021-01-01T00:00:00.172576+00:00"}'
+            == (
+                b'{"year":"2021-01-01T00:00:00+00:00","month":"2021-01-01T00:00:00+00:00",'
+                b'"day":"2021-01-01T00:00:00+00:00","hour":"2021-01-01T00:00:00+00:00",'
+                b'"minute":"2021-01-01T00:00:00+00:00","second":"2021-01-01T00:00:00+00:00",'
+                b'"milli":"2021-01-01T00:00:00.172000+00:00","micro":"2021-01-01T00:00:00.172576+00:00",'
+                b'"nano":"2021-01-01T00:00:00.172576+00:00"}'
+            )
         )
 
     def test_numpy_datetime_naive_utc_utc_z(self):
@@ -774,7 +803,12 @@ class TestNumpy:
                 | pyyjson.OPT_NAIVE_UTC
                 | pyyjson.OPT_UTC_Z,
             )
-            == b'{"year":"2021-01-01T00:00:00Z","month":"2021-01-01T00:00:00Z","day":"2021-01-01T00:00:00Z","hour":"2021-01-01T00:00:00Z","minute":"2021-01-01T00:00:00Z","second":"2021-01-01T00:00:00Z","milli":"2021-01-01T00:00:00.172000Z","micro":"2021-01-01T00:00:00.172576Z","nano":"2021-01-01T00:00:00.172576Z"}'
+            == (
+                b'{"year":"2021-01-01T00:00:00Z","month":"2021-01-01T00:00:00Z","day":"2021-01-01T00:00:00Z",'
+                b'"hour":"2021-01-01T00:00:00Z","minute":"2021-01-01T00:00:00Z","second":"2021-01-01T00:00:00Z",'
+                b'"milli":"2021-01-01T00:00:00.172000Z","micro":"2021-01-01T00:00:00.172576Z",'
+                b'"nano":"2021-01-01T00:00:00.172576Z"}'
+            )
         )
 
     def test_numpy_datetime_omit_microseconds(self):
@@ -793,7 +827,11 @@ class TestNumpy:
                 },
                 option=pyyjson.OPT_SERIALIZE_NUMPY | pyyjson.OPT_OMIT_MICROSECONDS,
             )
-            == b'{"year":"2021-01-01T00:00:00","month":"2021-01-01T00:00:00","day":"2021-01-01T00:00:00","hour":"2021-01-01T00:00:00","minute":"2021-01-01T00:00:00","second":"2021-01-01T00:00:00","milli":"2021-01-01T00:00:00","micro":"2021-01-01T00:00:00","nano":"2021-01-01T00:00:00"}'
+            == (
+                b'{"year":"2021-01-01T00:00:00","month":"2021-01-01T00:00:00","day":"2021-01-01T00:00:00",'
+                b'"hour":"2021-01-01T00:00:00","minute":"2021-01-01T00:00:00","second":"2021-01-01T00:00:00",'
+                b'"milli":"2021-01-01T00:00:00","micro":"2021-01-01T00:00:00","nano":"2021-01-01T00:00:00"}'
+            )
         )
 
     def test_numpy_datetime_nat(self):
@@ -813,6 +851,33 @@ class TestNumpy:
                 == b"[[[1,2],[3,4],[5,6],[7,8]]]"
             )
 
+    def test_numpy_array_strided(self):
+        array = numpy.arange(60, dtype=numpy.int32).reshape(3, 4, 5)
+        for view in (array[::2], array[:, ::-1], array[..., 1:4], array[::-1, ::2, ::3]):
+            assert not view.flags["C_CONTIGUOUS"]
+            assert pyyjson.dumps(
+                view, option=pyyjson.OPT_SERIALIZE_NUMPY
+            ) == pyyjson.dumps(view.tolist())
+
+    def test_numpy_array_indent(self):
+        array = numpy.array([[[1.5, 2.5]], [[3.5, 4.5]]])
+        assert pyyjson.dumps(
+            {"a": array, "b": numpy.empty((2, 0))},
+            option=pyyjson.OPT_SERIALIZE_NUMPY | pyyjson.OPT_INDENT_2,
+        ) == pyyjson.dumps(
+            {"a": array.tolist(), "b": [[], []]}, option=pyyjson.OPT_INDENT_2
+        )
+
+    def test_numpy_array_large(self):
+        array = numpy.random.rand(300, 1000)
+        assert pyyjson.dumps(
+            array, option=pyyjson.OPT_SERIALIZE_NUMPY
+        ) == pyyjson.dumps(array.tolist())
+        array = numpy.arange(-100000, 100000, dtype=numpy.int64)
+        assert pyyjson.dumps(
+            array, option=pyyjson.OPT_SERIALIZE_NUMPY
+        ) == pyyjson.dumps(array.tolist())
+
 
 @pytest.mark.skipif(numpy is None, reason="numpy is not installed")
 class TestNumpyEquivalence:
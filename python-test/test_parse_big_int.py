@@ -0,0 +1,76 @@
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+import sys
+
+import pytest
+
+import pyyjson
+
+
+class TestParseBigInt:
+    def test_parse_big_int_128(self):
+        """
+        loads() OPT_PARSE_BIG_INT int 128-bit
+        """
+        for val in (
+            18446744073709551616,
+            -9223372036854775809,
+            340282366920938463463374607431768211455,
+            -170141183460469231731687303715884105728,
+        ):
+            assert pyyjson.loads(str(val), option=pyyjson.OPT_PARSE_BIG_INT) == val
+            assert pyyjson.loads(
+                "[%d]" % val, option=pyyjson.OPT_PARSE_BIG_INT
+            ) == [val]
+
+    def test_parse_big_int_64(self):
+        """
+        loads() OPT_PARSE_BIG_INT int 64-bit unchanged
+        """
+        for val in (0, -1, 9223372036854775807, -9223372036854775808, 18446744073709551615):
+            assert pyyjson.loads(str(val), option=pyyjson.OPT_PARSE_BIG_INT) == val
+
+    def test_parse_big_int_digits(self):
+        """
+        loads() OPT_PARSE_BIG_INT numbers with hundreds of digits
+        """
+        for count in (19, 36, 37, 72, 73, 100, 500, 1000, 4000):
+            digits = "".join(str((i * 7 + 3) % 10) for i in range(count))
+            text = "9" + digits
+            assert pyyjson.loads(text, option=pyyjson.OPT_PARSE_BIG_INT) == int(text)
+            assert pyyjson.loads(
+                "-" + text, option=pyyjson.OPT_PARSE_BIG_INT
+            ) == -int(text)
+
+    def test_parse_big_int_no_digit_limit(self):
+        """
+        loads() OPT_PARSE_BIG_INT is not limited by int_max_str_digits
+        """
+        if not hasattr(sys, "get_int_max_str_digits"):
+            pytest.skip("no int_max_str_digits")
+        limit = sys.get_int_max_str_digits()
+        text = "1" * (max(limit, 4300) + 1)
+        val = pyyjson.loads(text, option=pyyjson.OPT_PARSE_BIG_INT)
+        assert val == (10 ** len(text) - 1) // 9
+
+    def test_parse_big_int_float(self):
+        """
+        loads() OPT_PARSE_BIG_INT keeps floats
+        """
+        assert pyyjson.loads(
+            "[1.5, 1e300, 18446744073709551616.0]", option=pyyjson.OPT_PARSE_BIG_INT
+        ) == [1.5, 1e300, 18446744073709551616.0]
+
+    def test_parse_big_int_float_infinity(self):
+        """
+        loads() OPT_PARSE_BIG_INT rejects floats beyond double
+        """
+        with pytest.raises(pyyjson.JSONDecodeError):
+            pyyjson.loads("1e400", option=pyyjson.OPT_PARSE_BIG_INT)
+
+    def test_parse_big_int_default(self):
+        """
+        loads() int beyond 64-bit is a float without OPT_PARSE_BIG_INT
+        """
+        assert pyyjson.loads("18446744073709551616") == 18446744073709551616.0
+        assert type(pyyjson.loads("18446744073709551616")) is float
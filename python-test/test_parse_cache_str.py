@@ -0,0 +1,71 @@
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+import pytest
+
+import pyyjson
+
+
+class TestParseCacheStr:
+    def test_cache_str_same_object(self):
+        """
+        loads() OPT_PARSE_CACHE_STR returns the same str for repeated values
+        """
+        obj = pyyjson.loads(
+            '[{"status": "ok"}, {"status": "ok"}, "héllo", "héllo"]',
+            option=pyyjson.OPT_PARSE_CACHE_STR,
+        )
+        assert obj == [{"status": "ok"}, {"status": "ok"}, "héllo", "héllo"]
+        assert obj[0]["status"] is obj[1]["status"]
+        assert obj[2] is obj[3]
+
+    def test_cache_str_across_calls(self):
+        """
+        loads() OPT_PARSE_CACHE_STR shares strings across calls
+        """
+        first = pyyjson.loads('["EUR"]', option=pyyjson.OPT_PARSE_CACHE_STR)
+        second = pyyjson.loads('["EUR"]', option=pyyjson.OPT_PARSE_CACHE_STR)
+        assert first[0] is second[0]
+
+    def test_cache_str_escape(self):
+        """
+        loads() OPT_PARSE_CACHE_STR decodes escaped strings
+        """
+        assert pyyjson.loads(
+            r'["a\"b", "é", "😀"]', option=pyyjson.OPT_PARSE_CACHE_STR
+        ) == ['a"b', "é", "😀"]
+
+    def test_cache_str_invalid(self):
+        """
+        loads() OPT_PARSE_CACHE_STR invalid strings
+        """
+        for val in (b'["\xff"]', b'["a\x01"]', b'["ab'):
+            with pytest.raises(pyyjson.JSONDecodeError):
+                pyyjson.loads(val, option=pyyjson.OPT_PARSE_CACHE_STR)
+
+    def test_cache_str_decoder(self):
+        """
+        Decoder(str_cache_max_len=...) only caches short strings
+        """
+        decoder = pyyjson.Decoder(str_cache_size=16, str_cache_max_len=3)
+        assert decoder.option & pyyjson.OPT_PARSE_CACHE_STR
+        obj = decoder.decode('["abc", "abc", "abcd", "abcd"]')
+        assert obj == ["abc", "abc", "abcd", "abcd"]
+        assert obj[0] is obj[1]
+        assert obj[0] is decoder.decode('"abc"')
+        assert obj[2] is not obj[3]
+
+    def test_cache_str_decoder_collision(self):
+        """
+        Decoder with a single cache entry keeps values correct
+        """
+        decoder = pyyjson.Decoder(str_cache_size=1)
+        assert decoder.decode('["a", "b", "a", "c", "b"]') == ["a", "b", "a", "c", "b"]
+
+    def test_cache_str_decoder_invalid_size(self):
+        """
+        Decoder() invalid cache size
+        """
+        with pytest.raises(ValueError):
+            pyyjson.Decoder(str_cache_size=0)
+        with pytest.raises(ValueError):
+            pyyjson.Decoder(str_cache_max_len=-2)
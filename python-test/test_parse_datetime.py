@@ -0,0 +1,121 @@
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+import datetime
+
+import pytest
+
+import pyyjson
+
+
+def tz(minutes):
+    return datetime.timezone(datetime.timedelta(minutes=minutes))
+
+
+class TestParseDatetime:
+    def test_parse_datetime_utc(self):
+        """
+        loads() OPT_PARSE_DATETIME UTC
+        """
+        assert pyyjson.loads(
+            '["2024-02-29T12:34:56Z", "2024-01-01t00:00:00z"]',
+            option=pyyjson.OPT_PARSE_DATETIME,
+        ) == [
+            datetime.datetime(2024, 2, 29, 12, 34, 56, tzinfo=datetime.timezone.utc),
+            datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc),
+        ]
+
+    def test_parse_datetime_offset(self):
+        """
+        loads() OPT_PARSE_DATETIME offsets
+        """
+        assert pyyjson.loads(
+            '["2024-01-01T00:00:00+05:30", "1999-12-31 23:59:59-08:00", "2024-01-01T00:00:00+00:07"]',
+            option=pyyjson.OPT_PARSE_DATETIME,
+        ) == [
+            datetime.datetime(2024, 1, 1, tzinfo=tz(330)),
+            datetime.datetime(1999, 12, 31, 23, 59, 59, tzinfo=tz(-480)),
+            datetime.datetime(2024, 1, 1, tzinfo=tz(7)),
+        ]
+
+    def test_parse_datetime_timezone_cached(self):
+        """
+        loads() OPT_PARSE_DATETIME reuses timezones of common offsets
+        """
+        obj = pyyjson.loads(
+            '["2024-01-01T00:00:00+01:00", "2024-06-01T00:00:00+01:00"]',
+            option=pyyjson.OPT_PARSE_DATETIME,
+        )
+        assert obj[0].tzinfo is obj[1].tzinfo
+        obj = pyyjson.loads('"2024-01-01T00:00:00Z"', option=pyyjson.OPT_PARSE_DATETIME)
+        assert obj.tzinfo is datetime.timezone.utc
+
+    def test_parse_datetime_fraction(self):
+        """
+        loads() OPT_PARSE_DATETIME fractions are truncated to microseconds
+        """
+        assert pyyjson.loads(
+            '["2024-01-01T00:00:00.5Z", "2024-01-01T00:00:00.123456789Z"]',
+            option=pyyjson.OPT_PARSE_DATETIME,
+        ) == [
+            datetime.datetime(2024, 1, 1, 0, 0, 0, 500000, tzinfo=datetime.timezone.utc),
+            datetime.datetime(2024, 1, 1, 0, 0, 0, 123456, tzinfo=datetime.timezone.utc),
+        ]
+
+    def test_parse_datetime_not_rfc3339(self):
+        """
+        loads() OPT_PARSE_DATETIME keeps other strings
+        """
+        for val in (
+            "2024-01-01T00:00:00",
+            "2024-02-30T00:00:00Z",
+            "2023-02-29T00:00:00Z",
+            "2024-01-01T00:00:60Z",
+            "2024-01-01T24:00:00Z",
+            "2024-01-01T00:00:00.Z",
+            "2024-01-01T00:00:00+0100",
+            "2024-01-01T00:00:00Z ",
+            "0000-01-01T00:00:00Z",
+            "2024-01-01",
+            "2",
+            "",
+        ):
+            assert pyyjson.loads(
+                '["%s"]' % val, option=pyyjson.OPT_PARSE_DATETIME
+            ) == [val]
+
+    def test_parse_datetime_default(self):
+        """
+        loads() keeps timestamps as str without OPT_PARSE_DATETIME
+        """
+        assert pyyjson.loads('["2024-01-01T00:00:00Z"]') == ["2024-01-01T00:00:00Z"]
+
+    def test_parse_datetime_invalid_json(self):
+        """
+        loads() OPT_PARSE_DATETIME unterminated string
+        """
+        with pytest.raises(pyyjson.JSONDecodeError):
+            pyyjson.loads('"2024-01-01T00:00:00Z', option=pyyjson.OPT_PARSE_DATETIME)
+
+    def test_parse_datetime_keys(self):
+        """
+        Decoder(datetime_keys=...) only parses the values of these keys
+        """
+        decoder = pyyjson.Decoder(datetime_keys=["ts"])
+        assert decoder.datetime_keys == frozenset(["ts"])
+        assert decoder.option & pyyjson.OPT_PARSE_DATETIME
+        assert decoder.decode(
+            '{"ts": "2024-01-01T00:00:00Z", "id": "2024-01-01T00:00:00Z", "l": ["2024-01-01T00:00:00Z"]}'
+        ) == {
+            "ts": datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc),
+            "id": "2024-01-01T00:00:00Z",
+            "l": ["2024-01-01T00:00:00Z"],
+        }
+
+    def test_parse_datetime_keys_invalid(self):
+        """
+        Decoder(datetime_keys=...) must be an iterable of str
+        """
+        with pytest.raises(TypeError):
+            pyyjson.Decoder(datetime_keys="ts")
+        with pytest.raises(TypeError):
+            pyyjson.Decoder(datetime_keys=[1])
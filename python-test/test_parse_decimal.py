@@ -0,0 +1,70 @@
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+from dataclasses import dataclass
+from decimal import Decimal
+
+import pytest
+
+import pyyjson
+
+
+@dataclass
+class Invoice:
+    amount: Decimal
+
+
+class TestParseDecimal:
+    def test_parse_decimal(self):
+        """
+        loads() OPT_PARSE_DECIMAL keeps the exact digits
+        """
+        assert pyyjson.loads(
+            "[0.1, 1.10, -0, 1e400, 123456789012345678901234567890]",
+            option=pyyjson.OPT_PARSE_DECIMAL,
+        ) == [
+            Decimal("0.1"),
+            Decimal("1.10"),
+            Decimal("-0"),
+            Decimal("1e400"),
+            Decimal("123456789012345678901234567890"),
+        ]
+
+    def test_parse_decimal_type(self):
+        """
+        loads() OPT_PARSE_DECIMAL returns Decimal for ints and floats
+        """
+        for val in ("1", "1.5", "-2e-3"):
+            obj = pyyjson.loads(val, option=pyyjson.OPT_PARSE_DECIMAL)
+            assert type(obj) is Decimal
+            assert str(obj) == str(Decimal(val))
+
+    def test_parse_decimal_trailing_zero(self):
+        """
+        loads() OPT_PARSE_DECIMAL keeps the exponent of the input
+        """
+        obj = pyyjson.loads('{"a": 1.500}', option=pyyjson.OPT_PARSE_DECIMAL)
+        assert obj["a"].as_tuple() == Decimal("1.500").as_tuple()
+
+    def test_parse_decimal_invalid_number(self):
+        """
+        loads() OPT_PARSE_DECIMAL still rejects invalid numbers
+        """
+        for val in ("01", "1.", "-", "1e"):
+            with pytest.raises(pyyjson.JSONDecodeError):
+                pyyjson.loads(val, option=pyyjson.OPT_PARSE_DECIMAL)
+
+    def test_parse_decimal_decoder(self):
+        """
+        Decoder(option=OPT_PARSE_DECIMAL) with a dataclass
+        """
+        decoder = pyyjson.Decoder(type=Invoice, option=pyyjson.OPT_PARSE_DECIMAL)
+        assert decoder.option == pyyjson.OPT_PARSE_DECIMAL
+        assert decoder.decode('{"amount": 19.99}') == Invoice(Decimal("19.99"))
+
+    def test_loads_invalid_option(self):
+        """
+        loads() invalid option
+        """
+        for val in (1, 1 << 40, "a", 1.0):
+            with pytest.raises(pyyjson.JSONDecodeError):
+                pyyjson.loads("1", option=val)
@@ -0,0 +1,147 @@
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+import sys
+from collections.abc import Mapping
+
+import pytest
+
+import pyyjson
+
+
+class TestParseFrozen:
+    def test_frozen_types(self):
+        """
+        loads() OPT_PARSE_FROZEN builds tuples and FrozenMappings
+        """
+        obj = pyyjson.loads('{"a": [1, {"b": []}]}', option=pyyjson.OPT_PARSE_FROZEN)
+        assert type(obj) is pyyjson.FrozenMapping
+        assert type(obj["a"]) is tuple
+        assert type(obj["a"][1]) is pyyjson.FrozenMapping
+        assert obj["a"][1]["b"] == ()
+        assert isinstance(obj, Mapping)
+
+    def test_frozen_equal(self):
+        """
+        FrozenMapping compares equal to dict with the same items
+        """
+        obj = pyyjson.loads('{"a": 1, "b": {"c": null}}', option=pyyjson.OPT_PARSE_FROZEN)
+        assert obj == {"a": 1, "b": {"c": None}}
+        assert {"a": 1, "b": {"c": None}} == obj
+        assert obj != {"a": 1}
+        assert obj != {"a": 2, "b": {"c": None}}
+
+    def test_frozen_duplicate_key(self):
+        """
+        loads() OPT_PARSE_FROZEN last duplicate key wins
+        """
+        obj = pyyjson.loads('{"a": 1, "b": 2, "a": 3}', option=pyyjson.OPT_PARSE_FROZEN)
+        assert len(obj) == 2
+        assert list(obj) == ["a", "b"]
+        assert obj["a"] == 3
+
+    def test_frozen_large(self):
+        """
+        FrozenMapping above the index threshold
+        """
+        doc = "{" + ",".join('"k%d": %d' % (i, i) for i in range(1000)) + ', "k7": -1}'
+        obj = pyyjson.loads(doc, option=pyyjson.OPT_PARSE_FROZEN)
+        assert len(obj) == 1000
+        assert obj["k7"] == -1
+        assert all(obj["k%d" % i] == i for i in range(1000) if i != 7)
+        assert "k1000" not in obj
+        assert obj == pyyjson.loads(doc)
+
+    def test_frozen_mapping_api(self):
+        """
+        FrozenMapping mapping methods
+        """
+        obj = pyyjson.FrozenMapping({"a": 1}, b=2)
+        assert obj["a"] == 1
+        assert obj.get("b") == 2
+        assert obj.get("c") is None
+        assert obj.get("c", 3) == 3
+        assert "a" in obj and "c" not in obj
+        assert obj.keys() == ("a", "b")
+        assert obj.values() == (1, 2)
+        assert obj.items() == (("a", 1), ("b", 2))
+        assert dict(obj) == {"a": 1, "b": 2}
+        assert repr(obj) == "pyyjson.FrozenMapping({'a': 1, 'b': 2})"
+        assert pyyjson.FrozenMapping([("x", 1)]) == {"x": 1}
+        with pytest.raises(KeyError):
+            obj["c"]
+        with pytest.raises(KeyError) as exc:
+            obj[(1, 2)]
+        assert exc.value.args == ((1, 2),)
+        with pytest.raises(TypeError):
+            obj.get()
+
+    def test_frozen_key_error(self):
+        """
+        FrozenMapping() releases its items when comparing keys raises
+        """
+        calls = [0]
+        fail_at = [0]
+
+        class Key:
+            def __hash__(self):
+                return 1
+
+            def __eq__(self, other):
+                calls[0] += 1
+                if calls[0] == fail_at[0]:
+                    raise ValueError
+                return False
+
+        value = object()
+        refs = sys.getrefcount(value)
+        # the first comparisons are made building a dict of the items
+        for fail_at[0] in range(1, 200):
+            calls[0] = 0
+            items = [(Key(), value) for _ in range(12)]
+            try:
+                pyyjson.FrozenMapping(items)
+            except ValueError:
+                pass
+            del items
+            assert sys.getrefcount(value) == refs
+
+    def test_frozen_immutable(self):
+        """
+        FrozenMapping does not support item assignment
+        """
+        obj = pyyjson.FrozenMapping(a=1)
+        with pytest.raises(TypeError):
+            obj["a"] = 2
+        with pytest.raises(TypeError):
+            del obj["a"]
+
+    def test_frozen_hash(self):
+        """
+        FrozenMapping is hashable when its values are
+        """
+        assert hash(pyyjson.FrozenMapping(a=1, b=(1, 2))) == hash(
+            pyyjson.FrozenMapping(b=(1, 2), a=1)
+        )
+        with pytest.raises(TypeError):
+            hash(pyyjson.FrozenMapping(a=[]))
+
+    def test_frozen_size(self):
+        """
+        FrozenMapping is smaller than dict for small objects
+        """
+        doc = '{"a": 1, "b": 2, "c": 3}'
+        assert sys.getsizeof(
+            pyyjson.loads(doc, option=pyyjson.OPT_PARSE_FROZEN)
+        ) < sys.getsizeof(pyyjson.loads(doc))
+
+    def test_frozen_dumps(self):
+        """
+        dumps() serializes FrozenMapping and tuple like dict and list
+        """
+        doc = b'{"a":[1,{"b":null}],"c":{}}'
+        obj = pyyjson.loads(doc, option=pyyjson.OPT_PARSE_FROZEN)
+        assert pyyjson.dumps(obj) == doc
+        assert (
+            pyyjson.dumps(obj, option=pyyjson.OPT_SORT_KEYS | pyyjson.OPT_INDENT_2)
+            == b'{\n  "a": [\n    1,\n    {\n      "b": null\n    }\n  ],\n  "c": {}\n}'
+        )
@@ -0,0 +1,99 @@
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import List
+
+import pytest
+
+import pyyjson
+
+
+@dataclass
+class Tier:
+    price: int
+
+
+@dataclass
+class Catalog:
+    tiers: List[Tier]
+    extra: dict
+
+
+def thaw(obj):
+    if isinstance(obj, tuple):
+        return [thaw(each) for each in obj]
+    if isinstance(obj, Mapping):
+        return {key: thaw(val) for key, val in obj.items()}
+    return obj
+
+
+class TestParseShareSubtrees:
+    def test_share_identical(self):
+        """
+        loads() OPT_PARSE_SHARE_SUBTREES reuses byte-identical containers
+        """
+        obj = pyyjson.loads(
+            '{"a": {"p": [1, 2]}, "b": {"p": [1, 2]}, "c": [[1, 2], {"p": [1, 2]}]}',
+            option=pyyjson.OPT_PARSE_SHARE_SUBTREES,
+        )
+        assert obj["a"] is obj["b"]
+        assert obj["a"] is obj["c"][1]
+        assert obj["a"]["p"] is obj["c"][0]
+
+    def test_share_immutable(self):
+        """
+        loads() OPT_PARSE_SHARE_SUBTREES returns tuples and read-only mappings
+        """
+        obj = pyyjson.loads(
+            '{"a": [1, {"b": null}]}', option=pyyjson.OPT_PARSE_SHARE_SUBTREES
+        )
+        assert isinstance(obj, Mapping)
+        assert type(obj["a"]) is tuple
+        assert obj["a"][1] == {"b": None}
+        with pytest.raises(TypeError):
+            obj["c"] = 1
+        with pytest.raises(TypeError):
+            obj["a"][1]["b"] = 1
+
+    def test_share_not_identical(self):
+        """
+        loads() OPT_PARSE_SHARE_SUBTREES compares the source text
+        """
+        obj = pyyjson.loads(
+            '[[1, 2], [1,2], [1.0, 2], [2, 1]]', option=pyyjson.OPT_PARSE_SHARE_SUBTREES
+        )
+        assert obj == ((1, 2), (1, 2), (1.0, 2), (2, 1))
+        assert obj[0] is not obj[1]
+        assert obj[0] is not obj[2]
+
+    def test_share_duplicate_key(self):
+        """
+        loads() OPT_PARSE_SHARE_SUBTREES keeps containers dropped by duplicate keys
+        """
+        obj = pyyjson.loads(
+            '[{"a": [1], "a": [2]}, [1], [1]]', option=pyyjson.OPT_PARSE_SHARE_SUBTREES
+        )
+        assert thaw(obj) == [{"a": [2]}, [1], [1]]
+        assert obj[1] is obj[2]
+
+    def test_share_roundtrip(self):
+        """
+        loads() OPT_PARSE_SHARE_SUBTREES has the same content as loads()
+        """
+        doc = '{"k": [{"x": [1, "a", null]}, {"x": [1, "a", null]}, [], [], {}, {}], "n": {"m": {}}}'
+        assert thaw(
+            pyyjson.loads(doc, option=pyyjson.OPT_PARSE_SHARE_SUBTREES)
+        ) == pyyjson.loads(doc)
+
+    def test_share_decoder_plan(self):
+        """
+        Decoder type plans keep building lists and instances
+        """
+        decoder = pyyjson.Decoder(type=Catalog, option=pyyjson.OPT_PARSE_SHARE_SUBTREES)
+        obj = decoder.decode(
+            '{"tiers": [{"price": 1}, {"price": 1}], "extra": {"a": [1]}}'
+        )
+        assert obj.tiers == [Tier(1), Tier(1)]
+        assert obj.tiers[0] is not obj.tiers[1]
+        assert obj.extra["a"] == (1,)
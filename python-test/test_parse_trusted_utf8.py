@@ -0,0 +1,42 @@
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+import pytest
+
+import pyyjson
+
+DOC = '{"ascii": "abc", "latin1": "àéîõü", "cjk": "中文字符", "emoji": "😀🙏", "mixed": "a\\u00e9中😀\\n"}'
+
+
+class TestParseTrustedUtf8:
+    def test_trusted_equal(self):
+        """
+        loads() OPT_PARSE_TRUSTED_UTF8 gives the same result on valid UTF-8
+        """
+        data = DOC.encode("utf-8")
+        assert pyyjson.loads(data, option=pyyjson.OPT_PARSE_TRUSTED_UTF8) == pyyjson.loads(data)
+        assert pyyjson.loads(data) == pyyjson.loads(DOC)
+
+    def test_trusted_keys(self):
+        """
+        loads() OPT_PARSE_TRUSTED_UTF8 non-ASCII keys
+        """
+        data = '{"中": 1, "é": ["😀"]}'.encode("utf-8")
+        assert pyyjson.loads(data, option=pyyjson.OPT_PARSE_TRUSTED_UTF8) == {
+            "中": 1,
+            "é": ["😀"],
+        }
+
+    def test_trusted_root_str(self):
+        """
+        loads() OPT_PARSE_TRUSTED_UTF8 string root
+        """
+        data = '"😀 中 é"'.encode("utf-8")
+        assert pyyjson.loads(data, option=pyyjson.OPT_PARSE_TRUSTED_UTF8) == "😀 中 é"
+
+    def test_untrusted_invalid(self):
+        """
+        loads() without OPT_PARSE_TRUSTED_UTF8 rejects invalid UTF-8
+        """
+        for data in (b'"\xed\xa0\x80"', b'"\xc0\xaf"', b'"\xe4\xb8"'):
+            with pytest.raises(pyyjson.JSONDecodeError):
+                pyyjson.loads(data)
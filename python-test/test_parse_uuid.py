@@ -0,0 +1,70 @@
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+import uuid
+
+import pytest
+
+import pyyjson
+
+
+class TestParseUUID:
+    def test_parse_uuid(self):
+        """
+        loads() OPT_PARSE_UUID canonical UUIDs in either case
+        """
+        val = uuid.UUID("7202d115-7ff3-4c81-a7c1-2a1f067b1ece")
+        obj = pyyjson.loads(
+            '["7202d115-7ff3-4c81-a7c1-2a1f067b1ece", "7202D115-7FF3-4C81-A7C1-2A1F067B1ECE"]',
+            option=pyyjson.OPT_PARSE_UUID,
+        )
+        assert obj == [val, val]
+        assert type(obj[0]) is uuid.UUID
+        assert obj[0].version == 4
+        assert obj[0].is_safe is uuid.SafeUUID.unknown
+        assert hash(obj[0]) == hash(val)
+        assert str(obj[1]) == str(val)
+
+    def test_parse_uuid_root(self):
+        """
+        loads() OPT_PARSE_UUID root string
+        """
+        assert pyyjson.loads(
+            '"00000000-0000-0000-0000-000000000000"', option=pyyjson.OPT_PARSE_UUID
+        ) == uuid.UUID(int=0)
+
+    def test_parse_uuid_not_canonical(self):
+        """
+        loads() OPT_PARSE_UUID keeps other strings
+        """
+        for val in (
+            "7202d1157ff34c81a7c12a1f067b1ece",
+            "{7202d115-7ff3-4c81-a7c1-2a1f067b1ece}",
+            "urn:uuid:7202d115-7ff3-4c81-a7c1-2a1f067b1ece",
+            "7202d115-7ff3-4c81-a7c1-2a1f067b1ec",
+            "7202d115-7ff3-4c81-a7c1-2a1f067b1ecee",
+            "7202d115-7ff3-4c81-a7c12a1f-067b1ece",
+            "g202d115-7ff3-4c81-a7c1-2a1f067b1ece",
+            "",
+        ):
+            assert pyyjson.loads('["%s"]' % val, option=pyyjson.OPT_PARSE_UUID) == [val]
+
+    def test_parse_uuid_keys(self):
+        """
+        Decoder(uuid_keys=...) only parses the values of these keys
+        """
+        val = "7202d115-7ff3-4c81-a7c1-2a1f067b1ece"
+        decoder = pyyjson.Decoder(uuid_keys=("id",))
+        assert decoder.uuid_keys == frozenset(["id"])
+        assert decoder.option & pyyjson.OPT_PARSE_UUID
+        assert decoder.decode('{"id": "%s", "ref": "%s", "l": ["%s"]}' % (val, val, val)) == {
+            "id": uuid.UUID(val),
+            "ref": val,
+            "l": [val],
+        }
+
+    def test_parse_uuid_keys_invalid(self):
+        """
+        Decoder(uuid_keys=...) must be an iterable of str
+        """
+        with pytest.raises(TypeError):
+            pyyjson.Decoder(uuid_keys="id")
@@ -0,0 +1,95 @@
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+from decimal import Decimal
+
+import pytest
+
+import pyyjson
+
+
+class TestRawNumber:
+    def test_parse_raw_number(self):
+        """
+        loads() OPT_PARSE_RAW_NUMBER keeps the text of numbers
+        """
+        obj = pyyjson.loads(
+            '[1.50, -0, 1e400, {"a": 123456789012345678901234567890}]',
+            option=pyyjson.OPT_PARSE_RAW_NUMBER,
+        )
+        assert [str(each) for each in obj[:3]] == ["1.50", "-0", "1e400"]
+        assert type(obj[3]["a"]) is pyyjson.RawNumber
+        assert str(obj[3]["a"]) == "123456789012345678901234567890"
+
+    def test_parse_raw_number_root(self):
+        """
+        loads() OPT_PARSE_RAW_NUMBER root number
+        """
+        obj = pyyjson.loads("-2.5e-3", option=pyyjson.OPT_PARSE_RAW_NUMBER)
+        assert type(obj) is pyyjson.RawNumber
+        assert bytes(obj) == b"-2.5e-3"
+
+    def test_parse_raw_number_precedence(self):
+        """
+        OPT_PARSE_RAW_NUMBER takes precedence over OPT_PARSE_DECIMAL
+        """
+        obj = pyyjson.loads(
+            "1", option=pyyjson.OPT_PARSE_RAW_NUMBER | pyyjson.OPT_PARSE_DECIMAL
+        )
+        assert type(obj) is pyyjson.RawNumber
+
+    def test_raw_number_convert(self):
+        """
+        RawNumber converts on demand
+        """
+        num = pyyjson.RawNumber("1.50")
+        assert float(num) == 1.5
+        assert int(num) == 1
+        assert num.as_decimal() == Decimal("1.50")
+        assert str(num.as_decimal()) == "1.50"
+        assert not num.is_integer()
+        big = pyyjson.RawNumber("-123456789012345678901234567890")
+        assert int(big) == -123456789012345678901234567890
+        assert big.is_integer()
+        assert float(pyyjson.RawNumber("1e400")) == float("inf")
+
+    def test_raw_number_buffer(self):
+        """
+        RawNumber supports the buffer protocol
+        """
+        num = pyyjson.RawNumber(b"3.25")
+        assert memoryview(num).tobytes() == b"3.25"
+        assert memoryview(num).readonly
+
+    def test_raw_number_eq_hash(self):
+        """
+        RawNumber compares by text
+        """
+        assert pyyjson.RawNumber("1.0") == pyyjson.RawNumber(b"1.0")
+        assert pyyjson.RawNumber("1.0") != pyyjson.RawNumber("1")
+        assert hash(pyyjson.RawNumber("1.0")) == hash(pyyjson.RawNumber("1.0"))
+        assert pyyjson.RawNumber("1") != 1
+
+    def test_raw_number_repr(self):
+        """
+        RawNumber repr
+        """
+        assert repr(pyyjson.RawNumber("12")) == "pyyjson.RawNumber('12')"
+
+    def test_raw_number_invalid(self):
+        """
+        RawNumber() rejects invalid numbers
+        """
+        for val in ("", "-", "01", "1.", ".5", "1e", "+1", "1 ", "NaN"):
+            with pytest.raises(ValueError):
+                pyyjson.RawNumber(val)
+        with pytest.raises(TypeError):
+            pyyjson.RawNumber(1)
+
+    def test_raw_number_dumps(self):
+        """
+        dumps() writes RawNumber text unchanged
+        """
+        doc = b'[1.10,100000000000000000000000001,-0.0,1E400]'
+        obj = pyyjson.loads(doc, option=pyyjson.OPT_PARSE_RAW_NUMBER)
+        assert pyyjson.dumps(obj) == doc
+        assert pyyjson.dumps({"a": pyyjson.RawNumber("1.50")}) == b'{"a":1.50}'
@@ -0,0 +1,62 @@
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+import json
+
+import pytest
+
+import pyyjson
+
+
+class TestSkipValue:
+    def test_skip_value(self):
+        """
+        skip_value() returns the end offset of a value
+        """
+        assert pyyjson.skip_value(b'{"a": [1, 2]}, 3') == 13
+        assert pyyjson.skip_value(b'"abc" ') == 5
+        assert pyyjson.skip_value(b"123,") == 3
+        assert pyyjson.skip_value(b"true]") == 4
+
+    def test_skip_value_offset(self):
+        """
+        skip_value() starts at offset and skips leading whitespace
+        """
+        data = b'[1, \n  {"b": null}, []]'
+        assert pyyjson.skip_value(data, 4) == 18
+        assert pyyjson.skip_value(bytearray(data), 19) == 22
+        assert pyyjson.skip_value(memoryview(data), 0) == len(data)
+
+    def test_skip_value_strings(self):
+        """
+        skip_value() ignores brackets and escaped quotes in strings
+        """
+        data = json.dumps({'k"]': ['}{', '\\"', "[" * 20, "é" * 10]}).encode()
+        assert pyyjson.skip_value(data + b"]]]") == len(data)
+
+    def test_skip_value_invalid(self):
+        """
+        skip_value() raises JSONDecodeError on unterminated values
+        """
+        for data in (b"", b"  ", b"[", b'{"a": [1}', b'"abc', b",", b"[" * 2000):
+            with pytest.raises(pyyjson.JSONDecodeError):
+                pyyjson.skip_value(data)
+
+    def test_skip_value_invalid_position(self):
+        """
+        skip_value() reports the offset of the bad byte, not of the value
+        """
+        for data, pos in [(b'  {"a": [1}', 10), (b'["abc', 5), (b"[" * 1025, 1024)]:
+            with pytest.raises(pyyjson.JSONDecodeError) as exc:
+                pyyjson.skip_value(data)
+            assert str(exc.value).endswith(f"at {pos}")
+
+    def test_skip_value_bad_arguments(self):
+        """
+        skip_value() argument errors
+        """
+        with pytest.raises(TypeError):
+            pyyjson.skip_value("[]")
+        with pytest.raises(ValueError):
+            pyyjson.skip_value(b"[]", 3)
+        with pytest.raises(ValueError):
+            pyyjson.skip_value(b"[]", -1)
@@ -71,6 +71,21 @@ class TestType:
         ref = "うぞ〜😏🙌"
         assert pyyjson.loads(pyyjson.dumps(ref)) == ref
 
+    def test_str_kinds_escape(self):
+        """
+        str escapes are the same for latin1, UCS2 and UCS4 storage
+        """
+        for prefix, encoded in (
+            ("", b""),
+            ("\xff", b"\xc3\xbf"),
+            ("\u0100", b"\xc4\x80"),
+            ("\U0001f408", b"\xf0\x9f\x90\x88"),
+        ):
+            obj = prefix + 'abcdefgh"\\\n\x01\x7f' * 2
+            ref = b'"' + encoded + b'abcdefgh\\"\\\\\\n\\u0001\x7f' * 2 + b'"'
+            assert pyyjson.dumps(obj) == ref
+            assert pyyjson.loads(ref) == obj
+
     def test_str_ascii_control(self):
         """
         worst case format_escaped_str_with_escapes() allocation
@@ -498,6 +513,27 @@ class TestType:
         assert pyyjson.loads("1.234567890E+34") == 1.23456789e34
         assert pyyjson.loads("23456789012E66") == 2.3456789012e76
 
+    def test_float32(self):
+        """
+        float OPT_FLOAT32
+        """
+        option = pyyjson.OPT_FLOAT32
+        assert pyyjson.dumps(0.1, option=option) == b"0.1"
+        assert pyyjson.dumps(1 / 3, option=option) == b"0.33333334"
+        assert pyyjson.dumps(-100.78399658203125, option=option) == b"-100.784"
+        assert pyyjson.dumps(3.4028234663852886e38, option=option) == b"3.4028235e38"
+        assert pyyjson.dumps(1e-45, option=option) == b"1e-45"
+        assert pyyjson.dumps(16777216.0, option=option) == b"16777216.0"
+        assert pyyjson.dumps(1e21, option=option) == b"1e21"
+        assert pyyjson.dumps(1e-6, option=option) == b"0.000001"
+        assert pyyjson.dumps([-0.0, 1e-50], option=option) == b"[-0.0,0.0]"
+        assert pyyjson.dumps(3.4028235e38, option=option) == b"3.4028235e38"
+        nan, inf = float("nan"), float("inf")
+        assert pyyjson.dumps([nan, inf, -inf], option=option) == b"[null,null,null]"
+        for val in (1e39, -1e39, 3.4028235677973366e38):
+            with pytest.raises(pyyjson.JSONEncodeError):
+                pyyjson.dumps(val, option=option)
+
     def test_float_notation(self):
         """
         float notation
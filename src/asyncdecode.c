@@ -0,0 +1,387 @@
+#include "asyncdecode.h"
+#include "decoder.h"
+#include <pythread.h>
+#include <stdbool.h>
+
+/*==============================================================================
+ * Decode Task
+ *============================================================================*/
+
+static PyObject *str_set_result = NULL;
+static PyObject *str_set_exception = NULL;
+static PyObject *str_done = NULL;
+static PyObject *str_call_soon_threadsafe = NULL;
+static PyObject *str_finish = NULL;
+
+/*
+ A pending `loads_async()` call. The decode worker reads the input into a
+ `yyjson_doc` without the GIL, then schedules the `_finish()` method of the
+ task on the event loop, where it builds the objects from the document and
+ resolves the future.
+ */
+typedef struct AsyncDecodeTask {
+    PyObject_HEAD
+    /** the asyncio future returned to the caller */
+    PyObject *future;
+    /** the loop the future belongs to */
+    PyObject *loop;
+    /** the input, bytes or str */
+    PyObject *source;
+    /** UTF-8 data of `source` */
+    const char *data;
+    Py_ssize_t len;
+    /** decode options */
+    pyyjson_read_ctx ctx;
+    /** the document read by the worker, NULL until then or on failure */
+    yyjson_doc *doc;
+    /** the read error if `doc` is NULL */
+    yyjson_read_err err;
+    /** the next task in the queue of the worker */
+    struct AsyncDecodeTask *next;
+} AsyncDecodeTask;
+
+static void AsyncDecodeTask_dealloc(AsyncDecodeTask *self)
+{
+    Py_XDECREF(self->future);
+    Py_XDECREF(self->loop);
+    Py_XDECREF(self->source);
+    yyjson_doc_free(self->doc);
+    Py_TYPE(self)->tp_free((PyObject *)self);
+}
+
+/* Resolve `future` with `value`, or with the raised exception if it is NULL.
+   The reference to `value` is stolen. */
+static int resolve_future(PyObject *future, PyObject *value)
+{
+    PyObject *ret;
+    if (value)
+    {
+        ret = PyObject_CallMethodObjArgs(future, str_set_result, value, NULL);
+        Py_DECREF(value);
+    }
+    else
+    {
+        PyObject *type, *exc, *traceback;
+        PyErr_Fetch(&type, &exc, &traceback);
+        PyErr_NormalizeException(&type, &exc, &traceback);
+        if (traceback) PyException_SetTraceback(exc, traceback);
+        ret = PyObject_CallMethodObjArgs(future, str_set_exception, exc, NULL);
+        Py_XDECREF(type);
+        Py_XDECREF(exc);
+        Py_XDECREF(traceback);
+    }
+    if (!ret) return -1;
+    Py_DECREF(ret);
+    return 0;
+}
+
+/* Called on the loop once the worker has read the input. */
+static PyObject *AsyncDecodeTask_finish(AsyncDecodeTask *self, PyObject *Py_UNUSED(ignored))
+{
+    PyObject *value;
+    PyObject *done = PyObject_CallMethodObjArgs(self->future, str_done, NULL);
+    if (!done) return NULL;
+    int is_done = PyObject_IsTrue(done);
+    Py_DECREF(done);
+    if (is_done < 0) return NULL;
+    if (is_done)
+    {
+        /* cancelled while reading */
+        yyjson_doc_free(self->doc);
+        self->doc = NULL;
+        Py_RETURN_NONE;
+    }
+
+    if (self->doc)
+    {
+        value = pyyjson_doc_to_obj(self->doc, &self->ctx);
+        yyjson_doc_free(self->doc);
+        self->doc = NULL;
+    }
+    else
+    {
+        PyErr_Format(JSONDecodeError, "%s\n\tat %zu", self->err.msg, self->err.pos);
+        value = NULL;
+    }
+    if (resolve_future(self->future, value) < 0) return NULL;
+    Py_RETURN_NONE;
+}
+
+static PyMethodDef AsyncDecodeTask_methods[] = {
+    {"_finish", (PyCFunction)AsyncDecodeTask_finish, METH_NOARGS, NULL},
+    {NULL, NULL, 0, NULL} /* Sentinel */
+};
+
+static PyTypeObject AsyncDecodeTask_Type = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    .tp_name = "pyyjson._AsyncDecodeTask",
+    .tp_basicsize = sizeof(AsyncDecodeTask),
+    .tp_dealloc = (destructor)AsyncDecodeTask_dealloc,
+    .tp_flags = Py_TPFLAGS_DEFAULT,
+    .tp_methods = AsyncDecodeTask_methods,
+};
+
+/*==============================================================================
+ * Decode Worker
+ *============================================================================*/
+
+/*
+ One native thread, started on first use, reads the inputs of all loops in
+ submission order. The default executor of the loop is never used, so the
+ blocking work of the application can not hold up decoding or the reverse.
+ The queue owns a reference to each task.
+ */
+static PyThread_type_lock queue_lock = NULL;
+/* held while the worker waits for a task, released by `async_decode_submit()` */
+static PyThread_type_lock wake_lock = NULL;
+static AsyncDecodeTask *queue_head = NULL;
+static AsyncDecodeTask *queue_tail = NULL;
+/* whether the worker is blocked on `wake_lock`, guarded by `queue_lock` */
+static bool worker_waiting = false;
+static bool worker_started = false;
+
+/* Take the next task, waiting while the queue is empty. Called without the GIL. */
+static AsyncDecodeTask *async_decode_pop(void)
+{
+    PyThread_acquire_lock(queue_lock, WAIT_LOCK);
+    while (!queue_head)
+    {
+        worker_waiting = true;
+        PyThread_release_lock(queue_lock);
+        PyThread_acquire_lock(wake_lock, WAIT_LOCK);
+        PyThread_acquire_lock(queue_lock, WAIT_LOCK);
+    }
+    AsyncDecodeTask *task = queue_head;
+    queue_head = task->next;
+    if (!queue_head) queue_tail = NULL;
+    PyThread_release_lock(queue_lock);
+    return task;
+}
+
+static void async_decode_worker(void *arg)
+{
+    /* the thread state is kept for the life of the worker */
+    PyGILState_STATE state = PyGILState_Ensure();
+    (void)state;
+    while (true)
+    {
+        AsyncDecodeTask *task;
+        Py_BEGIN_ALLOW_THREADS
+        task = async_decode_pop();
+        yyjson_read_flag flg = pyyjson_read_flags(YYJSON_READ_NOFLAG, &task->ctx);
+        bool trusted = (task->ctx.option & PYYJSON_OPT_PARSE_TRUSTED_UTF8) != 0;
+        task->doc = pyyjson_read_doc(task->data, (size_t)task->len, flg, trusted, &task->err);
+        Py_END_ALLOW_THREADS
+
+        PyObject *finish = PyObject_GetAttr((PyObject *)task, str_finish);
+        PyObject *ret = NULL;
+        if (finish)
+        {
+            ret = PyObject_CallMethodObjArgs(task->loop, str_call_soon_threadsafe, finish, NULL);
+            Py_DECREF(finish);
+        }
+        if (ret) Py_DECREF(ret);
+        else PyErr_WriteUnraisable((PyObject *)task);
+        Py_DECREF(task);
+    }
+}
+
+/* Queue `task` for the worker, starting it if needed. The reference is stolen. */
+static int async_decode_submit(AsyncDecodeTask *task)
+{
+    if (!worker_started)
+    {
+        if (PyThread_start_new_thread(async_decode_worker, NULL) == PYTHREAD_INVALID_THREAD_ID)
+        {
+            Py_DECREF(task);
+            PyErr_SetString(PyExc_RuntimeError, "can't start new thread");
+            return -1;
+        }
+        worker_started = true;
+    }
+    task->next = NULL;
+    PyThread_acquire_lock(queue_lock, WAIT_LOCK);
+    if (queue_tail) queue_tail->next = task;
+    else queue_head = task;
+    queue_tail = task;
+    if (worker_waiting)
+    {
+        worker_waiting = false;
+        PyThread_release_lock(wake_lock);
+    }
+    PyThread_release_lock(queue_lock);
+    return 0;
+}
+
+/* Allocate the locks of the worker, `wake_lock` starts held. */
+static int async_decode_locks_new(void)
+{
+    queue_lock = PyThread_allocate_lock();
+    wake_lock = PyThread_allocate_lock();
+    if (!queue_lock || !wake_lock)
+    {
+        PyErr_NoMemory();
+        return -1;
+    }
+    PyThread_acquire_lock(wake_lock, WAIT_LOCK);
+    return 0;
+}
+
+/* `os.register_at_fork(after_in_child=...)`: the worker does not survive a
+   fork, and the locks may have been held by it. The tasks of the parent are
+   dropped, their loops are not run by the child. */
+static PyObject *async_decode_after_fork(PyObject *self, PyObject *Py_UNUSED(ignored))
+{
+    AsyncDecodeTask *task = queue_head;
+    queue_head = queue_tail = NULL;
+    worker_waiting = false;
+    worker_started = false;
+    if (async_decode_locks_new() < 0) return NULL;
+    while (task)
+    {
+        AsyncDecodeTask *next = task->next;
+        Py_DECREF(task);
+        task = next;
+    }
+    Py_RETURN_NONE;
+}
+
+static PyMethodDef async_decode_after_fork_def = {
+    "_loads_async_after_fork", (PyCFunction)async_decode_after_fork, METH_NOARGS, NULL};
+
+PyObject *pyyjson_DecodeAsync(PyObject *self, PyObject *args, PyObject *kwargs)
+{
+    PyObject *obj;
+    PyObject *option = Py_None;
+    pyyjson_read_ctx ctx = {0};
+    static const char *kwlist[] = {"", "option", NULL};
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "O|O", (char **)kwlist, &obj, &option))
+    {
+        return NULL;
+    }
+    if (pyyjson_parse_option(option, &ctx.option) < 0) return NULL;
+
+    PyObject *get_running_loop = pyyjson_get_running_loop_func();
+    if (!get_running_loop) return NULL;
+    PyObject *loop = PyObject_CallObject(get_running_loop, NULL);
+    if (!loop) return NULL;
+    PyObject *future = PyObject_CallMethod(loop, "create_future", NULL);
+    if (!future)
+    {
+        Py_DECREF(loop);
+        return NULL;
+    }
+
+    /* bytes and str are immutable and can be read by the worker as they are,
+       other inputs are copied so later changes do not race with it */
+    PyObject *source = NULL;
+    const char *data = NULL;
+    Py_ssize_t len = 0;
+    if (PyBytes_Check(obj))
+    {
+        Py_INCREF(obj);
+        source = obj;
+        data = PyBytes_AS_STRING(obj);
+        len = PyBytes_GET_SIZE(obj);
+    }
+    else if (PyUnicode_Check(obj))
+    {
+        data = pyyjson_str_input(obj, &len);
+        if (data)
+        {
+            Py_INCREF(obj);
+            source = obj;
+        }
+        ctx.option |= PYYJSON_OPT_PARSE_TRUSTED_UTF8;
+    }
+    else if (PyByteArray_Check(obj) || PyMemoryView_Check(obj))
+    {
+        source = PyBytes_FromObject(obj);
+        if (source)
+        {
+            data = PyBytes_AS_STRING(source);
+            len = PyBytes_GET_SIZE(source);
+        }
+    }
+    else
+    {
+        PyErr_SetString(JSONDecodeError, "Input must be bytes, bytearray, memoryview, or str");
+    }
+    if (!source) goto fail;
+
+    /* shared subtrees are found from the source text of the containers,
+       which the document does not keep */
+    if (len < PYYJSON_ASYNC_MIN_SIZE || (ctx.option & PYYJSON_OPT_PARSE_SHARE_SUBTREES))
+    {
+        int ret = resolve_future(future, pyyjson_decode_obj(source, YYJSON_READ_NOFLAG, &ctx));
+        Py_DECREF(source);
+        if (ret < 0) goto fail;
+        Py_DECREF(loop);
+        return future;
+    }
+
+    AsyncDecodeTask *task = PyObject_New(AsyncDecodeTask, &AsyncDecodeTask_Type);
+    if (!task)
+    {
+        Py_DECREF(source);
+        goto fail;
+    }
+    Py_INCREF(future);
+    task->future = future;
+    task->loop = loop;
+    task->source = source;
+    task->data = data;
+    task->len = len;
+    task->ctx = ctx;
+    task->doc = NULL;
+    if (async_decode_submit(task) < 0)
+    {
+        Py_DECREF(future);
+        return NULL;
+    }
+    return future;
+
+fail:
+    Py_DECREF(future);
+    Py_DECREF(loop);
+    return NULL;
+}
+
+int pyyjson_async_decode_module_init(PyObject *module)
+{
+    str_set_result = PyUnicode_InternFromString("set_result");
+    if (!str_set_result) return -1;
+    str_set_exception = PyUnicode_InternFromString("set_exception");
+    if (!str_set_exception) return -1;
+    str_done = PyUnicode_InternFromString("done");
+    if (!str_done) return -1;
+    str_call_soon_threadsafe = PyUnicode_InternFromString("call_soon_threadsafe");
+    if (!str_call_soon_threadsafe) return -1;
+    str_finish = PyUnicode_InternFromString("_finish");
+    if (!str_finish) return -1;
+    if (async_decode_locks_new() < 0) return -1;
+
+    /* os.register_at_fork() is missing on Windows */
+    PyObject *os = PyImport_ImportModule("os");
+    if (!os) return -1;
+    PyObject *register_at_fork = PyObject_GetAttrString(os, "register_at_fork");
+    Py_DECREF(os);
+    if (register_at_fork)
+    {
+        PyObject *after_fork = PyCFunction_New(&async_decode_after_fork_def, NULL);
+        PyObject *kwargs = after_fork ? Py_BuildValue("{sN}", "after_in_child", after_fork) : NULL;
+        PyObject *empty = kwargs ? PyTuple_New(0) : NULL;
+        PyObject *ret = empty ? PyObject_Call(register_at_fork, empty, kwargs) : NULL;
+        Py_XDECREF(empty);
+        Py_XDECREF(kwargs);
+        Py_DECREF(register_at_fork);
+        if (!ret) return -1;
+        Py_DECREF(ret);
+    }
+    else
+    {
+        if (!PyErr_ExceptionMatches(PyExc_AttributeError)) return -1;
+        PyErr_Clear();
+    }
+    return PyType_Ready(&AsyncDecodeTask_Type);
+}
@@ -0,0 +1,15 @@
+#ifndef ASYNCDECODE_H
+#define ASYNCDECODE_H
+
+#include "pyinit.h"
+
+/** Inputs smaller than this are decoded on the calling thread right away. */
+#define PYYJSON_ASYNC_MIN_SIZE (64 * 1024)
+
+/** `loads_async(obj, /, option=None)` */
+PyObject *pyyjson_DecodeAsync(PyObject *self, PyObject *args, PyObject *kwargs);
+
+/** Ready the internal types of `loads_async()`. */
+int pyyjson_async_decode_module_init(PyObject *module);
+
+#endif // ASYNCDECODE_H
@@ -0,0 +1,1489 @@
+#include "decoder.h"
+#include "rawnumber.h"
+#include "frozenmapping.h"
+#include "pyutils.h"
+#include <structmember.h>
+#include <datetime.h>
+
+static PyObject *str_dict = NULL;        /* "__dict__" */
+static PyObject *str_post_init = NULL;   /* "__post_init__" */
+static PyObject *str_int = NULL;         /* "int" */
+static PyObject *str_is_safe = NULL;     /* "is_safe" */
+
+/*==============================================================================
+ * Type Plan
+ *============================================================================*/
+
+static Py_ssize_t plan_field_index(const pyyjson_type_plan *plan, PyObject *key)
+{
+    Py_hash_t hash = PyObject_Hash(key);
+    for (Py_ssize_t i = 0; i < plan->field_count; i++)
+    {
+        const pyyjson_field_plan *field = &plan->fields[i];
+        if (field->name == key) return i;
+        if (field->hash == hash && PyUnicode_Compare(field->name, key) == 0) return i;
+    }
+    return -1;
+}
+
+const pyyjson_type_plan *pyyjson_plan_child(const pyyjson_type_plan *plan, PyObject *key)
+{
+    if (plan->kind == PLAN_LIST) return plan->item;
+    assert(key);
+    Py_ssize_t index = plan_field_index(plan, key);
+    return index < 0 ? NULL : plan->fields[index].plan;
+}
+
+bool pyyjson_plan_has_field(const pyyjson_type_plan *plan, PyObject *key)
+{
+    return plan->kind != PLAN_CLASS || plan_field_index(plan, key) >= 0;
+}
+
+PyObject *pyyjson_plan_build(const pyyjson_type_plan *plan, PyObject **pairs, Py_ssize_t count)
+{
+    PyObject *small[16];
+    PyObject **values = small;
+    PyObject *inst = NULL, *dict = NULL;
+    Py_ssize_t i;
+
+    assert(plan->kind == PLAN_CLASS);
+    if (plan->field_count > (Py_ssize_t)(sizeof(small) / sizeof(small[0])))
+    {
+        values = PyMem_Calloc(plan->field_count, sizeof(PyObject *));
+        if (!values)
+        {
+            for (i = 0; i < count * 2; i++) Py_DECREF(pairs[i]);
+            PyErr_NoMemory();
+            return NULL;
+        }
+    }
+    else
+    {
+        memset(small, 0, sizeof(small));
+    }
+
+    // match keys to fields, unknown keys are dropped and later duplicates win
+    for (i = 0; i < count; i++)
+    {
+        PyObject *key = pairs[i * 2], *value = pairs[i * 2 + 1];
+        Py_ssize_t index = plan_field_index(plan, key);
+        Py_DECREF(key);
+        if (index < 0)
+        {
+            Py_DECREF(value);
+            continue;
+        }
+        Py_XSETREF(values[index], value);
+        const pyyjson_field_plan *field = &plan->fields[index];
+        if (field->plan && !pyyjson_plan_accepts(field->plan, value))
+        {
+            const char *expected = field->plan->kind == PLAN_CLASS ? field->plan->type->tp_name : "list";
+            PyErr_Format(JSONDecodeError, "field '%U' of %s expects %s, got %s", field->name,
+                         plan->type->tp_name, expected, Py_TYPE(value)->tp_name);
+            for (i++; i < count; i++)
+            {
+                Py_DECREF(pairs[i * 2]);
+                Py_DECREF(pairs[i * 2 + 1]);
+            }
+            goto fail;
+        }
+    }
+
+    inst = plan->type->tp_alloc(plan->type, 0);
+    if (!inst) goto fail;
+    if (plan->dict_count)
+    {
+        dict = _PyDict_NewPresized(plan->dict_count);
+        if (!dict) goto fail;
+    }
+
+    for (i = 0; i < plan->field_count; i++)
+    {
+        const pyyjson_field_plan *field = &plan->fields[i];
+        PyObject *value = values[i];
+        values[i] = NULL;
+        if (!value)
+        {
+            if (field->default_value)
+            {
+                value = field->default_value;
+                Py_INCREF(value);
+            }
+            else if (field->default_factory)
+            {
+                value = PyObject_CallNoArgs(field->default_factory);
+                if (!value) goto fail;
+            }
+            else
+            {
+                PyErr_Format(JSONDecodeError, "missing required field '%U' for %s",
+                             field->name, plan->type->tp_name);
+                goto fail;
+            }
+        }
+        if (field->offset)
+        {
+            // a fresh instance has empty slots, the slot takes the reference
+            *(PyObject **)((char *)inst + field->offset) = value;
+        }
+        else
+        {
+            int ret = PyDict_SetItem(dict, field->name, value);
+            Py_DECREF(value);
+            if (ret) goto fail;
+        }
+    }
+
+    // bypass __setattr__ so that frozen dataclasses can be filled as well
+    if (dict)
+    {
+        if (PyObject_GenericSetAttr(inst, str_dict, dict)) goto fail;
+        Py_CLEAR(dict);
+    }
+    if (plan->post_init)
+    {
+        PyObject *ret = PyObject_CallMethodNoArgs(inst, str_post_init);
+        if (!ret) goto fail;
+        Py_DECREF(ret);
+    }
+    if (values != small) PyMem_Free(values);
+    return inst;
+
+fail:
+    for (i = 0; i < plan->field_count; i++) Py_XDECREF(values[i]);
+    if (values != small) PyMem_Free(values);
+    Py_XDECREF(dict);
+    Py_XDECREF(inst);
+    return NULL;
+}
+
+static pyyjson_type_plan *plan_new(PyyjsonDecoderObject *self, pyyjson_plan_kind kind)
+{
+    pyyjson_type_plan **plans = PyMem_Realloc(self->plans, (self->plan_count + 1) * sizeof(pyyjson_type_plan *));
+    if (!plans) return (pyyjson_type_plan *)PyErr_NoMemory();
+    self->plans = plans;
+    pyyjson_type_plan *plan = PyMem_Calloc(1, sizeof(pyyjson_type_plan));
+    if (!plan) return (pyyjson_type_plan *)PyErr_NoMemory();
+    plan->kind = kind;
+    plans[self->plan_count++] = plan;
+    return plan;
+}
+
+static void plan_free(pyyjson_type_plan *plan)
+{
+    for (Py_ssize_t i = 0; i < plan->field_count; i++)
+    {
+        Py_XDECREF(plan->fields[i].name);
+        Py_XDECREF(plan->fields[i].default_value);
+        Py_XDECREF(plan->fields[i].default_factory);
+    }
+    PyMem_Free(plan->fields);
+    Py_XDECREF(plan->type);
+    PyMem_Free(plan);
+}
+
+/** Compilation state shared by the recursive calls of `plan_compile()`. */
+typedef struct plan_compiler {
+    PyyjsonDecoderObject *self;
+    /** type -> plan address, also breaks the recursion of recursive types */
+    PyObject *memo;
+    PyObject *get_origin;
+    PyObject *get_args;
+    PyObject *get_type_hints;
+    PyObject *fields;
+    PyObject *missing;
+    PyObject *union_types;
+} plan_compiler;
+
+static pyyjson_type_plan *plan_compile(plan_compiler *c, PyObject *tp);
+
+/** Compile a `list[T]` or an `Optional[T]` plan. Returns NULL without an
+    exception if the annotation needs no plan. */
+static pyyjson_type_plan *plan_compile_generic(plan_compiler *c, PyObject *tp, PyObject *origin)
+{
+    pyyjson_type_plan *plan = NULL;
+    PyObject *args = PyObject_CallOneArg(c->get_args, tp);
+    if (!args) return NULL;
+    if (!PyTuple_Check(args)) goto done;
+
+    if (origin == (PyObject *)&PyList_Type)
+    {
+        if (PyTuple_GET_SIZE(args) != 1) goto done;
+        pyyjson_type_plan *item = plan_compile(c, PyTuple_GET_ITEM(args, 0));
+        if (!item) goto done;
+        plan = plan_new(c->self, PLAN_LIST);
+        if (plan) plan->item = item;
+    }
+    else if (PySequence_Contains(c->union_types, origin) == 1)
+    {
+        // only Optional[T] is planned, other unions are kept as they are
+        if (PyTuple_GET_SIZE(args) != 2) goto done;
+        PyObject *first = PyTuple_GET_ITEM(args, 0), *second = PyTuple_GET_ITEM(args, 1);
+        if (second == (PyObject *)Py_TYPE(Py_None))
+            plan = plan_compile(c, first);
+        else if (first == (PyObject *)Py_TYPE(Py_None))
+            plan = plan_compile(c, second);
+    }
+
+done:
+    Py_DECREF(args);
+    return plan;
+}
+
+static int plan_compile_fields(plan_compiler *c, pyyjson_type_plan *plan, PyObject *tp)
+{
+    PyObject *hints = NULL, *fields = NULL;
+    int ret = -1;
+
+    hints = PyObject_CallOneArg(c->get_type_hints, tp);
+    if (!hints) goto done;
+    fields = PyObject_CallOneArg(c->fields, tp);
+    if (!fields) goto done;
+    Py_SETREF(fields, PySequence_Tuple(fields));
+    if (!fields) goto done;
+
+    Py_ssize_t count = PyTuple_GET_SIZE(fields);
+    plan->fields = PyMem_Calloc(count ? count : 1, sizeof(pyyjson_field_plan));
+    if (!plan->fields)
+    {
+        PyErr_NoMemory();
+        goto done;
+    }
+    for (Py_ssize_t i = 0; i < count; i++)
+    {
+        PyObject *field = PyTuple_GET_ITEM(fields, i);
+        pyyjson_field_plan *fp = &plan->fields[i];
+        plan->field_count++;
+
+        fp->name = PyObject_GetAttrString(field, "name");
+        if (!fp->name) goto done;
+        if (!PyUnicode_Check(fp->name))
+        {
+            PyErr_SetString(PyExc_TypeError, "field name must be str");
+            goto done;
+        }
+        PyUnicode_InternInPlace(&fp->name);
+        fp->hash = PyObject_Hash(fp->name);
+
+        fp->default_value = PyObject_GetAttrString(field, "default");
+        if (!fp->default_value) goto done;
+        if (fp->default_value == c->missing) Py_CLEAR(fp->default_value);
+        fp->default_factory = PyObject_GetAttrString(field, "default_factory");
+        if (!fp->default_factory) goto done;
+        if (fp->default_factory == c->missing) Py_CLEAR(fp->default_factory);
+
+        // `__slots__` members are filled by offset, others go to `__dict__`
+        PyObject *descr = _PyType_Lookup((PyTypeObject *)tp, fp->name);
+        if (descr && Py_IS_TYPE(descr, &PyMemberDescr_Type) &&
+            ((PyMemberDescrObject *)descr)->d_member->type == T_OBJECT_EX)
+        {
+            fp->offset = ((PyMemberDescrObject *)descr)->d_member->offset;
+        }
+        else
+        {
+            plan->dict_count++;
+        }
+
+        PyObject *hint = PyDict_GetItemWithError(hints, fp->name);
+        if (hint)
+        {
+            fp->plan = plan_compile(c, hint);
+        }
+        if (PyErr_Occurred()) goto done;
+    }
+    if (plan->dict_count && !(((PyTypeObject *)tp)->tp_dictoffset))
+    {
+        PyErr_Format(PyExc_TypeError, "%s has fields that are neither slots nor in __dict__",
+                     ((PyTypeObject *)tp)->tp_name);
+        goto done;
+    }
+    plan->post_init = PyObject_HasAttr(tp, str_post_init);
+    ret = 0;
+
+done:
+    Py_XDECREF(hints);
+    Py_XDECREF(fields);
+    return ret;
+}
+
+/** Compile the plan of an annotation. Returns NULL without an exception if
+    the annotation needs no plan. */
+static pyyjson_type_plan *plan_compile(plan_compiler *c, PyObject *tp)
+{
+    PyObject *cached = PyDict_GetItemWithError(c->memo, tp);
+    if (cached) return (pyyjson_type_plan *)PyLong_AsVoidPtr(cached);
+    if (PyErr_Occurred()) return NULL;
+
+    if (PyType_Check(tp) && PyObject_HasAttrString(tp, "__dataclass_fields__"))
+    {
+        pyyjson_type_plan *plan = plan_new(c->self, PLAN_CLASS);
+        if (!plan) return NULL;
+        Py_INCREF(tp);
+        plan->type = (PyTypeObject *)tp;
+        PyObject *addr = PyLong_FromVoidPtr(plan);
+        if (!addr) return NULL;
+        int ret = PyDict_SetItem(c->memo, tp, addr);
+        Py_DECREF(addr);
+        if (ret || plan_compile_fields(c, plan, tp)) return NULL;
+        return plan;
+    }
+
+    PyObject *origin = PyObject_CallOneArg(c->get_origin, tp);
+    if (!origin) return NULL;
+    pyyjson_type_plan *plan = NULL;
+    if (origin != Py_None) plan = plan_compile_generic(c, tp, origin);
+    Py_DECREF(origin);
+    return plan;
+}
+
+static int decoder_compile(PyyjsonDecoderObject *self, PyObject *tp)
+{
+    plan_compiler c = {self};
+    PyObject *typing = NULL, *dataclasses = NULL, *types = NULL;
+    int ret = -1;
+
+    typing = PyImport_ImportModule("typing");
+    if (!typing) goto done;
+    dataclasses = PyImport_ImportModule("dataclasses");
+    if (!dataclasses) goto done;
+    c.memo = PyDict_New();
+    if (!c.memo) goto done;
+    c.get_origin = PyObject_GetAttrString(typing, "get_origin");
+    c.get_args = PyObject_GetAttrString(typing, "get_args");
+    c.get_type_hints = PyObject_GetAttrString(typing, "get_type_hints");
+    c.fields = PyObject_GetAttrString(dataclasses, "fields");
+    c.missing = PyObject_GetAttrString(dataclasses, "MISSING");
+    if (!c.get_origin || !c.get_args || !c.get_type_hints || !c.fields || !c.missing) goto done;
+
+    // `X | None` has the origin types.UnionType since Python 3.10
+    c.union_types = PyList_New(0);
+    if (!c.union_types) goto done;
+    PyObject *typing_union = PyObject_GetAttrString(typing, "Union");
+    if (!typing_union || PyList_Append(c.union_types, typing_union))
+    {
+        Py_XDECREF(typing_union);
+        goto done;
+    }
+    Py_DECREF(typing_union);
+    types = PyImport_ImportModule("types");
+    if (!types) goto done;
+    if (PyObject_HasAttrString(types, "UnionType"))
+    {
+        PyObject *union_type = PyObject_GetAttrString(types, "UnionType");
+        if (!union_type || PyList_Append(c.union_types, union_type))
+        {
+            Py_XDECREF(union_type);
+            goto done;
+        }
+        Py_DECREF(union_type);
+    }
+
+    self->ctx.plan = plan_compile(&c, tp);
+    if (PyErr_Occurred()) goto done;
+    if (!self->ctx.plan)
+    {
+        PyErr_Format(PyExc_TypeError, "Unsupported decode type: %R", tp);
+        goto done;
+    }
+    ret = 0;
+
+done:
+    Py_XDECREF(typing);
+    Py_XDECREF(dataclasses);
+    Py_XDECREF(types);
+    Py_XDECREF(c.memo);
+    Py_XDECREF(c.get_origin);
+    Py_XDECREF(c.get_args);
+    Py_XDECREF(c.get_type_hints);
+    Py_XDECREF(c.fields);
+    Py_XDECREF(c.missing);
+    Py_XDECREF(c.union_types);
+    return ret;
+}
+
+/*==============================================================================
+ * String Values
+ *============================================================================*/
+
+/** Timezones of offsets that are a multiple of 15 minutes, in (-24h, 24h). */
+static PyObject *tz_cache[24 * 4 * 2];
+
+/* Parse `n` digits, -1 if any of them is not a digit. */
+static int read_digits(const char *str, int n)
+{
+    int value = 0;
+    for (int i = 0; i < n; i++)
+    {
+        unsigned char c = (unsigned char)str[i] - '0';
+        if (c > 9) return -1;
+        value = value * 10 + c;
+    }
+    return value;
+}
+
+static int days_in_month(int year, int month)
+{
+    static const int days[] = {31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31};
+    if (month == 2 && year % 4 == 0 && (year % 100 != 0 || year % 400 == 0)) return 29;
+    return days[month - 1];
+}
+
+/* Get a `datetime.timezone`, cached for common offsets. */
+static PyObject *get_timezone(int minutes)
+{
+    if (minutes == 0)
+    {
+        Py_INCREF(PyDateTime_TimeZone_UTC);
+        return PyDateTime_TimeZone_UTC;
+    }
+    PyObject **cached = NULL;
+    if (minutes % 15 == 0)
+    {
+        cached = &tz_cache[(minutes + 24 * 60) / 15];
+        if (*cached)
+        {
+            Py_INCREF(*cached);
+            return *cached;
+        }
+    }
+    PyObject *delta = PyDelta_FromDSU(0, minutes * 60, 0);
+    if (!delta) return NULL;
+    PyObject *tz = PyTimeZone_FromOffset(delta);
+    Py_DECREF(delta);
+    if (tz && cached)
+    {
+        Py_INCREF(tz);
+        *cached = tz;
+    }
+    return tz;
+}
+
+/*
+ Read an RFC 3339 timestamp: `YYYY-MM-DD[Tt ]HH:MM:SS[.frac](Z|z|+HH:MM|-HH:MM)`
+ followed by the closing quote. Fractions beyond microseconds are truncated.
+ The input is checked from left to right, so it never reads past the zero
+ padding of the reader.
+ */
+static int read_datetime(const char *str, PyObject **obj, Py_ssize_t *len)
+{
+    int year, month, day, hour, minute, second, usec = 0, offset = 0;
+    const char *cur;
+
+    if ((year = read_digits(str, 4)) < 1 || str[4] != '-' ||
+        (month = read_digits(str + 5, 2)) < 1 || month > 12 || str[7] != '-' ||
+        (day = read_digits(str + 8, 2)) < 1 || day > days_in_month(year, month) ||
+        (str[10] != 'T' && str[10] != 't' && str[10] != ' ') ||
+        (hour = read_digits(str + 11, 2)) < 0 || hour > 23 || str[13] != ':' ||
+        (minute = read_digits(str + 14, 2)) < 0 || minute > 59 || str[16] != ':' ||
+        (second = read_digits(str + 17, 2)) < 0 || second > 59)
+    {
+        return 0;
+    }
+    cur = str + 19;
+    if (*cur == '.')
+    {
+        int digits = 0;
+        cur++;
+        while ((unsigned char)(*cur - '0') <= 9)
+        {
+            if (digits < 6)
+            {
+                usec = usec * 10 + (*cur - '0');
+                digits++;
+            }
+            cur++;
+        }
+        if (cur == str + 20) return 0;
+        for (; digits < 6; digits++) usec *= 10;
+    }
+    if (*cur == 'Z' || *cur == 'z')
+    {
+        cur++;
+    }
+    else if (*cur == '+' || *cur == '-')
+    {
+        int tz_hour, tz_minute;
+        if ((tz_hour = read_digits(cur + 1, 2)) < 0 || tz_hour > 23 || cur[3] != ':' ||
+            (tz_minute = read_digits(cur + 4, 2)) < 0 || tz_minute > 59)
+        {
+            return 0;
+        }
+        offset = tz_hour * 60 + tz_minute;
+        if (*cur == '-') offset = -offset;
+        cur += 6;
+    }
+    else
+    {
+        return 0;
+    }
+    if (*cur != '"') return 0;
+
+    if (!PyDateTimeAPI)
+    {
+        PyDateTime_IMPORT;
+        if (!PyDateTimeAPI) return -1;
+    }
+    PyObject *tz = get_timezone(offset);
+    if (!tz) return -1;
+    *obj = PyDateTimeAPI->DateTime_FromDateAndTime(year, month, day, hour, minute, second, usec,
+                                                   tz, PyDateTimeAPI->DateTimeType);
+    Py_DECREF(tz);
+    if (!*obj) return -1;
+    *len = cur + 1 - str;
+    return 1;
+}
+
+/* Parse a hex digit, -1 if it is not one. */
+static int read_hex(char c)
+{
+    if (c >= '0' && c <= '9') return c - '0';
+    c |= 0x20;
+    if (c >= 'a' && c <= 'f') return c - 'a' + 10;
+    return -1;
+}
+
+/*
+ Read a canonical UUID `xxxxxxxx-xxxx-xxxx-xxxx-xxxxxxxxxxxx` (either case)
+ followed by the closing quote. The instance is filled from the 16 parsed
+ bytes like `UUID.__init__` does, without parsing the text again.
+ */
+static int read_uuid(const char *str, PyObject **obj, Py_ssize_t *len)
+{
+    unsigned char bytes[16];
+    const char *cur = str;
+    for (int i = 0; i < 16; i++)
+    {
+        if (i == 4 || i == 6 || i == 8 || i == 10)
+        {
+            if (*cur != '-') return 0;
+            cur++;
+        }
+        int hi = read_hex(cur[0]);
+        if (hi < 0) return 0;
+        int lo = read_hex(cur[1]);
+        if (lo < 0) return 0;
+        bytes[i] = (unsigned char)(hi << 4 | lo);
+        cur += 2;
+    }
+    if (*cur != '"') return 0;
+
+    PyObject *type_uuid, *safe_unknown;
+    if (pyyjson_get_uuid_types(&type_uuid, &safe_unknown) < 0) return -1;
+    PyObject *value = _PyLong_FromByteArray(bytes, 16, 0, 0);
+    if (!value) return -1;
+    PyObject *inst = ((PyTypeObject *)type_uuid)->tp_alloc((PyTypeObject *)type_uuid, 0);
+    if (!inst || PyObject_GenericSetAttr(inst, str_int, value) ||
+        PyObject_GenericSetAttr(inst, str_is_safe, safe_unknown))
+    {
+        Py_XDECREF(inst);
+        Py_DECREF(value);
+        return -1;
+    }
+    Py_DECREF(value);
+    *obj = inst;
+    *len = cur + 1 - str;
+    return 1;
+}
+
+/** An entry of `pyyjson_str_cache`, followed by `max_len` bytes of text. */
+typedef struct str_cache_entry {
+    uint64_t hash;
+    Py_ssize_t len;
+    /** the cached string, NULL if the entry is empty */
+    PyObject *str;
+    char text[];
+} str_cache_entry;
+
+/** The cache of `loads()`, created on first use. */
+static pyyjson_str_cache *shared_str_cache = NULL;
+
+pyyjson_str_cache *pyyjson_str_cache_new(Py_ssize_t size, Py_ssize_t max_len)
+{
+    if (size < 1 || size > (1 << 24))
+    {
+        PyErr_SetString(PyExc_ValueError, "str_cache_size must be in [1, 16777216]");
+        return NULL;
+    }
+    if (max_len < 0 || max_len > (1 << 12))
+    {
+        PyErr_SetString(PyExc_ValueError, "str_cache_max_len must be in [0, 4096]");
+        return NULL;
+    }
+    Py_ssize_t pow2 = 1;
+    while (pow2 < size) pow2 <<= 1;
+    pyyjson_str_cache *cache = PyMem_Malloc(sizeof(pyyjson_str_cache));
+    if (!cache) return (pyyjson_str_cache *)PyErr_NoMemory();
+    cache->size = pow2;
+    cache->max_len = max_len;
+    cache->stride = (Py_ssize_t)((sizeof(str_cache_entry) + (size_t)max_len + 7) & ~(size_t)7);
+    cache->intern = false;
+    cache->entries = PyMem_Calloc((size_t)pow2, (size_t)cache->stride);
+    if (!cache->entries)
+    {
+        PyMem_Free(cache);
+        return (pyyjson_str_cache *)PyErr_NoMemory();
+    }
+    return cache;
+}
+
+void pyyjson_str_cache_free(pyyjson_str_cache *cache)
+{
+    if (!cache) return;
+    for (Py_ssize_t i = 0; i < cache->size; i++)
+    {
+        Py_XDECREF(((str_cache_entry *)(cache->entries + i * cache->stride))->str);
+    }
+    PyMem_Free(cache->entries);
+    PyMem_Free(cache);
+}
+
+int pyyjson_str_cache_read(pyyjson_str_cache *cache, const char *str, PyObject **obj, Py_ssize_t *len)
+{
+    uint64_t hash = 14695981039346656037ULL; /* FNV-1a */
+    bool is_ascii = true;
+    Py_ssize_t n;
+    for (n = 0;; n++)
+    {
+        unsigned char c = (unsigned char)str[n];
+        if (c == '"') break;
+        if (n == cache->max_len || c == '\\' || c < 0x20) return 0;
+        is_ascii &= c < 0x80;
+        hash = (hash ^ c) * 1099511628211ULL;
+    }
+
+    str_cache_entry *entry = (str_cache_entry *)(cache->entries +
+                                                 (Py_ssize_t)(hash & (uint64_t)(cache->size - 1)) * cache->stride);
+    if (entry->str && entry->hash == hash && entry->len == n && memcmp(entry->text, str, (size_t)n) == 0)
+    {
+        Py_INCREF(entry->str);
+        *obj = entry->str;
+        *len = n + 1;
+        return 1;
+    }
+
+    PyObject *value = is_ascii ? create_py_unicode(str, n, true, 1) : PyUnicode_DecodeUTF8(str, n, NULL);
+    if (!value)
+    {
+        if (!PyErr_ExceptionMatches(PyExc_UnicodeDecodeError)) return -1;
+        PyErr_Clear();
+        return 0;
+    }
+    if (cache->intern) PyUnicode_InternInPlace(&value);
+    Py_INCREF(value);
+    Py_XSETREF(entry->str, value);
+    entry->hash = hash;
+    entry->len = n;
+    memcpy(entry->text, str, (size_t)n);
+    *obj = value;
+    *len = n + 1;
+    return 1;
+}
+
+/* Whether the value of `key` is parsed, `keys` is NULL for any value. */
+static int str_value_key_match(PyObject *keys, PyObject *key)
+{
+    if (!keys) return 1;
+    if (!key) return 0;
+    return PySet_Contains(keys, key);
+}
+
+int pyyjson_read_str_value(const pyyjson_read_ctx *ctx, const char *str, PyObject *key,
+                           PyObject **obj, Py_ssize_t *len)
+{
+    int ret;
+    if (ctx->option & PYYJSON_OPT_PARSE_DATETIME)
+    {
+        ret = str_value_key_match(ctx->datetime_keys, key);
+        if (ret > 0) ret = read_datetime(str, obj, len);
+        if (ret) return ret;
+    }
+    if (ctx->option & PYYJSON_OPT_PARSE_UUID)
+    {
+        ret = str_value_key_match(ctx->uuid_keys, key);
+        if (ret > 0) ret = read_uuid(str, obj, len);
+        if (ret) return ret;
+    }
+    if (ctx->option & PYYJSON_OPT_PARSE_CACHE_STR)
+    {
+        pyyjson_str_cache *cache = ctx->str_cache;
+        if (!cache)
+        {
+            if (!shared_str_cache)
+            {
+                shared_str_cache = pyyjson_str_cache_new(PYYJSON_STR_CACHE_SIZE, PYYJSON_STR_CACHE_MAX_LEN);
+                if (!shared_str_cache) return -1;
+            }
+            cache = shared_str_cache;
+        }
+        return pyyjson_str_cache_read(cache, str, obj, len);
+    }
+    return 0;
+}
+
+/*==============================================================================
+ * Arena
+ *============================================================================*/
+
+/* Every block starts with its capacity, padded to keep the data aligned. */
+#define ARENA_HEADER 16
+#define arena_block_cap(ptr) (*(size_t *)((char *)(ptr) - ARENA_HEADER))
+
+static void *arena_block_new(size_t size)
+{
+    char *block = PyMem_RawMalloc(size + ARENA_HEADER);
+    if (!block) return NULL;
+    *(size_t *)block = size;
+    return block + ARENA_HEADER;
+}
+
+static void *arena_malloc(void *ctx, size_t size)
+{
+    pyyjson_arena *arena = ctx;
+    for (int i = 0; i < PYYJSON_ARENA_SLOTS; i++)
+    {
+        void *ptr = arena->slots[i];
+        if (ptr && arena_block_cap(ptr) >= size)
+        {
+            arena->slots[i] = NULL;
+            return ptr;
+        }
+    }
+    return arena_block_new(size);
+}
+
+static void *arena_realloc(void *ctx, void *ptr, size_t old_size, size_t size)
+{
+    if (arena_block_cap(ptr) >= size) return ptr;
+    char *block = PyMem_RawRealloc((char *)ptr - ARENA_HEADER, size + ARENA_HEADER);
+    if (!block) return NULL;
+    *(size_t *)block = size;
+    return block + ARENA_HEADER;
+}
+
+static void arena_free(void *ctx, void *ptr)
+{
+    pyyjson_arena *arena = ctx;
+    if (arena_block_cap(ptr) <= PYYJSON_ARENA_MAX_BLOCK)
+    {
+        for (int i = 0; i < PYYJSON_ARENA_SLOTS; i++)
+        {
+            if (!arena->slots[i])
+            {
+                arena->slots[i] = ptr;
+                return;
+            }
+        }
+    }
+    PyMem_RawFree((char *)ptr - ARENA_HEADER);
+}
+
+void pyyjson_arena_init(pyyjson_arena *arena)
+{
+    memset(arena->slots, 0, sizeof(arena->slots));
+    arena->alc.malloc = arena_malloc;
+    arena->alc.realloc = arena_realloc;
+    arena->alc.free = arena_free;
+    arena->alc.ctx = arena;
+}
+
+void pyyjson_arena_free(pyyjson_arena *arena)
+{
+    for (int i = 0; i < PYYJSON_ARENA_SLOTS; i++)
+    {
+        if (arena->slots[i]) PyMem_RawFree((char *)arena->slots[i] - ARENA_HEADER);
+        arena->slots[i] = NULL;
+    }
+}
+
+/*==============================================================================
+ * Shared Subtrees
+ *============================================================================*/
+
+typedef struct share_entry {
+    Py_hash_t hash;
+    const char *span;
+    Py_ssize_t len;
+    /** the container built from `span`, NULL if the entry is empty */
+    PyObject *obj;
+} share_entry;
+
+struct pyyjson_share_table {
+    /** number of entries, a power of two */
+    Py_ssize_t size;
+    /** number of used entries */
+    Py_ssize_t used;
+    share_entry *entries;
+};
+
+pyyjson_share_table *pyyjson_share_new(void)
+{
+    pyyjson_share_table *table = PyMem_Malloc(sizeof(pyyjson_share_table));
+    if (!table) return (pyyjson_share_table *)PyErr_NoMemory();
+    table->size = 64;
+    table->used = 0;
+    table->entries = PyMem_Calloc((size_t)table->size, sizeof(share_entry));
+    if (!table->entries)
+    {
+        PyMem_Free(table);
+        return (pyyjson_share_table *)PyErr_NoMemory();
+    }
+    return table;
+}
+
+void pyyjson_share_free(pyyjson_share_table *table)
+{
+    if (!table) return;
+    for (Py_ssize_t i = 0; i < table->size; i++) Py_XDECREF(table->entries[i].obj);
+    PyMem_Free(table->entries);
+    PyMem_Free(table);
+}
+
+/* Find the entry of `span`, or the empty entry where it belongs. */
+static share_entry *share_find(share_entry *entries, Py_ssize_t size, Py_hash_t hash,
+                               const char *span, Py_ssize_t len)
+{
+    size_t mask = (size_t)size - 1;
+    size_t i = (size_t)hash & mask;
+    while (true)
+    {
+        share_entry *entry = &entries[i];
+        if (!entry->obj) return entry;
+        if (entry->hash == hash && entry->len == len && memcmp(entry->span, span, (size_t)len) == 0)
+        {
+            return entry;
+        }
+        i = (i + 1) & mask;
+    }
+}
+
+/* Insert a new container, the table holds a reference to it. */
+static int share_insert(pyyjson_share_table *table, share_entry *entry, Py_hash_t hash,
+                        const char *span, Py_ssize_t len, PyObject *obj)
+{
+    entry->hash = hash;
+    entry->span = span;
+    entry->len = len;
+    Py_INCREF(obj);
+    entry->obj = obj;
+    if (++table->used * 2 <= table->size) return 0;
+
+    Py_ssize_t size = table->size * 2;
+    share_entry *entries = PyMem_Calloc((size_t)size, sizeof(share_entry));
+    if (!entries)
+    {
+        PyErr_NoMemory();
+        return -1;
+    }
+    for (Py_ssize_t i = 0; i < table->size; i++)
+    {
+        share_entry *old = &table->entries[i];
+        if (old->obj) *share_find(entries, size, old->hash, old->span, old->len) = *old;
+    }
+    PyMem_Free(table->entries);
+    table->entries = entries;
+    table->size = size;
+    return 0;
+}
+
+/* Drop the items of a duplicate container and return the shared one. */
+static PyObject *share_reuse(share_entry *entry, PyObject **items, Py_ssize_t count)
+{
+    for (Py_ssize_t i = 0; i < count; i++) Py_DECREF(items[i]);
+    Py_INCREF(entry->obj);
+    return entry->obj;
+}
+
+PyObject *pyyjson_share_array(pyyjson_share_table *table, const char *span, Py_ssize_t len,
+                              PyObject **items, Py_ssize_t count)
+{
+    Py_hash_t hash = _Py_HashBytes(span, len);
+    share_entry *entry = share_find(table->entries, table->size, hash, span, len);
+    if (entry->obj) return share_reuse(entry, items, count);
+
+    PyObject *tuple = PyTuple_New(count);
+    if (!tuple)
+    {
+        for (Py_ssize_t i = 0; i < count; i++) Py_DECREF(items[i]);
+        return NULL;
+    }
+    if (count) memcpy(((PyTupleObject *)tuple)->ob_item, items, (size_t)count * sizeof(PyObject *));
+    if (share_insert(table, entry, hash, span, len, tuple))
+    {
+        Py_DECREF(tuple);
+        return NULL;
+    }
+    return tuple;
+}
+
+PyObject *pyyjson_share_object(pyyjson_share_table *table, const char *span, Py_ssize_t len,
+                               PyObject **pairs, Py_ssize_t count)
+{
+    Py_hash_t hash = _Py_HashBytes(span, len);
+    share_entry *entry = share_find(table->entries, table->size, hash, span, len);
+    if (entry->obj) return share_reuse(entry, pairs, count * 2);
+
+    PyObject *mapping = pyyjson_frozen_mapping_new(pairs, count);
+    if (!mapping) return NULL;
+    if (share_insert(table, entry, hash, span, len, mapping))
+    {
+        Py_DECREF(mapping);
+        return NULL;
+    }
+    return mapping;
+}
+
+/*==============================================================================
+ * Decode Entrance
+ *============================================================================*/
+
+/** Number of decimal digits always fitting in a u64. */
+#define BIG_INT_CHUNK 18
+/** Maximum number of cached powers, 10**(18 * 2**39) digits never fit in memory. */
+#define BIG_INT_POW_MAX 40
+
+PyObject *pyyjson_raw_to_decimal(const char *str, Py_ssize_t len)
+{
+    PyObject *type_decimal = pyyjson_get_type_decimal();
+    if (!type_decimal) return NULL;
+    /* the span is checked by the reader, so it is ASCII */
+    PyObject *digits = PyUnicode_New(len, 127);
+    if (!digits) return NULL;
+    memcpy(PyUnicode_1BYTE_DATA(digits), str, (size_t)len);
+    PyObject *ret = PyObject_CallOneArg(type_decimal, digits);
+    Py_DECREF(digits);
+    return ret;
+}
+
+/* Get 10**(BIG_INT_CHUNK * 2**level), squaring the previous level on demand. */
+static PyObject *big_int_pow(PyObject **pows, int level)
+{
+    if (!pows[level])
+    {
+        if (level == 0)
+        {
+            pows[0] = PyLong_FromUnsignedLongLong(1000000000000000000ULL);
+        }
+        else
+        {
+            PyObject *half = big_int_pow(pows, level - 1);
+            if (!half) return NULL;
+            pows[level] = PyNumber_Multiply(half, half);
+        }
+    }
+    return pows[level];
+}
+
+/*
+ Convert a run of decimal digits to an int. The run is split so that its low
+ part has `BIG_INT_CHUNK * 2**level` digits, then `high * 10**len(low) + low`
+ is computed recursively. Both halves have similar sizes, which lets the
+ Karatsuba multiplication of CPython do the heavy lifting instead of the
+ quadratic digit-by-digit conversion of `int(str)`.
+ */
+static PyObject *big_int_from_digits(const char *str, Py_ssize_t len, PyObject **pows)
+{
+    if (len <= BIG_INT_CHUNK)
+    {
+        unsigned long long value = 0;
+        for (Py_ssize_t i = 0; i < len; i++) value = value * 10 + (unsigned long long)(str[i] - '0');
+        return PyLong_FromUnsignedLongLong(value);
+    }
+    int level = 0;
+    Py_ssize_t low_len = BIG_INT_CHUNK;
+    while (low_len * 2 < len)
+    {
+        low_len *= 2;
+        level++;
+    }
+    if (level >= BIG_INT_POW_MAX)
+    {
+        PyErr_NoMemory();
+        return NULL;
+    }
+    PyObject *pow = big_int_pow(pows, level);
+    if (!pow) return NULL;
+    PyObject *high = big_int_from_digits(str, len - low_len, pows);
+    if (!high) return NULL;
+    PyObject *low = big_int_from_digits(str + len - low_len, low_len, pows);
+    if (!low)
+    {
+        Py_DECREF(high);
+        return NULL;
+    }
+    PyObject *ret = PyNumber_Multiply(high, pow);
+    Py_DECREF(high);
+    if (ret)
+    {
+        Py_SETREF(ret, PyNumber_Add(ret, low));
+    }
+    Py_DECREF(low);
+    return ret;
+}
+
+PyObject *pyyjson_raw_to_int(const char *str, Py_ssize_t len)
+{
+    bool sign = str[0] == '-';
+    for (Py_ssize_t i = sign; i < len; i++)
+    {
+        if (str[i] < '0' || str[i] > '9')
+        {
+            /* a float too large for a double, rejected as without the option */
+            PyErr_SetString(JSONDecodeError, "number is infinity when parsed as double");
+            return NULL;
+        }
+    }
+
+    PyObject *pows[BIG_INT_POW_MAX] = {NULL};
+    PyObject *ret = big_int_from_digits(str + sign, len - sign, pows);
+    for (int i = 0; i < BIG_INT_POW_MAX; i++) Py_XDECREF(pows[i]);
+    if (ret && sign) Py_SETREF(ret, PyNumber_Negative(ret));
+    return ret;
+}
+
+PyObject *pyyjson_read_raw_number(const pyyjson_read_ctx *ctx, const char *str, Py_ssize_t len)
+{
+    if (ctx->option & PYYJSON_OPT_PARSE_RAW_NUMBER) return pyyjson_raw_number_new(str, len);
+    if (ctx->option & PYYJSON_OPT_PARSE_DECIMAL) return pyyjson_raw_to_decimal(str, len);
+    assert(ctx->option & PYYJSON_OPT_PARSE_BIG_INT);
+    return pyyjson_raw_to_int(str, len);
+}
+
+int pyyjson_parse_option(PyObject *option, int *out)
+{
+    if (option == Py_None)
+    {
+        *out = 0;
+        return 0;
+    }
+    if (!PyLong_Check(option))
+    {
+        PyErr_SetString(JSONDecodeError, "Invalid opts");
+        return -1;
+    }
+    long value = PyLong_AsLong(option);
+    if (value == -1 && PyErr_Occurred()) return -1;
+    if (value & ~(long)PYYJSON_OPT_PARSE_MASK)
+    {
+        PyErr_SetString(JSONDecodeError, "Invalid opts");
+        return -1;
+    }
+    *out = (int)value;
+    return 0;
+}
+
+const char *pyyjson_str_input(PyObject *str, Py_ssize_t *len)
+{
+    const char *data = PyUnicode_AsUTF8AndSize(str, len);
+    if (!data && PyErr_ExceptionMatches(PyExc_UnicodeEncodeError))
+    {
+        PyErr_Clear();
+        PyErr_SetString(JSONDecodeError, "str is not valid UTF-8: surrogates not allowed");
+    }
+    return data;
+}
+
+/* Get the UTF-8 data of a str, bytes, bytearray or memoryview object.
+   For str, `*ctx` is replaced with `trusted_ctx` to skip UTF-8 validation. */
+static int decode_input(PyObject *obj, const char **string, Py_ssize_t *len,
+                        pyyjson_read_ctx **ctx, pyyjson_read_ctx *trusted_ctx)
+{
+    if (PyUnicode_Check(obj))
+    {
+        *string = pyyjson_str_input(obj, len);
+        if (!*string) return -1;
+        /* The UTF-8 of a str is always valid, there is no need to check it again. */
+        if (*ctx && !((*ctx)->option & PYYJSON_OPT_PARSE_TRUSTED_UTF8))
+        {
+            *trusted_ctx = **ctx;
+            trusted_ctx->option |= PYYJSON_OPT_PARSE_TRUSTED_UTF8;
+            *ctx = trusted_ctx;
+        }
+    }
+    else if (PyBytes_Check(obj))
+    {
+        *string = PyBytes_AS_STRING(obj);
+        *len = PyBytes_GET_SIZE(obj);
+    }
+    else if (PyByteArray_Check(obj))
+    {
+        *string = PyByteArray_AS_STRING(obj);
+        *len = PyByteArray_GET_SIZE(obj);
+    }
+    else if (PyMemoryView_Check(obj))
+    {
+        Py_buffer *view = PyMemoryView_GET_BUFFER(obj);
+        if (!PyBuffer_IsContiguous(view, 'C'))
+        {
+            PyErr_SetString(JSONDecodeError, "Input memoryview must be C contiguous");
+            return -1;
+        }
+        *string = view->buf;
+        *len = view->len;
+    }
+    else
+    {
+        PyErr_SetString(JSONDecodeError, "Input must be bytes, bytearray, memoryview, or str");
+        return -1;
+    }
+    return 0;
+}
+
+yyjson_read_flag pyyjson_read_flags(yyjson_read_flag flg, const pyyjson_read_ctx *ctx)
+{
+    if (ctx && (ctx->option & (PYYJSON_OPT_PARSE_RAW_NUMBER | PYYJSON_OPT_PARSE_DECIMAL)))
+        flg |= YYJSON_READ_NUMBER_AS_RAW;
+    else if (ctx && (ctx->option & PYYJSON_OPT_PARSE_BIG_INT)) flg |= YYJSON_READ_BIGNUM_AS_RAW;
+    return flg;
+}
+
+PyObject *pyyjson_decode_obj(PyObject *obj, yyjson_read_flag flg, pyyjson_read_ctx *ctx)
+{
+    const char *string = NULL;
+    Py_ssize_t len = 0;
+    pyyjson_read_ctx trusted_ctx;
+
+    if (decode_input(obj, &string, &len, &ctx, &trusted_ctx) < 0) return NULL;
+    flg = pyyjson_read_flags(flg, ctx);
+
+    yyjson_read_err err;
+    PyObject *root = yyjson_read_opts((char *)string, (size_t)len, flg, ctx, ctx ? ctx->alc : NULL, &err);
+    if (!root)
+    {
+        if (!PyErr_Occurred())
+            PyErr_Format(JSONDecodeError, "%s\n\tat %zu", err.msg, err.pos);
+        return NULL;
+    }
+    return root;
+}
+
+/*==============================================================================
+ * Line Decoder
+ *============================================================================*/
+
+static bool line_is_blank(const char *cur, const char *end)
+{
+    for (; cur < end; cur++)
+    {
+        if (*cur != ' ' && *cur != '\t' && *cur != '\r') return false;
+    }
+    return true;
+}
+
+/* Append `(line_no, byte_offset, code, msg)` for a line that failed to decode.
+   An exception raised while building the value is cleared and reported with
+   code 0 and its text as the message, except MemoryError, which is kept and
+   returns -1. */
+static int record_line_error(PyObject *errors, Py_ssize_t line_no, Py_ssize_t line_offset,
+                             const yyjson_read_err *err)
+{
+    PyObject *msg, *item;
+    unsigned int code = (unsigned int)err->code;
+    if (PyErr_Occurred())
+    {
+        /* JSONDecodeError or a failed conversion, anything else propagates */
+        if (!PyErr_ExceptionMatches(PyExc_ValueError)) return -1;
+        PyObject *type, *value, *traceback;
+        PyErr_Fetch(&type, &value, &traceback);
+        msg = value ? PyObject_Str(value) : PyObject_GetAttrString(type, "__name__");
+        Py_XDECREF(type);
+        Py_XDECREF(value);
+        Py_XDECREF(traceback);
+        code = YYJSON_READ_SUCCESS;
+    }
+    else
+    {
+        msg = PyUnicode_FromString(err->msg);
+    }
+    if (!msg) return -1;
+    item = Py_BuildValue("(nnIN)", line_no, line_offset + (Py_ssize_t)err->pos,
+                         code, msg);
+    if (!item) return -1;
+    int ret = PyList_Append(errors, item);
+    Py_DECREF(item);
+    return ret;
+}
+
+PyObject *pyyjson_decode_lines(PyObject *obj, yyjson_read_flag flg, pyyjson_read_ctx *ctx)
+{
+    const char *string = NULL;
+    Py_ssize_t len = 0;
+    pyyjson_read_ctx trusted_ctx;
+    PyObject *values = NULL, *errors = NULL;
+
+    if (decode_input(obj, &string, &len, &ctx, &trusted_ctx) < 0) return NULL;
+    flg = pyyjson_read_flags(flg, ctx);
+    values = PyList_New(0);
+    if (!values) goto fail;
+    errors = PyList_New(0);
+    if (!errors) goto fail;
+
+    const char *cur = string, *end = string + len;
+    Py_ssize_t line_no = 0;
+    while (cur < end)
+    {
+        const char *eol = memchr(cur, '\n', (size_t)(end - cur));
+        if (!eol) eol = end;
+        line_no++;
+        if (!line_is_blank(cur, eol))
+        {
+            yyjson_read_err err;
+            PyObject *value = yyjson_read_opts((char *)cur, (size_t)(eol - cur), flg, ctx, ctx ? ctx->alc : NULL, &err);
+            if (value)
+            {
+                int ret = PyList_Append(values, value);
+                Py_DECREF(value);
+                if (ret < 0) goto fail;
+            }
+            else if (record_line_error(errors, line_no, cur - string, &err) < 0)
+            {
+                goto fail;
+            }
+        }
+        cur = eol + 1;
+    }
+    return Py_BuildValue("(NN)", values, errors);
+
+fail:
+    Py_XDECREF(values);
+    Py_XDECREF(errors);
+    return NULL;
+}
+
+/*==============================================================================
+ * Decoder Type
+ *============================================================================*/
+
+/* Convert an iterable of str to a frozenset. */
+static PyObject *decoder_key_set(PyObject *keys, const char *name)
+{
+    if (PyUnicode_Check(keys))
+    {
+        PyErr_Format(PyExc_TypeError, "%s must be an iterable of str, not str", name);
+        return NULL;
+    }
+    PyObject *set = PyFrozenSet_New(keys);
+    if (!set) return NULL;
+    PyObject *iter = PyObject_GetIter(set);
+    if (!iter)
+    {
+        Py_DECREF(set);
+        return NULL;
+    }
+    PyObject *key;
+    while ((key = PyIter_Next(iter)))
+    {
+        bool is_str = PyUnicode_Check(key);
+        Py_DECREF(key);
+        if (!is_str)
+        {
+            PyErr_Format(PyExc_TypeError, "%s must be an iterable of str", name);
+            break;
+        }
+    }
+    Py_DECREF(iter);
+    if (PyErr_Occurred())
+    {
+        Py_DECREF(set);
+        return NULL;
+    }
+    return set;
+}
+
+static void decoder_reset(PyyjsonDecoderObject *self);
+
+static int Decoder_init(PyyjsonDecoderObject *self, PyObject *args, PyObject *kwargs)
+{
+    static const char *kwlist[] = {"type", "option", "datetime_keys", "uuid_keys",
+                                   "str_cache_size", "str_cache_max_len", "skip_unknown", NULL};
+    PyObject *tp = Py_None;
+    PyObject *option = Py_None;
+    PyObject *datetime_keys = Py_None;
+    PyObject *uuid_keys = Py_None;
+    Py_ssize_t str_cache_size = -1;
+    Py_ssize_t str_cache_max_len = -1;
+    int skip_unknown = 0;
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "|$OOOOnnp", (char **)kwlist, &tp, &option,
+                                     &datetime_keys, &uuid_keys, &str_cache_size, &str_cache_max_len,
+                                     &skip_unknown))
+        return -1;
+    if (self->type)
+    {
+        PyErr_SetString(PyExc_RuntimeError, "Decoder is already initialized");
+        return -1;
+    }
+    if (pyyjson_parse_option(option, &self->ctx.option) < 0) return -1;
+    self->ctx.skip_unknown = (char)skip_unknown;
+    if (datetime_keys != Py_None)
+    {
+        self->ctx.datetime_keys = decoder_key_set(datetime_keys, "datetime_keys");
+        if (!self->ctx.datetime_keys) goto fail;
+        self->ctx.option |= PYYJSON_OPT_PARSE_DATETIME;
+    }
+    if (uuid_keys != Py_None)
+    {
+        self->ctx.uuid_keys = decoder_key_set(uuid_keys, "uuid_keys");
+        if (!self->ctx.uuid_keys) goto fail;
+        self->ctx.option |= PYYJSON_OPT_PARSE_UUID;
+    }
+    if (str_cache_size != -1 || str_cache_max_len != -1)
+    {
+        self->ctx.option |= PYYJSON_OPT_PARSE_CACHE_STR;
+    }
+    if (self->ctx.option & PYYJSON_OPT_PARSE_CACHE_STR)
+    {
+        self->ctx.str_cache = pyyjson_str_cache_new(
+            str_cache_size == -1 ? PYYJSON_STR_CACHE_SIZE : str_cache_size,
+            str_cache_max_len == -1 ? PYYJSON_STR_CACHE_MAX_LEN : str_cache_max_len);
+        if (!self->ctx.str_cache) goto fail;
+    }
+    self->ctx.key_cache = pyyjson_str_cache_new(PYYJSON_KEY_CACHE_SIZE, PYYJSON_STR_CACHE_MAX_LEN);
+    if (!self->ctx.key_cache) goto fail;
+    self->ctx.key_cache->intern = true;
+    pyyjson_arena_init(&self->arena);
+    self->ctx.alc = &self->arena.alc;
+    if (tp != Py_None && decoder_compile(self, tp)) goto fail;
+    Py_INCREF(tp);
+    self->type = tp;
+    return 0;
+
+fail:
+    decoder_reset(self);
+    return -1;
+}
+
+static int Decoder_traverse(PyyjsonDecoderObject *self, visitproc visit, void *arg)
+{
+    Py_VISIT(self->type);
+    Py_VISIT(self->ctx.datetime_keys);
+    Py_VISIT(self->ctx.uuid_keys);
+    for (Py_ssize_t i = 0; i < self->plan_count; i++)
+    {
+        const pyyjson_type_plan *plan = self->plans[i];
+        Py_VISIT(plan->type);
+        for (Py_ssize_t j = 0; j < plan->field_count; j++)
+        {
+            Py_VISIT(plan->fields[j].default_value);
+            Py_VISIT(plan->fields[j].default_factory);
+        }
+    }
+    return 0;
+}
+
+/* Drop the plans and references, the decoder is left uninitialized. */
+static int Decoder_clear(PyyjsonDecoderObject *self)
+{
+    self->ctx.plan = NULL;
+    for (Py_ssize_t i = 0; i < self->plan_count; i++) plan_free(self->plans[i]);
+    PyMem_Free(self->plans);
+    self->plans = NULL;
+    self->plan_count = 0;
+    Py_CLEAR(self->type);
+    Py_CLEAR(self->ctx.datetime_keys);
+    Py_CLEAR(self->ctx.uuid_keys);
+    return 0;
+}
+
+/* Free everything `Decoder_init()` built, the decoder is left as new. */
+static void decoder_reset(PyyjsonDecoderObject *self)
+{
+    Decoder_clear(self);
+    pyyjson_str_cache_free(self->ctx.str_cache);
+    pyyjson_str_cache_free(self->ctx.key_cache);
+    pyyjson_arena_free(&self->arena);
+    memset(&self->ctx, 0, sizeof(self->ctx));
+}
+
+static void Decoder_dealloc(PyyjsonDecoderObject *self)
+{
+    PyObject_GC_UnTrack(self);
+    decoder_reset(self);
+    Py_TYPE(self)->tp_free((PyObject *)self);
+}
+
+static PyObject *Decoder_decode(PyyjsonDecoderObject *self, PyObject *obj)
+{
+    if (!self->type)
+    {
+        PyErr_SetString(PyExc_RuntimeError, "Decoder is not initialized");
+        return NULL;
+    }
+    return pyyjson_decode_obj(obj, YYJSON_READ_NOFLAG, &self->ctx);
+}
+
+static PyObject *Decoder_decode_lines(PyyjsonDecoderObject *self, PyObject *obj)
+{
+    if (!self->type)
+    {
+        PyErr_SetString(PyExc_RuntimeError, "Decoder is not initialized");
+        return NULL;
+    }
+    return pyyjson_decode_lines(obj, YYJSON_READ_NOFLAG, &self->ctx);
+}
+
+static PyMethodDef Decoder_methods[] = {
+    {"decode", (PyCFunction)Decoder_decode, METH_O, "decode(obj, /)\n--\n\nDeserialize JSON to the decoder's target type."},
+    {"decode_lines", (PyCFunction)Decoder_decode_lines, METH_O, "decode_lines(obj, /)\n--\n\nDeserialize newline-delimited JSON like `loads_lines()`."},
+    {NULL, NULL, 0, NULL} /* Sentinel */
+};
+
+static PyMemberDef Decoder_members[] = {
+    {"type", T_OBJECT, offsetof(PyyjsonDecoderObject, type), READONLY, "The target type, or None for plain dicts and lists."},
+    {"option", T_INT, offsetof(PyyjsonDecoderObject, ctx.option), READONLY, "The decode options."},
+    {"datetime_keys", T_OBJECT, offsetof(PyyjsonDecoderObject, ctx.datetime_keys), READONLY, "Keys whose values are parsed as datetimes, or None for any string."},
+    {"uuid_keys", T_OBJECT, offsetof(PyyjsonDecoderObject, ctx.uuid_keys), READONLY, "Keys whose values are parsed as UUIDs, or None for any string."},
+    {"skip_unknown", T_BOOL, offsetof(PyyjsonDecoderObject, ctx.skip_unknown), READONLY, "Whether the values of unknown dataclass fields are skipped unread."},
+    {NULL} /* Sentinel */
+};
+
+PyTypeObject PyyjsonDecoder_Type = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    .tp_name = "pyyjson.Decoder",
+    .tp_basicsize = sizeof(PyyjsonDecoderObject),
+    .tp_dealloc = (destructor)Decoder_dealloc,
+    .tp_flags = Py_TPFLAGS_DEFAULT | Py_TPFLAGS_HAVE_GC,
+    .tp_doc = "Decoder(*, type=None, option=None, datetime_keys=None, uuid_keys=None, "
+              "str_cache_size=1024, str_cache_max_len=64, skip_unknown=False)\n--\n\n"
+              "A reusable JSON decoder.\n\n"
+              "With a dataclass `type`, objects are decoded straight into instances "
+              "through a field plan compiled once from the annotations. "
+              "`list[T]` and `Optional[T]` fields are planned as well. "
+              "`option` takes the same `OPT_PARSE_*` flags as `loads()`. "
+              "`datetime_keys` and `uuid_keys` limit datetime and UUID parsing to "
+              "the values of these keys and imply `OPT_PARSE_DATETIME` and "
+              "`OPT_PARSE_UUID`. With `OPT_PARSE_CACHE_STR` or a cache size, "
+              "repeated string values share one str object across calls, up to "
+              "`str_cache_size` entries of `str_cache_max_len` bytes. "
+              "The values of fields the dataclass does not declare are read "
+              "and dropped; with `skip_unknown`, they are passed over without "
+              "reading them, which is faster but only checks that their "
+              "brackets match and their strings end.\n\n"
+              "A decoder keeps its reader buffers and a cache of object keys "
+              "between calls, which makes it cheaper than `loads()` for many "
+              "small documents.",
+    .tp_traverse = (traverseproc)Decoder_traverse,
+    .tp_clear = (inquiry)Decoder_clear,
+    .tp_methods = Decoder_methods,
+    .tp_members = Decoder_members,
+    .tp_init = (initproc)Decoder_init,
+    .tp_new = PyType_GenericNew,
+};
+
+int pyyjson_decoder_module_init(PyObject *module)
+{
+    str_dict = PyUnicode_InternFromString("__dict__");
+    if (!str_dict) return -1;
+    str_post_init = PyUnicode_InternFromString("__post_init__");
+    if (!str_post_init) return -1;
+    str_int = PyUnicode_InternFromString("int");
+    if (!str_int) return -1;
+    str_is_safe = PyUnicode_InternFromString("is_safe");
+    if (!str_is_safe) return -1;
+    if (PyType_Ready(&PyyjsonDecoder_Type) < 0) return -1;
+    Py_INCREF(&PyyjsonDecoder_Type);
+    if (PyModule_AddObject(module, "Decoder", (PyObject *)&PyyjsonDecoder_Type) < 0)
+    {
+        Py_DECREF(&PyyjsonDecoder_Type);
+        return -1;
+    }
+    return 0;
+}
@@ -0,0 +1,274 @@
+#ifndef DECODER_H
+#define DECODER_H
+
+#include "pyinit.h"
+#include "yyjson.h"
+
+/** How a JSON container is materialized by a type plan. */
+typedef enum pyyjson_plan_kind {
+    /** JSON object to an instance of the plan's class. */
+    PLAN_CLASS,
+    /** JSON array to a list whose items follow the item plan. */
+    PLAN_LIST,
+} pyyjson_plan_kind;
+
+/**
+ Decode options, exposed to Python as `pyyjson.OPT_PARSE_*`.
+ They start at bit 16, so an encode option is never taken as a decode option.
+ */
+/** Parse all numbers as `decimal.Decimal`. */
+#define PYYJSON_OPT_PARSE_DECIMAL (1 << 16)
+/** Parse integers beyond 64 bits as exact ints instead of floats. */
+#define PYYJSON_OPT_PARSE_BIG_INT (1 << 17)
+/** Parse all numbers as `pyyjson.RawNumber`, takes precedence over the above. */
+#define PYYJSON_OPT_PARSE_RAW_NUMBER (1 << 18)
+/** Parse RFC 3339 timestamp strings as `datetime.datetime`. */
+#define PYYJSON_OPT_PARSE_DATETIME (1 << 19)
+/** Parse canonical 36-character UUID strings as `uuid.UUID`. */
+#define PYYJSON_OPT_PARSE_UUID (1 << 20)
+/** Return the same str object for repeated short string values. */
+#define PYYJSON_OPT_PARSE_CACHE_STR (1 << 21)
+/** Decode containers as immutable objects, sharing byte-identical ones.
+    Implies `PYYJSON_OPT_PARSE_FROZEN`. */
+#define PYYJSON_OPT_PARSE_SHARE_SUBTREES (1 << 22)
+/** Decode arrays as tuples and objects as `pyyjson.FrozenMapping`. */
+#define PYYJSON_OPT_PARSE_FROZEN (1 << 23)
+/** Skip UTF-8 validation of strings, for input known to be valid UTF-8.
+    Always on for str input. */
+#define PYYJSON_OPT_PARSE_TRUSTED_UTF8 (1 << 24)
+/** All valid decode options. */
+#define PYYJSON_OPT_PARSE_MASK (PYYJSON_OPT_PARSE_DECIMAL | PYYJSON_OPT_PARSE_BIG_INT | \
+                                PYYJSON_OPT_PARSE_RAW_NUMBER | PYYJSON_OPT_PARSE_DATETIME | \
+                                PYYJSON_OPT_PARSE_UUID | PYYJSON_OPT_PARSE_CACHE_STR | \
+                                PYYJSON_OPT_PARSE_SHARE_SUBTREES | PYYJSON_OPT_PARSE_FROZEN | \
+                                PYYJSON_OPT_PARSE_TRUSTED_UTF8)
+/** Options handled by `pyyjson_read_str_value()`. */
+#define PYYJSON_OPT_STR_HOOK_MASK (PYYJSON_OPT_PARSE_DATETIME | PYYJSON_OPT_PARSE_UUID | \
+                                   PYYJSON_OPT_PARSE_CACHE_STR)
+
+typedef struct pyyjson_type_plan pyyjson_type_plan;
+
+/** Default number of entries of a string value cache. */
+#define PYYJSON_STR_CACHE_SIZE 1024
+/** Number of entries of the key cache of a decoder. */
+#define PYYJSON_KEY_CACHE_SIZE 512
+/** Default maximum byte length of a cached string value. */
+#define PYYJSON_STR_CACHE_MAX_LEN 64
+
+/**
+ A direct-mapped cache of string values, keyed on the raw bytes of the string.
+ A new string replaces the entry of its slot, so the cache never grows.
+ */
+typedef struct pyyjson_str_cache {
+    /** number of entries, a power of two */
+    Py_ssize_t size;
+    /** maximum byte length of a cached string */
+    Py_ssize_t max_len;
+    /** stride of an entry in `entries` */
+    Py_ssize_t stride;
+    /** whether new strings are interned, for object keys */
+    bool intern;
+    /** `size` entries of `pyyjson_str_cache_entry` followed by `max_len` bytes */
+    char *entries;
+} pyyjson_str_cache;
+
+/** Create a string value cache, NULL with an exception set on failure. */
+pyyjson_str_cache *pyyjson_str_cache_new(Py_ssize_t size, Py_ssize_t max_len);
+
+/** Release the strings and the memory of a string value cache. */
+void pyyjson_str_cache_free(pyyjson_str_cache *cache);
+
+/**
+ Read a string through the cache, `str` points after the opening quote.
+ Strings with escapes, control characters or more than `max_len` bytes are
+ left to the reader, which also reports the errors of invalid strings.
+ @return 1 with a new reference in `*obj` and the bytes consumed, including
+    the closing quote, in `*len`; 0 if not handled; -1 on error.
+ */
+int pyyjson_str_cache_read(pyyjson_str_cache *cache, const char *str,
+                           PyObject **obj, Py_ssize_t *len);
+
+/** Number of blocks kept by `pyyjson_arena`. */
+#define PYYJSON_ARENA_SLOTS 2
+/** Largest block kept by `pyyjson_arena` between calls, in bytes. */
+#define PYYJSON_ARENA_MAX_BLOCK (1 << 20)
+
+/**
+ Scratch memory of a decoder, reused by the reader across calls.
+ Blocks freed by the reader are kept in empty slots and handed out again. A
+ nested decode that finds no fitting block falls back to the heap.
+ */
+typedef struct pyyjson_arena {
+    /** free blocks, NULL if empty */
+    void *slots[PYYJSON_ARENA_SLOTS];
+    /** allocator over this arena, passed to `yyjson_read_opts()` */
+    yyjson_alc alc;
+} pyyjson_arena;
+
+/** Set up an empty arena. */
+void pyyjson_arena_init(pyyjson_arena *arena);
+
+/** Release the blocks kept by an arena. */
+void pyyjson_arena_free(pyyjson_arena *arena);
+
+/** A field of a class plan. */
+typedef struct pyyjson_field_plan {
+    /** interned field name */
+    PyObject *name;
+    /** hash of the field name */
+    Py_hash_t hash;
+    /** default value, NULL if none */
+    PyObject *default_value;
+    /** default factory, NULL if none */
+    PyObject *default_factory;
+    /** plan of the field value, NULL to keep plain dicts and lists */
+    pyyjson_type_plan *plan;
+    /** slot offset in the instance, 0 if the field lives in `__dict__` */
+    Py_ssize_t offset;
+} pyyjson_field_plan;
+
+/**
+ A per-type decode plan, compiled once from the class annotations.
+ Plans may refer to each other (e.g. recursive dataclasses), they are owned
+ and freed by the decoder which compiled them.
+ */
+struct pyyjson_type_plan {
+    pyyjson_plan_kind kind;
+    /** target class of `PLAN_CLASS`, NULL for `PLAN_LIST` */
+    PyTypeObject *type;
+    /** item plan of `PLAN_LIST`, NULL for `PLAN_CLASS` */
+    pyyjson_type_plan *item;
+    /** whether `__post_init__` is called after the fields are filled */
+    bool post_init;
+    /** number of fields stored in `__dict__` */
+    Py_ssize_t dict_count;
+    /** number of fields */
+    Py_ssize_t field_count;
+    /** fields in declaration order */
+    pyyjson_field_plan *fields;
+};
+
+/** Python-specific reader state passed to `yyjson_read_opts()`. */
+struct pyyjson_read_ctx {
+    /** plan of the root value, NULL to build plain dicts and lists */
+    pyyjson_type_plan *plan;
+    /** decode options, see `PYYJSON_OPT_PARSE_*` */
+    int option;
+    /** keys whose values are parsed as datetimes, NULL for any string */
+    PyObject *datetime_keys;
+    /** keys whose values are parsed as UUIDs, NULL for any string */
+    PyObject *uuid_keys;
+    /** string value cache for `PYYJSON_OPT_PARSE_CACHE_STR`, NULL for the shared one */
+    pyyjson_str_cache *str_cache;
+    /** object key cache, NULL to create every key */
+    pyyjson_str_cache *key_cache;
+    /** allocator of the reader buffers, NULL for the default one */
+    const yyjson_alc *alc;
+    /** skip the values of unknown fields instead of reading them,
+        only their brackets and string ends are checked */
+    char skip_unknown;
+};
+
+/** Get the plan of a container inside a planned container, or NULL.
+    `key` is the object key of the container, NULL inside an array. */
+const pyyjson_type_plan *pyyjson_plan_child(const pyyjson_type_plan *plan,
+                                            PyObject *key);
+
+/** Whether `value` was read for `plan`: an instance of its class, a list,
+    or None since plans do not record `Optional`. */
+static inline bool pyyjson_plan_accepts(const pyyjson_type_plan *plan, PyObject *value)
+{
+    if (value == Py_None) return true;
+    return plan->kind == PLAN_CLASS ? Py_IS_TYPE(value, plan->type) : PyList_CheckExact(value);
+}
+
+/** Whether the value of `key` in a planned container is kept.
+    Always true for `PLAN_LIST`, false for unknown fields of `PLAN_CLASS`. */
+bool pyyjson_plan_has_field(const pyyjson_type_plan *plan, PyObject *key);
+
+/** Build an instance from `count` key-value pairs.
+    The references of all pairs are stolen, even on failure. */
+PyObject *pyyjson_plan_build(const pyyjson_type_plan *plan,
+                             PyObject **pairs, Py_ssize_t count);
+
+/** Convert a number kept as raw text by the reader to a Python object. */
+PyObject *pyyjson_read_raw_number(const pyyjson_read_ctx *ctx,
+                                  const char *str, Py_ssize_t len);
+
+/**
+ Read a string value with the string options of `ctx`.
+ `str` points after the opening quote, `key` is the object key of the value,
+ or NULL inside an array. Returns 1 and sets `*obj` and `*len` (the bytes
+ consumed, including the closing quote) if the string was converted, 0 if it
+ should be read as a plain string, or -1 with an exception set.
+ */
+int pyyjson_read_str_value(const pyyjson_read_ctx *ctx, const char *str, PyObject *key,
+                           PyObject **obj, Py_ssize_t *len);
+
+/** Table of the containers built in one decode, keyed on their source text. */
+typedef struct pyyjson_share_table pyyjson_share_table;
+
+/** Create a table for `PYYJSON_OPT_PARSE_SHARE_SUBTREES`, NULL on failure. */
+pyyjson_share_table *pyyjson_share_new(void);
+
+/** Release a table and the containers it holds, `table` may be NULL. */
+void pyyjson_share_free(pyyjson_share_table *table);
+
+/** Get the tuple of an array from its source text `span`, reusing the tuple
+    of an identical span. The references of all items are stolen. */
+PyObject *pyyjson_share_array(pyyjson_share_table *table, const char *span, Py_ssize_t len,
+                              PyObject **items, Py_ssize_t count);
+
+/** Get the FrozenMapping of an object from its source text `span`,
+    reusing the mapping of an identical span. The references of all pairs
+    are stolen. */
+PyObject *pyyjson_share_object(pyyjson_share_table *table, const char *span, Py_ssize_t len,
+                               PyObject **pairs, Py_ssize_t count);
+
+/** Convert the text of a valid JSON number to `decimal.Decimal`. */
+PyObject *pyyjson_raw_to_decimal(const char *str, Py_ssize_t len);
+
+/** Convert the text of a valid JSON integer to an exact int.
+    Raises JSONDecodeError if the text is not an integer. */
+PyObject *pyyjson_raw_to_int(const char *str, Py_ssize_t len);
+
+/** Convert the `option` argument of `loads()` or `Decoder()`.
+    None is no option, returns -1 with an exception set on invalid options. */
+int pyyjson_parse_option(PyObject *option, int *out);
+
+/** Get the UTF-8 data of a str to decode.
+    Raises JSONDecodeError if it has surrogates. */
+const char *pyyjson_str_input(PyObject *str, Py_ssize_t *len);
+
+/** Add the reader flags needed by the decode options of `ctx`. */
+yyjson_read_flag pyyjson_read_flags(yyjson_read_flag flg, const pyyjson_read_ctx *ctx);
+
+/** Decode a str, bytes, bytearray or memoryview object. */
+PyObject *pyyjson_decode_obj(PyObject *obj, yyjson_read_flag flg,
+                             pyyjson_read_ctx *ctx);
+
+/** Decode newline-delimited JSON, one value per non-blank line.
+    Returns `(values, errors)`, where `errors` lists
+    `(line_no, byte_offset, code, msg)` for the lines that failed to decode. */
+PyObject *pyyjson_decode_lines(PyObject *obj, yyjson_read_flag flg,
+                               pyyjson_read_ctx *ctx);
+
+typedef struct PyyjsonDecoderObject {
+    PyObject_HEAD
+    /** the target type given to the constructor, or None */
+    PyObject *type;
+    /** reader state, holds the plan of `type` */
+    pyyjson_read_ctx ctx;
+    /** all plans compiled for `type`, owned by this decoder */
+    pyyjson_type_plan **plans;
+    Py_ssize_t plan_count;
+    /** scratch memory of the reader, `ctx.alc` points into it */
+    pyyjson_arena arena;
+} PyyjsonDecoderObject;
+
+extern PyTypeObject PyyjsonDecoder_Type;
+
+/** Ready the decoder types and add them to the module. */
+int pyyjson_decoder_module_init(PyObject *module);
+
+#endif // DECODER_H
@@ -0,0 +1,2410 @@
+#include "encoder.h"
+#include "fragment.h"
+#include "frozenmapping.h"
+#include "rawnumber.h"
+#include <datetime.h>
+#include <errno.h>
+#include <limits.h>
+#include <math.h>
+#include <stdbool.h>
+#include <string.h>
+#include <structmember.h>
+#ifdef _WIN32
+#include <io.h>
+#else
+#include <unistd.h>
+#endif
+
+static PyObject *str_utcoffset = NULL;
+static PyObject *str_value = NULL;
+static PyObject *str_int = NULL;
+static PyObject *str_write = NULL;
+static PyObject *str_dataclass_fields = NULL;
+static PyObject *str_slots = NULL;
+static PyObject *str_field_type = NULL;
+static PyObject *str_array_struct = NULL;
+static PyObject *str_dtype = NULL;
+static PyObject *str_str = NULL;
+static PyObject *int_64 = NULL;
+
+/*==============================================================================
+ * Output Buffer
+ *============================================================================*/
+
+/** Initial capacity of the output buffer. */
+#define ENCODER_INITIAL_CAPACITY 1024
+
+/** Largest integer that a double holds exactly, for OPT_STRICT_INTEGER. */
+#define MAX_SAFE_INTEGER 9007199254740991LL
+
+/** Where the output of the encoder goes. */
+typedef enum encoder_sink {
+    /** a bytes object grown to fit, for `dumps()` */
+    SINK_BYTES,
+    /** a buffer flushed to a file object's `write()`, for `dump()` */
+    SINK_FILE,
+    /** a buffer flushed to a file descriptor, for `dump()` */
+    SINK_FD,
+    /** a caller's buffer, through a scratch buffer once it is nearly full, for `dumps_into()` */
+    SINK_BUFFER,
+} encoder_sink;
+
+typedef struct encode_frame encode_frame;
+
+/**
+ State of one encode call.
+
+ For `dumps()` the JSON text is written straight into the storage of `bytes`,
+ which is resized as it grows and shrunk to the written length at the end, so
+ the result is never copied. For `dump()` it is written to a fixed-size buffer
+ that is flushed to the file whenever it fills. For `dumps_into()` it is written
+ into the caller's buffer. Values reserve room for their worst case, so once
+ a value may not fit, the rest goes through a scratch buffer whose contents
+ are copied into the caller's buffer as long as they fit, and otherwise only
+ counted to report how many bytes are missing.
+ */
+typedef struct encoder {
+    encoder_sink sink;
+    /** the bytes object being written, owned, for SINK_BYTES */
+    PyObject *bytes;
+    /** the `write` method of the file, for SINK_FILE */
+    PyObject *write_func;
+    /** the file descriptor, for SINK_FD */
+    int fd;
+    /** the caller's buffer from the offset, for SINK_BUFFER */
+    uint8_t *target;
+    Py_ssize_t target_len;
+    /** bytes flushed to `target` (or counted past its end) while `buf` is scratch */
+    Py_ssize_t flushed;
+    /** whether `buf` is the scratch buffer */
+    bool spilled;
+    /** start of the output buffer */
+    uint8_t *buf;
+    /** write position */
+    uint8_t *cur;
+    /** end of the output buffer */
+    uint8_t *end;
+    /** encode options */
+    int option;
+    /** the `default` callable, or NULL */
+    PyObject *default_func;
+    /** the containers being written, `PYYJSON_ENCODE_DEPTH_LIMIT` of them */
+    encode_frame *frames;
+    /** number of containers being written */
+    int depth;
+    /** whether long runs of numbers may be written with the GIL released,
+        not while another thread may resume the encoder */
+    bool allow_threads;
+} encoder;
+
+static int encoder_init(encoder *enc)
+{
+    enc->bytes = PyBytes_FromStringAndSize(NULL, ENCODER_INITIAL_CAPACITY);
+    if (!enc->bytes) return -1;
+    enc->buf = (uint8_t *)PyBytes_AS_STRING(enc->bytes);
+    enc->cur = enc->buf;
+    enc->end = enc->buf + ENCODER_INITIAL_CAPACITY;
+    return 0;
+}
+
+static int encoder_init_file(encoder *enc)
+{
+    enc->buf = PyMem_Malloc(PYYJSON_DUMP_BUFFER_SIZE);
+    if (!enc->buf)
+    {
+        PyErr_NoMemory();
+        return -1;
+    }
+    enc->cur = enc->buf;
+    enc->end = enc->buf + PYYJSON_DUMP_BUFFER_SIZE;
+    return 0;
+}
+
+static int write_to_fd(int fd, const uint8_t *data, size_t len)
+{
+    while (len)
+    {
+        /* the count is an unsigned int on Windows */
+        size_t count = len > INT_MAX ? INT_MAX : len;
+        Py_ssize_t n;
+        Py_BEGIN_ALLOW_THREADS
+#ifdef _WIN32
+        n = _write(fd, data, (unsigned int)count);
+#else
+        n = write(fd, data, count);
+#endif
+        Py_END_ALLOW_THREADS
+        if (n < 0)
+        {
+            if (errno == EINTR)
+            {
+                if (PyErr_CheckSignals() < 0) return -1;
+                continue;
+            }
+            PyErr_SetFromErrno(PyExc_OSError);
+            return -1;
+        }
+        data += n;
+        len -= (size_t)n;
+    }
+    return 0;
+}
+
+static int write_to_file(PyObject *write_func, const uint8_t *data, size_t len)
+{
+    /* a copy, the file may keep what it is given */
+    PyObject *chunk = PyBytes_FromStringAndSize((const char *)data, (Py_ssize_t)len);
+    if (!chunk) return -1;
+    PyObject *ret = PyObject_CallFunctionObjArgs(write_func, chunk, NULL);
+    Py_DECREF(chunk);
+    if (!ret) return -1;
+    Py_DECREF(ret);
+    return 0;
+}
+
+/* Write out the buffer of `dump()`, or the scratch buffer of `dumps_into()`, and empty it. */
+static int encoder_flush(encoder *enc)
+{
+    size_t len = (size_t)(enc->cur - enc->buf);
+    if (!len) return 0;
+    enc->cur = enc->buf;
+    if (enc->sink == SINK_BUFFER)
+    {
+        if (enc->flushed + (Py_ssize_t)len <= enc->target_len) memcpy(enc->target + enc->flushed, enc->buf, len);
+        enc->flushed += (Py_ssize_t)len;
+        return 0;
+    }
+    if (enc->sink == SINK_FD) return write_to_fd(enc->fd, enc->buf, len);
+    return write_to_file(enc->write_func, enc->buf, len);
+}
+
+/*
+ Make room for `size` more bytes when the buffer is full. The capacity grows
+ geometrically; for `dump()` the buffer is flushed first, and only grows for
+ a single value larger than it.
+ */
+static int encoder_grow(encoder *enc, size_t size)
+{
+    if (enc->sink == SINK_BUFFER && !enc->spilled)
+    {
+        /* switch to scratch, the caller's buffer is never reallocated */
+        size_t cap = size > PYYJSON_DUMP_BUFFER_SIZE ? size : PYYJSON_DUMP_BUFFER_SIZE;
+        uint8_t *buf = PyMem_Malloc(cap);
+        if (!buf)
+        {
+            PyErr_NoMemory();
+            return -1;
+        }
+        enc->flushed = enc->cur - enc->target;
+        enc->spilled = true;
+        enc->buf = buf;
+        enc->cur = buf;
+        enc->end = buf + cap;
+        return 0;
+    }
+    if (enc->sink != SINK_BYTES && encoder_flush(enc) < 0) return -1;
+    size_t len = (size_t)(enc->cur - enc->buf);
+    size_t cap = (size_t)(enc->end - enc->buf);
+    if (cap - len >= size) return 0;
+    while (cap - len < size)
+    {
+        if (cap > (size_t)PY_SSIZE_T_MAX / 2)
+        {
+            PyErr_NoMemory();
+            return -1;
+        }
+        cap *= 2;
+    }
+    if (enc->sink == SINK_BYTES)
+    {
+        /* frees the object and sets it to NULL on failure */
+        if (_PyBytes_Resize(&enc->bytes, (Py_ssize_t)cap) < 0) return -1;
+        enc->buf = (uint8_t *)PyBytes_AS_STRING(enc->bytes);
+    }
+    else
+    {
+        uint8_t *buf = PyMem_Realloc(enc->buf, cap);
+        if (!buf)
+        {
+            PyErr_NoMemory();
+            return -1;
+        }
+        enc->buf = buf;
+    }
+    enc->cur = enc->buf + len;
+    enc->end = enc->buf + cap;
+    return 0;
+}
+
+/* Shrink the bytes object to the written length and take it. */
+static PyObject *encoder_finish(encoder *enc)
+{
+    PyObject *bytes = enc->bytes;
+    enc->bytes = NULL;
+    if (_PyBytes_Resize(&bytes, enc->cur - enc->buf) < 0) return NULL;
+    return bytes;
+}
+
+/* Make room for `size` more bytes. */
+static inline int reserve(encoder *enc, size_t size)
+{
+    if ((size_t)(enc->end - enc->cur) >= size) return 0;
+    return encoder_grow(enc, size);
+}
+
+static inline int write_raw(encoder *enc, const char *data, size_t len)
+{
+    if (reserve(enc, len) < 0) return -1;
+    memcpy(enc->cur, data, len);
+    enc->cur += len;
+    return 0;
+}
+
+/*==============================================================================
+ * Errors
+ *============================================================================*/
+
+static int type_error(PyObject *obj)
+{
+    PyErr_Format(JSONEncodeError, "Type is not JSON serializable: %.200s", Py_TYPE(obj)->tp_name);
+    return -1;
+}
+
+/* Take the exception being handled as a normalized exception object. */
+static PyObject *fetch_exception(void)
+{
+    PyObject *type, *value, *traceback;
+    PyErr_Fetch(&type, &value, &traceback);
+    PyErr_NormalizeException(&type, &value, &traceback);
+    if (traceback) PyException_SetTraceback(value, traceback);
+    Py_XDECREF(type);
+    Py_XDECREF(traceback);
+    return value;
+}
+
+/* Set `cause` as the cause of the exception being raised, stealing the reference. */
+static int set_cause(PyObject *cause)
+{
+    PyObject *type, *value, *traceback;
+    PyErr_Fetch(&type, &value, &traceback);
+    PyErr_NormalizeException(&type, &value, &traceback);
+    Py_INCREF(cause);
+    PyException_SetContext(value, cause);
+    PyException_SetCause(value, cause);
+    PyErr_Restore(type, value, traceback);
+    return -1;
+}
+
+/* Replace the error of `PyUnicode_AsUTF8AndSize()` on a str with surrogates. */
+static int str_error(void)
+{
+    if (PyErr_ExceptionMatches(PyExc_UnicodeEncodeError))
+    {
+        PyErr_Clear();
+        PyErr_SetString(JSONEncodeError, "str is not valid UTF-8: surrogates not allowed");
+    }
+    return -1;
+}
+
+/*==============================================================================
+ * Strings
+ *============================================================================*/
+
+/*
+ A str is written from its own storage, one loop per kind (Latin-1, UCS2 or
+ UCS4), escaping and encoding to UTF-8 in one pass. `PyUnicode_AsUTF8AndSize()`
+ would instead build and keep a UTF-8 copy of every string. The escapes match
+ yyjson's writer.
+ */
+
+#define SWAR_ONES 0x0101010101010101ULL
+#define SWAR_HIGHS 0x8080808080808080ULL
+
+/* Nonzero if any byte of `v` is zero. */
+#define swar_has_zero(v) (((v) - SWAR_ONES) & ~(v) & SWAR_HIGHS)
+/* Nonzero if any byte of `v` equals `c`. */
+#define swar_has_byte(v, c) swar_has_zero((v) ^ (SWAR_ONES * (uint8_t)(c)))
+/* Nonzero if any byte of `v` is below `n`, for `n` up to 128. */
+#define swar_has_less(v, n) (((v) - SWAR_ONES * (n)) & ~(v) & SWAR_HIGHS)
+
+/* Whether the 8 Latin-1 characters at `src` need more than a copy: a quote,
+   a backslash, a control character or a non-ASCII character. */
+static inline bool swar_has_string_special(const uint8_t *src)
+{
+    uint64_t v;
+    memcpy(&v, src, sizeof(v));
+    return ((v & SWAR_HIGHS) | swar_has_byte(v, '"') | swar_has_byte(v, '\\') | swar_has_less(v, 0x20)) != 0;
+}
+
+/* Write an escaped ASCII character: `"`, `\` or a control character. */
+static uint8_t *write_escape(uint8_t *cur, uint32_t c)
+{
+    static const char hex[] = "0123456789ABCDEF";
+    char short_esc = 0;
+    switch (c)
+    {
+        case '"': short_esc = '"'; break;
+        case '\\': short_esc = '\\'; break;
+        case '\b': short_esc = 'b'; break;
+        case '\f': short_esc = 'f'; break;
+        case '\n': short_esc = 'n'; break;
+        case '\r': short_esc = 'r'; break;
+        case '\t': short_esc = 't'; break;
+    }
+    *cur++ = '\\';
+    if (short_esc)
+    {
+        *cur++ = (uint8_t)short_esc;
+        return cur;
+    }
+    memcpy(cur, "u00", 3);
+    cur[3] = (uint8_t)hex[c >> 4];
+    cur[4] = (uint8_t)hex[c & 0xF];
+    return cur + 5;
+}
+
+/* Write one code point as escaped UTF-8, the caller rejects surrogates. */
+static inline uint8_t *write_code_point(uint8_t *cur, uint32_t c)
+{
+    if (c < 0x80)
+    {
+        if (c < 0x20 || c == '"' || c == '\\') return write_escape(cur, c);
+        *cur++ = (uint8_t)c;
+    }
+    else if (c < 0x800)
+    {
+        *cur++ = (uint8_t)(0xC0 | (c >> 6));
+        *cur++ = (uint8_t)(0x80 | (c & 0x3F));
+    }
+    else if (c < 0x10000)
+    {
+        *cur++ = (uint8_t)(0xE0 | (c >> 12));
+        *cur++ = (uint8_t)(0x80 | ((c >> 6) & 0x3F));
+        *cur++ = (uint8_t)(0x80 | (c & 0x3F));
+    }
+    else
+    {
+        *cur++ = (uint8_t)(0xF0 | (c >> 18));
+        *cur++ = (uint8_t)(0x80 | ((c >> 12) & 0x3F));
+        *cur++ = (uint8_t)(0x80 | ((c >> 6) & 0x3F));
+        *cur++ = (uint8_t)(0x80 | (c & 0x3F));
+    }
+    return cur;
+}
+
+/* Latin-1 (including compact ASCII): runs of plain ASCII are copied 8 bytes
+   at a time, the other characters one by one. */
+static uint8_t *write_ucs1(uint8_t *cur, const uint8_t *src, Py_ssize_t len)
+{
+    const uint8_t *end = src + len;
+    while (src < end)
+    {
+        while (end - src >= 8 && !swar_has_string_special(src))
+        {
+            memcpy(cur, src, 8);
+            cur += 8;
+            src += 8;
+        }
+        const uint8_t *stop = end - src > 8 ? src + 8 : end;
+        while (src < stop) cur = write_code_point(cur, *src++);
+    }
+    return cur;
+}
+
+/* UCS2, returns NULL on a surrogate. */
+static uint8_t *write_ucs2(uint8_t *cur, const Py_UCS2 *src, Py_ssize_t len)
+{
+    const Py_UCS2 *end = src + len;
+    while (src < end)
+    {
+        Py_UCS2 c = *src++;
+        if (c >= 0x20 && c < 0x80 && c != '"' && c != '\\')
+        {
+            *cur++ = (uint8_t)c;
+            continue;
+        }
+        if (Py_UNICODE_IS_SURROGATE(c)) return NULL;
+        cur = write_code_point(cur, c);
+    }
+    return cur;
+}
+
+/* UCS4, returns NULL on a surrogate. */
+static uint8_t *write_ucs4(uint8_t *cur, const Py_UCS4 *src, Py_ssize_t len)
+{
+    const Py_UCS4 *end = src + len;
+    while (src < end)
+    {
+        Py_UCS4 c = *src++;
+        if (c >= 0x20 && c < 0x80 && c != '"' && c != '\\')
+        {
+            *cur++ = (uint8_t)c;
+            continue;
+        }
+        if (Py_UNICODE_IS_SURROGATE(c)) return NULL;
+        cur = write_code_point(cur, c);
+    }
+    return cur;
+}
+
+static int write_str(encoder *enc, PyObject *obj)
+{
+#if PY_VERSION_HEX < 0x030C0000
+    if (PyUnicode_READY(obj) < 0) return -1;
+#endif
+    Py_ssize_t len = PyUnicode_GET_LENGTH(obj);
+    /* an escaped control character is the longest, 6 bytes */
+    if (reserve(enc, (size_t)len * 6 + 2) < 0) return -1;
+    uint8_t *cur = enc->cur;
+    *cur++ = '"';
+    switch (PyUnicode_KIND(obj))
+    {
+        case PyUnicode_1BYTE_KIND:
+            cur = write_ucs1(cur, PyUnicode_1BYTE_DATA(obj), len);
+            break;
+        case PyUnicode_2BYTE_KIND:
+            cur = write_ucs2(cur, PyUnicode_2BYTE_DATA(obj), len);
+            break;
+        default:
+            cur = write_ucs4(cur, PyUnicode_4BYTE_DATA(obj), len);
+            break;
+    }
+    if (!cur)
+    {
+        PyErr_SetString(JSONEncodeError, "str is not valid UTF-8: surrogates not allowed");
+        return -1;
+    }
+    *cur++ = '"';
+    enc->cur = cur;
+    return 0;
+}
+
+/*==============================================================================
+ * Scalars
+ *============================================================================*/
+
+/*
+ Convert an int to 64 bits. `*is_unsigned` is set for values above INT64_MAX.
+ Out of range values raise JSONEncodeError, chained from the OverflowError
+ if there was one.
+ */
+static int int_to_u64(PyObject *obj, uint64_t *out, bool *is_unsigned)
+{
+    int overflow;
+    long long val = PyLong_AsLongLongAndOverflow(obj, &overflow);
+    if (!overflow)
+    {
+        if (val == -1 && PyErr_Occurred()) return -1;
+        *out = (uint64_t)val;
+        *is_unsigned = false;
+        return 0;
+    }
+    if (overflow > 0)
+    {
+        unsigned long long uval = PyLong_AsUnsignedLongLong(obj);
+        if (uval == (unsigned long long)-1 && PyErr_Occurred())
+        {
+            PyObject *cause = fetch_exception();
+            PyErr_SetString(JSONEncodeError, "Integer exceeds 64-bit range");
+            return set_cause(cause);
+        }
+        *out = uval;
+        *is_unsigned = true;
+        return 0;
+    }
+    PyErr_SetString(JSONEncodeError, "Integer exceeds 64-bit range");
+    return -1;
+}
+
+static int write_int(encoder *enc, PyObject *obj)
+{
+    uint64_t val;
+    bool is_unsigned;
+    if (int_to_u64(obj, &val, &is_unsigned) < 0) return -1;
+    if (enc->option & PYYJSON_OPT_STRICT_INTEGER)
+    {
+        if (is_unsigned || (int64_t)val > MAX_SAFE_INTEGER || (int64_t)val < -MAX_SAFE_INTEGER)
+        {
+            PyErr_SetString(JSONEncodeError, "Integer exceeds 53-bit range");
+            return -1;
+        }
+    }
+    if (reserve(enc, 21) < 0) return -1;
+    enc->cur = is_unsigned ? pyyjson_write_u64(enc->cur, val) : pyyjson_write_i64(enc->cur, (int64_t)val);
+    return 0;
+}
+
+static int write_float(encoder *enc, PyObject *obj)
+{
+    double val = PyFloat_AS_DOUBLE(obj);
+    /* finite values from FLT_MAX plus half an ulp on round to infinity */
+    if ((enc->option & PYYJSON_OPT_FLOAT32) && fabs(val) >= 0x1.ffffffp127 && !isinf(val))
+    {
+        PyErr_SetString(JSONEncodeError, "Float exceeds float32 range");
+        return -1;
+    }
+    if (reserve(enc, 32) < 0) return -1;
+    if (enc->option & PYYJSON_OPT_FLOAT32) enc->cur = pyyjson_write_f32(enc->cur, (float)val);
+    else enc->cur = pyyjson_write_f64(enc->cur, val);
+    return 0;
+}
+
+static int write_fragment(encoder *enc, PyObject *obj)
+{
+    PyObject *contents = PyyjsonFragment_CONTENTS(obj);
+    const char *data;
+    Py_ssize_t len;
+    if (PyBytes_Check(contents))
+    {
+        data = PyBytes_AS_STRING(contents);
+        len = PyBytes_GET_SIZE(contents);
+    }
+    else if (PyUnicode_Check(contents))
+    {
+        data = PyUnicode_AsUTF8AndSize(contents, &len);
+        if (!data) return str_error();
+    }
+    else
+    {
+        PyErr_SetString(JSONEncodeError, "Fragment contents must be bytes or str");
+        return -1;
+    }
+    return write_raw(enc, data, (size_t)len);
+}
+
+/*==============================================================================
+ * Dates, Times and UUIDs
+ *============================================================================*/
+
+/** Longest text of a datetime, "YYYY-MM-DDTHH:MM:SS.ffffff+HH:MM". */
+#define DATETIME_MAX_LEN 32
+/** Length of the text of a UUID. */
+#define UUID_LEN 36
+
+static int ensure_datetime_api(void)
+{
+    if (!PyDateTimeAPI)
+    {
+        PyDateTime_IMPORT;
+        if (!PyDateTimeAPI) return -1;
+    }
+    return 0;
+}
+
+static char *format_digits(char *cur, int val, int n)
+{
+    for (int i = n - 1; i >= 0; i--)
+    {
+        cur[i] = (char)('0' + val % 10);
+        val /= 10;
+    }
+    return cur + n;
+}
+
+static char *format_ymd(char *cur, int year, int month, int day)
+{
+    cur = format_digits(cur, year, 4);
+    *cur++ = '-';
+    cur = format_digits(cur, month, 2);
+    *cur++ = '-';
+    return format_digits(cur, day, 2);
+}
+
+static char *format_date(char *cur, PyObject *obj)
+{
+    return format_ymd(cur, PyDateTime_GET_YEAR(obj), PyDateTime_GET_MONTH(obj), PyDateTime_GET_DAY(obj));
+}
+
+static char *format_time(char *cur, int hour, int minute, int second, int usec, int option)
+{
+    cur = format_digits(cur, hour, 2);
+    *cur++ = ':';
+    cur = format_digits(cur, minute, 2);
+    *cur++ = ':';
+    cur = format_digits(cur, second, 2);
+    if (usec && !(option & PYYJSON_OPT_OMIT_MICROSECONDS))
+    {
+        *cur++ = '.';
+        cur = format_digits(cur, usec, 6);
+    }
+    return cur;
+}
+
+static char *format_utc(char *cur, int option)
+{
+    if (option & PYYJSON_OPT_UTC_Z)
+    {
+        *cur++ = 'Z';
+        return cur;
+    }
+    memcpy(cur, "+00:00", 6);
+    return cur + 6;
+}
+
+/* Write the UTC offset of an aware datetime, rounded to the closest minute
+   as RFC 3339 asks. Returns NULL with an exception set on failure. */
+static char *format_utc_offset(char *cur, PyObject *obj, int option)
+{
+    PyObject *offset = PyObject_CallMethodObjArgs(obj, str_utcoffset, NULL);
+    if (!offset) return NULL;
+    if (offset == Py_None)
+    {
+        Py_DECREF(offset);
+        return cur;
+    }
+    if (!PyDelta_Check(offset))
+    {
+        Py_DECREF(offset);
+        PyErr_SetString(JSONEncodeError, "datetime.datetime utcoffset() must return a timedelta");
+        return NULL;
+    }
+    long seconds = (long)PyDateTime_DELTA_GET_DAYS(offset) * 86400 + PyDateTime_DELTA_GET_SECONDS(offset);
+    Py_DECREF(offset);
+    if (seconds == 0) return format_utc(cur, option);
+    *cur++ = seconds < 0 ? '-' : '+';
+    long minutes = ((seconds < 0 ? -seconds : seconds) + 30) / 60;
+    cur = format_digits(cur, (int)(minutes / 60), 2);
+    *cur++ = ':';
+    return format_digits(cur, (int)(minutes % 60), 2);
+}
+
+/* Format a `datetime.datetime`, returns the length or -1 with an exception set. */
+static int format_datetime(char *buf, PyObject *obj, int option)
+{
+    char *cur = format_date(buf, obj);
+    *cur++ = 'T';
+    cur = format_time(cur, PyDateTime_DATE_GET_HOUR(obj), PyDateTime_DATE_GET_MINUTE(obj),
+                      PyDateTime_DATE_GET_SECOND(obj), PyDateTime_DATE_GET_MICROSECOND(obj), option);
+    if (((PyDateTime_DateTime *)obj)->hastzinfo)
+    {
+        if (((PyDateTime_DateTime *)obj)->tzinfo == PyDateTime_TimeZone_UTC)
+        {
+            cur = format_utc(cur, option);
+        }
+        else
+        {
+            cur = format_utc_offset(cur, obj, option);
+            if (!cur) return -1;
+        }
+    }
+    else if (option & PYYJSON_OPT_NAIVE_UTC)
+    {
+        cur = format_utc(cur, option);
+    }
+    return (int)(cur - buf);
+}
+
+/* Format a `datetime.time`, returns the length or -1 with an exception set. */
+static int format_time_obj(char *buf, PyObject *obj, int option)
+{
+    if (((PyDateTime_Time *)obj)->hastzinfo)
+    {
+        PyErr_SetString(JSONEncodeError, "datetime.time must not have tzinfo set");
+        return -1;
+    }
+    char *cur = format_time(buf, PyDateTime_TIME_GET_HOUR(obj), PyDateTime_TIME_GET_MINUTE(obj),
+                            PyDateTime_TIME_GET_SECOND(obj), PyDateTime_TIME_GET_MICROSECOND(obj), option);
+    return (int)(cur - buf);
+}
+
+/* Format a `uuid.UUID` in its canonical form, returns UUID_LEN or -1 with an exception set. */
+static int format_uuid(char *buf, PyObject *obj)
+{
+    static const char hex[] = "0123456789abcdef";
+    PyObject *value = PyObject_GetAttr(obj, str_int);
+    if (!value) return -1;
+    PyObject *high = PyNumber_Rshift(value, int_64);
+    uint64_t lo = PyLong_AsUnsignedLongLongMask(value);
+    uint64_t hi = high ? PyLong_AsUnsignedLongLong(high) : 0;
+    Py_DECREF(value);
+    Py_XDECREF(high);
+    if (PyErr_Occurred()) return -1;
+
+    char *cur = buf;
+    for (int i = 0; i < 32; i++)
+    {
+        if (i == 8 || i == 12 || i == 16 || i == 20) *cur++ = '-';
+        uint64_t word = i < 16 ? hi : lo;
+        *cur++ = hex[(word >> ((15 - i % 16) * 4)) & 0xF];
+    }
+    return UUID_LEN;
+}
+
+/* Write a date, time or datetime, `kind` is 'D', 'd' or 't' respectively. */
+static int write_datetime(encoder *enc, PyObject *obj, char kind)
+{
+    if (reserve(enc, DATETIME_MAX_LEN + 2) < 0) return -1;
+    char *buf = (char *)enc->cur + 1;
+    int len;
+    if (kind == 'D') len = format_datetime(buf, obj, enc->option);
+    else if (kind == 'd') len = (int)(format_date(buf, obj) - buf);
+    else len = format_time_obj(buf, obj, enc->option);
+    if (len < 0) return -1;
+    enc->cur[0] = '"';
+    enc->cur[len + 1] = '"';
+    enc->cur += len + 2;
+    return 0;
+}
+
+static int write_uuid(encoder *enc, PyObject *obj)
+{
+    if (reserve(enc, UUID_LEN + 2) < 0) return -1;
+    if (format_uuid((char *)enc->cur + 1, obj) < 0) return -1;
+    enc->cur[0] = '"';
+    enc->cur[UUID_LEN + 1] = '"';
+    enc->cur += UUID_LEN + 2;
+    return 0;
+}
+
+/* Which of datetime ('D'), date ('d') or time ('t') `obj` is exactly, or 0. */
+static char datetime_kind(PyObject *obj)
+{
+    if (PyDateTime_CheckExact(obj)) return 'D';
+    if (PyDate_CheckExact(obj)) return 'd';
+    if (PyTime_CheckExact(obj)) return 't';
+    return 0;
+}
+
+/* Whether `obj` is a member of an enum. Returns -1 with an exception set on failure. */
+static int is_enum_member(PyObject *obj)
+{
+    PyObject *enum_meta = pyyjson_get_enum_meta();
+    if (!enum_meta) return -1;
+    return PyObject_TypeCheck((PyObject *)Py_TYPE(obj), (PyTypeObject *)enum_meta);
+}
+
+/*==============================================================================
+ * Containers
+ *============================================================================*/
+
+
+/* Write a newline and the indent of `depth`, with OPT_INDENT_2. */
+static int write_indent(encoder *enc, int depth)
+{
+    size_t width = (size_t)depth * 2;
+    if (reserve(enc, width + 1) < 0) return -1;
+    *enc->cur++ = '\n';
+    memset(enc->cur, ' ', width);
+    enc->cur += width;
+    return 0;
+}
+
+/* Write a newline and the indent of the current depth, with OPT_INDENT_2. */
+static inline int write_newline(encoder *enc)
+{
+    return write_indent(enc, enc->depth);
+}
+
+/* Write the separator before an item of a container. */
+static inline int begin_item(encoder *enc, bool first)
+{
+    if (!first && write_raw(enc, ",", 1) < 0) return -1;
+    if (enc->option & PYYJSON_OPT_INDENT_2) return write_newline(enc);
+    return 0;
+}
+
+/* Write the separator between a key and its value. */
+static inline int write_colon(encoder *enc)
+{
+    if (enc->option & PYYJSON_OPT_INDENT_2) return write_raw(enc, ": ", 2);
+    return write_raw(enc, ":", 1);
+}
+
+/* Iterate the items of a dict or a FrozenMapping. */
+static inline bool mapping_next(PyObject *obj, Py_ssize_t *pos, PyObject **key, PyObject **value)
+{
+    if (PyyjsonFrozenMapping_Check(obj))
+    {
+        PyyjsonFrozenMappingObject *mapping = (PyyjsonFrozenMappingObject *)obj;
+        if (*pos >= mapping->len) return false;
+        *key = mapping->slots[*pos * 2];
+        *value = mapping->slots[*pos * 2 + 1];
+        (*pos)++;
+        return true;
+    }
+    return PyDict_Next(obj, pos, key, value);
+}
+
+static Py_ssize_t mapping_size(PyObject *obj)
+{
+    if (PyyjsonFrozenMapping_Check(obj)) return ((PyyjsonFrozenMappingObject *)obj)->len;
+    return PyDict_GET_SIZE(obj);
+}
+
+/* Convert a dict key that is not a str, with OPT_NON_STR_KEYS. Returns a new str. */
+static PyObject *key_to_str(encoder *enc, PyObject *key)
+{
+    char buf[64];
+    int len = -1;
+    if (!(enc->option & PYYJSON_OPT_NON_STR_KEYS))
+    {
+        PyErr_SetString(JSONEncodeError, "Dict key must be str");
+        return NULL;
+    }
+    if (PyUnicode_Check(key))
+    {
+        Py_INCREF(key);
+        return key;
+    }
+    if (key == Py_True) return PyUnicode_FromStringAndSize("true", 4);
+    if (key == Py_False) return PyUnicode_FromStringAndSize("false", 5);
+    if (key == Py_None) return PyUnicode_FromStringAndSize("null", 4);
+    if (PyLong_CheckExact(key))
+    {
+        uint64_t val;
+        bool is_unsigned;
+        if (int_to_u64(key, &val, &is_unsigned) < 0) return NULL;
+        uint8_t *end = is_unsigned ? pyyjson_write_u64((uint8_t *)buf, val)
+                                   : pyyjson_write_i64((uint8_t *)buf, (int64_t)val);
+        len = (int)(end - (uint8_t *)buf);
+    }
+    else if (PyFloat_CheckExact(key))
+    {
+        uint8_t *end = pyyjson_write_f64((uint8_t *)buf, PyFloat_AS_DOUBLE(key));
+        len = (int)(end - (uint8_t *)buf);
+    }
+    else
+    {
+        if (ensure_datetime_api() < 0) return NULL;
+        char kind = datetime_kind(key);
+        if (kind == 'D') len = format_datetime(buf, key, enc->option);
+        else if (kind == 'd') len = (int)(format_date(buf, key) - buf);
+        else if (kind == 't') len = format_time_obj(buf, key, enc->option);
+        else
+        {
+            PyObject *type_uuid, *safe_unknown;
+            if (pyyjson_get_uuid_types(&type_uuid, &safe_unknown) < 0) return NULL;
+            if (Py_TYPE(key) == (PyTypeObject *)type_uuid)
+            {
+                len = format_uuid(buf, key);
+            }
+            else
+            {
+                int is_enum = is_enum_member(key);
+                if (is_enum < 0) return NULL;
+                if (is_enum)
+                {
+                    PyObject *value = PyObject_GetAttr(key, str_value);
+                    if (!value) return NULL;
+                    PyObject *ret = key_to_str(enc, value);
+                    Py_DECREF(value);
+                    return ret;
+                }
+                PyErr_SetString(JSONEncodeError, "Dict key must a type serializable with OPT_NON_STR_KEYS");
+                return NULL;
+            }
+        }
+        if (len < 0) return NULL;
+    }
+    return PyUnicode_FromStringAndSize(buf, len);
+}
+
+/*
+ The key cache maps interned str keys to their ready-to-copy `"key":` bytes,
+ so the keys repeated across many dicts (and dataclass field names) are
+ escaped only once. It is direct-mapped by the hash of the str and an entry is
+ valid only for the very object it holds a reference to; a colliding key
+ evicts the entry.
+ */
+
+/** An entry of the key cache. */
+typedef struct key_cache_entry {
+    /** the cached key, owned, NULL if the entry is empty */
+    PyObject *key;
+    Py_ssize_t len;
+    /** `"key":` as written without indent */
+    uint8_t text[PYYJSON_ENCODE_KEY_CACHE_MAX_LEN];
+} key_cache_entry;
+
+/** The key cache shared by all `dumps()` calls, created on first use. */
+static key_cache_entry *key_cache = NULL;
+
+/* Write a str key and its colon, through the key cache if it is interned. */
+static int write_str_key(encoder *enc, PyObject *key)
+{
+    if (!PyUnicode_CHECK_INTERNED(key))
+    {
+        if (write_str(enc, key) < 0) return -1;
+        return write_colon(enc);
+    }
+    if (!key_cache)
+    {
+        key_cache = PyMem_Calloc(PYYJSON_ENCODE_KEY_CACHE_SIZE, sizeof(key_cache_entry));
+        if (!key_cache)
+        {
+            PyErr_NoMemory();
+            return -1;
+        }
+    }
+    /* Room for the escaped key, its colon and indent, reserved before the
+       cache is used: growing may switch or flush the buffer, and a flush may
+       call a `write()` that runs `dumps()` and changes the cache. */
+    if (reserve(enc, (size_t)PyUnicode_GET_LENGTH(key) * 6 + 4) < 0) return -1;
+    /* the hash of an interned str is always computed already */
+    key_cache_entry *entry = &key_cache[(size_t)PyObject_Hash(key) & (PYYJSON_ENCODE_KEY_CACHE_SIZE - 1)];
+    if (entry->key != key)
+    {
+        uint8_t *start = enc->cur;
+        if (write_str(enc, key) < 0) return -1;
+        Py_ssize_t len = enc->cur - start;
+        if (len < PYYJSON_ENCODE_KEY_CACHE_MAX_LEN)
+        {
+            Py_INCREF(key);
+            Py_XSETREF(entry->key, key);
+            memcpy(entry->text, start, (size_t)len);
+            entry->text[len] = ':';
+            entry->len = len + 1;
+        }
+        return write_colon(enc);
+    }
+    memcpy(enc->cur, entry->text, (size_t)entry->len);
+    enc->cur += entry->len;
+    if (enc->option & PYYJSON_OPT_INDENT_2) *enc->cur++ = ' ';
+    return 0;
+}
+
+static int write_key(encoder *enc, PyObject *key)
+{
+    if (PyUnicode_CheckExact(key)) return write_str_key(enc, key);
+    PyObject *str = key_to_str(enc, key);
+    if (!str) return -1;
+    int ret = write_str_key(enc, str);
+    Py_DECREF(str);
+    return ret;
+}
+
+/** A key and value of a dict being sorted, both owned. */
+typedef struct sort_item {
+    PyObject *key;
+    PyObject *value;
+} sort_item;
+
+/* Code point order, which is the order of the UTF-8 bytes. */
+static int sort_item_cmp(const void *a, const void *b)
+{
+    return PyUnicode_Compare(((const sort_item *)a)->key, ((const sort_item *)b)->key);
+}
+
+static void sort_items_free(sort_item *items, Py_ssize_t count)
+{
+    for (Py_ssize_t i = 0; i < count; i++)
+    {
+        Py_DECREF(items[i].key);
+        Py_DECREF(items[i].value);
+    }
+    PyMem_Free(items);
+}
+
+/* The items of a dict or FrozenMapping with their keys converted to str and
+   sorted, for OPT_SORT_KEYS. */
+static sort_item *sort_mapping(encoder *enc, PyObject *obj, Py_ssize_t size, Py_ssize_t *count)
+{
+    sort_item *items = PyMem_Malloc((size_t)size * sizeof(sort_item));
+    if (!items) return (sort_item *)PyErr_NoMemory();
+    Py_ssize_t n = 0, pos = 0;
+    PyObject *key, *value;
+    while (n < size && mapping_next(obj, &pos, &key, &value))
+    {
+        if (PyUnicode_CheckExact(key))
+        {
+            Py_INCREF(key);
+        }
+        else
+        {
+            key = key_to_str(enc, key);
+            if (!key)
+            {
+                sort_items_free(items, n);
+                return NULL;
+            }
+        }
+        Py_INCREF(value);
+        items[n].key = key;
+        items[n].value = value;
+        n++;
+    }
+    qsort(items, (size_t)n, sizeof(sort_item), sort_item_cmp);
+    *count = n;
+    return items;
+}
+
+/* Whether a str starts with an underscore, such fields are not serialized. */
+static inline bool is_private_name(PyObject *name)
+{
+    return PyUnicode_GET_LENGTH(name) && PyUnicode_READ_CHAR(name, 0) == '_';
+}
+
+/*
+ Dataclasses are written by a plan compiled once per class: the fields to
+ write with their `"name":` already escaped, the slot offsets of `__slots__`
+ fields, and whether instances are written from their `__dict__`. The plans
+ are cached direct-mapped by type; a plan holds a reference to its class and
+ is valid as long as the class keeps the `tp_version_tag` it had, which
+ CPython resets whenever a class or one of its bases is modified. Open
+ containers hold a reference to their plan, so an evicted plan lives until
+ they are written.
+ */
+
+/** A field of a dataclass plan. */
+typedef struct dataclass_field_plan {
+    /** the field name, owned */
+    PyObject *name;
+    /** `"name":` as written without indent, owned bytes */
+    PyObject *text;
+    /** slot offset in the instance, 0 to get the attribute */
+    Py_ssize_t offset;
+} dataclass_field_plan;
+
+/** How the instances of a dataclass are written. */
+typedef struct dataclass_plan {
+    /** the dataclass, owned */
+    PyTypeObject *type;
+    /** `tp_version_tag` of `type` when the plan was compiled */
+    unsigned int version_tag;
+    /** references from the cache and from open containers */
+    Py_ssize_t refs;
+    /** whether instances are written from their `__dict__` */
+    bool use_dict;
+    Py_ssize_t field_count;
+    /** the fields to write, in declaration order */
+    dataclass_field_plan *fields;
+} dataclass_plan;
+
+/** The plan cache shared by all `dumps()` calls, created on first use. */
+static dataclass_plan **dataclass_plans = NULL;
+
+static void dataclass_plan_decref(dataclass_plan *plan)
+{
+    if (--plan->refs) return;
+    for (Py_ssize_t i = 0; i < plan->field_count; i++)
+    {
+        Py_XDECREF(plan->fields[i].name);
+        Py_XDECREF(plan->fields[i].text);
+    }
+    PyMem_Free(plan->fields);
+    Py_DECREF(plan->type);
+    PyMem_Free(plan);
+}
+
+static inline dataclass_plan **dataclass_plan_slot(PyTypeObject *type)
+{
+    return &dataclass_plans[((uintptr_t)type >> 4) & (PYYJSON_DATACLASS_PLAN_CACHE_SIZE - 1)];
+}
+
+/* The cached plan of `type` if it is up to date, or NULL. */
+static inline dataclass_plan *cached_dataclass_plan(PyTypeObject *type)
+{
+    if (!dataclass_plans) return NULL;
+    dataclass_plan *plan = *dataclass_plan_slot(type);
+    if (!plan || plan->type != type) return NULL;
+    if (!PyType_HasFeature(type, Py_TPFLAGS_VALID_VERSION_TAG) || type->tp_version_tag != plan->version_tag) return NULL;
+    return plan;
+}
+
+/* Compile a field of a dataclass plan, returns 0 if it is not written. */
+static int dataclass_field_compile(dataclass_plan *plan, PyObject *name, PyObject *field)
+{
+    if (!PyUnicode_Check(name) || is_private_name(name)) return 0;
+    PyObject *field_type = PyObject_GetAttr(field, str_field_type);
+    if (!field_type) return -1;
+    Py_DECREF(field_type);
+    /* leave out ClassVar and InitVar pseudo-fields */
+    if (field_type != pyyjson_get_dataclass_field_marker()) return 0;
+
+    dataclass_field_plan *fp = &plan->fields[plan->field_count];
+    encoder enc = {0};
+    if (encoder_init(&enc) < 0) return -1;
+    if (write_str(&enc, name) < 0 || write_raw(&enc, ":", 1) < 0)
+    {
+        Py_XDECREF(enc.bytes);
+        return -1;
+    }
+    fp->text = encoder_finish(&enc);
+    if (!fp->text) return -1;
+    Py_INCREF(name);
+    fp->name = name;
+    plan->field_count++;
+
+    /* slots are read by offset, unless attribute access is customized */
+    PyTypeObject *type = plan->type;
+    PyObject *descr = type->tp_getattro == PyObject_GenericGetAttr ? _PyType_Lookup(type, name) : NULL;
+    if (descr && Py_IS_TYPE(descr, &PyMemberDescr_Type) &&
+        ((PyMemberDescrObject *)descr)->d_member->type == T_OBJECT_EX &&
+        PyType_IsSubtype(type, PyDescr_TYPE(descr)))
+    {
+        fp->offset = ((PyMemberDescrObject *)descr)->d_member->offset;
+    }
+    return 1;
+}
+
+static dataclass_plan *dataclass_plan_compile(PyObject *obj)
+{
+    PyTypeObject *type = Py_TYPE(obj);
+    PyObject *fields = PyObject_GetAttr((PyObject *)type, str_dataclass_fields);
+    if (!fields) return NULL;
+    if (!PyDict_Check(fields))
+    {
+        Py_DECREF(fields);
+        type_error(obj);
+        return NULL;
+    }
+    if (!pyyjson_get_dataclass_field_marker())
+    {
+        Py_DECREF(fields);
+        return NULL;
+    }
+    dataclass_plan *plan = PyMem_Calloc(1, sizeof(dataclass_plan));
+    Py_ssize_t count = PyDict_GET_SIZE(fields);
+    if (plan) plan->fields = PyMem_Calloc(count ? count : 1, sizeof(dataclass_field_plan));
+    if (!plan || !plan->fields)
+    {
+        PyMem_Free(plan);
+        Py_DECREF(fields);
+        return (dataclass_plan *)PyErr_NoMemory();
+    }
+    Py_INCREF(type);
+    plan->type = type;
+    plan->refs = 1;
+
+    Py_ssize_t pos = 0;
+    PyObject *name, *field;
+    int has_slots = type->tp_dict ? PyDict_Contains(type->tp_dict, str_slots) : 0;
+    plan->use_dict = has_slots == 0;
+    while (has_slots >= 0 && PyDict_Next(fields, &pos, &name, &field))
+    {
+        /* `count` guards against a dict changed by the attribute lookups */
+        if (plan->field_count == count || dataclass_field_compile(plan, name, field) < 0) has_slots = -1;
+    }
+    Py_DECREF(fields);
+    if (has_slots < 0)
+    {
+        if (!PyErr_Occurred()) PyErr_SetString(PyExc_RuntimeError, "__dataclass_fields__ changed size during iteration");
+        dataclass_plan_decref(plan);
+        return NULL;
+    }
+    /* looking up a name assigns the class a version tag if it has none */
+    _PyType_Lookup(type, str_dataclass_fields);
+    plan->version_tag = type->tp_version_tag;
+    return plan;
+}
+
+/* The plan of the class of a dataclass instance, compiled and cached if it is
+   missing or out of date. Returns a borrowed reference. */
+static dataclass_plan *get_dataclass_plan(PyObject *obj)
+{
+    dataclass_plan *plan = cached_dataclass_plan(Py_TYPE(obj));
+    if (plan) return plan;
+    if (!dataclass_plans)
+    {
+        dataclass_plans = PyMem_Calloc(PYYJSON_DATACLASS_PLAN_CACHE_SIZE, sizeof(dataclass_plan *));
+        if (!dataclass_plans) return (dataclass_plan *)PyErr_NoMemory();
+    }
+    plan = dataclass_plan_compile(obj);
+    if (!plan) return NULL;
+    dataclass_plan **slot = dataclass_plan_slot(Py_TYPE(obj));
+    if (*slot) dataclass_plan_decref(*slot);
+    *slot = plan;
+    return plan;
+}
+
+/*
+ Containers are written without recursion: each open container is a frame on
+ the encoder's stack, and `encode_run()` writes the next item of the innermost
+ one until the stack is empty. This lets `dumps_iter()` stop between any two
+ items and resume later.
+ */
+
+typedef enum frame_kind {
+    FRAME_LIST,
+    FRAME_TUPLE,
+    /** a dict or FrozenMapping */
+    FRAME_MAPPING,
+    /** a dict or FrozenMapping with OPT_SORT_KEYS */
+    FRAME_SORTED,
+    /** a dataclass written from its `__dict__` */
+    FRAME_DATACLASS_DICT,
+    /** a dataclass written by the fields of its plan */
+    FRAME_DATACLASS_FIELDS,
+} frame_kind;
+
+/** A container being written. */
+struct encode_frame {
+    /** the container, owned */
+    PyObject *obj;
+    /** the `__dict__` of FRAME_DATACLASS_DICT, owned */
+    PyObject *dict;
+    /** the plan of FRAME_DATACLASS_FIELDS, a reference */
+    dataclass_plan *plan;
+    /** the items of FRAME_SORTED, owned */
+    sort_item *items;
+    /** number of `items` */
+    Py_ssize_t size;
+    /** index or `PyDict_Next()` position of the next item */
+    Py_ssize_t pos;
+    /** number of items written */
+    Py_ssize_t count;
+    frame_kind kind;
+    /** number of `default` calls that led to the container */
+    int default_calls;
+};
+
+static void frame_release(encode_frame *frame)
+{
+    Py_CLEAR(frame->obj);
+    Py_CLEAR(frame->dict);
+    if (frame->plan) dataclass_plan_decref(frame->plan);
+    frame->plan = NULL;
+    if (frame->items) sort_items_free(frame->items, frame->size);
+    frame->items = NULL;
+}
+
+/* Drop the open containers, after an error. */
+static void encoder_clear_frames(encoder *enc)
+{
+    while (enc->depth > 0) frame_release(&enc->frames[--enc->depth]);
+}
+
+/* Open a container, taking a reference to `obj` and the ownership of `dict`
+   and `items` even on failure. */
+static int push_frame(encoder *enc, frame_kind kind, PyObject *obj, PyObject *dict, sort_item *items,
+                      Py_ssize_t size, int default_calls)
+{
+    if (enc->depth == PYYJSON_ENCODE_DEPTH_LIMIT)
+    {
+        Py_XDECREF(dict);
+        if (items) sort_items_free(items, size);
+        PyErr_SetString(JSONEncodeError, "Recursion limit reached");
+        return -1;
+    }
+    encode_frame *frame = &enc->frames[enc->depth++];
+    Py_INCREF(obj);
+    frame->obj = obj;
+    frame->dict = dict;
+    frame->plan = NULL;
+    frame->items = items;
+    frame->size = size;
+    frame->pos = 0;
+    frame->count = 0;
+    frame->kind = kind;
+    frame->default_calls = default_calls;
+    return write_raw(enc, kind == FRAME_LIST || kind == FRAME_TUPLE ? "[" : "{", 1);
+}
+
+/* Close the innermost container. */
+static int pop_frame(encoder *enc)
+{
+    encode_frame *frame = &enc->frames[--enc->depth];
+    bool is_array = frame->kind == FRAME_LIST || frame->kind == FRAME_TUPLE;
+    bool newline = frame->count && (enc->option & PYYJSON_OPT_INDENT_2);
+    frame_release(frame);
+    if (newline && write_newline(enc) < 0) return -1;
+    return write_raw(enc, is_array ? "]" : "}", 1);
+}
+
+/*
+ Write the separator and key of the next item of a container. Returns 1 and
+ a new reference to the value, 0 if there are no more items or -1 on error.
+ */
+static int frame_next(encoder *enc, encode_frame *frame, PyObject **value)
+{
+    PyObject *key, *item;
+    int ret;
+    switch (frame->kind)
+    {
+        case FRAME_LIST:
+            /* `default` may change a list while it is written */
+            if (frame->pos >= PyList_GET_SIZE(frame->obj)) return 0;
+            *value = PyList_GET_ITEM(frame->obj, frame->pos);
+            frame->pos++;
+            Py_INCREF(*value);
+            ret = begin_item(enc, frame->count++ == 0);
+            break;
+        case FRAME_TUPLE:
+            if (frame->pos >= PyTuple_GET_SIZE(frame->obj)) return 0;
+            *value = PyTuple_GET_ITEM(frame->obj, frame->pos);
+            frame->pos++;
+            Py_INCREF(*value);
+            ret = begin_item(enc, frame->count++ == 0);
+            break;
+        case FRAME_MAPPING:
+            if (!mapping_next(frame->obj, &frame->pos, &key, value)) return 0;
+            Py_INCREF(key);
+            Py_INCREF(*value);
+            ret = begin_item(enc, frame->count++ == 0);
+            if (ret == 0) ret = write_key(enc, key);
+            Py_DECREF(key);
+            break;
+        case FRAME_SORTED:
+            if (frame->pos >= frame->size) return 0;
+            key = frame->items[frame->pos].key;
+            *value = frame->items[frame->pos].value;
+            frame->pos++;
+            Py_INCREF(*value);
+            ret = begin_item(enc, frame->count++ == 0);
+            if (ret == 0) ret = write_str_key(enc, key);
+            break;
+        case FRAME_DATACLASS_DICT:
+            do
+            {
+                if (!PyDict_Next(frame->dict, &frame->pos, &key, &item)) return 0;
+            } while (!PyUnicode_Check(key) || is_private_name(key));
+            Py_INCREF(item);
+            *value = item;
+            Py_INCREF(key);
+            ret = begin_item(enc, frame->count++ == 0);
+            if (ret == 0) ret = write_str_key(enc, key);
+            Py_DECREF(key);
+            break;
+        default:
+        {
+            if (frame->pos >= frame->plan->field_count) return 0;
+            dataclass_field_plan *field = &frame->plan->fields[frame->pos++];
+            *value = field->offset ? *(PyObject **)((char *)frame->obj + field->offset) : NULL;
+            /* an unset slot raises the AttributeError of a lookup */
+            if (*value) Py_INCREF(*value);
+            else *value = PyObject_GetAttr(frame->obj, field->name);
+            if (!*value) return -1;
+            ret = begin_item(enc, frame->count++ == 0);
+            if (ret == 0) ret = write_raw(enc, PyBytes_AS_STRING(field->text), (size_t)PyBytes_GET_SIZE(field->text));
+            if (ret == 0 && (enc->option & PYYJSON_OPT_INDENT_2)) ret = write_raw(enc, " ", 1);
+            break;
+        }
+    }
+    if (ret < 0)
+    {
+        Py_DECREF(*value);
+        return -1;
+    }
+    return 1;
+}
+
+static int open_list(encoder *enc, PyObject *obj, int default_calls)
+{
+    bool is_list = PyList_Check(obj);
+    if ((is_list ? PyList_GET_SIZE(obj) : PyTuple_GET_SIZE(obj)) == 0) return write_raw(enc, "[]", 2);
+    return push_frame(enc, is_list ? FRAME_LIST : FRAME_TUPLE, obj, NULL, NULL, 0, default_calls);
+}
+
+/* Open a dict or a FrozenMapping. */
+static int open_dict(encoder *enc, PyObject *obj, int default_calls)
+{
+    Py_ssize_t size = mapping_size(obj);
+    if (size == 0) return write_raw(enc, "{}", 2);
+    if (!(enc->option & PYYJSON_OPT_SORT_KEYS)) return push_frame(enc, FRAME_MAPPING, obj, NULL, NULL, 0, default_calls);
+    Py_ssize_t count;
+    sort_item *items = sort_mapping(enc, obj, size, &count);
+    if (!items) return -1;
+    return push_frame(enc, FRAME_SORTED, obj, NULL, items, count, default_calls);
+}
+
+/*
+ Open a dataclass instance, given the plan of its class. Instances with a
+ `__dict__` and no `__slots__` are written from their `__dict__`, others by
+ the fields of the plan.
+ */
+static int open_dataclass(encoder *enc, PyObject *obj, dataclass_plan *plan, int default_calls)
+{
+    if (plan->use_dict)
+    {
+        PyObject *dict = PyObject_GenericGetDict(obj, NULL);
+        if (dict) return push_frame(enc, FRAME_DATACLASS_DICT, obj, dict, NULL, 0, default_calls);
+        PyErr_Clear();
+    }
+    if (plan->field_count == 0) return write_raw(enc, "{}", 2);
+    /* a reference first, writing `{` may flush to a `write()` that evicts the plan */
+    plan->refs++;
+    if (push_frame(enc, FRAME_DATACLASS_FIELDS, obj, NULL, NULL, 0, default_calls) < 0)
+    {
+        dataclass_plan_decref(plan);
+        return -1;
+    }
+    enc->frames[enc->depth - 1].plan = plan;
+    return 0;
+}
+
+/*==============================================================================
+ * NumPy
+ *============================================================================*/
+
+/*
+ Arrays and scalars are read through `__array_struct__`, the C side of the
+ numpy array interface, so numpy is needed neither to build nor to import
+ pyyjson. Rows of numbers are written in blocks, large arrays with the GIL
+ released, and all arrays are walked by their strides, so views need no copy.
+ */
+
+/** `PyArrayInterface` of the numpy array interface. */
+typedef struct numpy_array_interface {
+    /** always 2 */
+    int two;
+    int nd;
+    /** 'b', 'i', 'u', 'f', 'M' and others */
+    char typekind;
+    int itemsize;
+    int flags;
+    Py_intptr_t *shape;
+    Py_intptr_t *strides;
+    void *data;
+    PyObject *descr;
+} numpy_array_interface;
+
+/* `flags` of the array interface */
+#define NUMPY_C_CONTIGUOUS 0x0001
+#define NUMPY_F_CONTIGUOUS 0x0002
+#define NUMPY_NOTSWAPPED 0x0200
+
+/** Number of items written between two checks of the buffer size. */
+#define NUMPY_BLOCK_ITEMS 1024
+/** Arrays of at least this many numbers are written with the GIL released. */
+#define NUMPY_ALLOW_THREADS_MIN 16384
+
+typedef enum numpy_kind {
+    NUMPY_BOOL,
+    NUMPY_INT8,
+    NUMPY_INT16,
+    NUMPY_INT32,
+    NUMPY_INT64,
+    NUMPY_UINT8,
+    NUMPY_UINT16,
+    NUMPY_UINT32,
+    NUMPY_UINT64,
+    NUMPY_FLOAT16,
+    NUMPY_FLOAT32,
+    NUMPY_FLOAT64,
+    NUMPY_DATETIME64,
+} numpy_kind;
+
+/** Units of `numpy.datetime64`, the supported ones first. */
+typedef enum numpy_unit {
+    UNIT_YEAR,
+    UNIT_MONTH,
+    UNIT_WEEK,
+    UNIT_DAY,
+    UNIT_HOUR,
+    UNIT_MINUTE,
+    UNIT_SECOND,
+    UNIT_MILLISECOND,
+    UNIT_MICROSECOND,
+    UNIT_NANOSECOND,
+    UNIT_SUPPORTED,
+} numpy_unit;
+
+static const struct {
+    const char *code;
+    const char *name;
+} numpy_units[] = {
+    {"Y", "years"},        {"M", "months"},        {"W", "weeks"},         {"D", "days"},
+    {"h", "hours"},        {"m", "minutes"},       {"s", "seconds"},       {"ms", "milliseconds"},
+    {"us", "microseconds"}, {"ns", "nanoseconds"}, {"ps", "picoseconds"}, {"fs", "femtoseconds"},
+    {"as", "attoseconds"},
+};
+
+/** Ticks of the units from hours to nanoseconds in a day. */
+static const int64_t numpy_ticks_per_day[] = {
+    24, 1440, 86400, 86400000LL, 86400000000LL, 86400000000000LL,
+};
+
+/** Days from 1970-01-01 to 0001-01-01 and to 9999-12-31. */
+#define NUMPY_MIN_DAYS (-719162)
+#define NUMPY_MAX_DAYS 2932896
+
+/** A numpy array or scalar being written. */
+typedef struct numpy_view {
+    const numpy_array_interface *arr;
+    numpy_kind kind;
+    /** unit of NUMPY_DATETIME64 */
+    numpy_unit unit;
+    /** longest text of an item */
+    size_t item_len;
+    /** whether rows are written with the GIL released */
+    bool allow_threads;
+} numpy_view;
+
+/* The kind of the items of an array, returns -1 if they are not supported. */
+static int numpy_kind_of(const numpy_array_interface *arr, numpy_kind *kind)
+{
+    int size = arr->itemsize;
+    int index = size == 1 ? 0 : size == 2 ? 1 : size == 4 ? 2 : size == 8 ? 3 : -1;
+    if (index < 0) return -1;
+    switch (arr->typekind)
+    {
+        case 'b':
+            if (size != 1) return -1;
+            *kind = NUMPY_BOOL;
+            return 0;
+        case 'i':
+            *kind = (numpy_kind)(NUMPY_INT8 + index);
+            return 0;
+        case 'u':
+            *kind = (numpy_kind)(NUMPY_UINT8 + index);
+            return 0;
+        case 'f':
+            if (size == 1) return -1;
+            *kind = (numpy_kind)(NUMPY_FLOAT16 + index - 1);
+            return 0;
+        case 'M':
+            if (size != 8) return -1;
+            *kind = NUMPY_DATETIME64;
+            return 0;
+        default:
+            return -1;
+    }
+}
+
+/* Read the unit of a datetime64 array or scalar from its `dtype.str`, such as
+   "<M8[ns]". Returns -1 with an exception set if it is not supported. */
+static int numpy_unit_of(PyObject *obj, numpy_unit *unit)
+{
+    PyObject *dtype = PyObject_GetAttr(obj, str_dtype);
+    if (!dtype) return -1;
+    PyObject *text = PyObject_GetAttr(dtype, str_str);
+    Py_DECREF(dtype);
+    if (!text) return -1;
+    const char *descr = PyUnicode_Check(text) ? PyUnicode_AsUTF8(text) : NULL;
+    if (!descr)
+    {
+        Py_DECREF(text);
+        if (!PyErr_Occurred()) PyErr_SetString(JSONEncodeError, "numpy dtype.str must be a str");
+        return -1;
+    }
+    const char *code = strchr(descr, '[');
+    size_t len = code ? strcspn(++code, "]") : 0;
+    for (size_t i = 0; code && i < sizeof(numpy_units) / sizeof(numpy_units[0]); i++)
+    {
+        if (strlen(numpy_units[i].code) != len || strncmp(code, numpy_units[i].code, len)) continue;
+        if (i < UNIT_SUPPORTED)
+        {
+            Py_DECREF(text);
+            *unit = (numpy_unit)i;
+            return 0;
+        }
+        descr = numpy_units[i].name;
+        break;
+    }
+    PyErr_Format(JSONEncodeError, "unsupported numpy.datetime64 unit: %s", descr);
+    Py_DECREF(text);
+    return -1;
+}
+
+static int numpy_nat_error(void)
+{
+    PyErr_SetString(JSONEncodeError, "numpy.datetime64 is NaT");
+    return -1;
+}
+
+static inline int64_t floor_div(int64_t a, int64_t b, int64_t *rem)
+{
+    int64_t q = a / b;
+    int64_t r = a % b;
+    if (r < 0)
+    {
+        q--;
+        r += b;
+    }
+    *rem = r;
+    return q;
+}
+
+/* Format a datetime64 as a naive datetime, returns the length or -1 with an
+   exception set. */
+static int format_datetime64(char *buf, int64_t val, numpy_unit unit, int option)
+{
+    if (val == INT64_MIN) return numpy_nat_error();
+    int64_t days, rem, usec = 0;
+    int year, month, day;
+    switch (unit)
+    {
+        case UNIT_YEAR:
+            if (val < 1 - 1970 || val > 9999 - 1970) goto out_of_range;
+            year = (int)(1970 + val);
+            month = day = 1;
+            break;
+        case UNIT_MONTH:
+            days = floor_div(val, 12, &rem);
+            if (days < 1 - 1970 || days > 9999 - 1970) goto out_of_range;
+            year = (int)(1970 + days);
+            month = (int)rem + 1;
+            day = 1;
+            break;
+        default:
+            if (unit == UNIT_WEEK)
+            {
+                if (val < NUMPY_MIN_DAYS / 7 - 1 || val > NUMPY_MAX_DAYS / 7 + 1) goto out_of_range;
+                days = val * 7;
+            }
+            else if (unit == UNIT_DAY)
+            {
+                days = val;
+            }
+            else
+            {
+                days = floor_div(val, numpy_ticks_per_day[unit - UNIT_HOUR], &rem);
+                switch (unit)
+                {
+                    case UNIT_HOUR: usec = rem * 3600000000LL; break;
+                    case UNIT_MINUTE: usec = rem * 60000000LL; break;
+                    case UNIT_SECOND: usec = rem * 1000000LL; break;
+                    case UNIT_MILLISECOND: usec = rem * 1000LL; break;
+                    case UNIT_MICROSECOND: usec = rem; break;
+                    default: usec = rem / 1000; break;
+                }
+            }
+            if (days < NUMPY_MIN_DAYS || days > NUMPY_MAX_DAYS) goto out_of_range;
+            /* civil_from_days() of Howard Hinnant's date algorithms */
+            int64_t z = days + 719468;
+            int64_t era = (z >= 0 ? z : z - 146096) / 146097;
+            int64_t doe = z - era * 146097;
+            int64_t yoe = (doe - doe / 1460 + doe / 36524 - doe / 146096) / 365;
+            int64_t doy = doe - (365 * yoe + yoe / 4 - yoe / 100);
+            int64_t mp = (5 * doy + 2) / 153;
+            day = (int)(doy - (153 * mp + 2) / 5 + 1);
+            month = (int)(mp < 10 ? mp + 3 : mp - 9);
+            year = (int)(yoe + era * 400 + (month <= 2));
+            break;
+    }
+    char *cur = format_ymd(buf, year, month, day);
+    *cur++ = 'T';
+    int seconds = (int)(usec / 1000000);
+    cur = format_time(cur, seconds / 3600, seconds / 60 % 60, seconds % 60, (int)(usec % 1000000), option);
+    if (option & PYYJSON_OPT_NAIVE_UTC) cur = format_utc(cur, option);
+    return (int)(cur - buf);
+
+out_of_range:
+    PyErr_SetString(JSONEncodeError, "numpy.datetime64 is out of the range of datetime.datetime");
+    return -1;
+}
+
+/* Convert the bits of a float16 to a float. */
+static inline float half_to_float(uint16_t bits)
+{
+    uint32_t sign = (uint32_t)(bits & 0x8000) << 16;
+    uint32_t exp = (bits >> 10) & 0x1F;
+    uint32_t mant = bits & 0x3FF;
+    uint32_t word;
+    if (exp == 0x1F)
+    {
+        word = sign | 0x7F800000 | (mant << 13);
+    }
+    else if (exp)
+    {
+        word = sign | ((exp + 112) << 23) | (mant << 13);
+    }
+    else if (!mant)
+    {
+        word = sign;
+    }
+    else
+    {
+        /* subnormal, normalized as a float */
+        exp = 113;
+        while (!(mant & 0x400))
+        {
+            mant <<= 1;
+            exp--;
+        }
+        word = sign | (exp << 23) | ((mant & 0x3FF) << 13);
+    }
+    float val;
+    memcpy(&val, &word, sizeof(val));
+    return val;
+}
+
+/* Write the separator before an item of a row, `indent` is -1 without OPT_INDENT_2. */
+static inline uint8_t *write_numpy_sep(uint8_t *cur, bool first, int indent)
+{
+    if (!first) *cur++ = ',';
+    if (indent >= 0)
+    {
+        *cur++ = '\n';
+        memset(cur, ' ', (size_t)indent);
+        cur += indent;
+    }
+    return cur;
+}
+
+static inline uint8_t *write_bool(uint8_t *cur, bool val)
+{
+    if (val)
+    {
+        memcpy(cur, "true", 4);
+        return cur + 4;
+    }
+    memcpy(cur, "false", 5);
+    return cur + 5;
+}
+
+#define NUMPY_WRITE_ITEMS(type, write)                           \
+    for (Py_ssize_t i = 0; i < count; i++, data += stride)       \
+    {                                                            \
+        type val;                                                \
+        memcpy(&val, data, sizeof(val));                         \
+        cur = write_numpy_sep(cur, first && i == 0, indent);     \
+        cur = write;                                             \
+    }                                                            \
+    break
+
+/*
+ Write `count` numbers `stride` bytes apart. The caller reserves room for
+ them; nothing here touches Python objects, so it runs without the GIL.
+ */
+static uint8_t *write_numpy_numbers(uint8_t *cur, numpy_kind kind, const char *data, Py_ssize_t count,
+                                    Py_ssize_t stride, bool first, int indent)
+{
+    switch (kind)
+    {
+        case NUMPY_BOOL: NUMPY_WRITE_ITEMS(uint8_t, write_bool(cur, val != 0));
+        case NUMPY_INT8: NUMPY_WRITE_ITEMS(int8_t, pyyjson_write_i64(cur, val));
+        case NUMPY_INT16: NUMPY_WRITE_ITEMS(int16_t, pyyjson_write_i64(cur, val));
+        case NUMPY_INT32: NUMPY_WRITE_ITEMS(int32_t, pyyjson_write_i64(cur, val));
+        case NUMPY_INT64: NUMPY_WRITE_ITEMS(int64_t, pyyjson_write_i64(cur, val));
+        case NUMPY_UINT8: NUMPY_WRITE_ITEMS(uint8_t, pyyjson_write_u64(cur, val));
+        case NUMPY_UINT16: NUMPY_WRITE_ITEMS(uint16_t, pyyjson_write_u64(cur, val));
+        case NUMPY_UINT32: NUMPY_WRITE_ITEMS(uint32_t, pyyjson_write_u64(cur, val));
+        case NUMPY_UINT64: NUMPY_WRITE_ITEMS(uint64_t, pyyjson_write_u64(cur, val));
+        case NUMPY_FLOAT16: NUMPY_WRITE_ITEMS(uint16_t, pyyjson_write_f32(cur, half_to_float(val)));
+        case NUMPY_FLOAT32: NUMPY_WRITE_ITEMS(float, pyyjson_write_f32(cur, val));
+        case NUMPY_FLOAT64: NUMPY_WRITE_ITEMS(double, pyyjson_write_f64(cur, val));
+        default: break;
+    }
+    return cur;
+}
+
+#undef NUMPY_WRITE_ITEMS
+
+/* Write `count` items `stride` bytes apart, the caller reserves room for them. */
+static int write_numpy_items(encoder *enc, const numpy_view *view, const char *data, Py_ssize_t count,
+                             Py_ssize_t stride, bool first, int indent)
+{
+    if (view->kind != NUMPY_DATETIME64)
+    {
+        if (!view->allow_threads)
+        {
+            enc->cur = write_numpy_numbers(enc->cur, view->kind, data, count, stride, first, indent);
+            return 0;
+        }
+        uint8_t *cur = enc->cur;
+        Py_BEGIN_ALLOW_THREADS
+        cur = write_numpy_numbers(cur, view->kind, data, count, stride, first, indent);
+        Py_END_ALLOW_THREADS
+        enc->cur = cur;
+        return 0;
+    }
+    for (Py_ssize_t i = 0; i < count; i++, data += stride)
+    {
+        int64_t val;
+        memcpy(&val, data, sizeof(val));
+        enc->cur = write_numpy_sep(enc->cur, first && i == 0, indent);
+        int len = format_datetime64((char *)enc->cur + 1, val, view->unit, enc->option);
+        if (len < 0) return -1;
+        enc->cur[0] = '"';
+        enc->cur[len + 1] = '"';
+        enc->cur += len + 2;
+    }
+    return 0;
+}
+
+/* Write the items of the innermost dimension, nested `depth` deep. */
+static int write_numpy_row(encoder *enc, const numpy_view *view, const char *data, Py_ssize_t count,
+                           Py_ssize_t stride, int depth)
+{
+    int indent = (enc->option & PYYJSON_OPT_INDENT_2) ? depth * 2 : -1;
+    size_t item_len = view->item_len + 1 + (size_t)(indent + 1);
+    for (Py_ssize_t i = 0; i < count; i += NUMPY_BLOCK_ITEMS)
+    {
+        Py_ssize_t n = count - i < NUMPY_BLOCK_ITEMS ? count - i : NUMPY_BLOCK_ITEMS;
+        if (reserve(enc, (size_t)n * item_len) < 0) return -1;
+        if (write_numpy_items(enc, view, data, n, stride, i == 0, indent) < 0) return -1;
+        data += n * stride;
+    }
+    return 0;
+}
+
+/* Write dimension `dim` of an array from `data`, as a list nested `depth` deep. */
+static int write_numpy_dim(encoder *enc, const numpy_view *view, int dim, const char *data, int depth)
+{
+    const numpy_array_interface *arr = view->arr;
+    Py_ssize_t count = arr->shape[dim];
+    Py_ssize_t stride = arr->strides[dim];
+    bool indent = enc->option & PYYJSON_OPT_INDENT_2;
+    if (count == 0) return write_raw(enc, "[]", 2);
+    if (write_raw(enc, "[", 1) < 0) return -1;
+    if (dim == arr->nd - 1)
+    {
+        if (write_numpy_row(enc, view, data, count, stride, depth + 1) < 0) return -1;
+    }
+    else
+    {
+        for (Py_ssize_t i = 0; i < count; i++, data += stride)
+        {
+            if (i && write_raw(enc, ",", 1) < 0) return -1;
+            if (indent && write_indent(enc, depth + 1) < 0) return -1;
+            if (write_numpy_dim(enc, view, dim + 1, data, depth + 1) < 0) return -1;
+        }
+    }
+    if (indent && write_indent(enc, depth) < 0) return -1;
+    return write_raw(enc, "]", 1);
+}
+
+static int numpy_view_init(numpy_view *view, PyObject *obj, const numpy_array_interface *arr)
+{
+    view->arr = arr;
+    if (numpy_kind_of(arr, &view->kind) < 0) return 0;
+    switch (view->kind)
+    {
+        case NUMPY_BOOL: view->item_len = 5; break;
+        case NUMPY_FLOAT16:
+        case NUMPY_FLOAT32:
+        case NUMPY_FLOAT64: view->item_len = 32; break;
+        case NUMPY_DATETIME64: view->item_len = DATETIME_MAX_LEN + 2; break;
+        default: view->item_len = 21; break;
+    }
+    view->allow_threads = false;
+    if (view->kind == NUMPY_DATETIME64 && numpy_unit_of(obj, &view->unit) < 0) return -1;
+    return 1;
+}
+
+/* An array that cannot be written goes to `default`, or raises `msg`. */
+static int numpy_unsupported(encoder *enc, const char *msg)
+{
+    if (enc->default_func) return 0;
+    PyErr_SetString(JSONEncodeError, msg);
+    return -1;
+}
+
+static int write_numpy_array(encoder *enc, PyObject *obj, const numpy_array_interface *arr)
+{
+    numpy_view view;
+    int ret = numpy_view_init(&view, obj, arr);
+    if (ret <= 0) return ret < 0 ? -1 : numpy_unsupported(enc, "unsupported datatype in numpy array");
+    if (arr->nd == 0) return numpy_unsupported(enc, "numpy array of 0 dimensions is not supported");
+    if (!(arr->flags & NUMPY_NOTSWAPPED)) return numpy_unsupported(enc, "numpy array is not native-endian");
+    /* F-ordered arrays would be read against their memory order */
+    if ((arr->flags & NUMPY_F_CONTIGUOUS) && !(arr->flags & NUMPY_C_CONTIGUOUS))
+    {
+        return numpy_unsupported(enc, "numpy array is not C contiguous; use ndarray.tolist() in default");
+    }
+    if (enc->depth + arr->nd > PYYJSON_ENCODE_DEPTH_LIMIT)
+    {
+        PyErr_SetString(JSONEncodeError, "Recursion limit reached");
+        return -1;
+    }
+    if (enc->allow_threads && view.kind != NUMPY_DATETIME64)
+    {
+        Py_ssize_t size = 1;
+        for (int i = 0; i < arr->nd && size < NUMPY_ALLOW_THREADS_MIN; i++) size *= arr->shape[i];
+        view.allow_threads = size >= NUMPY_ALLOW_THREADS_MIN;
+    }
+    if (write_numpy_dim(enc, &view, 0, arr->data, enc->depth) < 0) return -1;
+    return 1;
+}
+
+static int write_numpy_scalar(encoder *enc, PyObject *obj, const numpy_array_interface *arr)
+{
+    numpy_view view;
+    if (arr->typekind == 'M')
+    {
+        int64_t val;
+        memcpy(&val, arr->data, sizeof(val));
+        /* before its unit, NaT may have none */
+        if (val == INT64_MIN) return numpy_nat_error();
+    }
+    int ret = numpy_view_init(&view, obj, arr);
+    if (ret <= 0) return ret;
+    if (reserve(enc, view.item_len) < 0) return -1;
+    if (write_numpy_items(enc, &view, arr->data, 1, 0, true, -1) < 0) return -1;
+    return 1;
+}
+
+/*
+ Write a numpy array or scalar, with OPT_SERIALIZE_NUMPY. Returns 1 if it is
+ written, 0 if `obj` is not one or goes to `default`, or -1 on error.
+ */
+static int write_numpy(encoder *enc, PyObject *obj)
+{
+    PyObject *ndarray, *generic;
+    int ret = pyyjson_get_numpy_types(&ndarray, &generic);
+    if (ret <= 0) return ret;
+    bool is_array = PyObject_TypeCheck(obj, (PyTypeObject *)ndarray);
+    if (!is_array && !PyObject_TypeCheck(obj, (PyTypeObject *)generic)) return 0;
+    PyObject *capsule = PyObject_GetAttr(obj, str_array_struct);
+    if (!capsule) return -1;
+    const numpy_array_interface *arr = PyCapsule_GetPointer(capsule, NULL);
+    if (!arr || arr->two != 2)
+    {
+        Py_DECREF(capsule);
+        if (!PyErr_Occurred()) PyErr_SetString(JSONEncodeError, "numpy __array_struct__ is not valid");
+        return -1;
+    }
+    ret = is_array ? write_numpy_array(enc, obj, arr) : write_numpy_scalar(enc, obj, arr);
+    Py_DECREF(capsule);
+    return ret;
+}
+
+/*==============================================================================
+ * Encoder
+ *============================================================================*/
+
+static int encode_value(encoder *enc, PyObject *obj, int default_calls);
+
+static int encode_default(encoder *enc, PyObject *obj, int default_calls)
+{
+    if (!enc->default_func) return type_error(obj);
+    if (default_calls == PYYJSON_DEFAULT_DEPTH_LIMIT)
+    {
+        PyErr_SetString(JSONEncodeError, "default serializer exceeds recursion limit");
+        return -1;
+    }
+    PyObject *value = PyObject_CallFunctionObjArgs(enc->default_func, obj, NULL);
+    if (!value)
+    {
+        PyObject *cause = fetch_exception();
+        type_error(obj);
+        return set_cause(cause);
+    }
+    int ret = encode_value(enc, value, default_calls + 1);
+    Py_DECREF(value);
+    return ret;
+}
+
+/* Types other than the exact builtin ones, in the order orjson checks them. */
+static int encode_other(encoder *enc, PyObject *obj, int default_calls)
+{
+    int option = enc->option;
+    if (!(option & PYYJSON_OPT_PASSTHROUGH_SUBCLASS))
+    {
+        if (PyUnicode_Check(obj)) return write_str(enc, obj);
+        if (PyLong_Check(obj)) return write_int(enc, obj);
+        if (PyList_Check(obj)) return open_list(enc, obj, default_calls);
+        if (PyDict_Check(obj)) return open_dict(enc, obj, default_calls);
+    }
+    if (PyTuple_CheckExact(obj)) return open_list(enc, obj, default_calls);
+    if (PyyjsonFrozenMapping_Check(obj)) return open_dict(enc, obj, default_calls);
+    if (PyyjsonRawNumber_Check(obj))
+    {
+        return write_raw(enc, PyyjsonRawNumber_TEXT(obj), (size_t)PyyjsonRawNumber_LEN(obj));
+    }
+    if (PyyjsonFragment_Check(obj)) return write_fragment(enc, obj);
+    if (!(option & PYYJSON_OPT_PASSTHROUGH_DATETIME))
+    {
+        if (ensure_datetime_api() < 0) return -1;
+        char kind = datetime_kind(obj);
+        if (kind) return write_datetime(enc, obj, kind);
+    }
+
+    PyObject *type_uuid, *safe_unknown;
+    if (pyyjson_get_uuid_types(&type_uuid, &safe_unknown) < 0) return -1;
+    if (Py_TYPE(obj) == (PyTypeObject *)type_uuid) return write_uuid(enc, obj);
+
+    int is_enum = is_enum_member(obj);
+    if (is_enum < 0) return -1;
+    if (is_enum)
+    {
+        PyObject *value = PyObject_GetAttr(obj, str_value);
+        if (!value) return -1;
+        int ret = encode_value(enc, value, default_calls);
+        Py_DECREF(value);
+        return ret;
+    }
+
+    if (option & PYYJSON_OPT_SERIALIZE_NUMPY)
+    {
+        int ret = write_numpy(enc, obj);
+        if (ret) return ret < 0 ? -1 : 0;
+    }
+
+    if (!(option & PYYJSON_OPT_PASSTHROUGH_DATACLASS))
+    {
+        dataclass_plan *plan = cached_dataclass_plan(Py_TYPE(obj));
+        if (!plan && PyObject_HasAttr((PyObject *)Py_TYPE(obj), str_dataclass_fields))
+        {
+            plan = get_dataclass_plan(obj);
+            if (!plan) return -1;
+        }
+        if (plan) return open_dataclass(enc, obj, plan, default_calls);
+    }
+    return encode_default(enc, obj, default_calls);
+}
+
+/* Write a value other than a container, or open a container. */
+static int encode_value(encoder *enc, PyObject *obj, int default_calls)
+{
+    PyTypeObject *type = Py_TYPE(obj);
+    if (type == &PyUnicode_Type) return write_str(enc, obj);
+    if (type == &PyLong_Type) return write_int(enc, obj);
+    if (type == &PyBool_Type) return obj == Py_True ? write_raw(enc, "true", 4) : write_raw(enc, "false", 5);
+    if (obj == Py_None) return write_raw(enc, "null", 4);
+    if (type == &PyFloat_Type) return write_float(enc, obj);
+    if (type == &PyList_Type) return open_list(enc, obj, default_calls);
+    if (type == &PyDict_Type) return open_dict(enc, obj, default_calls);
+    return encode_other(enc, obj, default_calls);
+}
+
+/*
+ Write the items of the open containers until none is left, or until at least
+ `limit` bytes are buffered if `limit` is not 0. Returns 1 when stopped early.
+ */
+static int encode_run(encoder *enc, Py_ssize_t limit)
+{
+    while (enc->depth > 0)
+    {
+        if (limit && enc->cur - enc->buf >= limit) return 1;
+        encode_frame *frame = &enc->frames[enc->depth - 1];
+        PyObject *value;
+        int ret = frame_next(enc, frame, &value);
+        if (ret == 0)
+        {
+            if (pop_frame(enc) < 0) return -1;
+            continue;
+        }
+        if (ret < 0) return -1;
+        ret = encode_value(enc, value, frame->default_calls);
+        Py_DECREF(value);
+        if (ret < 0) return -1;
+    }
+    return 0;
+}
+
+/* Write `obj` completely, with APPEND_NEWLINE. */
+static int encode_obj(encoder *enc, PyObject *obj)
+{
+    if (encode_value(enc, obj, 0) < 0 || encode_run(enc, 0) < 0)
+    {
+        encoder_clear_frames(enc);
+        return -1;
+    }
+    if (enc->option & PYYJSON_OPT_APPEND_NEWLINE) return write_raw(enc, "\n", 1);
+    return 0;
+}
+
+int pyyjson_parse_encode_option(PyObject *option, int *out)
+{
+    if (option == Py_None)
+    {
+        *out = 0;
+        return 0;
+    }
+    if (!PyLong_CheckExact(option))
+    {
+        PyErr_SetString(JSONEncodeError, "Invalid opts");
+        return -1;
+    }
+    int overflow;
+    long value = PyLong_AsLongAndOverflow(option, &overflow);
+    if (value == -1 && PyErr_Occurred()) return -1;
+    if (overflow || (value & ~(long)PYYJSON_OPT_ENCODE_MASK))
+    {
+        PyErr_SetString(JSONEncodeError, "Invalid opts");
+        return -1;
+    }
+    *out = (int)value;
+    return 0;
+}
+
+PyObject *pyyjson_encode_obj(PyObject *obj, PyObject *default_func, int option)
+{
+    encode_frame frames[PYYJSON_ENCODE_DEPTH_LIMIT];
+    encoder enc = {0};
+    enc.frames = frames;
+    if (encoder_init(&enc) < 0) return NULL;
+    enc.option = option;
+    enc.default_func = default_func;
+    enc.allow_threads = true;
+
+    int ret = encode_obj(&enc, obj);
+    if (ret < 0)
+    {
+        Py_XDECREF(enc.bytes);
+        return NULL;
+    }
+    return encoder_finish(&enc);
+}
+
+PyObject *pyyjson_encode_into(PyObject *obj, PyObject *buffer, Py_ssize_t offset, PyObject *default_func, int option)
+{
+    Py_buffer view;
+    if (PyObject_GetBuffer(buffer, &view, PyBUF_WRITABLE) < 0) return NULL;
+    if (offset < 0 || offset > view.len)
+    {
+        PyBuffer_Release(&view);
+        PyErr_SetString(PyExc_ValueError, "dumps_into() offset is out of the buffer");
+        return NULL;
+    }
+    encode_frame frames[PYYJSON_ENCODE_DEPTH_LIMIT];
+    encoder enc = {0};
+    enc.frames = frames;
+    enc.sink = SINK_BUFFER;
+    enc.option = option;
+    enc.default_func = default_func;
+    enc.allow_threads = true;
+    enc.target = (uint8_t *)view.buf + offset;
+    enc.target_len = view.len - offset;
+    enc.buf = enc.target;
+    enc.cur = enc.target;
+    enc.end = enc.target + enc.target_len;
+
+    int ret = encode_obj(&enc, obj);
+    Py_ssize_t total = enc.cur - enc.buf;
+    if (enc.spilled)
+    {
+        if (ret == 0) encoder_flush(&enc);
+        total = enc.flushed;
+        PyMem_Free(enc.buf);
+    }
+    PyBuffer_Release(&view);
+    if (ret < 0) return NULL;
+    /* the number of missing bytes, negated */
+    if (total > enc.target_len) return PyLong_FromSsize_t(enc.target_len - total);
+    return PyLong_FromSsize_t(total);
+}
+
+PyObject *pyyjson_encode_file(PyObject *obj, PyObject *fp, PyObject *default_func, int option)
+{
+    encode_frame frames[PYYJSON_ENCODE_DEPTH_LIMIT];
+    encoder enc = {0};
+    enc.frames = frames;
+    enc.option = option;
+    enc.default_func = default_func;
+    enc.allow_threads = true;
+    if (PyLong_Check(fp))
+    {
+        enc.sink = SINK_FD;
+        enc.fd = PyObject_AsFileDescriptor(fp);
+        if (enc.fd < 0) return NULL;
+    }
+    else
+    {
+        enc.sink = SINK_FILE;
+        enc.write_func = PyObject_GetAttr(fp, str_write);
+        if (!enc.write_func)
+        {
+            if (!PyErr_ExceptionMatches(PyExc_AttributeError)) return NULL;
+            PyErr_Clear();
+            PyErr_Format(PyExc_TypeError, "dump() fp must be a file descriptor or have a write() method, not %.200s",
+                         Py_TYPE(fp)->tp_name);
+            return NULL;
+        }
+    }
+    if (encoder_init_file(&enc) < 0)
+    {
+        Py_XDECREF(enc.write_func);
+        return NULL;
+    }
+
+    int ret = encode_obj(&enc, obj);
+    if (ret == 0) ret = encoder_flush(&enc);
+    PyMem_Free(enc.buf);
+    Py_XDECREF(enc.write_func);
+    if (ret < 0) return NULL;
+    Py_RETURN_NONE;
+}
+
+/*==============================================================================
+ * Chunked Encoder
+ *============================================================================*/
+
+/**
+ The iterator of `dumps_iter()`. The encoder and its stack of open containers
+ are kept between chunks; each `__next__()` writes items until at least
+ `chunk_size` bytes are buffered and returns exactly `chunk_size` of them,
+ keeping the rest for the next chunk. Only the last chunk is shorter.
+ */
+typedef struct PyyjsonEncodeIterObject {
+    PyObject_HEAD
+    /** the object to encode, owned until the first chunk */
+    PyObject *obj;
+    /** owned reference to `enc.default_func` */
+    PyObject *default_func;
+    Py_ssize_t chunk_size;
+    /** whether everything is written to the buffer */
+    bool done;
+    /** whether a chunk is being written, `default` may call `next()` */
+    bool running;
+    encoder enc;
+    encode_frame frames[PYYJSON_ENCODE_DEPTH_LIMIT];
+} PyyjsonEncodeIterObject;
+
+static void EncodeIter_clear_state(PyyjsonEncodeIterObject *self)
+{
+    encoder_clear_frames(&self->enc);
+    Py_CLEAR(self->enc.bytes);
+}
+
+/* Take the first `chunk_size` buffered bytes as a chunk, moving the rest to a new buffer. */
+static PyObject *EncodeIter_split(PyyjsonEncodeIterObject *self)
+{
+    encoder *enc = &self->enc;
+    Py_ssize_t rest = enc->cur - enc->buf - self->chunk_size;
+    Py_ssize_t cap = rest + (self->chunk_size > ENCODER_INITIAL_CAPACITY ? self->chunk_size : ENCODER_INITIAL_CAPACITY);
+    PyObject *next = PyBytes_FromStringAndSize(NULL, cap);
+    if (!next) return NULL;
+    memcpy(PyBytes_AS_STRING(next), enc->buf + self->chunk_size, (size_t)rest);
+    PyObject *chunk = enc->bytes;
+    enc->bytes = next;
+    enc->buf = (uint8_t *)PyBytes_AS_STRING(next);
+    enc->cur = enc->buf + rest;
+    enc->end = enc->buf + cap;
+    if (_PyBytes_Resize(&chunk, self->chunk_size) < 0) return NULL;
+    return chunk;
+}
+
+/* Write the next chunk, or return NULL without an exception at the end. */
+static PyObject *EncodeIter_write_chunk(PyyjsonEncodeIterObject *self)
+{
+    encoder *enc = &self->enc;
+    if (!enc->bytes) return NULL;
+    if (self->obj)
+    {
+        PyObject *obj = self->obj;
+        self->obj = NULL;
+        int ret = encode_value(enc, obj, 0);
+        Py_DECREF(obj);
+        if (ret < 0) goto error;
+    }
+    if (!self->done)
+    {
+        int ret = encode_run(enc, self->chunk_size);
+        if (ret < 0) goto error;
+        if (ret == 0)
+        {
+            self->done = true;
+            if ((enc->option & PYYJSON_OPT_APPEND_NEWLINE) && write_raw(enc, "\n", 1) < 0) goto error;
+        }
+    }
+    Py_ssize_t len = enc->cur - enc->buf;
+    if (len > self->chunk_size)
+    {
+        PyObject *chunk = EncodeIter_split(self);
+        if (!chunk) goto error;
+        return chunk;
+    }
+    if (len == 0)
+    {
+        Py_CLEAR(enc->bytes);
+        return NULL;
+    }
+    /* the last chunk, or one that is exactly full */
+    PyObject *chunk = encoder_finish(enc);
+    if (chunk && !self->done && encoder_init(enc) < 0) Py_CLEAR(chunk);
+    if (!chunk) goto error;
+    return chunk;
+
+error:
+    EncodeIter_clear_state(self);
+    return NULL;
+}
+
+static PyObject *EncodeIter_next(PyyjsonEncodeIterObject *self)
+{
+    if (self->running)
+    {
+        PyErr_SetString(PyExc_ValueError, "dumps_iter() already executing");
+        return NULL;
+    }
+    self->running = true;
+    PyObject *chunk = EncodeIter_write_chunk(self);
+    self->running = false;
+    return chunk;
+}
+
+static int EncodeIter_traverse(PyyjsonEncodeIterObject *self, visitproc visit, void *arg)
+{
+    Py_VISIT(self->obj);
+    Py_VISIT(self->default_func);
+    for (int i = 0; i < self->enc.depth; i++)
+    {
+        encode_frame *frame = &self->frames[i];
+        Py_VISIT(frame->obj);
+        Py_VISIT(frame->dict);
+        for (Py_ssize_t j = 0; frame->items && j < frame->size; j++)
+        {
+            Py_VISIT(frame->items[j].value);
+        }
+    }
+    return 0;
+}
+
+static int EncodeIter_clear(PyyjsonEncodeIterObject *self)
+{
+    EncodeIter_clear_state(self);
+    Py_CLEAR(self->obj);
+    self->enc.default_func = NULL;
+    Py_CLEAR(self->default_func);
+    return 0;
+}
+
+static void EncodeIter_dealloc(PyyjsonEncodeIterObject *self)
+{
+    PyObject_GC_UnTrack(self);
+    EncodeIter_clear(self);
+    Py_TYPE(self)->tp_free((PyObject *)self);
+}
+
+static PyTypeObject PyyjsonEncodeIter_Type = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    .tp_name = "pyyjson.DumpsIterator",
+    .tp_basicsize = sizeof(PyyjsonEncodeIterObject),
+    .tp_dealloc = (destructor)EncodeIter_dealloc,
+    .tp_flags = Py_TPFLAGS_DEFAULT | Py_TPFLAGS_HAVE_GC,
+    .tp_doc = "Iterator of JSON chunks returned by `dumps_iter()`.",
+    .tp_traverse = (traverseproc)EncodeIter_traverse,
+    .tp_clear = (inquiry)EncodeIter_clear,
+    .tp_iter = PyObject_SelfIter,
+    .tp_iternext = (iternextfunc)EncodeIter_next,
+};
+
+PyObject *pyyjson_encode_iter(PyObject *obj, PyObject *default_func, int option, Py_ssize_t chunk_size)
+{
+    if (chunk_size < 1)
+    {
+        PyErr_SetString(PyExc_ValueError, "dumps_iter() chunk_size must be positive");
+        return NULL;
+    }
+    PyyjsonEncodeIterObject *self = PyObject_GC_New(PyyjsonEncodeIterObject, &PyyjsonEncodeIter_Type);
+    if (!self) return NULL;
+    memset(&self->enc, 0, sizeof(self->enc));
+    Py_INCREF(obj);
+    self->obj = obj;
+    Py_XINCREF(default_func);
+    self->default_func = default_func;
+    self->chunk_size = chunk_size;
+    self->done = false;
+    self->running = false;
+    self->enc.option = option;
+    self->enc.default_func = default_func;
+    self->enc.frames = self->frames;
+    PyObject_GC_Track(self);
+    if (encoder_init(&self->enc) < 0)
+    {
+        Py_DECREF(self);
+        return NULL;
+    }
+    return (PyObject *)self;
+}
+
+int pyyjson_encoder_module_init(PyObject *module)
+{
+    if (PyType_Ready(&PyyjsonEncodeIter_Type) < 0) return -1;
+    str_utcoffset = PyUnicode_InternFromString("utcoffset");
+    if (!str_utcoffset) return -1;
+    str_value = PyUnicode_InternFromString("value");
+    if (!str_value) return -1;
+    str_int = PyUnicode_InternFromString("int");
+    if (!str_int) return -1;
+    str_write = PyUnicode_InternFromString("write");
+    if (!str_write) return -1;
+    str_dataclass_fields = PyUnicode_InternFromString("__dataclass_fields__");
+    if (!str_dataclass_fields) return -1;
+    str_slots = PyUnicode_InternFromString("__slots__");
+    if (!str_slots) return -1;
+    str_field_type = PyUnicode_InternFromString("_field_type");
+    if (!str_field_type) return -1;
+    str_array_struct = PyUnicode_InternFromString("__array_struct__");
+    if (!str_array_struct) return -1;
+    str_dtype = PyUnicode_InternFromString("dtype");
+    if (!str_dtype) return -1;
+    str_str = PyUnicode_InternFromString("str");
+    if (!str_str) return -1;
+    int_64 = PyLong_FromLong(64);
+    if (!int_64) return -1;
+    return pyyjson_fragment_module_init(module);
+}
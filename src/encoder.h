@@ -0,0 +1,96 @@
+#ifndef ENCODER_H
+#define ENCODER_H
+
+#include "pyinit.h"
+#include <stddef.h>
+#include <stdint.h>
+
+/**
+ Encode options, exposed to Python as `pyyjson.OPT_*`.
+ The values are the same as orjson's, decode options start at bit 16.
+ */
+/** Pretty-print with an indent of two spaces. */
+#define PYYJSON_OPT_INDENT_2 (1 << 0)
+/** Serialize naive `datetime.datetime` objects as UTC. */
+#define PYYJSON_OPT_NAIVE_UTC (1 << 1)
+/** Allow dict keys of types other than str. */
+#define PYYJSON_OPT_NON_STR_KEYS (1 << 2)
+/** Leave out the microseconds of `datetime.datetime` and `datetime.time`. */
+#define PYYJSON_OPT_OMIT_MICROSECONDS (1 << 3)
+/** Serialize `numpy.ndarray` and numpy scalars. */
+#define PYYJSON_OPT_SERIALIZE_NUMPY (1 << 4)
+/** Sort the keys of dicts. */
+#define PYYJSON_OPT_SORT_KEYS (1 << 5)
+/** Raise on integers beyond 53 bits. */
+#define PYYJSON_OPT_STRICT_INTEGER (1 << 6)
+/** Write a UTC offset as `Z` instead of `+00:00`. */
+#define PYYJSON_OPT_UTC_Z (1 << 7)
+/** Pass subclasses of str, int, dict and list to `default`. */
+#define PYYJSON_OPT_PASSTHROUGH_SUBCLASS (1 << 8)
+/** Pass `datetime.datetime`, `datetime.date` and `datetime.time` to `default`. */
+#define PYYJSON_OPT_PASSTHROUGH_DATETIME (1 << 9)
+/** Append a newline to the output. */
+#define PYYJSON_OPT_APPEND_NEWLINE (1 << 10)
+/** Pass dataclasses to `default`. */
+#define PYYJSON_OPT_PASSTHROUGH_DATACLASS (1 << 11)
+/** Write floats as float32, with the shortest text that reads back as the
+    same float32. Finite floats beyond its range raise. Options not in
+    orjson count down from bit 15. */
+#define PYYJSON_OPT_FLOAT32 (1 << 15)
+/** All valid encode options. */
+#define PYYJSON_OPT_ENCODE_MASK (((1 << 12) - 1) | PYYJSON_OPT_FLOAT32)
+
+/** Maximum nesting depth of containers. */
+#define PYYJSON_ENCODE_DEPTH_LIMIT 255
+/** Maximum nesting depth of `default` calls. */
+#define PYYJSON_DEFAULT_DEPTH_LIMIT 255
+
+/** Size of the buffer of `dump()`, flushed to the file whenever it fills. */
+#define PYYJSON_DUMP_BUFFER_SIZE 65536
+
+/** Number of entries of the key cache, a power of two. */
+#define PYYJSON_ENCODE_KEY_CACHE_SIZE 1024
+/** Maximum byte length of a cached `"key":`. */
+#define PYYJSON_ENCODE_KEY_CACHE_MAX_LEN 64
+
+/** Number of entries of the dataclass plan cache, a power of two. */
+#define PYYJSON_DATACLASS_PLAN_CACHE_SIZE 64
+
+/*
+ Writer primitives of yyjson, implemented in yyjson.c (modified).
+ Each returns the cursor after the written text, the caller makes sure the
+ buffer has enough room.
+ */
+/** Write an unsigned integer, needs 20 bytes. */
+uint8_t *pyyjson_write_u64(uint8_t *cur, uint64_t val);
+/** Write a signed integer, needs 21 bytes. */
+uint8_t *pyyjson_write_i64(uint8_t *cur, int64_t val);
+/** Write the shortest text that reads back as `val`, or `null` for nan and
+    infinity. Needs 32 bytes. */
+uint8_t *pyyjson_write_f64(uint8_t *cur, double val);
+/** Write the shortest text that reads back as the float32 `val`, or `null`
+    for nan and infinity. Needs 32 bytes. */
+uint8_t *pyyjson_write_f32(uint8_t *cur, float val);
+
+/** Parse the `option` argument of `dumps()`, None means no option. */
+int pyyjson_parse_encode_option(PyObject *option, int *out);
+
+/** Serialize `obj` to JSON bytes. `default_func` may be NULL. */
+PyObject *pyyjson_encode_obj(PyObject *obj, PyObject *default_func, int option);
+
+/** Serialize `obj` into a writable buffer from `offset`. Returns the number of
+    bytes written, or if they do not fit, minus the number of bytes missing. */
+PyObject *pyyjson_encode_into(PyObject *obj, PyObject *buffer, Py_ssize_t offset, PyObject *default_func, int option);
+
+/** Serialize `obj` to `fp`, a file descriptor or an object with a `write()`
+    method taking bytes. Returns None. */
+PyObject *pyyjson_encode_file(PyObject *obj, PyObject *fp, PyObject *default_func, int option);
+
+/** Serialize `obj` lazily: returns an iterator of bytes chunks of `chunk_size`,
+    the last one shorter. */
+PyObject *pyyjson_encode_iter(PyObject *obj, PyObject *default_func, int option, Py_ssize_t chunk_size);
+
+/** Intern the attribute names used by the encoder and ready its types. */
+int pyyjson_encoder_module_init(PyObject *module);
+
+#endif // ENCODER_H
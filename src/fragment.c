@@ -0,0 +1,64 @@
+#include "fragment.h"
+
+static PyObject *Fragment_new(PyTypeObject *type, PyObject *args, PyObject *kwargs)
+{
+    PyObject *contents;
+    if (kwargs && PyDict_GET_SIZE(kwargs))
+    {
+        PyErr_SetString(PyExc_TypeError, "Fragment() takes no keyword arguments");
+        return NULL;
+    }
+    if (!PyArg_ParseTuple(args, "O:Fragment", &contents)) return NULL;
+    PyyjsonFragmentObject *self = PyObject_GC_New(PyyjsonFragmentObject, type);
+    if (!self) return NULL;
+    Py_INCREF(contents);
+    self->contents = contents;
+    PyObject_GC_Track(self);
+    return (PyObject *)self;
+}
+
+static int Fragment_traverse(PyyjsonFragmentObject *self, visitproc visit, void *arg)
+{
+    Py_VISIT(self->contents);
+    return 0;
+}
+
+static int Fragment_clear(PyyjsonFragmentObject *self)
+{
+    Py_CLEAR(self->contents);
+    return 0;
+}
+
+static void Fragment_dealloc(PyyjsonFragmentObject *self)
+{
+    PyObject_GC_UnTrack(self);
+    Py_XDECREF(self->contents);
+    Py_TYPE(self)->tp_free((PyObject *)self);
+}
+
+PyTypeObject PyyjsonFragment_Type = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    .tp_name = "pyyjson.Fragment",
+    .tp_basicsize = sizeof(PyyjsonFragmentObject),
+    .tp_dealloc = (destructor)Fragment_dealloc,
+    .tp_flags = Py_TPFLAGS_DEFAULT | Py_TPFLAGS_HAVE_GC,
+    .tp_doc = "Fragment(contents, /)\n--\n\n"
+              "Already serialized JSON, given as bytes or str.\n\n"
+              "`dumps()` writes the contents into its output as they are, without "
+              "checking that they are valid JSON.",
+    .tp_traverse = (traverseproc)Fragment_traverse,
+    .tp_clear = (inquiry)Fragment_clear,
+    .tp_new = Fragment_new,
+};
+
+int pyyjson_fragment_module_init(PyObject *module)
+{
+    if (PyType_Ready(&PyyjsonFragment_Type) < 0) return -1;
+    Py_INCREF(&PyyjsonFragment_Type);
+    if (PyModule_AddObject(module, "Fragment", (PyObject *)&PyyjsonFragment_Type) < 0)
+    {
+        Py_DECREF(&PyyjsonFragment_Type);
+        return -1;
+    }
+    return 0;
+}
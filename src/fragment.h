@@ -0,0 +1,21 @@
+#ifndef FRAGMENT_H
+#define FRAGMENT_H
+
+#include "pyinit.h"
+
+/** Already serialized JSON, written into the output of `dumps()` as it is. */
+typedef struct PyyjsonFragmentObject {
+    PyObject_HEAD
+    /** the JSON text, bytes or str */
+    PyObject *contents;
+} PyyjsonFragmentObject;
+
+extern PyTypeObject PyyjsonFragment_Type;
+
+#define PyyjsonFragment_Check(op) Py_IS_TYPE(op, &PyyjsonFragment_Type)
+#define PyyjsonFragment_CONTENTS(op) (((PyyjsonFragmentObject *)(op))->contents)
+
+/** Ready the Fragment type and add it to the module. */
+int pyyjson_fragment_module_init(PyObject *module);
+
+#endif // FRAGMENT_H
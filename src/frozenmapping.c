@@ -0,0 +1,396 @@
+#include "frozenmapping.h"
+
+/* `case {...}` patterns match mappings by this flag, from Python 3.10 */
+#if PY_VERSION_HEX < 0x030A0000
+#define Py_TPFLAGS_MAPPING 0
+#endif
+
+/*
+ Find `key` in the mapping. Returns the item position, -1 if not found (and
+ sets `*slot` to the free index slot when there is an index), or -2 with an
+ exception set.
+ */
+static Py_ssize_t frozen_find(PyyjsonFrozenMappingObject *self, PyObject *key, Py_hash_t hash, size_t *slot)
+{
+    if (!self->index)
+    {
+        for (Py_ssize_t i = 0; i < self->len; i++)
+        {
+            PyObject *item_key = self->slots[i * 2];
+            if (item_key == key) return i;
+            Py_hash_t item_hash = PyObject_Hash(item_key);
+            if (item_hash == -1) return -2;
+            if (item_hash != hash) continue;
+            int eq = PyObject_RichCompareBool(item_key, key, Py_EQ);
+            if (eq < 0) return -2;
+            if (eq) return i;
+        }
+        return -1;
+    }
+    size_t i = (size_t)hash & self->index_mask;
+    while (true)
+    {
+        uint32_t entry = self->index[i];
+        if (!entry)
+        {
+            if (slot) *slot = i;
+            return -1;
+        }
+        PyObject *item_key = self->slots[(entry - 1) * 2];
+        if (item_key == key) return entry - 1;
+        Py_hash_t item_hash = PyObject_Hash(item_key);
+        if (item_hash == -1) return -2;
+        if (item_hash == hash)
+        {
+            int eq = PyObject_RichCompareBool(item_key, key, Py_EQ);
+            if (eq < 0) return -2;
+            if (eq) return entry - 1;
+        }
+        i = (i + 1) & self->index_mask;
+    }
+}
+
+PyObject *pyyjson_frozen_mapping_new(PyObject **pairs, Py_ssize_t count)
+{
+    PyyjsonFrozenMappingObject *self;
+    Py_ssize_t slot_count = count * 2;
+    size_t index_size = 0;
+    Py_ssize_t i = 0;
+
+    if (count > PYYJSON_FROZEN_INDEX_THRESHOLD)
+    {
+        if (count >= (Py_ssize_t)(UINT32_MAX / 2))
+        {
+            PyErr_NoMemory();
+            goto fail;
+        }
+        index_size = 16;
+        while (index_size < (size_t)count * 2) index_size <<= 1;
+        slot_count += (Py_ssize_t)((index_size * sizeof(uint32_t) + sizeof(PyObject *) - 1) / sizeof(PyObject *));
+    }
+    self = PyObject_GC_NewVar(PyyjsonFrozenMappingObject, &PyyjsonFrozenMapping_Type, slot_count);
+    if (!self) goto fail;
+    self->len = 0;
+    self->hash = -1;
+    self->index = NULL;
+    self->index_mask = 0;
+    if (index_size)
+    {
+        self->index = (uint32_t *)(void *)(self->slots + count * 2);
+        self->index_mask = index_size - 1;
+        memset(self->index, 0, index_size * sizeof(uint32_t));
+    }
+
+    for (; i < count; i++)
+    {
+        PyObject *key = pairs[i * 2];
+        PyObject *value = pairs[i * 2 + 1];
+        size_t slot = 0;
+        Py_hash_t hash = PyObject_Hash(key);
+        Py_ssize_t pos = hash == -1 ? -2 : frozen_find(self, key, hash, &slot);
+        if (pos == -2)
+        {
+            Py_DECREF(self);
+            goto fail;
+        }
+        if (pos >= 0)
+        {
+            Py_DECREF(key);
+            Py_SETREF(self->slots[pos * 2 + 1], value);
+            continue;
+        }
+        self->slots[self->len * 2] = key;
+        self->slots[self->len * 2 + 1] = value;
+        if (self->index) self->index[slot] = (uint32_t)(self->len + 1);
+        self->len++;
+    }
+    PyObject_GC_Track(self);
+    return (PyObject *)self;
+
+fail:
+    /* the pairs before `i` are already released, with the mapping */
+    for (Py_ssize_t j = i * 2; j < count * 2; j++) Py_DECREF(pairs[j]);
+    return NULL;
+}
+
+/*==============================================================================
+ * FrozenMapping Type
+ *============================================================================*/
+
+static PyObject *FrozenMapping_new(PyTypeObject *type, PyObject *args, PyObject *kwargs)
+{
+    PyObject *src = NULL;
+    if (!PyArg_ParseTuple(args, "|O:FrozenMapping", &src)) return NULL;
+    PyObject *dict = PyDict_New();
+    if (!dict) return NULL;
+    if ((src && PyDict_Merge(dict, src, 1) < 0 &&
+         (!PyErr_ExceptionMatches(PyExc_AttributeError) ||
+          (PyErr_Clear(), PyDict_MergeFromSeq2(dict, src, 1) < 0))) ||
+        (kwargs && PyDict_Merge(dict, kwargs, 1) < 0))
+    {
+        Py_DECREF(dict);
+        return NULL;
+    }
+    Py_ssize_t count = PyDict_GET_SIZE(dict);
+    PyObject **pairs = PyMem_Malloc((size_t)Py_MAX(count, 1) * 2 * sizeof(PyObject *));
+    if (!pairs)
+    {
+        Py_DECREF(dict);
+        return PyErr_NoMemory();
+    }
+    Py_ssize_t pos = 0, i = 0;
+    PyObject *key, *value;
+    while (PyDict_Next(dict, &pos, &key, &value))
+    {
+        Py_INCREF(key);
+        Py_INCREF(value);
+        pairs[i++] = key;
+        pairs[i++] = value;
+    }
+    Py_DECREF(dict);
+    PyObject *ret = pyyjson_frozen_mapping_new(pairs, count);
+    PyMem_Free(pairs);
+    return ret;
+}
+
+static int FrozenMapping_traverse(PyyjsonFrozenMappingObject *self, visitproc visit, void *arg)
+{
+    for (Py_ssize_t i = 0; i < self->len * 2; i++) Py_VISIT(self->slots[i]);
+    return 0;
+}
+
+static void FrozenMapping_dealloc(PyyjsonFrozenMappingObject *self)
+{
+    PyObject_GC_UnTrack(self);
+    Py_TRASHCAN_BEGIN(self, FrozenMapping_dealloc)
+    for (Py_ssize_t i = 0; i < self->len * 2; i++) Py_DECREF(self->slots[i]);
+    Py_TYPE(self)->tp_free((PyObject *)self);
+    Py_TRASHCAN_END
+}
+
+static Py_ssize_t FrozenMapping_length(PyyjsonFrozenMappingObject *self)
+{
+    return self->len;
+}
+
+/* Get the value of `key`, NULL without an exception if it is missing. */
+static PyObject *frozen_get(PyyjsonFrozenMappingObject *self, PyObject *key)
+{
+    Py_hash_t hash = PyObject_Hash(key);
+    if (hash == -1) return NULL;
+    Py_ssize_t pos = frozen_find(self, key, hash, NULL);
+    return pos < 0 ? NULL : self->slots[pos * 2 + 1];
+}
+
+static PyObject *FrozenMapping_subscript(PyyjsonFrozenMappingObject *self, PyObject *key)
+{
+    PyObject *value = frozen_get(self, key);
+    if (value)
+    {
+        Py_INCREF(value);
+        return value;
+    }
+    if (PyErr_Occurred()) return NULL;
+    /* wrapped, a tuple key would be taken as the exception arguments */
+    PyObject *args = PyTuple_Pack(1, key);
+    if (!args) return NULL;
+    PyErr_SetObject(PyExc_KeyError, args);
+    Py_DECREF(args);
+    return NULL;
+}
+
+static int FrozenMapping_contains(PyyjsonFrozenMappingObject *self, PyObject *key)
+{
+    if (frozen_get(self, key)) return 1;
+    return PyErr_Occurred() ? -1 : 0;
+}
+
+static PyObject *FrozenMapping_get(PyyjsonFrozenMappingObject *self, PyObject *const *args, Py_ssize_t nargs)
+{
+    if (nargs < 1 || nargs > 2)
+    {
+        PyErr_Format(PyExc_TypeError, "get() takes 1 or 2 arguments (%zd given)", nargs);
+        return NULL;
+    }
+    PyObject *value = frozen_get(self, args[0]);
+    if (!value)
+    {
+        if (PyErr_Occurred()) return NULL;
+        value = nargs > 1 ? args[1] : Py_None;
+    }
+    Py_INCREF(value);
+    return value;
+}
+
+/* Build a tuple of the keys (0), values (1) or (key, value) pairs (2). */
+static PyObject *frozen_tuple(PyyjsonFrozenMappingObject *self, int kind)
+{
+    PyObject *tuple = PyTuple_New(self->len);
+    if (!tuple) return NULL;
+    for (Py_ssize_t i = 0; i < self->len; i++)
+    {
+        PyObject *item;
+        if (kind == 2)
+        {
+            item = PyTuple_Pack(2, self->slots[i * 2], self->slots[i * 2 + 1]);
+            if (!item)
+            {
+                Py_DECREF(tuple);
+                return NULL;
+            }
+        }
+        else
+        {
+            item = self->slots[i * 2 + kind];
+            Py_INCREF(item);
+        }
+        PyTuple_SET_ITEM(tuple, i, item);
+    }
+    return tuple;
+}
+
+static PyObject *FrozenMapping_keys(PyyjsonFrozenMappingObject *self, PyObject *Py_UNUSED(ignored))
+{
+    return frozen_tuple(self, 0);
+}
+
+static PyObject *FrozenMapping_values(PyyjsonFrozenMappingObject *self, PyObject *Py_UNUSED(ignored))
+{
+    return frozen_tuple(self, 1);
+}
+
+static PyObject *FrozenMapping_items(PyyjsonFrozenMappingObject *self, PyObject *Py_UNUSED(ignored))
+{
+    return frozen_tuple(self, 2);
+}
+
+static PyObject *FrozenMapping_iter(PyyjsonFrozenMappingObject *self)
+{
+    PyObject *keys = frozen_tuple(self, 0);
+    if (!keys) return NULL;
+    PyObject *iter = PyObject_GetIter(keys);
+    Py_DECREF(keys);
+    return iter;
+}
+
+static PyObject *FrozenMapping_repr(PyyjsonFrozenMappingObject *self)
+{
+    int status = Py_ReprEnter((PyObject *)self);
+    if (status != 0) return status > 0 ? PyUnicode_FromString("pyyjson.FrozenMapping({...})") : NULL;
+    PyObject *ret = NULL;
+    PyObject *dict = PyDict_New();
+    if (dict)
+    {
+        Py_ssize_t i = 0;
+        for (; i < self->len; i++)
+        {
+            if (PyDict_SetItem(dict, self->slots[i * 2], self->slots[i * 2 + 1])) break;
+        }
+        if (i == self->len) ret = PyUnicode_FromFormat("pyyjson.FrozenMapping(%R)", dict);
+        Py_DECREF(dict);
+    }
+    Py_ReprLeave((PyObject *)self);
+    return ret;
+}
+
+static PyObject *FrozenMapping_richcompare(PyyjsonFrozenMappingObject *self, PyObject *other, int op)
+{
+    if ((op != Py_EQ && op != Py_NE) || (!PyyjsonFrozenMapping_Check(other) && !PyDict_Check(other)))
+    {
+        Py_RETURN_NOTIMPLEMENTED;
+    }
+    Py_ssize_t other_len = PyDict_Check(other) ? PyDict_GET_SIZE(other) : ((PyyjsonFrozenMappingObject *)other)->len;
+    bool eq = self->len == other_len;
+    for (Py_ssize_t i = 0; eq && i < self->len; i++)
+    {
+        PyObject *key = self->slots[i * 2];
+        PyObject *value = PyDict_Check(other) ? PyDict_GetItemWithError(other, key)
+                                              : frozen_get((PyyjsonFrozenMappingObject *)other, key);
+        if (!value)
+        {
+            if (PyErr_Occurred()) return NULL;
+            eq = false;
+            break;
+        }
+        Py_INCREF(value);
+        int cmp = PyObject_RichCompareBool(self->slots[i * 2 + 1], value, Py_EQ);
+        Py_DECREF(value);
+        if (cmp < 0) return NULL;
+        eq = cmp;
+    }
+    return PyBool_FromLong(op == Py_EQ ? eq : !eq);
+}
+
+static Py_hash_t FrozenMapping_hash(PyyjsonFrozenMappingObject *self)
+{
+    if (self->hash != -1) return self->hash;
+    PyObject *items = frozen_tuple(self, 2);
+    if (!items) return -1;
+    PyObject *set = PyFrozenSet_New(items);
+    Py_DECREF(items);
+    if (!set) return -1;
+    self->hash = PyObject_Hash(set);
+    Py_DECREF(set);
+    return self->hash;
+}
+
+static PyMappingMethods FrozenMapping_as_mapping = {
+    .mp_length = (lenfunc)FrozenMapping_length,
+    .mp_subscript = (binaryfunc)FrozenMapping_subscript,
+};
+
+static PySequenceMethods FrozenMapping_as_sequence = {
+    .sq_contains = (objobjproc)FrozenMapping_contains,
+};
+
+static PyMethodDef FrozenMapping_methods[] = {
+    {"get", (PyCFunction)(void (*)(void))FrozenMapping_get, METH_FASTCALL, "get(key, default=None, /)\n--\n\nThe value of key if present, else default."},
+    {"keys", (PyCFunction)FrozenMapping_keys, METH_NOARGS, "keys()\n--\n\nA tuple of the keys."},
+    {"values", (PyCFunction)FrozenMapping_values, METH_NOARGS, "values()\n--\n\nA tuple of the values."},
+    {"items", (PyCFunction)FrozenMapping_items, METH_NOARGS, "items()\n--\n\nA tuple of the (key, value) pairs."},
+    {NULL, NULL, 0, NULL} /* Sentinel */
+};
+
+PyTypeObject PyyjsonFrozenMapping_Type = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    .tp_name = "pyyjson.FrozenMapping",
+    .tp_basicsize = offsetof(PyyjsonFrozenMappingObject, slots),
+    .tp_itemsize = sizeof(PyObject *),
+    .tp_dealloc = (destructor)FrozenMapping_dealloc,
+    .tp_repr = (reprfunc)FrozenMapping_repr,
+    .tp_as_sequence = &FrozenMapping_as_sequence,
+    .tp_as_mapping = &FrozenMapping_as_mapping,
+    .tp_hash = (hashfunc)FrozenMapping_hash,
+    .tp_flags = Py_TPFLAGS_DEFAULT | Py_TPFLAGS_HAVE_GC | Py_TPFLAGS_MAPPING,
+    .tp_doc = "FrozenMapping(mapping=(), /, **kwargs)\n--\n\n"
+              "An immutable mapping, returned by `loads()` with `OPT_PARSE_FROZEN`.\n\n"
+              "Keys and values are stored inline in insertion order, which takes less "
+              "memory than a dict for small objects.",
+    .tp_traverse = (traverseproc)FrozenMapping_traverse,
+    .tp_richcompare = (richcmpfunc)FrozenMapping_richcompare,
+    .tp_iter = (getiterfunc)FrozenMapping_iter,
+    .tp_methods = FrozenMapping_methods,
+    .tp_new = FrozenMapping_new,
+};
+
+int pyyjson_frozen_mapping_module_init(PyObject *module)
+{
+    if (PyType_Ready(&PyyjsonFrozenMapping_Type) < 0) return -1;
+    Py_INCREF(&PyyjsonFrozenMapping_Type);
+    if (PyModule_AddObject(module, "FrozenMapping", (PyObject *)&PyyjsonFrozenMapping_Type) < 0)
+    {
+        Py_DECREF(&PyyjsonFrozenMapping_Type);
+        return -1;
+    }
+    /* make `isinstance(obj, collections.abc.Mapping)` true */
+    PyObject *abc = PyImport_ImportModule("collections.abc");
+    if (!abc) return -1;
+    PyObject *mapping = PyObject_GetAttrString(abc, "Mapping");
+    Py_DECREF(abc);
+    if (!mapping) return -1;
+    PyObject *ret = PyObject_CallMethod(mapping, "register", "O", (PyObject *)&PyyjsonFrozenMapping_Type);
+    Py_DECREF(mapping);
+    if (!ret) return -1;
+    Py_DECREF(ret);
+    return 0;
+}
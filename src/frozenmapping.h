@@ -0,0 +1,43 @@
+#ifndef FROZENMAPPING_H
+#define FROZENMAPPING_H
+
+#include "pyinit.h"
+#include <stdbool.h>
+#include <stddef.h>
+#include <stdint.h>
+
+/** Objects with more items than this get an open-addressing index. */
+#define PYYJSON_FROZEN_INDEX_THRESHOLD 8
+
+/**
+ An immutable mapping with its keys and values stored inline.
+ `slots` holds `len` key-value pairs, followed by the index when the mapping
+ has more than `PYYJSON_FROZEN_INDEX_THRESHOLD` items. Smaller mappings are
+ searched linearly.
+ */
+typedef struct PyyjsonFrozenMappingObject {
+    PyObject_VAR_HEAD
+    /** number of items */
+    Py_ssize_t len;
+    /** hash of the items, -1 if not computed yet */
+    Py_hash_t hash;
+    /** open-addressing index of item positions plus one, NULL if none */
+    uint32_t *index;
+    /** size of `index` minus one */
+    size_t index_mask;
+    /** keys and values interleaved, then the index */
+    PyObject *slots[1];
+} PyyjsonFrozenMappingObject;
+
+extern PyTypeObject PyyjsonFrozenMapping_Type;
+
+#define PyyjsonFrozenMapping_Check(op) Py_IS_TYPE(op, &PyyjsonFrozenMapping_Type)
+
+/** Build a mapping from `count` key-value pairs, later duplicate keys win.
+    The references of all pairs are stolen, even on failure. */
+PyObject *pyyjson_frozen_mapping_new(PyObject **pairs, Py_ssize_t count);
+
+/** Ready the FrozenMapping type and add it to the module. */
+int pyyjson_frozen_mapping_module_init(PyObject *module);
+
+#endif // FROZENMAPPING_H
@@ -0,0 +1,467 @@
+#include "index.h"
+#include "decoder.h"
+#include "skip.h"
+#include <stdint.h>
+#include <structmember.h>
+
+/*==============================================================================
+ * File Mapping
+ *============================================================================*/
+
+static void file_map_close(file_map *fm)
+{
+    PyObject *type, *value, *traceback;
+    PyErr_Fetch(&type, &value, &traceback);
+    if (fm->map)
+    {
+        PyBuffer_Release(&fm->view);
+        Py_XDECREF(PyObject_CallMethod(fm->map, "close", NULL));
+        Py_CLEAR(fm->map);
+    }
+    if (fm->file)
+    {
+        Py_XDECREF(PyObject_CallMethod(fm->file, "close", NULL));
+        Py_CLEAR(fm->file);
+    }
+    PyErr_Clear();
+    PyErr_Restore(type, value, traceback);
+}
+
+/* Map the file at `path`. An empty file gives an empty view without a map. */
+static int file_map_open(PyObject *path, file_map *fm)
+{
+    PyObject *io = NULL, *mmap = NULL, *fileno = NULL, *size = NULL;
+    PyObject *access = NULL, *args = NULL, *kwargs = NULL;
+    int ret = -1;
+
+    memset(fm, 0, sizeof(*fm));
+    io = PyImport_ImportModule("io");
+    if (!io) goto done;
+    fm->file = PyObject_CallMethod(io, "open", "Os", path, "rb");
+    if (!fm->file) goto done;
+    size = PyObject_CallMethod(fm->file, "seek", "ii", 0, 2);
+    if (!size) goto done;
+    if (PyObject_Not(size))
+    {
+        fm->view.buf = (void *)"";
+        fm->view.len = 0;
+        ret = 0;
+        goto done;
+    }
+    mmap = PyImport_ImportModule("mmap");
+    if (!mmap) goto done;
+    fileno = PyObject_CallMethod(fm->file, "fileno", NULL);
+    if (!fileno) goto done;
+    access = PyObject_GetAttrString(mmap, "ACCESS_READ");
+    if (!access) goto done;
+    args = Py_BuildValue("(Oi)", fileno, 0);
+    kwargs = Py_BuildValue("{sO}", "access", access);
+    if (!args || !kwargs) goto done;
+    PyObject *map_type = PyObject_GetAttrString(mmap, "mmap");
+    if (!map_type) goto done;
+    PyObject *map = PyObject_Call(map_type, args, kwargs);
+    Py_DECREF(map_type);
+    if (!map) goto done;
+    if (PyObject_GetBuffer(map, &fm->view, PyBUF_SIMPLE) < 0)
+    {
+        Py_XDECREF(PyObject_CallMethod(map, "close", NULL));
+        Py_DECREF(map);
+        goto done;
+    }
+    fm->map = map;
+    ret = 0;
+
+done:
+    Py_XDECREF(io);
+    Py_XDECREF(mmap);
+    Py_XDECREF(fileno);
+    Py_XDECREF(size);
+    Py_XDECREF(access);
+    Py_XDECREF(args);
+    Py_XDECREF(kwargs);
+    if (ret < 0) file_map_close(fm);
+    return ret;
+}
+
+/*==============================================================================
+ * Index
+ *============================================================================*/
+
+/* Growable array of offsets. */
+typedef struct offset_list {
+    uint64_t *items;
+    size_t len;
+    size_t cap;
+} offset_list;
+
+static bool offset_list_push(offset_list *list, uint64_t offset)
+{
+    if (list->len == list->cap)
+    {
+        size_t cap = list->cap ? list->cap * 2 : 1024;
+        uint64_t *items = PyMem_RawRealloc(list->items, cap * sizeof(uint64_t));
+        if (!items) return false;
+        list->items = items;
+        list->cap = cap;
+    }
+    list->items[list->len++] = offset;
+    return true;
+}
+
+static bool char_is_space(char c)
+{
+    return c == ' ' || c == '\t' || c == '\n' || c == '\r';
+}
+
+/* Index the start of each non-blank line, then the end of the data.
+   Runs without the GIL. */
+static const char *index_lines(const char *hdr, const char *end, offset_list *list)
+{
+    const char *cur = hdr;
+    while (cur < end)
+    {
+        const char *eol = memchr(cur, '\n', (size_t)(end - cur));
+        if (!eol) eol = end;
+        const char *pos = cur;
+        while (pos < eol && char_is_space(*pos)) pos++;
+        if (pos < eol && !offset_list_push(list, (uint64_t)(cur - hdr))) return "memory allocation failed";
+        cur = eol + 1;
+    }
+    if (!offset_list_push(list, (uint64_t)(end - hdr))) return "memory allocation failed";
+    return NULL;
+}
+
+/* Index the start of each element of the root array, then the end of the last
+   element. Runs without the GIL. */
+static const char *index_array(const char *hdr, const char *end, offset_list *list,
+                               const char **err_pos)
+{
+    const char *cur = hdr, *msg = NULL;
+#define skip_space() while (cur < end && char_is_space(*cur)) cur++
+#define return_err(_msg) do { \
+    *err_pos = cur; \
+    return _msg; \
+} while (0)
+
+    skip_space();
+    if (cur == end || *cur != '[') return_err("the root value is not an array");
+    cur++;
+    skip_space();
+    if (cur < end && *cur == ']')
+    {
+        if (!offset_list_push(list, (uint64_t)(cur - hdr))) return_err("memory allocation failed");
+        return NULL;
+    }
+    while (true)
+    {
+        if (!offset_list_push(list, (uint64_t)(cur - hdr))) return_err("memory allocation failed");
+        const char *val_end = pyyjson_skip_value(cur, end, &msg, err_pos);
+        if (!val_end) return msg;
+        cur = val_end;
+        skip_space();
+        if (cur < end && *cur == ',')
+        {
+            cur++;
+            skip_space();
+            continue;
+        }
+        if (cur < end && *cur == ']')
+        {
+            if (!offset_list_push(list, (uint64_t)(val_end - hdr))) return_err("memory allocation failed");
+            return NULL;
+        }
+        return_err("unexpected character, expected ',' or ']'");
+    }
+#undef skip_space
+#undef return_err
+}
+
+/* Index the mapped file into bytes of little-endian u64 offsets. */
+static PyObject *index_build(const file_map *fm, int lines)
+{
+    const char *hdr = fm->view.buf, *end = hdr + fm->view.len, *err_pos = hdr, *msg;
+    offset_list list = {0};
+    Py_BEGIN_ALLOW_THREADS
+    msg = lines ? index_lines(hdr, end, &list) : index_array(hdr, end, &list, &err_pos);
+    Py_END_ALLOW_THREADS
+
+    PyObject *index = NULL;
+    if (msg)
+    {
+        PyErr_Format(JSONDecodeError, "%s\n\tat %zd", msg, (Py_ssize_t)(err_pos - hdr));
+    }
+    else if ((index = PyBytes_FromStringAndSize(NULL, (Py_ssize_t)(list.len * 8))))
+    {
+        unsigned char *out = (unsigned char *)PyBytes_AS_STRING(index);
+        for (size_t i = 0; i < list.len; i++)
+        {
+            uint64_t offset = list.items[i];
+            for (int b = 0; b < 8; b++) *out++ = (unsigned char)(offset >> (b * 8));
+        }
+    }
+    PyMem_RawFree(list.items);
+    return index;
+}
+
+static uint64_t read_offset(const unsigned char *src)
+{
+    uint64_t offset = 0;
+    for (int b = 7; b >= 0; b--) offset = (offset << 8) | src[b];
+    return offset;
+}
+
+/* The number of elements of an index, or -1 with an exception set. */
+static Py_ssize_t index_count(const Py_buffer *index)
+{
+    if (index->len % 8 != 0 || index->len < 8)
+    {
+        PyErr_SetString(PyExc_ValueError, "index must be a sequence of 8-byte offsets");
+        return -1;
+    }
+    return index->len / 8 - 1;
+}
+
+/* Decode element `i` of the mapped file, `i` may be negative. */
+static PyObject *index_load(const file_map *fm, const Py_buffer *index, Py_ssize_t count, Py_ssize_t i,
+                            pyyjson_read_ctx *ctx)
+{
+    if (i < 0) i += count;
+    if (i < 0 || i >= count)
+    {
+        PyErr_SetString(PyExc_IndexError, "index out of range");
+        return NULL;
+    }
+    uint64_t start = read_offset((const unsigned char *)index->buf + i * 8);
+    uint64_t stop = read_offset((const unsigned char *)index->buf + (i + 1) * 8);
+    if (start > stop || stop > (uint64_t)fm->view.len)
+    {
+        PyErr_SetString(PyExc_ValueError, "index does not match the file");
+        return NULL;
+    }
+    yyjson_read_err err;
+    /* the range of an array element ends after the separator */
+    yyjson_read_flag flg = pyyjson_read_flags(YYJSON_READ_STOP_WHEN_DONE, ctx);
+    PyObject *root = yyjson_read_opts((char *)fm->view.buf + start, (size_t)(stop - start), flg, ctx, NULL, &err);
+    if (!root && !PyErr_Occurred())
+        PyErr_Format(JSONDecodeError, "%s\n\tat %zu", err.msg, (size_t)start + err.pos);
+    return root;
+}
+
+PyObject *pyyjson_BuildIndex(PyObject *self, PyObject *args, PyObject *kwargs)
+{
+    PyObject *path;
+    int lines = 0;
+    static const char *kwlist[] = {"", "lines", NULL};
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "O|p", (char **)kwlist, &path, &lines))
+    {
+        return NULL;
+    }
+
+    file_map fm;
+    if (file_map_open(path, &fm) < 0) return NULL;
+    PyObject *index = index_build(&fm, lines);
+    file_map_close(&fm);
+    return index;
+}
+
+PyObject *pyyjson_LoadAt(PyObject *self, PyObject *args, PyObject *kwargs)
+{
+    PyObject *path, *index_obj;
+    Py_ssize_t i;
+    PyObject *option = Py_None;
+    pyyjson_read_ctx ctx = {0};
+    static const char *kwlist[] = {"", "", "", "option", NULL};
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "OOn|O", (char **)kwlist, &path, &index_obj, &i, &option))
+    {
+        return NULL;
+    }
+    if (pyyjson_parse_option(option, &ctx.option) < 0) return NULL;
+
+    Py_buffer index;
+    if (PyObject_GetBuffer(index_obj, &index, PyBUF_SIMPLE) < 0) return NULL;
+    Py_ssize_t count = index_count(&index);
+    PyObject *root = NULL;
+    file_map fm;
+    if (count >= 0 && file_map_open(path, &fm) == 0)
+    {
+        root = index_load(&fm, &index, count, i, &ctx);
+        file_map_close(&fm);
+    }
+    PyBuffer_Release(&index);
+    return root;
+}
+
+/*==============================================================================
+ * Index Type
+ *============================================================================*/
+
+/* Close the file and release the index, the object stays valid but closed. */
+static void Index_close_state(PyyjsonIndexObject *self)
+{
+    if (!self->open) return;
+    self->open = false;
+    PyBuffer_Release(&self->view);
+    file_map_close(&self->fm);
+}
+
+static int Index_init(PyyjsonIndexObject *self, PyObject *args, PyObject *kwargs)
+{
+    PyObject *path, *index = Py_None, *option = Py_None;
+    int lines = 0;
+    static const char *kwlist[] = {"", "index", "lines", "option", NULL};
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "O|O$pO:Index", (char **)kwlist, &path, &index, &lines,
+                                     &option))
+    {
+        return -1;
+    }
+    if (self->open)
+    {
+        PyErr_SetString(PyExc_RuntimeError, "Index is already initialized");
+        return -1;
+    }
+    if (pyyjson_parse_option(option, &self->ctx.option) < 0) return -1;
+    if (file_map_open(path, &self->fm) < 0) return -1;
+    if (index == Py_None)
+    {
+        index = index_build(&self->fm, lines);
+    }
+    else
+    {
+        Py_INCREF(index);
+    }
+    if (!index || PyObject_GetBuffer(index, &self->view, PyBUF_SIMPLE) < 0)
+    {
+        Py_XDECREF(index);
+        file_map_close(&self->fm);
+        return -1;
+    }
+    self->count = index_count(&self->view);
+    if (self->count < 0)
+    {
+        PyBuffer_Release(&self->view);
+        Py_DECREF(index);
+        file_map_close(&self->fm);
+        return -1;
+    }
+    Py_XSETREF(self->index, index);
+    self->open = true;
+    return 0;
+}
+
+static int Index_check_open(PyyjsonIndexObject *self)
+{
+    if (self->open) return 0;
+    PyErr_SetString(PyExc_ValueError, "I/O operation on closed Index");
+    return -1;
+}
+
+static Py_ssize_t Index_length(PyyjsonIndexObject *self)
+{
+    if (Index_check_open(self) < 0) return -1;
+    return self->count;
+}
+
+static PyObject *Index_subscript(PyyjsonIndexObject *self, PyObject *key)
+{
+    if (Index_check_open(self) < 0) return NULL;
+    if (!PyIndex_Check(key))
+    {
+        PyErr_Format(PyExc_TypeError, "Index indices must be integers, not %.200s", Py_TYPE(key)->tp_name);
+        return NULL;
+    }
+    Py_ssize_t i = PyNumber_AsSsize_t(key, PyExc_IndexError);
+    if (i == -1 && PyErr_Occurred()) return NULL;
+    return index_load(&self->fm, &self->view, self->count, i, &self->ctx);
+}
+
+static PyObject *Index_close(PyyjsonIndexObject *self, PyObject *Py_UNUSED(ignored))
+{
+    Index_close_state(self);
+    Py_RETURN_NONE;
+}
+
+static PyObject *Index_enter(PyyjsonIndexObject *self, PyObject *Py_UNUSED(ignored))
+{
+    if (Index_check_open(self) < 0) return NULL;
+    Py_INCREF(self);
+    return (PyObject *)self;
+}
+
+static PyObject *Index_exit(PyyjsonIndexObject *self, PyObject *args)
+{
+    Index_close_state(self);
+    Py_RETURN_NONE;
+}
+
+static int Index_traverse(PyyjsonIndexObject *self, visitproc visit, void *arg)
+{
+    Py_VISIT(self->index);
+    Py_VISIT(self->fm.file);
+    Py_VISIT(self->fm.map);
+    return 0;
+}
+
+static int Index_clear(PyyjsonIndexObject *self)
+{
+    Index_close_state(self);
+    Py_CLEAR(self->index);
+    return 0;
+}
+
+static void Index_dealloc(PyyjsonIndexObject *self)
+{
+    PyObject_GC_UnTrack(self);
+    Index_clear(self);
+    Py_TYPE(self)->tp_free((PyObject *)self);
+}
+
+static PyMappingMethods Index_as_mapping = {
+    .mp_length = (lenfunc)Index_length,
+    .mp_subscript = (binaryfunc)Index_subscript,
+};
+
+static PyMethodDef Index_methods[] = {
+    {"close", (PyCFunction)Index_close, METH_NOARGS, "close()\n--\n\nUnmap and close the file."},
+    {"__enter__", (PyCFunction)Index_enter, METH_NOARGS, NULL},
+    {"__exit__", (PyCFunction)Index_exit, METH_VARARGS, NULL},
+    {NULL, NULL, 0, NULL} /* Sentinel */
+};
+
+static PyMemberDef Index_members[] = {
+    {"index", T_OBJECT, offsetof(PyyjsonIndexObject, index), READONLY, "The offsets, as given or built by `build_index()`."},
+    {NULL} /* Sentinel */
+};
+
+PyTypeObject PyyjsonIndex_Type = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    .tp_name = "pyyjson.Index",
+    .tp_basicsize = sizeof(PyyjsonIndexObject),
+    .tp_dealloc = (destructor)Index_dealloc,
+    .tp_as_mapping = &Index_as_mapping,
+    .tp_flags = Py_TPFLAGS_DEFAULT | Py_TPFLAGS_HAVE_GC,
+    .tp_doc = "Index(path, /, index=None, *, lines=False, option=None)\n--\n\n"
+              "Random access to the elements of a JSON file, or to the lines of an "
+              "NDJSON file with `lines=True`.\n\n"
+              "The file is opened and memory-mapped once, and `index[i]` decodes "
+              "element `i` like `load_at()`, with `option`. `index` takes offsets "
+              "from `build_index()` or a sidecar file, and they are built when it is "
+              "None. Use it as a context manager, or call `close()`, to unmap the file.",
+    .tp_traverse = (traverseproc)Index_traverse,
+    .tp_clear = (inquiry)Index_clear,
+    .tp_methods = Index_methods,
+    .tp_members = Index_members,
+    .tp_init = (initproc)Index_init,
+    .tp_new = PyType_GenericNew,
+};
+
+int pyyjson_index_module_init(PyObject *module)
+{
+    if (PyType_Ready(&PyyjsonIndex_Type) < 0) return -1;
+    Py_INCREF(&PyyjsonIndex_Type);
+    if (PyModule_AddObject(module, "Index", (PyObject *)&PyyjsonIndex_Type) < 0)
+    {
+        Py_DECREF(&PyyjsonIndex_Type);
+        return -1;
+    }
+    return 0;
+}
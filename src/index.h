@@ -0,0 +1,42 @@
+#ifndef INDEX_H
+#define INDEX_H
+
+#include "decoder.h"
+#include <stdbool.h>
+
+/** A file mapped read-only through the `mmap` module. */
+typedef struct file_map {
+    PyObject *file;
+    /** the `mmap.mmap`, NULL for an empty file */
+    PyObject *map;
+    Py_buffer view;
+} file_map;
+
+/** An indexed file kept mapped between lookups. */
+typedef struct PyyjsonIndexObject {
+    PyObject_HEAD
+    file_map fm;
+    /** the object holding the offsets */
+    PyObject *index;
+    /** buffer of `index`, held while open */
+    Py_buffer view;
+    /** number of elements */
+    Py_ssize_t count;
+    /** reader state, holds the decode options */
+    pyyjson_read_ctx ctx;
+    /** whether the file is mapped */
+    bool open;
+} PyyjsonIndexObject;
+
+extern PyTypeObject PyyjsonIndex_Type;
+
+/** `build_index(path, /, lines=False)` */
+PyObject *pyyjson_BuildIndex(PyObject *self, PyObject *args, PyObject *kwargs);
+
+/** `load_at(path, index, i, /, option=None)` */
+PyObject *pyyjson_LoadAt(PyObject *self, PyObject *args, PyObject *kwargs);
+
+/** Ready the Index type and add it to the module. */
+int pyyjson_index_module_init(PyObject *module);
+
+#endif // INDEX_H
@@ -2,23 +2,149 @@
 
 #include "yyjson.h"
 #include "pyinit.h"
+#include "decoder.h"
+#include "rawnumber.h"
+#include "frozenmapping.h"
+#include "index.h"
+#include "skip.h"
+#include "asyncdecode.h"
+#include "encoder.h"
 
 #define MODULE_STATE(o) ((modulestate *)PyModule_GetState(o))
 
-PyObject *pyyjson_Encode(PyObject *self, PyObject *args, PyObject *kwargs);
-PyObject *pyyjson_Decode(PyObject *self, PyObject *args, PyObject *kwargs);
-PyObject *pyyjson_FileEncode(PyObject *self, PyObject *args, PyObject *kwargs);
+PyObject *pyyjson_Encode(PyObject *self, PyObject *const *args, Py_ssize_t nargs, PyObject *kwnames);
+PyObject *pyyjson_Decode(PyObject *self, PyObject *const *args, Py_ssize_t nargs, PyObject *kwnames);
+PyObject *pyyjson_DecodeLines(PyObject *self, PyObject *args, PyObject *kwargs);
+PyObject *pyyjson_FileEncode(PyObject *self, PyObject *const *args, Py_ssize_t nargs, PyObject *kwnames);
+PyObject *pyyjson_EncodeInto(PyObject *self, PyObject *const *args, Py_ssize_t nargs, PyObject *kwnames);
+PyObject *pyyjson_EncodeIter(PyObject *self, PyObject *const *args, Py_ssize_t nargs, PyObject *kwnames);
 PyObject *pyyjson_DecodeFile(PyObject *self, PyObject *args, PyObject *kwargs);
 
 PyObject *JSONDecodeError = NULL;
 PyObject *JSONEncodeError = NULL;
 
+/*
+ Parse the arguments of a fast call into `params`, the first `nposonly` of
+ which are positional-only. Parameters that are not given keep their value.
+ */
+static int parse_encode_args(const char *fname, PyObject *const *args, Py_ssize_t nargs, PyObject *kwnames,
+                             const char *const *names, int nparams, int nposonly, PyObject **params)
+{
+    Py_ssize_t nkw = kwnames ? PyTuple_GET_SIZE(kwnames) : 0;
+    if (nargs > nparams)
+    {
+        PyErr_Format(PyExc_TypeError, "%s() takes at most %d arguments (%zd given)", fname, nparams, nargs);
+        return -1;
+    }
+    for (Py_ssize_t i = 0; i < nargs; i++) params[i] = args[i];
+    for (Py_ssize_t i = 0; i < nkw; i++)
+    {
+        PyObject *name = PyTuple_GET_ITEM(kwnames, i);
+        int index = 0;
+        for (int j = nposonly; j < nparams; j++)
+        {
+            if (PyUnicode_CompareWithASCIIString(name, names[j]) == 0) index = j;
+        }
+        if (!index)
+        {
+            PyErr_Format(PyExc_TypeError, "%s() got an unexpected keyword argument %R", fname, name);
+            return -1;
+        }
+        if (index < nargs)
+        {
+            PyErr_Format(PyExc_TypeError, "%s() got multiple values for argument '%s'", fname, names[index]);
+            return -1;
+        }
+        params[index] = args[nargs + i];
+    }
+    return 0;
+}
+
+PyObject *pyyjson_Encode(PyObject *self, PyObject *const *args, Py_ssize_t nargs, PyObject *kwnames)
+{
+    static const char *const names[] = {"obj", "default", "option"};
+    PyObject *params[3] = {NULL, Py_None, Py_None};
+    int option;
+    if (parse_encode_args("dumps", args, nargs, kwnames, names, 3, 1, params) < 0) return NULL;
+    if (!params[0])
+    {
+        PyErr_SetString(JSONEncodeError, "dumps() missing 1 required positional argument: 'obj'");
+        return NULL;
+    }
+    if (pyyjson_parse_encode_option(params[2], &option) < 0) return NULL;
+    return pyyjson_encode_obj(params[0], params[1] == Py_None ? NULL : params[1], option);
+}
+
+PyObject *pyyjson_FileEncode(PyObject *self, PyObject *const *args, Py_ssize_t nargs, PyObject *kwnames)
+{
+    static const char *const names[] = {"obj", "fp", "default", "option"};
+    PyObject *params[4] = {NULL, NULL, Py_None, Py_None};
+    int option;
+    if (parse_encode_args("dump", args, nargs, kwnames, names, 4, 2, params) < 0) return NULL;
+    if (!params[1])
+    {
+        PyErr_SetString(PyExc_TypeError, "dump() missing required positional arguments: 'obj' and 'fp'");
+        return NULL;
+    }
+    if (pyyjson_parse_encode_option(params[3], &option) < 0) return NULL;
+    return pyyjson_encode_file(params[0], params[1], params[2] == Py_None ? NULL : params[2], option);
+}
+
+PyObject *pyyjson_EncodeInto(PyObject *self, PyObject *const *args, Py_ssize_t nargs, PyObject *kwnames)
+{
+    static const char *const names[] = {"obj", "buffer", "offset", "default", "option"};
+    PyObject *params[5] = {NULL, NULL, NULL, Py_None, Py_None};
+    Py_ssize_t offset = 0;
+    int option;
+    if (parse_encode_args("dumps_into", args, nargs, kwnames, names, 5, 2, params) < 0) return NULL;
+    if (!params[1])
+    {
+        PyErr_SetString(PyExc_TypeError, "dumps_into() missing required positional arguments: 'obj' and 'buffer'");
+        return NULL;
+    }
+    if (params[2])
+    {
+        offset = PyNumber_AsSsize_t(params[2], PyExc_OverflowError);
+        if (offset == -1 && PyErr_Occurred()) return NULL;
+    }
+    if (pyyjson_parse_encode_option(params[4], &option) < 0) return NULL;
+    return pyyjson_encode_into(params[0], params[1], offset, params[3] == Py_None ? NULL : params[3], option);
+}
+
+PyObject *pyyjson_EncodeIter(PyObject *self, PyObject *const *args, Py_ssize_t nargs, PyObject *kwnames)
+{
+    static const char *const names[] = {"obj", "chunk_size", "default", "option"};
+    PyObject *params[4] = {NULL, NULL, Py_None, Py_None};
+    Py_ssize_t chunk_size = PYYJSON_DUMP_BUFFER_SIZE;
+    int option;
+    if (parse_encode_args("dumps_iter", args, nargs, kwnames, names, 4, 1, params) < 0) return NULL;
+    if (!params[0])
+    {
+        PyErr_SetString(PyExc_TypeError, "dumps_iter() missing 1 required positional argument: 'obj'");
+        return NULL;
+    }
+    if (params[1])
+    {
+        chunk_size = PyNumber_AsSsize_t(params[1], PyExc_OverflowError);
+        if (chunk_size == -1 && PyErr_Occurred()) return NULL;
+    }
+    if (pyyjson_parse_encode_option(params[3], &option) < 0) return NULL;
+    return pyyjson_encode_iter(params[0], params[2] == Py_None ? NULL : params[2], option, chunk_size);
+}
+
 static PyMethodDef pyyjson_Methods[] = {
-    // {"encode", (PyCFunction)pyyjson_Encode, METH_VARARGS | METH_KEYWORDS, "Converts arbitrary object recursively into JSON. "},
-    {"decode", (PyCFunction)pyyjson_Decode, METH_VARARGS | METH_KEYWORDS, "Converts JSON as string to dict object structure."},
-    // {"dumps", (PyCFunction)pyyjson_Encode, METH_VARARGS | METH_KEYWORDS, "Converts arbitrary object recursively into JSON. "},
-    // {"loads", (PyCFunction)pyyjson_Decode, METH_VARARGS | METH_KEYWORDS, "Converts JSON as string to dict object structure."},
-    // {"dump", (PyCFunction)pyyjson_FileEncode, METH_VARARGS | METH_KEYWORDS, "Converts arbitrary object recursively into JSON file. "},
+    {"encode", (PyCFunction)(void (*)(void))pyyjson_Encode, METH_FASTCALL | METH_KEYWORDS, "encode(obj, /, default=None, option=None)\n--\n\nSerialize `obj` to JSON bytes.\n\n`default` is called with objects of unsupported types and should return a serializable object or raise. `option` is an int of `OPT_*` flags combined with `|`. Raises JSONEncodeError if `obj` cannot be serialized."},
+    {"decode", (PyCFunction)(void (*)(void))pyyjson_Decode, METH_FASTCALL | METH_KEYWORDS, "decode(obj, /, option=None)\n--\n\nConverts JSON as string to dict object structure."},
+    {"dumps", (PyCFunction)(void (*)(void))pyyjson_Encode, METH_FASTCALL | METH_KEYWORDS, "dumps(obj, /, default=None, option=None)\n--\n\nSerialize `obj` to JSON bytes.\n\n`default` is called with objects of unsupported types and should return a serializable object or raise. `option` is an int of `OPT_*` flags combined with `|`. Raises JSONEncodeError if `obj` cannot be serialized."},
+    {"loads", (PyCFunction)(void (*)(void))pyyjson_Decode, METH_FASTCALL | METH_KEYWORDS, "loads(obj, /, option=None)\n--\n\nConverts JSON as string to dict object structure."},
+    {"loads_lines", (PyCFunction)pyyjson_DecodeLines, METH_VARARGS | METH_KEYWORDS, "loads_lines(obj, /, option=None)\n--\n\nConverts newline-delimited JSON to a list of values, skipping blank lines.\n\nReturns `(values, errors)`. A line that fails to decode is left out of `values` and reported in `errors` as `(line_no, byte_offset, code, msg)`, where `line_no` counts from 1, `byte_offset` is the offset of the error in the UTF-8 input and `code` is the yyjson read error code, or 0 if the JSON was valid but could not be converted. No JSONDecodeError is raised for bad lines."},
+    {"build_index", (PyCFunction)pyyjson_BuildIndex, METH_VARARGS | METH_KEYWORDS, "build_index(path, /, lines=False)\n--\n\nIndex the elements of the root array of a JSON file, or the non-blank lines of an NDJSON file with `lines=True`.\n\nReturns bytes of little-endian u64 offsets: the start of each element or line, followed by the end of the last one. The elements are skipped without decoding them. Pass the index to `load_at()`, or save it as a sidecar file."},
+    {"load_at", (PyCFunction)pyyjson_LoadAt, METH_VARARGS | METH_KEYWORDS, "load_at(path, index, i, /, option=None)\n--\n\nDecode element `i` of a file indexed by `build_index()`.\n\nThe file is memory-mapped and only the bytes of the element are read. `index` can be any buffer, such as the bytes returned by `build_index()` or a memory-mapped sidecar file. The file is opened for each call, use `Index` to decode many elements."},
+    {"skip_value", (PyCFunction)pyyjson_SkipValue, METH_VARARGS, "skip_value(buf, offset=0, /)\n--\n\nReturn the offset just past the JSON value at `offset` of a bytes-like object, skipping leading whitespace.\n\nThe value is not decoded: strings are scanned for their closing quote and containers for their matching bracket. Raises JSONDecodeError if the value is unterminated or its brackets do not match."},
+    {"loads_async", (PyCFunction)pyyjson_DecodeAsync, METH_VARARGS | METH_KEYWORDS, "loads_async(obj, /, option=None)\n--\n\nDeserialize JSON like `loads()` and return an asyncio future of the result.\n\nMust be called from a running event loop. Inputs of 64 KiB or more are parsed without the GIL on a native thread owned by pyyjson, which wakes the loop with `call_soon_threadsafe()` to build the objects. The default executor is not used. Smaller inputs, and inputs decoded with `OPT_PARSE_SHARE_SUBTREES`, are decoded right away into a completed future."},
+    {"dumps_into", (PyCFunction)(void (*)(void))pyyjson_EncodeInto, METH_FASTCALL | METH_KEYWORDS, "dumps_into(obj, buffer, /, offset=0, default=None, option=None)\n--\n\nSerialize `obj` like `dumps()` into a writable buffer, such as a bytearray, memoryview or mmap, starting at `offset`.\n\nReturns the number of bytes written. If the JSON does not fit, nothing is allocated for it and minus the number of bytes missing is returned instead; the buffer contents after `offset` are then unspecified."},
+    {"dumps_iter", (PyCFunction)(void (*)(void))pyyjson_EncodeIter, METH_FASTCALL | METH_KEYWORDS, "dumps_iter(obj, /, chunk_size=65536, default=None, option=None)\n--\n\nSerialize `obj` like `dumps()`, lazily, as an iterator of bytes chunks.\n\nEach chunk is `chunk_size` bytes long except the last one. The encoder stops between items once a chunk is full and resumes from where it was on the next iteration, so the first chunk is ready early and memory stays bounded. Changing `obj` while iterating gives unspecified output."},
+    {"dump", (PyCFunction)(void (*)(void))pyyjson_FileEncode, METH_FASTCALL | METH_KEYWORDS, "dump(obj, fp, /, default=None, option=None)\n--\n\nSerialize `obj` like `dumps()` and write it to `fp`, a binary file object or a file descriptor.\n\nThe JSON is written through a 64 KiB buffer that is flushed whenever it fills, so memory stays bounded however large the output is. File descriptors are written without holding the GIL. Returns None."},
     // {"load", (PyCFunction)pyyjson_DecodeFile, METH_VARARGS | METH_KEYWORDS, "Converts JSON as file to dict object structure."},
     {NULL, NULL, 0, NULL} /* Sentinel */
 };
@@ -29,6 +155,13 @@ static void module_free(void *m);
 typedef struct
 {
     PyObject *type_decimal;
+    PyObject *type_uuid;
+    PyObject *uuid_safe_unknown;
+    PyObject *get_running_loop;
+    PyObject *enum_meta;
+    PyObject *dataclass_field;
+    PyObject *numpy_ndarray;
+    PyObject *numpy_generic;
 } modulestate;
 
 static struct PyModuleDef moduledef = {
@@ -46,12 +179,26 @@ static struct PyModuleDef moduledef = {
 static int module_traverse(PyObject *m, visitproc visit, void *arg)
 {
     Py_VISIT(MODULE_STATE(m)->type_decimal);
+    Py_VISIT(MODULE_STATE(m)->type_uuid);
+    Py_VISIT(MODULE_STATE(m)->uuid_safe_unknown);
+    Py_VISIT(MODULE_STATE(m)->get_running_loop);
+    Py_VISIT(MODULE_STATE(m)->enum_meta);
+    Py_VISIT(MODULE_STATE(m)->dataclass_field);
+    Py_VISIT(MODULE_STATE(m)->numpy_ndarray);
+    Py_VISIT(MODULE_STATE(m)->numpy_generic);
     return 0;
 }
 
 static int module_clear(PyObject *m)
 {
     Py_CLEAR(MODULE_STATE(m)->type_decimal);
+    Py_CLEAR(MODULE_STATE(m)->type_uuid);
+    Py_CLEAR(MODULE_STATE(m)->uuid_safe_unknown);
+    Py_CLEAR(MODULE_STATE(m)->get_running_loop);
+    Py_CLEAR(MODULE_STATE(m)->enum_meta);
+    Py_CLEAR(MODULE_STATE(m)->dataclass_field);
+    Py_CLEAR(MODULE_STATE(m)->numpy_ndarray);
+    Py_CLEAR(MODULE_STATE(m)->numpy_generic);
     return 0;
 }
 
@@ -79,15 +226,6 @@ PyMODINIT_FUNC PyInit_pyyjson(void)
 
     PyModule_AddStringConstant(module, "__version__", YYJSON_VERSION_STRING);
 
-    // PyObject *mod_decimal = PyImport_ImportModule("decimal");
-    // if (mod_decimal) {
-    //     PyObject *type_decimal = PyObject_GetAttrString(mod_decimal, "Decimal");
-    //     assert(type_decimal != NULL);
-    //     MODULE_STATE(module)->type_decimal = type_decimal;
-    //     Py_DECREF(mod_decimal);
-    // } else
-    //     PyErr_Clear();
-
     JSONDecodeError = PyErr_NewException("pyyjson.JSONDecodeError", PyExc_ValueError, NULL);
     Py_XINCREF(JSONDecodeError);
     if (PyModule_AddObject(module, "JSONDecodeError", JSONDecodeError) < 0)
@@ -98,7 +236,15 @@ PyMODINIT_FUNC PyInit_pyyjson(void)
         return NULL;
     }
 
-    JSONEncodeError = PyErr_NewException("pyyjson.JSONEncodeError", PyExc_ValueError, NULL);
+    /* a TypeError like orjson's, and still a ValueError */
+    PyObject *encode_error_bases = PyTuple_Pack(2, PyExc_TypeError, PyExc_ValueError);
+    if (!encode_error_bases)
+    {
+        Py_DECREF(module);
+        return NULL;
+    }
+    JSONEncodeError = PyErr_NewException("pyyjson.JSONEncodeError", encode_error_bases, NULL);
+    Py_DECREF(encode_error_bases);
     Py_XINCREF(JSONEncodeError);
     if (PyModule_AddObject(module, "JSONEncodeError", JSONEncodeError) < 0) {
         Py_XDECREF(JSONEncodeError);
@@ -107,28 +253,207 @@ PyMODINIT_FUNC PyInit_pyyjson(void)
         return NULL;
     }
 
+    if (pyyjson_decoder_module_init(module) < 0 || pyyjson_raw_number_module_init(module) < 0 ||
+        pyyjson_frozen_mapping_module_init(module) < 0 || pyyjson_async_decode_module_init(module) < 0 ||
+        pyyjson_encoder_module_init(module) < 0 || pyyjson_index_module_init(module) < 0)
+    {
+        Py_DECREF(module);
+        return NULL;
+    }
+
+    if (PyModule_AddIntConstant(module, "OPT_PARSE_DECIMAL", PYYJSON_OPT_PARSE_DECIMAL) < 0 ||
+        PyModule_AddIntConstant(module, "OPT_PARSE_BIG_INT", PYYJSON_OPT_PARSE_BIG_INT) < 0 ||
+        PyModule_AddIntConstant(module, "OPT_PARSE_RAW_NUMBER", PYYJSON_OPT_PARSE_RAW_NUMBER) < 0 ||
+        PyModule_AddIntConstant(module, "OPT_PARSE_DATETIME", PYYJSON_OPT_PARSE_DATETIME) < 0 ||
+        PyModule_AddIntConstant(module, "OPT_PARSE_UUID", PYYJSON_OPT_PARSE_UUID) < 0 ||
+        PyModule_AddIntConstant(module, "OPT_PARSE_CACHE_STR", PYYJSON_OPT_PARSE_CACHE_STR) < 0 ||
+        PyModule_AddIntConstant(module, "OPT_PARSE_SHARE_SUBTREES", PYYJSON_OPT_PARSE_SHARE_SUBTREES) < 0 ||
+        PyModule_AddIntConstant(module, "OPT_PARSE_FROZEN", PYYJSON_OPT_PARSE_FROZEN) < 0 ||
+        PyModule_AddIntConstant(module, "OPT_PARSE_TRUSTED_UTF8", PYYJSON_OPT_PARSE_TRUSTED_UTF8) < 0 ||
+        PyModule_AddIntConstant(module, "OPT_INDENT_2", PYYJSON_OPT_INDENT_2) < 0 ||
+        PyModule_AddIntConstant(module, "OPT_NAIVE_UTC", PYYJSON_OPT_NAIVE_UTC) < 0 ||
+        PyModule_AddIntConstant(module, "OPT_NON_STR_KEYS", PYYJSON_OPT_NON_STR_KEYS) < 0 ||
+        PyModule_AddIntConstant(module, "OPT_OMIT_MICROSECONDS", PYYJSON_OPT_OMIT_MICROSECONDS) < 0 ||
+        PyModule_AddIntConstant(module, "OPT_SERIALIZE_NUMPY", PYYJSON_OPT_SERIALIZE_NUMPY) < 0 ||
+        PyModule_AddIntConstant(module, "OPT_SORT_KEYS", PYYJSON_OPT_SORT_KEYS) < 0 ||
+        PyModule_AddIntConstant(module, "OPT_STRICT_INTEGER", PYYJSON_OPT_STRICT_INTEGER) < 0 ||
+        PyModule_AddIntConstant(module, "OPT_UTC_Z", PYYJSON_OPT_UTC_Z) < 0 ||
+        PyModule_AddIntConstant(module, "OPT_PASSTHROUGH_SUBCLASS", PYYJSON_OPT_PASSTHROUGH_SUBCLASS) < 0 ||
+        PyModule_AddIntConstant(module, "OPT_PASSTHROUGH_DATETIME", PYYJSON_OPT_PASSTHROUGH_DATETIME) < 0 ||
+        PyModule_AddIntConstant(module, "OPT_APPEND_NEWLINE", PYYJSON_OPT_APPEND_NEWLINE) < 0 ||
+        PyModule_AddIntConstant(module, "OPT_PASSTHROUGH_DATACLASS", PYYJSON_OPT_PASSTHROUGH_DATACLASS) < 0 ||
+        PyModule_AddIntConstant(module, "OPT_FLOAT32", PYYJSON_OPT_FLOAT32) < 0 ||
+        PyModule_AddIntConstant(module, "OPT_SERIALIZE_DATACLASS", 0) < 0 ||
+        PyModule_AddIntConstant(module, "OPT_SERIALIZE_UUID", 0) < 0)
+    {
+        Py_DECREF(module);
+        return NULL;
+    }
+
     return module;
 }
 
-PyObject *pyyjson_Decode(PyObject *self, PyObject *args, PyObject *kwargs)
+static modulestate *get_module_state(void)
 {
-    const char *string = NULL;
-    size_t len = 0;
-    static const char *kwlist[] = {"s", NULL};
-    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "s#", (char **)kwlist, &string, &len))
+    PyObject *module = PyState_FindModule(&moduledef);
+    if (!module)
     {
-        PyErr_SetString(JSONDecodeError, "Invalid argument");
+        PyErr_SetString(PyExc_RuntimeError, "pyyjson module is not initialized");
         return NULL;
     }
-    // TODO
-    yyjson_read_err err;
-    PyObject* root = yyjson_read_opts((char *)string,
-                            len, YYJSON_READ_NOFLAG & ~YYJSON_READ_INSITU, NULL, &err);
-    if(err.code)
+    return MODULE_STATE(module);
+}
+
+PyObject *pyyjson_get_type_decimal(void)
+{
+    modulestate *state = get_module_state();
+    if (!state) return NULL;
+    if (!state->type_decimal)
+    {
+        PyObject *mod_decimal = PyImport_ImportModule("decimal");
+        if (!mod_decimal) return NULL;
+        state->type_decimal = PyObject_GetAttrString(mod_decimal, "Decimal");
+        Py_DECREF(mod_decimal);
+    }
+    return state->type_decimal;
+}
+
+int pyyjson_get_uuid_types(PyObject **type_uuid, PyObject **safe_unknown)
+{
+    modulestate *state = get_module_state();
+    if (!state) return -1;
+    if (!state->uuid_safe_unknown)
+    {
+        PyObject *mod_uuid = PyImport_ImportModule("uuid");
+        if (!mod_uuid) return -1;
+        PyObject *type = PyObject_GetAttrString(mod_uuid, "UUID");
+        PyObject *safe = type ? PyObject_GetAttrString(mod_uuid, "SafeUUID") : NULL;
+        PyObject *unknown = safe ? PyObject_GetAttrString(safe, "unknown") : NULL;
+        Py_XDECREF(safe);
+        Py_DECREF(mod_uuid);
+        if (!unknown)
+        {
+            Py_XDECREF(type);
+            return -1;
+        }
+        state->type_uuid = type;
+        state->uuid_safe_unknown = unknown;
+    }
+    *type_uuid = state->type_uuid;
+    *safe_unknown = state->uuid_safe_unknown;
+    return 0;
+}
+
+PyObject *pyyjson_get_running_loop_func(void)
+{
+    modulestate *state = get_module_state();
+    if (!state) return NULL;
+    if (!state->get_running_loop)
+    {
+        PyObject *mod_asyncio = PyImport_ImportModule("asyncio");
+        if (!mod_asyncio) return NULL;
+        state->get_running_loop = PyObject_GetAttrString(mod_asyncio, "get_running_loop");
+        Py_DECREF(mod_asyncio);
+    }
+    return state->get_running_loop;
+}
+
+PyObject *pyyjson_get_enum_meta(void)
+{
+    modulestate *state = get_module_state();
+    if (!state) return NULL;
+    if (!state->enum_meta)
+    {
+        PyObject *mod_enum = PyImport_ImportModule("enum");
+        if (!mod_enum) return NULL;
+        state->enum_meta = PyObject_GetAttrString(mod_enum, "EnumMeta");
+        Py_DECREF(mod_enum);
+    }
+    return state->enum_meta;
+}
+
+PyObject *pyyjson_get_dataclass_field_marker(void)
+{
+    modulestate *state = get_module_state();
+    if (!state) return NULL;
+    if (!state->dataclass_field)
+    {
+        PyObject *mod_dataclasses = PyImport_ImportModule("dataclasses");
+        if (!mod_dataclasses) return NULL;
+        state->dataclass_field = PyObject_GetAttrString(mod_dataclasses, "_FIELD");
+        Py_DECREF(mod_dataclasses);
+    }
+    return state->dataclass_field;
+}
+
+int pyyjson_get_numpy_types(PyObject **ndarray, PyObject **generic)
+{
+    modulestate *state = get_module_state();
+    if (!state) return -1;
+    if (!state->numpy_generic)
+    {
+        /* numpy objects only exist once it is imported, so it is not imported here */
+        PyObject *mod_numpy = PyDict_GetItemString(PyImport_GetModuleDict(), "numpy");
+        if (!mod_numpy) return 0;
+        PyObject *type = PyObject_GetAttrString(mod_numpy, "ndarray");
+        PyObject *base = type ? PyObject_GetAttrString(mod_numpy, "generic") : NULL;
+        if (!base)
+        {
+            Py_XDECREF(type);
+            return -1;
+        }
+        state->numpy_ndarray = type;
+        state->numpy_generic = base;
+    }
+    *ndarray = state->numpy_ndarray;
+    *generic = state->numpy_generic;
+    return 1;
+}
+
+/* Parse the `(obj, /, option=None)` arguments of a fast call. */
+static int parse_decode_args(const char *fname, PyObject *const *args, Py_ssize_t nargs,
+                             PyObject *kwnames, PyObject **obj, PyObject **option)
+{
+    Py_ssize_t nkw = kwnames ? PyTuple_GET_SIZE(kwnames) : 0;
+    if (nargs < 1 || nargs + nkw > 2)
+    {
+        PyErr_Format(PyExc_TypeError, "%s() takes 1 positional argument and an optional option", fname);
+        return -1;
+    }
+    *obj = args[0];
+    *option = nargs == 2 ? args[1] : Py_None;
+    if (nkw)
+    {
+        PyObject *name = PyTuple_GET_ITEM(kwnames, 0);
+        if (!PyUnicode_Check(name) || PyUnicode_CompareWithASCIIString(name, "option") != 0)
+        {
+            PyErr_Format(PyExc_TypeError, "%s() got an unexpected keyword argument %R", fname, name);
+            return -1;
+        }
+        *option = args[nargs];
+    }
+    return 0;
+}
+
+PyObject *pyyjson_Decode(PyObject *self, PyObject *const *args, Py_ssize_t nargs, PyObject *kwnames)
+{
+    PyObject *obj, *option;
+    pyyjson_read_ctx ctx = {0};
+    if (parse_decode_args("loads", args, nargs, kwnames, &obj, &option) < 0) return NULL;
+    if (option != Py_None && pyyjson_parse_option(option, &ctx.option) < 0) return NULL;
+    return pyyjson_decode_obj(obj, YYJSON_READ_NOFLAG, &ctx);
+}
+
+PyObject *pyyjson_DecodeLines(PyObject *self, PyObject *args, PyObject *kwargs)
+{
+    PyObject *obj;
+    PyObject *option = Py_None;
+    pyyjson_read_ctx ctx = {0};
+    static const char *kwlist[] = {"", "option", NULL};
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "O|O", (char **)kwlist, &obj, &option))
     {
-        PyErr_Format(JSONDecodeError, "%s\n\tat %zu", err.msg, err.pos);
         return NULL;
     }
-    assert(root);
-    return root;
+    if (pyyjson_parse_option(option, &ctx.option) < 0) return NULL;
+    return pyyjson_decode_lines(obj, YYJSON_READ_NOFLAG, &ctx);
 }
@@ -11,4 +11,41 @@
 #include <Python.h>
 #endif
 
+/* Calls and type checks added in Python 3.9 */
+#if PY_VERSION_HEX < 0x03090000
+#define Py_IS_TYPE(ob, type) (Py_TYPE(ob) == (type))
+#define PyObject_CallNoArgs(func) PyObject_CallFunctionObjArgs((func), NULL)
+#define PyObject_CallOneArg(func, arg) PyObject_CallFunctionObjArgs((func), (arg), NULL)
+#define PyObject_CallMethodNoArgs(obj, name) PyObject_CallMethodObjArgs((obj), (name), NULL)
+#endif
+
+extern PyObject *JSONDecodeError;
+extern PyObject *JSONEncodeError;
+
+/** Get `decimal.Decimal` cached in the module state (borrowed reference).
+    Returns NULL with an exception set if it cannot be imported. */
+PyObject *pyyjson_get_type_decimal(void);
+
+/** Get `uuid.UUID` and `uuid.SafeUUID.unknown` cached in the module state
+    (borrowed references). Returns -1 with an exception set on failure. */
+int pyyjson_get_uuid_types(PyObject **type_uuid, PyObject **safe_unknown);
+
+/** Get `asyncio.get_running_loop` cached in the module state (borrowed reference).
+    Returns NULL with an exception set if it cannot be imported. */
+PyObject *pyyjson_get_running_loop_func(void);
+
+/** Get `enum.EnumMeta` cached in the module state (borrowed reference).
+    Returns NULL with an exception set if it cannot be imported. */
+PyObject *pyyjson_get_enum_meta(void);
+
+/** Get `dataclasses._FIELD`, the marker of fields that are not ClassVar or
+    InitVar, cached in the module state (borrowed reference).
+    Returns NULL with an exception set if it cannot be imported. */
+PyObject *pyyjson_get_dataclass_field_marker(void);
+
+/** Get `numpy.ndarray` and `numpy.generic` cached in the module state
+    (borrowed references), without importing numpy. Returns 1, 0 if numpy is
+    not imported, or -1 with an exception set on failure. */
+int pyyjson_get_numpy_types(PyObject **ndarray, PyObject **generic);
+
 #endif // PYINIT_H
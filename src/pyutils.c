@@ -19,13 +19,9 @@ PyObject* create_py_unicode(const char* str, Py_ssize_t len, int is_ascii, int k
         }
     }
     PyObject* unicode = PyUnicode_New(len, max_char);
-    if(!unicode) goto alc_fail;
+    if(!unicode) return NULL;
     memcpy(PyUnicode_DATA(unicode), str, len * kind);
     // same as
     // memcpy((unsigned char *) ((PyCompactUnicodeObject *) unicode + 1), str, len * kind);
     return unicode;
-    alc_fail:
-    // TODO
-    assert(0);
-
 }
\ No newline at end of file
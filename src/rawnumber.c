@@ -0,0 +1,197 @@
+#include "rawnumber.h"
+#include "decoder.h"
+
+/* Check the text of a JSON number: -?(0|[1-9][0-9]*)(\.[0-9]+)?([eE][+-]?[0-9]+)? */
+static bool raw_number_is_valid(const char *str, Py_ssize_t len)
+{
+    const char *cur = str, *end = str + len;
+#define is_digit(_c) ((_c) >= '0' && (_c) <= '9')
+    if (cur < end && *cur == '-') cur++;
+    if (cur == end || !is_digit(*cur)) return false;
+    if (*cur++ == '0')
+    {
+        if (cur < end && is_digit(*cur)) return false;
+    }
+    else
+    {
+        while (cur < end && is_digit(*cur)) cur++;
+    }
+    if (cur < end && *cur == '.')
+    {
+        cur++;
+        if (cur == end || !is_digit(*cur)) return false;
+        while (cur < end && is_digit(*cur)) cur++;
+    }
+    if (cur < end && (*cur == 'e' || *cur == 'E'))
+    {
+        cur++;
+        if (cur < end && (*cur == '+' || *cur == '-')) cur++;
+        if (cur == end || !is_digit(*cur)) return false;
+        while (cur < end && is_digit(*cur)) cur++;
+    }
+    return cur == end;
+#undef is_digit
+}
+
+static bool raw_number_is_integer(PyObject *self)
+{
+    const char *text = PyyjsonRawNumber_TEXT(self);
+    return strpbrk(text, ".eE") == NULL;
+}
+
+PyObject *pyyjson_raw_number_new(const char *str, Py_ssize_t len)
+{
+    PyyjsonRawNumberObject *self = PyObject_NewVar(PyyjsonRawNumberObject, &PyyjsonRawNumber_Type, len);
+    if (!self) return NULL;
+    memcpy(self->text, str, (size_t)len);
+    self->text[len] = '\0';
+    self->hash = -1;
+    return (PyObject *)self;
+}
+
+static PyObject *RawNumber_new(PyTypeObject *type, PyObject *args, PyObject *kwargs)
+{
+    static const char *kwlist[] = {"", NULL};
+    PyObject *obj;
+    const char *str;
+    Py_ssize_t len;
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "O:RawNumber", (char **)kwlist, &obj)) return NULL;
+    if (PyUnicode_Check(obj))
+    {
+        str = PyUnicode_AsUTF8AndSize(obj, &len);
+        if (!str) return NULL;
+    }
+    else if (PyBytes_Check(obj))
+    {
+        str = PyBytes_AS_STRING(obj);
+        len = PyBytes_GET_SIZE(obj);
+    }
+    else
+    {
+        PyErr_Format(PyExc_TypeError, "RawNumber() argument must be str or bytes, not %.200s",
+                     Py_TYPE(obj)->tp_name);
+        return NULL;
+    }
+    if (!raw_number_is_valid(str, len))
+    {
+        PyErr_Format(PyExc_ValueError, "invalid JSON number: %R", obj);
+        return NULL;
+    }
+    return pyyjson_raw_number_new(str, len);
+}
+
+static PyObject *RawNumber_str(PyObject *self)
+{
+    return PyUnicode_DecodeASCII(PyyjsonRawNumber_TEXT(self), PyyjsonRawNumber_LEN(self), NULL);
+}
+
+static PyObject *RawNumber_repr(PyObject *self)
+{
+    return PyUnicode_FromFormat("pyyjson.RawNumber('%s')", PyyjsonRawNumber_TEXT(self));
+}
+
+static Py_hash_t RawNumber_hash(PyyjsonRawNumberObject *self)
+{
+    if (self->hash == -1)
+    {
+        self->hash = _Py_HashBytes(self->text, Py_SIZE(self));
+    }
+    return self->hash;
+}
+
+static PyObject *RawNumber_richcompare(PyObject *self, PyObject *other, int op)
+{
+    if (!PyyjsonRawNumber_Check(other) || (op != Py_EQ && op != Py_NE)) Py_RETURN_NOTIMPLEMENTED;
+    bool eq = PyyjsonRawNumber_LEN(self) == PyyjsonRawNumber_LEN(other) &&
+              memcmp(PyyjsonRawNumber_TEXT(self), PyyjsonRawNumber_TEXT(other),
+                     (size_t)PyyjsonRawNumber_LEN(self)) == 0;
+    return PyBool_FromLong(op == Py_EQ ? eq : !eq);
+}
+
+static PyObject *RawNumber_float(PyObject *self)
+{
+    double value = PyOS_string_to_double(PyyjsonRawNumber_TEXT(self), NULL, NULL);
+    if (value == -1.0 && PyErr_Occurred()) return NULL;
+    return PyFloat_FromDouble(value);
+}
+
+static PyObject *RawNumber_int(PyObject *self)
+{
+    if (raw_number_is_integer(self))
+    {
+        return pyyjson_raw_to_int(PyyjsonRawNumber_TEXT(self), PyyjsonRawNumber_LEN(self));
+    }
+    PyObject *value = RawNumber_float(self);
+    if (!value) return NULL;
+    Py_SETREF(value, PyNumber_Long(value));
+    return value;
+}
+
+static PyObject *RawNumber_as_decimal(PyObject *self, PyObject *Py_UNUSED(ignored))
+{
+    return pyyjson_raw_to_decimal(PyyjsonRawNumber_TEXT(self), PyyjsonRawNumber_LEN(self));
+}
+
+static PyObject *RawNumber_bytes(PyObject *self, PyObject *Py_UNUSED(ignored))
+{
+    return PyBytes_FromStringAndSize(PyyjsonRawNumber_TEXT(self), PyyjsonRawNumber_LEN(self));
+}
+
+static PyObject *RawNumber_is_integer(PyObject *self, PyObject *Py_UNUSED(ignored))
+{
+    return PyBool_FromLong(raw_number_is_integer(self));
+}
+
+static int RawNumber_getbuffer(PyObject *self, Py_buffer *view, int flags)
+{
+    return PyBuffer_FillInfo(view, self, PyyjsonRawNumber_TEXT(self), PyyjsonRawNumber_LEN(self), 1, flags);
+}
+
+static PyNumberMethods RawNumber_as_number = {
+    .nb_int = RawNumber_int,
+    .nb_float = RawNumber_float,
+};
+
+static PyBufferProcs RawNumber_as_buffer = {
+    .bf_getbuffer = RawNumber_getbuffer,
+};
+
+static PyMethodDef RawNumber_methods[] = {
+    {"as_decimal", (PyCFunction)RawNumber_as_decimal, METH_NOARGS, "as_decimal()\n--\n\nConvert to decimal.Decimal without rounding."},
+    {"is_integer", (PyCFunction)RawNumber_is_integer, METH_NOARGS, "is_integer()\n--\n\nWhether the text has no fraction and no exponent."},
+    {"__bytes__", (PyCFunction)RawNumber_bytes, METH_NOARGS, "__bytes__()\n--\n\nThe text of the number as bytes."},
+    {NULL, NULL, 0, NULL} /* Sentinel */
+};
+
+PyTypeObject PyyjsonRawNumber_Type = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    .tp_name = "pyyjson.RawNumber",
+    .tp_basicsize = offsetof(PyyjsonRawNumberObject, text) + 1,
+    .tp_itemsize = 1,
+    .tp_flags = Py_TPFLAGS_DEFAULT,
+    .tp_doc = "RawNumber(text, /)\n--\n\n"
+              "A JSON number kept as its source text, returned by `loads()` with "
+              "`OPT_PARSE_RAW_NUMBER`.\n\n"
+              "It converts to int, float or Decimal on demand with `int()`, `float()` "
+              "and `as_decimal()`. Two RawNumbers are equal when their texts are equal.",
+    .tp_repr = RawNumber_repr,
+    .tp_str = RawNumber_str,
+    .tp_hash = (hashfunc)RawNumber_hash,
+    .tp_richcompare = RawNumber_richcompare,
+    .tp_as_number = &RawNumber_as_number,
+    .tp_as_buffer = &RawNumber_as_buffer,
+    .tp_methods = RawNumber_methods,
+    .tp_new = RawNumber_new,
+};
+
+int pyyjson_raw_number_module_init(PyObject *module)
+{
+    if (PyType_Ready(&PyyjsonRawNumber_Type) < 0) return -1;
+    Py_INCREF(&PyyjsonRawNumber_Type);
+    if (PyModule_AddObject(module, "RawNumber", (PyObject *)&PyyjsonRawNumber_Type) < 0)
+    {
+        Py_DECREF(&PyyjsonRawNumber_Type);
+        return -1;
+    }
+    return 0;
+}
@@ -0,0 +1,30 @@
+#ifndef RAWNUMBER_H
+#define RAWNUMBER_H
+
+#include "pyinit.h"
+
+/**
+ A JSON number kept as its source text.
+ The text is stored inline and is always null-terminated.
+ */
+typedef struct PyyjsonRawNumberObject {
+    PyObject_VAR_HEAD
+    /** hash of the text, -1 if not computed yet */
+    Py_hash_t hash;
+    /** the text of the number, `ob_size` bytes */
+    char text[1];
+} PyyjsonRawNumberObject;
+
+extern PyTypeObject PyyjsonRawNumber_Type;
+
+#define PyyjsonRawNumber_Check(op) Py_IS_TYPE(op, &PyyjsonRawNumber_Type)
+#define PyyjsonRawNumber_TEXT(op) (((PyyjsonRawNumberObject *)(op))->text)
+#define PyyjsonRawNumber_LEN(op) Py_SIZE(op)
+
+/** Create a RawNumber from the text of a valid JSON number. */
+PyObject *pyyjson_raw_number_new(const char *str, Py_ssize_t len);
+
+/** Ready the RawNumber type and add it to the module. */
+int pyyjson_raw_number_module_init(PyObject *module);
+
+#endif // RAWNUMBER_H
@@ -0,0 +1,182 @@
+#include "skip.h"
+#include <stdbool.h>
+#include <stdint.h>
+#include <string.h>
+
+/*==============================================================================
+ * SWAR Helpers
+ *============================================================================*/
+
+#define SWAR_ONES 0x0101010101010101ULL
+#define SWAR_HIGHS 0x8080808080808080ULL
+
+/* Nonzero if any byte of `v` is zero. */
+#define swar_has_zero(v) (((v) - SWAR_ONES) & ~(v) & SWAR_HIGHS)
+/* Nonzero if any byte of `v` equals `c`. */
+#define swar_has_byte(v, c) swar_has_zero((v) ^ (SWAR_ONES * (uint8_t)(c)))
+
+static inline uint64_t swar_load(const char *src)
+{
+    uint64_t v;
+    memcpy(&v, src, sizeof(v));
+    return v;
+}
+
+/* Whether the 8 bytes at `src` contain a quote or a backslash. */
+static inline bool swar_has_string_stop(const char *src)
+{
+    uint64_t v = swar_load(src);
+    return (swar_has_byte(v, '"') | swar_has_byte(v, '\\')) != 0;
+}
+
+/* Whether the 8 bytes at `src` contain a quote or a bracket.
+   Setting bit 5 maps '[' to '{' and ']' to '}', and no other byte to either. */
+static inline bool swar_has_container_stop(const char *src)
+{
+    uint64_t v = swar_load(src);
+    uint64_t folded = v | (SWAR_ONES * 0x20);
+    return (swar_has_byte(v, '"') | swar_has_byte(folded, '{') | swar_has_byte(folded, '}')) != 0;
+}
+
+/*==============================================================================
+ * Skipper
+ *============================================================================*/
+
+/* Skip a string body, `cur` points after the opening quote.
+   Returns the end of the string, or NULL if it is not closed. */
+static const char *skip_string(const char *cur, const char *end)
+{
+    while (true)
+    {
+        while (end - cur >= 8 && !swar_has_string_stop(cur)) cur += 8;
+        if (cur >= end) return NULL;
+        char c = *cur++;
+        if (c == '"') return cur;
+        if (c == '\\') cur++;
+    }
+}
+
+static bool char_is_delimiter(char c)
+{
+    return c == ',' || c == ']' || c == '}' || c == ':' || c == ' ' || c == '\t' ||
+           c == '\n' || c == '\r' || c == '"' || c == '[' || c == '{';
+}
+
+const char *pyyjson_skip_value(const char *cur, const char *end, const char **msg,
+                               const char **err_pos)
+{
+    /* one bit per open container, set for objects */
+    uint64_t is_obj[PYYJSON_SKIP_DEPTH_LIMIT / 64];
+    size_t depth = 0;
+
+    if (cur >= end)
+    {
+        *msg = "unexpected end of data";
+        *err_pos = cur;
+        return NULL;
+    }
+    if (*cur == '"')
+    {
+        const char *str_end = skip_string(cur + 1, end);
+        if (!str_end)
+        {
+            *msg = "unclosed string";
+            *err_pos = end;
+        }
+        return str_end;
+    }
+    if (*cur != '[' && *cur != '{')
+    {
+        const char *start = cur;
+        while (cur < end && !char_is_delimiter(*cur)) cur++;
+        if (cur != start) return cur;
+        *msg = "unexpected character, expected a JSON value";
+        *err_pos = start;
+        return NULL;
+    }
+    while (true)
+    {
+        while (end - cur >= 8 && !swar_has_container_stop(cur)) cur += 8;
+        if (cur >= end) break;
+        char c = *cur++;
+        if (c == '"')
+        {
+            cur = skip_string(cur, end);
+            if (!cur)
+            {
+                *msg = "unclosed string";
+                *err_pos = end;
+                return NULL;
+            }
+        }
+        else if (c == '[' || c == '{')
+        {
+            if (depth == PYYJSON_SKIP_DEPTH_LIMIT)
+            {
+                *msg = "exceeded the max depth";
+                *err_pos = cur - 1;
+                return NULL;
+            }
+            uint64_t bit = (uint64_t)1 << (depth % 64);
+            if (c == '{') is_obj[depth / 64] |= bit;
+            else is_obj[depth / 64] &= ~bit;
+            depth++;
+        }
+        else if (c == ']' || c == '}')
+        {
+            depth--;
+            bool obj = (is_obj[depth / 64] >> (depth % 64)) & 1;
+            if (obj != (c == '}'))
+            {
+                *msg = "mismatched closing bracket";
+                *err_pos = cur - 1;
+                return NULL;
+            }
+            if (depth == 0) return cur;
+        }
+    }
+    *msg = "unexpected end of data";
+    *err_pos = end;
+    return NULL;
+}
+
+/*==============================================================================
+ * Python API
+ *============================================================================*/
+
+/* Release the GIL when more than this many bytes may be scanned. */
+#define SKIP_NOGIL_MIN_SIZE (64 * 1024)
+
+PyObject *pyyjson_SkipValue(PyObject *self, PyObject *args)
+{
+    Py_buffer view;
+    Py_ssize_t offset = 0;
+    if (!PyArg_ParseTuple(args, "y*|n:skip_value", &view, &offset)) return NULL;
+    if (offset < 0 || offset > view.len)
+    {
+        PyBuffer_Release(&view);
+        PyErr_SetString(PyExc_ValueError, "offset out of range");
+        return NULL;
+    }
+
+    const char *hdr = view.buf, *end = hdr + view.len, *cur = hdr + offset;
+    const char *val_end, *msg = NULL, *err_pos = cur;
+    while (cur < end && (*cur == ' ' || *cur == '\t' || *cur == '\n' || *cur == '\r')) cur++;
+    if (end - cur >= SKIP_NOGIL_MIN_SIZE)
+    {
+        Py_BEGIN_ALLOW_THREADS
+        val_end = pyyjson_skip_value(cur, end, &msg, &err_pos);
+        Py_END_ALLOW_THREADS
+    }
+    else
+    {
+        val_end = pyyjson_skip_value(cur, end, &msg, &err_pos);
+    }
+    PyBuffer_Release(&view);
+    if (!val_end)
+    {
+        PyErr_Format(JSONDecodeError, "%s\n\tat %zd", msg, (Py_ssize_t)(err_pos - hdr));
+        return NULL;
+    }
+    return PyLong_FromSsize_t((Py_ssize_t)(val_end - hdr));
+}
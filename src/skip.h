@@ -0,0 +1,26 @@
+#ifndef SKIP_H
+#define SKIP_H
+
+#include "pyinit.h"
+#include <stddef.h>
+
+/** Deepest container nesting accepted by `pyyjson_skip_value()`. */
+#define PYYJSON_SKIP_DEPTH_LIMIT 1024
+
+/**
+ Skip one JSON value without building it.
+ `cur` points at the first byte of the value, leading whitespace is not skipped.
+ Strings are scanned for their closing quote and containers for their matching
+ bracket; the grammar inside containers and scalars is not validated.
+ Scanning runs 8 bytes at a time while there is no quote, backslash or bracket.
+ @return The end of the value, or NULL with `*msg` set and `*err_pos` at the
+    offending byte if the value is not terminated before `end` or its brackets
+    do not match.
+ */
+const char *pyyjson_skip_value(const char *cur, const char *end, const char **msg,
+                               const char **err_pos);
+
+/** `skip_value(buf, offset=0, /)` */
+PyObject *pyyjson_SkipValue(PyObject *self, PyObject *args);
+
+#endif // SKIP_H
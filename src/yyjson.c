@@ -22,6 +22,10 @@
 
 #include "yyjson.h"
 #include "pyutils.h"
+#include "decoder.h"
+#include "frozenmapping.h"
+#include "skip.h"
+#include "encoder.h"
 
 #include <assert.h>
 #include <math.h>
@@ -301,6 +305,9 @@ uint32_t yyjson_version(void) {
  */
 #define YYJSON_READER_ESTIMATED_PRETTY_RATIO 16
 #define YYJSON_READER_ESTIMATED_MINIFY_RATIO 6
+
+/* The maximum nesting depth of arrays and objects for the reader (modified). */
+#define YYJSON_READER_DEPTH_LIMIT 1024
 #define YYJSON_WRITER_ESTIMATED_PRETTY_RATIO 32
 #define YYJSON_WRITER_ESTIMATED_MINIFY_RATIO 18
 
@@ -5241,21 +5248,41 @@ static_inline u32 read_b4_unicode(u32 uni) {
  * JSON String Reader
  *============================================================================*/
 
+/* modified BEGIN */
+/** The characters of a string read by `read_string_ucs()`, in the layout of
+    the data of a Python str. */
+typedef struct read_str {
+    /** the characters, in the input for ASCII strings without escapes,
+        else at the start of the string buffer */
+    const void *data;
+    /** the number of characters */
+    usize len;
+    /** the bytes per character: 1, 2 or 4 */
+    int kind;
+    /** whether all characters are ASCII */
+    bool is_ascii;
+} read_str;
+/* modified END */
+
 /**
- Read a JSON string.
+ Read a JSON string (modified).
+ The characters are decoded into `temp_string_buf` as UCS1, UCS2 or UCS4,
+ no Python object is created and the GIL is not needed.
  @param ptr The head pointer of string before '"' prefix (inout).
  @param lst JSON last position.
- @param inv Allow invalid unicode.
- @param val The string value to be written.
+ @param trusted Skip UTF-8 validation, the input must be valid UTF-8.
+ @param temp_string_buf The buffer the characters are decoded into.
+ @param str The characters read.
  @param msg The error message pointer.
  @return Whether success.
  */
-static_inline PyObject* read_string(u8 **ptr,
+static_inline bool read_string_ucs(u8 **ptr,
                                u8 *lst,
                                /* modified */
-                                bool inv,  // TODO drop this
+                                bool trusted,
                                 //    yyjson_val *val,
                                 void* temp_string_buf,
+                                read_str *str,
                                /* modified */
                                const char **msg) {
     /*
@@ -5316,6 +5343,9 @@ static_inline PyObject* read_string(u8 **ptr,
     const u32 b4_requ = 0x07300000UL;
     const u32 b4_err0 = 0x04000000UL;
     const u32 b4_err1 = 0x03300000UL;
+    /* modified BEGIN */
+    const u32 lead_mask = 0xFF000000UL;
+    /* modified END */
 #elif YYJSON_ENDIAN == YYJSON_LITTLE_ENDIAN
     const u32 b1_mask = 0x00000080UL;
     const u32 b1_patt = 0x00000000UL;
@@ -5331,6 +5361,9 @@ static_inline PyObject* read_string(u8 **ptr,
     const u32 b4_requ = 0x00003007UL;
     const u32 b4_err0 = 0x00000004UL;
     const u32 b4_err1 = 0x00003003UL;
+    /* modified BEGIN */
+    const u32 lead_mask = 0x000000FFUL;
+    /* modified END */
 #else
     /* this should be evaluated at compile-time */
     v32_uni b1_mask_uni = {{ 0x80, 0x00, 0x00, 0x00 }};
@@ -5347,6 +5380,9 @@ static_inline PyObject* read_string(u8 **ptr,
     v32_uni b4_requ_uni = {{ 0x07, 0x30, 0x00, 0x00 }};
     v32_uni b4_err0_uni = {{ 0x04, 0x00, 0x00, 0x00 }};
     v32_uni b4_err1_uni = {{ 0x03, 0x30, 0x00, 0x00 }};
+    /* modified BEGIN */
+    v32_uni lead_mask_uni = {{ 0xFF, 0x00, 0x00, 0x00 }};
+    /* modified END */
     u32 b1_mask = b1_mask_uni.u;
     u32 b1_patt = b1_patt_uni.u;
     u32 b2_mask = b2_mask_uni.u;
@@ -5361,28 +5397,42 @@ static_inline PyObject* read_string(u8 **ptr,
     u32 b4_requ = b4_requ_uni.u;
     u32 b4_err0 = b4_err0_uni.u;
     u32 b4_err1 = b4_err1_uni.u;
+    /* modified BEGIN */
+    u32 lead_mask = lead_mask_uni.u;
+    /* modified END */
 #endif
     
 #define is_valid_seq_1(uni) ( \
     ((uni & b1_mask) == b1_patt) \
 )
 
-#define is_valid_seq_2(uni) ( \
+    /* modified BEGIN */
+    /*
+     In trusted mode the input is known to be valid UTF-8, so the leading byte
+     alone gives the sequence length, and with it the kind of the string.
+     The continuation bytes, overlong forms and surrogates are not checked.
+     */
+#define is_lead_seq(uni, n) ( \
+    ((uni & b##n##_mask & lead_mask) == (b##n##_patt & lead_mask)) \
+)
+
+#define is_valid_seq_2(uni) (trusted ? is_lead_seq(uni, 2) : ( \
     ((uni & b2_mask) == b2_patt) && \
     ((uni & b2_requ)) \
-)
+))
     
-#define is_valid_seq_3(uni) ( \
+#define is_valid_seq_3(uni) (trusted ? is_lead_seq(uni, 3) : ( \
     ((uni & b3_mask) == b3_patt) && \
     ((tmp = (uni & b3_requ))) && \
     ((tmp != b3_erro)) \
-)
+))
     
-#define is_valid_seq_4(uni) ( \
+#define is_valid_seq_4(uni) (trusted ? is_lead_seq(uni, 4) : ( \
     ((uni & b4_mask) == b4_patt) && \
     ((tmp = (uni & b4_requ))) && \
     ((tmp & b4_err0) == 0 || (tmp & b4_err1) == 0) \
-)
+))
+    /* modified END */
     
 #define return_err(_end, _msg) do { \
     *msg = _msg; \
@@ -5390,6 +5440,16 @@ static_inline PyObject* read_string(u8 **ptr,
     return false; \
 } while (false)
     
+    /* modified BEGIN */
+#define return_str(_data, _len, _is_ascii, _kind) do { \
+    str->data = (_data); \
+    str->len = (usize)(_len); \
+    str->is_ascii = (_is_ascii); \
+    str->kind = (_kind); \
+    return true; \
+} while (false)
+    /* modified END */
+    
     u8 *cur = *ptr;
     u8 **end = ptr;
     /* modified BEGIN */
@@ -5456,7 +5516,8 @@ skip_ascii_end:
     if (likely(*src == '"')) {
         /* modified BEGIN */
         // this is a fast path for ascii strings. directly copy the buffer to pyobject
-        return create_py_unicode(src_start, src - src_start, true, 1);
+        *end = src + 1;
+        return_str(src_start, src - src_start, true, 1);
         // val->tag = ((u64)(src - cur) << YYJSON_TAG_BIT) |
         //             (u64)(YYJSON_TYPE_STR | YYJSON_SUBTYPE_NOESC);
         // val->uni.str = (const char *)cur;
@@ -5782,7 +5843,7 @@ copy_utf8_inner_ucs1:
         uni = byte_load_4(src);
         // TODO remove the repeat4 later
         while (true) repeat4({
-            if ((uni & b3_mask) == b3_patt) {
+            if (is_valid_seq_3(uni)) {
                 /* modified BEGIN */
                 // code point: [U+0800, U+FFFF]
                 // BEGIN ucs1 -> ucs2
@@ -5804,7 +5865,7 @@ copy_utf8_inner_ucs1:
         })
         if ((uni & b1_mask) == b1_patt) goto copy_ascii_ucs1;
         while (true) repeat4({
-            if ((uni & b2_mask) == b2_patt) {
+            if (is_valid_seq_2(uni)) {
                 /* modified BEGIN */
                 assert(cur_max_ucs_size == 1);
                 u16 to_write = read_b2_unicode(uni);
@@ -5838,7 +5899,7 @@ copy_utf8_inner_ucs1:
             } else break;
         })
         while (true) repeat4({
-            if ((uni & b4_mask) == b4_patt) {
+            if (is_valid_seq_4(uni)) {
                 /* modified BEGIN */
                 // code point: [U+10000, U+10FFFF]
                 // must be ucs4
@@ -5859,10 +5920,9 @@ copy_utf8_inner_ucs1:
         })
 
         /* modified BEGIN */
-        // if (unlikely(pos == src)) {
-        //     if (!inv) return_err(src, "invalid UTF-8 encoding in string");
-        //     goto copy_ascii_stop_1;
-        // }
+        if (unlikely(pos == src)) {
+            return_err(src, "invalid UTF-8 encoding in string");
+        }
         goto copy_ascii_ucs1;
         /* modified END */
     }
@@ -5989,7 +6049,7 @@ copy_utf8_inner_ucs2:
         uni = byte_load_4(src);
         // TODO remove the repeat4 later
         while (true) repeat4({
-            if ((uni & b3_mask) == b3_patt) {
+            if (is_valid_seq_3(uni)) {
                 /* modified BEGIN */
                 // code point: [U+0800, U+FFFF]
                 assert(cur_max_ucs_size == 2);
@@ -6006,7 +6066,7 @@ copy_utf8_inner_ucs2:
         })
         if ((uni & b1_mask) == b1_patt) goto copy_ascii_ucs2;
         while (true) repeat4({
-            if ((uni & b2_mask) == b2_patt) {
+            if (is_valid_seq_2(uni)) {
                 /* modified BEGIN */
                 assert(cur_max_ucs_size == 2);
                 u16 to_write = read_b2_unicode(uni);
@@ -6036,7 +6096,7 @@ copy_utf8_inner_ucs2:
             } else break;
         })
         while (true) repeat4({
-            if ((uni & b4_mask) == b4_patt) {
+            if (is_valid_seq_4(uni)) {
                 /* modified BEGIN */
                 // code point: [U+10000, U+10FFFF]
                 // must be ucs4
@@ -6057,10 +6117,9 @@ copy_utf8_inner_ucs2:
         })
 
         /* modified BEGIN */
-        // if (unlikely(pos == src)) {
-        //     if (!inv) return_err(src, "invalid UTF-8 encoding in string");
-        //     goto copy_ascii_stop_1;
-        // }
+        if (unlikely(pos == src)) {
+            return_err(src, "invalid UTF-8 encoding in string");
+        }
         goto copy_ascii_ucs2;
         /* modified END */
     }
@@ -6180,7 +6239,7 @@ copy_utf8_inner_ucs4:
         uni = byte_load_4(src);
         // TODO remove the repeat4 later
         while (true) repeat4({
-            if ((uni & b3_mask) == b3_patt) {
+            if (is_valid_seq_3(uni)) {
                 /* modified BEGIN */
                 // code point: [U+0800, U+FFFF]
                 assert(cur_max_ucs_size == 4);
@@ -6197,7 +6256,7 @@ copy_utf8_inner_ucs4:
         })
         if ((uni & b1_mask) == b1_patt) goto copy_ascii_ucs4;
         while (true) repeat4({
-            if ((uni & b2_mask) == b2_patt) {
+            if (is_valid_seq_2(uni)) {
                 /* modified BEGIN */
                 assert(cur_max_ucs_size == 4);
                 *dst_ucs4++ = read_b2_unicode(uni);
@@ -6226,7 +6285,7 @@ copy_utf8_inner_ucs4:
             } else break;
         })
         while (true) repeat4({
-            if ((uni & b4_mask) == b4_patt) {
+            if (is_valid_seq_4(uni)) {
                 /* modified BEGIN */
                 // code point: [U+10000, U+10FFFF]
                 // must be ucs4
@@ -6241,10 +6300,9 @@ copy_utf8_inner_ucs4:
         })
 
         /* modified BEGIN */
-        // if (unlikely(pos == src)) {
-        //     if (!inv) return_err(src, "invalid UTF-8 encoding in string");
-        //     goto copy_ascii_stop_1;
-        // }
+        if (unlikely(pos == src)) {
+            return_err(src, "invalid UTF-8 encoding in string");
+        }
         goto copy_ascii_ucs4;
         /* modified END */
     }
@@ -6253,6 +6311,7 @@ copy_utf8_inner_ucs4:
     /* modified END */
     
 read_finalize:
+    *end = src + 1;
     if(unlikely(cur_max_ucs_size==4)) {
         u32* start = (u32*)temp_string_buf + len_ucs1 + len_ucs2 - 1;
         u16* ucs2_back = (u16*)temp_string_buf + len_ucs1 + len_ucs2 - 1;
@@ -6265,7 +6324,7 @@ read_finalize:
             *start-- = *ucs1_back--;
             len_ucs1--;
         }
-        return create_py_unicode(temp_string_buf, dst_ucs4 - (u32*)temp_string_buf, false, 4);
+        return_str(temp_string_buf, dst_ucs4 - (u32*)temp_string_buf, false, 4);
     } else if (unlikely(cur_max_ucs_size==2)) {
         u16* start = (u16*)temp_string_buf + len_ucs1 - 1;
         u8* ucs1_back = (u8*)temp_string_buf + len_ucs1 - 1;
@@ -6273,18 +6332,85 @@ read_finalize:
             *start-- = *ucs1_back--;
             len_ucs1--;
         }
-        return create_py_unicode(temp_string_buf, dst_ucs2 - (u16*)temp_string_buf, false, 2);
+        return_str(temp_string_buf, dst_ucs2 - (u16*)temp_string_buf, false, 2);
     } else {
-        return create_py_unicode(temp_string_buf, dst - (u8*)temp_string_buf, false, 1);
+        return_str(temp_string_buf, dst - (u8*)temp_string_buf, is_ascii, 1);
     }
 
+#undef return_str
 #undef return_err
 #undef is_valid_seq_1
 #undef is_valid_seq_2
 #undef is_valid_seq_3
 #undef is_valid_seq_4
+/* modified BEGIN */
+#undef is_lead_seq
+/* modified END */
+}
+
+/* modified BEGIN */
+/** Read a JSON string into a new Python str, see `read_string_ucs()`. */
+static_inline PyObject *read_string(u8 **ptr,
+                                    u8 *lst,
+                                    bool trusted,
+                                    void *temp_string_buf,
+                                    const char **msg) {
+    read_str str;
+    if (unlikely(!read_string_ucs(ptr, lst, trusted, temp_string_buf,
+                                  &str, msg))) {
+        return NULL;
+    }
+    return create_py_unicode((const char *)str.data, (Py_ssize_t)str.len,
+                             str.is_ascii, str.kind);
 }
 
+/*
+ Strings of a document read by `pyyjson_read_doc()` are kept as the data of
+ a Python str. The subtype of a string value tells its kind, its length is the
+ number of characters. ASCII strings without escapes point into the input,
+ right after their opening quote. Other strings are marked `DOC_STR_POOL` and
+ point into the string pool, after a `usize` holding the offset of their text
+ in the input, so that the string options of `pyyjson_read_ctx` can still
+ read the source text.
+ */
+#define DOC_STR_ASCII ((u8)(0 << 3))
+#define DOC_STR_UCS1 ((u8)(1 << 3))
+#define DOC_STR_UCS2 ((u8)(2 << 3))
+#define DOC_STR_UCS4 ((u8)(3 << 3))
+#define DOC_STR_POOL ((u8)(1 << 5))
+
+/** Read a JSON string into a document value, decoding it into `*pool` and
+    moving `*pool` past it if it is not an ASCII string without escapes. */
+static_inline bool read_string_doc(u8 **ptr,
+                                   u8 *lst,
+                                   bool trusted,
+                                   u8 *hdr,
+                                   u8 **pool,
+                                   yyjson_val *val,
+                                   const char **msg) {
+    read_str str;
+    u8 *start = *ptr + 1;
+    u8 *dst = *pool + sizeof(usize);
+    u8 subtype;
+    if (unlikely(!read_string_ucs(ptr, lst, trusted, dst, &str, msg))) {
+        return false;
+    }
+    if ((const u8 *)str.data != dst) {
+        subtype = DOC_STR_ASCII;
+    } else {
+        *(usize *)(void *)*pool = (usize)(start - hdr);
+        *pool = dst + size_align_up(str.len * (usize)str.kind, sizeof(usize));
+        if (str.kind == 4) subtype = DOC_STR_POOL | DOC_STR_UCS4;
+        else if (str.kind == 2) subtype = DOC_STR_POOL | DOC_STR_UCS2;
+        else subtype = DOC_STR_POOL | (str.is_ascii ? DOC_STR_ASCII : DOC_STR_UCS1);
+    }
+    val->tag = ((u64)str.len << YYJSON_TAG_BIT) |
+               (u64)(YYJSON_TYPE_STR | subtype);
+    val->uni.str = (const char *)str.data;
+    return true;
+}
+/* modified END */
+
 
 
 /*==============================================================================
@@ -6295,14 +6421,41 @@ read_finalize:
  * state transitions.
  *============================================================================*/
 
+/** Convert a number filled by `read_number()` to a Python object (modified).
+    Raw numbers are converted as requested by the decode options of `ctx`. */
+static_inline PyObject *read_py_number(yyjson_val *val,
+                                       const pyyjson_read_ctx *ctx) {
+    switch (val->tag & (YYJSON_TYPE_MASK | YYJSON_SUBTYPE_MASK)) {
+        case YYJSON_TYPE_NUM | YYJSON_SUBTYPE_UINT:
+            return PyLong_FromUnsignedLongLong(val->uni.u64);
+        case YYJSON_TYPE_NUM | YYJSON_SUBTYPE_SINT:
+            return PyLong_FromLongLong(val->uni.i64);
+        case YYJSON_TYPE_NUM | YYJSON_SUBTYPE_REAL:
+            return PyFloat_FromDouble(val->uni.f64);
+        case YYJSON_TYPE_RAW | YYJSON_SUBTYPE_NONE:
+            assert(ctx);
+            return pyyjson_read_raw_number(ctx, val->uni.str,
+                                           (Py_ssize_t)unsafe_yyjson_get_len(val));
+        default:
+            assert(false);
+            return NULL;
+    }
+}
+
 /** Read single value JSON document. */
 static_noinline PyObject *read_root_single(u8 *hdr,
                                              u8 *cur,
                                              u8 *end,
+                                             /* modified BEGIN */
+                                             u8 *buf,
+                                             /* modified END */
                                              yyjson_alc alc,
                                              yyjson_read_flag flg,
+                                             /* modified BEGIN */
+                                             const pyyjson_read_ctx *ctx,
+                                             /* modified END */
                                              yyjson_read_err *err) {
-    
+
 #define return_err(_pos, _code, _msg) do { \
     if (is_truncated_end(hdr, _pos, end, YYJSON_READ_ERROR_##_code, flg)) { \
         err->pos = (usize)(end - hdr); \
@@ -6313,68 +6466,81 @@ static_noinline PyObject *read_root_single(u8 *hdr,
         err->code = YYJSON_READ_ERROR_##_code; \
         err->msg = _msg; \
     } \
+    Py_XDECREF(val); \
     return NULL; \
 } while (false)
-    
-    // usize hdr_len; /* value count used by doc */
-    // usize alc_num; /* value count capacity */
-    // yyjson_val *val_hdr; /* the head of allocated values */
-    PyObject *val; /* current value */
-    // yyjson_doc *doc; /* the JSON document, equals to val_hdr */
+
+    /* modified BEGIN */
+    PyObject *val = NULL; /* current value */
+    yyjson_val num; /* number or literal read by yyjson */
+    u8 *raw_end = NULL; /* end of the previous raw number */
+    u8 **pre = (has_read_flag(NUMBER_AS_RAW) || has_read_flag(BIGNUM_AS_RAW))
+               ? &raw_end : NULL;
+    /* modified END */
     const char *msg; /* error message */
-    
-    // bool raw; /* read number as raw */
-    bool inv; /* allow invalid unicode */
-    // u8 *raw_end; /* raw end for null-terminator */
-    // u8 **pre; /* previous raw end pointer */
-    
-    // hdr_len = sizeof(yyjson_doc) / sizeof(yyjson_val);
-    // hdr_len += (sizeof(yyjson_doc) % sizeof(yyjson_val)) > 0;
-    // alc_num = hdr_len + 1; /* single value */
-    
-    // val_hdr = (yyjson_val *)alc.malloc(alc.ctx, alc_num * sizeof(yyjson_val));
-    // if (unlikely(!val_hdr)) goto fail_alloc;
-    // val = val_hdr + hdr_len;
-    // raw = has_read_flag(NUMBER_AS_RAW) || has_read_flag(BIGNUM_AS_RAW);
-    // inv = has_read_flag(ALLOW_INVALID_UNICODE) != 0;
-    // raw_end = NULL;
-    // pre = raw ? &raw_end : NULL;
-    
+
     if (char_is_number(*cur)) {
-        assert(false);
-        // if (likely(read_number(&cur, pre, flg, val, &msg))) goto doc_end;
+        /* modified BEGIN */
+        if (likely(read_number(&cur, pre, flg, &num, &msg))) {
+            val = read_py_number(&num, ctx);
+            if (likely(val)) goto doc_end;
+            goto fail_alloc;
+        }
+        /* modified END */
         goto fail_number;
     }
     if (*cur == '"') {
-        PyObject* re = read_string(&cur, end, false, hdr, &msg);
-        // TODO
-        if (likely(re)) return re;
+        /* modified BEGIN */
+        if (unlikely(ctx && (ctx->option & PYYJSON_OPT_STR_HOOK_MASK))) {
+            int hook;
+            Py_ssize_t hook_len;
+            hook = pyyjson_read_str_value(ctx, (const char *)cur + 1, NULL,
+                                          &val, &hook_len);
+            if (unlikely(hook < 0)) goto fail_python;
+            if (hook) {
+                cur += 1 + hook_len;
+                goto doc_end;
+            }
+        }
+        val = read_string(&cur, end,
+                          ctx && (ctx->option & PYYJSON_OPT_PARSE_TRUSTED_UTF8),
+                          buf, &msg);
+        if (likely(val)) goto doc_end;
+        /* modified END */
         goto fail_string;
     }
     if (*cur == 't') {
-        assert(false);
-        // if (likely(read_true(&cur, val))) goto doc_end;
+        /* modified BEGIN */
+        if (likely(read_true(&cur, &num))) {
+            val = Py_True;
+            Py_INCREF(val);
+            goto doc_end;
+        }
+        /* modified END */
         goto fail_literal_true;
     }
     if (*cur == 'f') {
-        assert(false);
-        // if (likely(read_false(&cur, val))) goto doc_end;
+        /* modified BEGIN */
+        if (likely(read_false(&cur, &num))) {
+            val = Py_False;
+            Py_INCREF(val);
+            goto doc_end;
+        }
+        /* modified END */
         goto fail_literal_false;
     }
     if (*cur == 'n') {
-        assert(false);
-        // if (likely(read_null(&cur, val))) goto doc_end;
-        // if (has_read_flag(ALLOW_INF_AND_NAN)) {
-        //     if (read_nan(false, &cur, pre, val)) goto doc_end;
-        // }
+        /* modified BEGIN */
+        if (likely(read_null(&cur, &num))) {
+            val = Py_None;
+            Py_INCREF(val);
+            goto doc_end;
+        }
+        /* modified END */
         goto fail_literal_null;
     }
-    if (has_read_flag(ALLOW_INF_AND_NAN)) {
-        assert(false);
-        // if (read_inf_or_nan(false, &cur, pre, val)) goto doc_end;
-    }
     goto fail_character;
-    
+
 doc_end:
     /* check invalid contents after json document */
     if (unlikely(cur < end) && !has_read_flag(STOP_WHEN_DONE)) {
@@ -6387,53 +6553,78 @@ doc_end:
         }
         if (unlikely(cur < end)) goto fail_garbage;
     }
-    
-    // if (pre && *pre) **pre = '\0';
-    // doc = (yyjson_doc *)val_hdr;
-    // doc->root = val_hdr + hdr_len;
-    // doc->alc = alc;
-    // doc->dat_read = (usize)(cur - hdr);
-    // doc->val_read = 1;
-    // doc->str_pool = has_read_flag(INSITU) ? NULL : (char *)hdr;
+
+    /* modified BEGIN */
+    err->pos = (usize)(cur - hdr);
+    /* modified END */
     return val;
-    
+
 fail_string:
     return_err(cur, INVALID_STRING, msg);
 fail_number:
     return_err(cur, INVALID_NUMBER, msg);
 fail_alloc:
-    return_err(cur, MEMORY_ALLOCATION, 
+    return_err(cur, MEMORY_ALLOCATION,
                "memory allocation failed");
+fail_python:
+    return_err(cur, MEMORY_ALLOCATION,
+               "failed to build a Python object");
 fail_literal_true:
-    return_err(cur, LITERAL, 
+    return_err(cur, LITERAL,
                "invalid literal, expected a valid literal such as 'true'");
 fail_literal_false:
-    return_err(cur, LITERAL, 
+    return_err(cur, LITERAL,
                "invalid literal, expected a valid literal such as 'false'");
 fail_literal_null:
-    return_err(cur, LITERAL, 
+    return_err(cur, LITERAL,
                "invalid literal, expected a valid literal such as 'null'");
 fail_character:
-    return_err(cur, UNEXPECTED_CHARACTER, 
+    return_err(cur, UNEXPECTED_CHARACTER,
                "unexpected character, expected a valid root value");
 fail_comment:
     return_err(cur, INVALID_COMMENT,
                "unclosed multiline comment");
 fail_garbage:
-    return_err(cur, UNEXPECTED_CONTENT, 
+    return_err(cur, UNEXPECTED_CONTENT,
                "unexpected content after document");
-    
+
 #undef return_err
 }
 
-/** Read JSON document (accept all style, but optimized for minify). */
-static_inline yyjson_doc *read_root_minify(u8 *hdr,
-                                           u8 *cur,
-                                           u8 *end,
-                                           yyjson_alc alc,
-                                           yyjson_read_flag flg,
-                                           yyjson_read_err *err) {
-    
+/* modified BEGIN */
+/** A container being read, values are collected on the value stack. */
+typedef struct read_ctn {
+    /** index of the first item of this container in the value stack */
+    usize ofs;
+    /** offset of the opening bracket in the input */
+    usize pos;
+    /** whether this container is an object (items are key-value pairs) */
+    bool is_obj;
+    /** field plan of this container, NULL to build plain dict or list */
+    const pyyjson_type_plan *plan;
+} read_ctn;
+/* modified END */
+
+/**
+ Read JSON document (accept all style, but optimized for minify).
+
+ Modified: values are pushed onto a stack of Python objects. When a container
+ ends, its items are popped and moved into an exact-size list, a dict, or an
+ instance described by the container's field plan.
+ */
+static_inline PyObject *read_root_minify(u8 *hdr,
+                                         u8 *cur,
+                                         u8 *end,
+                                         /* modified BEGIN */
+                                         u8 *buf,
+                                         /* modified END */
+                                         yyjson_alc alc,
+                                         yyjson_read_flag flg,
+                                         /* modified BEGIN */
+                                         pyyjson_read_ctx *ctx,
+                                         /* modified END */
+                                         yyjson_read_err *err) {
+
 #define return_err(_pos, _code, _msg) do { \
     if (is_truncated_end(hdr, _pos, end, YYJSON_READ_ERROR_##_code, flg)) { \
         err->pos = (usize)(end - hdr); \
@@ -6444,88 +6635,119 @@ static_inline yyjson_doc *read_root_minify(u8 *hdr,
         err->code = YYJSON_READ_ERROR_##_code; \
         err->msg = _msg; \
     } \
-    if (val_hdr) alc.free(alc.ctx, (void *)val_hdr); \
+    if (val_hdr) { \
+        while (val > val_hdr) Py_DECREF(*--val); \
+        alc.free(alc.ctx, (void *)val_hdr); \
+    } \
+    pyyjson_share_free(share); \
     return NULL; \
 } while (false)
-    
-#define val_incr() do { \
-    val++; \
+
+#define val_push(_obj) do { \
+    PyObject *_val = (_obj); \
     if (unlikely(val >= val_end)) { \
         usize alc_old = alc_len; \
         alc_len += alc_len / 2; \
-        if ((sizeof(usize) < 8) && (alc_len >= alc_max)) goto fail_alloc; \
-        val_tmp = (yyjson_val *)alc.realloc(alc.ctx, (void *)val_hdr, \
-            alc_old * sizeof(yyjson_val), \
-            alc_len * sizeof(yyjson_val)); \
-        if ((!val_tmp)) goto fail_alloc; \
+        val_tmp = NULL; \
+        if ((sizeof(usize) >= 8) || (alc_len < alc_max)) { \
+            val_tmp = (PyObject **)alc.realloc(alc.ctx, (void *)val_hdr, \
+                alc_old * sizeof(PyObject *), \
+                alc_len * sizeof(PyObject *)); \
+        } \
+        if ((!val_tmp)) { \
+            Py_DECREF(_val); \
+            goto fail_alloc; \
+        } \
         val = val_tmp + (usize)(val - val_hdr); \
-        ctn = val_tmp + (usize)(ctn - val_hdr); \
         val_hdr = val_tmp; \
-        val_end = val_tmp + (alc_len - 2); \
+        val_end = val_tmp + alc_len; \
     } \
+    *val++ = _val; \
 } while (false)
-    
+
+#define ctn_push(_is_obj) do { \
+    if (unlikely(ctn == ctn_end - 1)) goto fail_depth; \
+    plan = NULL; \
+    if (unlikely(ctn->plan)) { \
+        plan = pyyjson_plan_child(ctn->plan, ctn->is_obj ? val[-1] : NULL); \
+        if (plan && plan->kind != ((_is_obj) ? PLAN_CLASS : PLAN_LIST)) { \
+            goto fail_plan; \
+        } \
+    } \
+    ctn++; \
+    ctn->ofs = (usize)(val - val_hdr); \
+    ctn->pos = (usize)(cur - 1 - hdr); \
+    ctn->is_obj = _is_obj; \
+    ctn->plan = plan; \
+} while (false)
+
     usize dat_len; /* data length in bytes, hint for allocator */
-    usize hdr_len; /* value count used by yyjson_doc */
     usize alc_len; /* value count allocated */
     usize alc_max; /* maximum value count for allocator */
-    usize ctn_len; /* the number of elements in current container */
-    yyjson_val *val_hdr; /* the head of allocated values */
-    yyjson_val *val_end; /* the end of allocated values */
-    yyjson_val *val_tmp; /* temporary pointer for realloc */
-    yyjson_val *val; /* current JSON value */
-    yyjson_val *ctn; /* current container */
-    yyjson_val *ctn_parent; /* parent of current container */
-    yyjson_doc *doc; /* the JSON document, equals to val_hdr */
+    usize ctn_len; /* the number of items in current container */
+    PyObject **val_hdr; /* the head of value stack */
+    PyObject **val_end; /* the end of value stack */
+    PyObject **val_tmp; /* temporary pointer for realloc */
+    PyObject **val; /* the next free slot of value stack */
+    PyObject *obj; /* the value just read */
+    PyObject **item; /* items of current container */
+    yyjson_val num; /* number or literal read by yyjson */
+    u8 *raw_end = NULL; /* end of the previous raw number */
+    u8 **pre; /* raw number state, NULL to convert numbers while reading */
+    bool str_hook; /* whether string values go through the string options */
+    int hook; /* result of the string hook */
+    Py_ssize_t hook_len; /* bytes consumed by the string hook */
+    read_ctn ctn_hdr[YYJSON_READER_DEPTH_LIMIT]; /* container stack */
+    read_ctn *ctn_end; /* the end of container stack */
+    read_ctn *ctn; /* current container */
+    const pyyjson_type_plan *plan; /* plan of a new container */
+    pyyjson_share_table *share = NULL; /* containers for sharing subtrees */
+    bool frozen; /* whether containers are built as tuples and FrozenMappings */
     const char *msg; /* error message */
-    
-    bool raw; /* read number as raw */
-    bool inv; /* allow invalid unicode */
-    u8 *raw_end; /* raw end for null-terminator */
-    u8 **pre; /* previous raw end pointer */
-    
+
+    bool trusted; /* skip UTF-8 validation of strings */
+    pyyjson_str_cache *key_cache; /* object key cache, NULL if none */
+
     dat_len = has_read_flag(STOP_WHEN_DONE) ? 256 : (usize)(end - cur);
-    hdr_len = sizeof(yyjson_doc) / sizeof(yyjson_val);
-    hdr_len += (sizeof(yyjson_doc) % sizeof(yyjson_val)) > 0;
-    alc_max = USIZE_MAX / sizeof(yyjson_val);
-    alc_len = hdr_len + (dat_len / YYJSON_READER_ESTIMATED_MINIFY_RATIO) + 4;
+    alc_max = USIZE_MAX / sizeof(PyObject *);
+    alc_len = (dat_len / YYJSON_READER_ESTIMATED_MINIFY_RATIO) + 4;
     alc_len = yyjson_min(alc_len, alc_max);
-    
-    val_hdr = (yyjson_val *)alc.malloc(alc.ctx, alc_len * sizeof(yyjson_val));
+
+    val_hdr = (PyObject **)alc.malloc(alc.ctx, alc_len * sizeof(PyObject *));
+    val = val_hdr;
     if (unlikely(!val_hdr)) goto fail_alloc;
-    val_end = val_hdr + (alc_len - 2); /* padding for key-value pair reading */
-    val = val_hdr + hdr_len;
-    ctn = val;
-    ctn_len = 0;
-    raw = has_read_flag(NUMBER_AS_RAW) || has_read_flag(BIGNUM_AS_RAW);
-    inv = has_read_flag(ALLOW_INVALID_UNICODE) != 0;
-    raw_end = NULL;
-    pre = raw ? &raw_end : NULL;
-    
+    val_end = val_hdr + alc_len;
+    ctn_end = ctn_hdr + YYJSON_READER_DEPTH_LIMIT;
+    ctn = ctn_hdr;
+    ctn->ofs = 0;
+    ctn->plan = ctx ? ctx->plan : NULL;
+    trusted = ctx && (ctx->option & PYYJSON_OPT_PARSE_TRUSTED_UTF8);
+    key_cache = ctx ? ctx->key_cache : NULL;
+    pre = (has_read_flag(NUMBER_AS_RAW) || has_read_flag(BIGNUM_AS_RAW))
+          ? &raw_end : NULL;
+    str_hook = ctx && (ctx->option & PYYJSON_OPT_STR_HOOK_MASK);
+    frozen = ctx && (ctx->option & (PYYJSON_OPT_PARSE_FROZEN |
+                                    PYYJSON_OPT_PARSE_SHARE_SUBTREES));
+    if (ctx && (ctx->option & PYYJSON_OPT_PARSE_SHARE_SUBTREES)) {
+        share = pyyjson_share_new();
+        if (unlikely(!share)) goto fail_python;
+    }
+    ctn->pos = (usize)(cur - hdr);
+
     if (*cur++ == '{') {
-        ctn->tag = YYJSON_TYPE_OBJ;
-        ctn->uni.ofs = 0;
+        ctn->is_obj = true;
+        if (ctn->plan && ctn->plan->kind != PLAN_CLASS) goto fail_plan;
         goto obj_key_begin;
     } else {
-        ctn->tag = YYJSON_TYPE_ARR;
-        ctn->uni.ofs = 0;
+        ctn->is_obj = false;
+        if (ctn->plan && ctn->plan->kind != PLAN_LIST) goto fail_plan;
         goto arr_val_begin;
     }
-    
+
 arr_begin:
-    /* save current container */
-    ctn->tag = (((u64)ctn_len + 1) << YYJSON_TAG_BIT) |
-               (ctn->tag & YYJSON_TAG_MASK);
-    
-    /* create a new array value, save parent container offset */
-    val_incr();
-    val->tag = YYJSON_TYPE_ARR;
-    val->uni.ofs = (usize)((u8 *)val - (u8 *)ctn);
-    
-    /* push the new array value as current container */
-    ctn = val;
-    ctn_len = 0;
-    
+    /* push a new array as current container */
+    ctn_push(false);
+
 arr_val_begin:
     if (*cur == '{') {
         cur++;
@@ -6536,41 +6758,59 @@ arr_val_begin:
         goto arr_begin;
     }
     if (char_is_number(*cur)) {
-        val_incr();
-        ctn_len++;
-        if (likely(read_number(&cur, pre, flg, val, &msg))) goto arr_val_end;
+        if (likely(read_number(&cur, pre, flg, &num, &msg))) {
+            obj = read_py_number(&num, ctx);
+            if (unlikely(!obj)) goto fail_alloc;
+            val_push(obj);
+            goto arr_val_end;
+        }
         goto fail_number;
     }
     if (*cur == '"') {
-        val_incr();
-        ctn_len++;
-        if (likely(read_string(&cur, end, inv, val, &msg))) goto arr_val_end;
+        if (unlikely(str_hook)) {
+            hook = pyyjson_read_str_value(ctx, (const char *)cur + 1, NULL,
+                                          &obj, &hook_len);
+            if (unlikely(hook < 0)) goto fail_python;
+            if (hook) {
+                cur += 1 + hook_len;
+                val_push(obj);
+                goto arr_val_end;
+            }
+        }
+        obj = read_string(&cur, end, trusted, buf, &msg);
+        if (likely(obj)) {
+            val_push(obj);
+            goto arr_val_end;
+        }
         goto fail_string;
     }
     if (*cur == 't') {
-        val_incr();
-        ctn_len++;
-        if (likely(read_true(&cur, val))) goto arr_val_end;
+        if (likely(read_true(&cur, &num))) {
+            Py_INCREF(Py_True);
+            val_push(Py_True);
+            goto arr_val_end;
+        }
         goto fail_literal_true;
     }
     if (*cur == 'f') {
-        val_incr();
-        ctn_len++;
-        if (likely(read_false(&cur, val))) goto arr_val_end;
+        if (likely(read_false(&cur, &num))) {
+            Py_INCREF(Py_False);
+            val_push(Py_False);
+            goto arr_val_end;
+        }
         goto fail_literal_false;
     }
     if (*cur == 'n') {
-        val_incr();
-        ctn_len++;
-        if (likely(read_null(&cur, val))) goto arr_val_end;
-        if (has_read_flag(ALLOW_INF_AND_NAN)) {
-            if (read_nan(false, &cur, pre, val)) goto arr_val_end;
+        if (likely(read_null(&cur, &num))) {
+            Py_INCREF(Py_None);
+            val_push(Py_None);
+            goto arr_val_end;
         }
         goto fail_literal_null;
     }
     if (*cur == ']') {
         cur++;
-        if (likely(ctn_len == 0)) goto arr_end;
+        if (likely((usize)(val - val_hdr) == ctn->ofs)) goto arr_end;
         if (has_read_flag(ALLOW_TRAILING_COMMAS)) goto arr_end;
         while (*cur != ',') cur--;
         goto fail_trailing_comma;
@@ -6579,19 +6819,12 @@ arr_val_begin:
         while (char_is_space(*++cur));
         goto arr_val_begin;
     }
-    if (has_read_flag(ALLOW_INF_AND_NAN) &&
-        (*cur == 'i' || *cur == 'I' || *cur == 'N')) {
-        val_incr();
-        ctn_len++;
-        if (read_inf_or_nan(false, &cur, pre, val)) goto arr_val_end;
-        goto fail_character_val;
-    }
     if (has_read_flag(ALLOW_COMMENTS)) {
         if (skip_spaces_and_comments(&cur)) goto arr_val_begin;
         if (byte_match_2(cur, "/*")) goto fail_comment;
     }
     goto fail_character_val;
-    
+
 arr_val_end:
     if (*cur == ',') {
         cur++;
@@ -6610,46 +6843,78 @@ arr_val_end:
         if (byte_match_2(cur, "/*")) goto fail_comment;
     }
     goto fail_character_arr_end;
-    
+
 arr_end:
-    /* get parent container */
-    ctn_parent = (yyjson_val *)(void *)((u8 *)ctn - ctn->uni.ofs);
-    
-    /* save the next sibling value offset */
-    ctn->uni.ofs = (usize)((u8 *)val - (u8 *)ctn) + sizeof(yyjson_val);
-    ctn->tag = ((ctn_len) << YYJSON_TAG_BIT) | YYJSON_TYPE_ARR;
-    if (unlikely(ctn == ctn_parent)) goto doc_end;
-    
+    /* pop the items and move them into an exact-size list */
+    item = val_hdr + ctn->ofs;
+    ctn_len = (usize)(val - item);
+    if (unlikely(ctn->plan && ctn->plan->item)) {
+        /* scalars are not checked as they are read */
+        usize i;
+        for (i = 0; i < ctn_len; i++) {
+            if (!pyyjson_plan_accepts(ctn->plan->item, item[i])) {
+                goto fail_plan_item;
+            }
+        }
+    }
+    if (unlikely(frozen && !ctn->plan)) {
+        if (share) {
+            val = item;
+            obj = pyyjson_share_array(share, (const char *)hdr + ctn->pos,
+                                      (Py_ssize_t)((usize)(cur - hdr) - ctn->pos),
+                                      item, (Py_ssize_t)ctn_len);
+            if (unlikely(!obj)) goto fail_python;
+        } else {
+            obj = PyTuple_New((Py_ssize_t)ctn_len);
+            if (unlikely(!obj)) goto fail_alloc;
+            if (ctn_len) memcpy(((PyTupleObject *)obj)->ob_item, item,
+                                ctn_len * sizeof(PyObject *));
+            val = item;
+        }
+    } else {
+        obj = PyList_New((Py_ssize_t)ctn_len);
+        if (unlikely(!obj)) goto fail_alloc;
+        if (ctn_len) memcpy(((PyListObject *)obj)->ob_item, item,
+                            ctn_len * sizeof(PyObject *));
+        val = item;
+    }
+    val_push(obj);
+    if (unlikely(ctn == ctn_hdr)) goto doc_end;
+
     /* pop parent as current container */
-    ctn = ctn_parent;
-    ctn_len = (usize)(ctn->tag >> YYJSON_TAG_BIT);
-    if ((ctn->tag & YYJSON_TYPE_MASK) == YYJSON_TYPE_OBJ) {
+    ctn--;
+    if (ctn->is_obj) {
         goto obj_val_end;
     } else {
         goto arr_val_end;
     }
-    
+
 obj_begin:
-    /* push container */
-    ctn->tag = (((u64)ctn_len + 1) << YYJSON_TAG_BIT) |
-               (ctn->tag & YYJSON_TAG_MASK);
-    val_incr();
-    val->tag = YYJSON_TYPE_OBJ;
-    /* offset to the parent */
-    val->uni.ofs = (usize)((u8 *)val - (u8 *)ctn);
-    ctn = val;
-    ctn_len = 0;
-    
+    /* push a new object as current container */
+    ctn_push(true);
+
 obj_key_begin:
     if (likely(*cur == '"')) {
-        val_incr();
-        ctn_len++;
-        if (likely(read_string(&cur, end, inv, val, &msg))) goto obj_key_end;
+        if (key_cache) {
+            hook = pyyjson_str_cache_read(key_cache, (const char *)cur + 1,
+                                          &obj, &hook_len);
+            if (unlikely(hook < 0)) goto fail_python;
+            if (hook) {
+                cur += 1 + hook_len;
+                val_push(obj);
+                goto obj_key_end;
+            }
+        }
+        obj = read_string(&cur, end, trusted, buf, &msg);
+        if (likely(obj)) {
+            val_push(obj);
+            goto obj_key_end;
+        }
         goto fail_string;
     }
     if (likely(*cur == '}')) {
         cur++;
-        if (likely(ctn_len == 0)) goto obj_end;
+        if (likely((usize)(val - val_hdr) == ctn->ofs)) goto obj_end;
         if (has_read_flag(ALLOW_TRAILING_COMMAS)) goto obj_end;
         while (*cur != ',') cur--;
         goto fail_trailing_comma;
@@ -6663,10 +6928,14 @@ obj_key_begin:
         if (byte_match_2(cur, "/*")) goto fail_comment;
     }
     goto fail_character_obj_key;
-    
+
 obj_key_end:
     if (*cur == ':') {
         cur++;
+        if (unlikely(ctn->plan) && ctx->skip_unknown &&
+            !pyyjson_plan_has_field(ctn->plan, val[-1])) {
+            goto obj_val_skip;
+        }
         goto obj_val_begin;
     }
     if (char_is_space(*cur)) {
@@ -6678,18 +6947,33 @@ obj_key_end:
         if (byte_match_2(cur, "/*")) goto fail_comment;
     }
     goto fail_character_obj_sep;
-    
+
 obj_val_begin:
     if (*cur == '"') {
-        val++;
-        ctn_len++;
-        if (likely(read_string(&cur, end, inv, val, &msg))) goto obj_val_end;
+        if (unlikely(str_hook)) {
+            hook = pyyjson_read_str_value(ctx, (const char *)cur + 1, val[-1],
+                                          &obj, &hook_len);
+            if (unlikely(hook < 0)) goto fail_python;
+            if (hook) {
+                cur += 1 + hook_len;
+                val_push(obj);
+                goto obj_val_end;
+            }
+        }
+        obj = read_string(&cur, end, trusted, buf, &msg);
+        if (likely(obj)) {
+            val_push(obj);
+            goto obj_val_end;
+        }
         goto fail_string;
     }
     if (char_is_number(*cur)) {
-        val++;
-        ctn_len++;
-        if (likely(read_number(&cur, pre, flg, val, &msg))) goto obj_val_end;
+        if (likely(read_number(&cur, pre, flg, &num, &msg))) {
+            obj = read_py_number(&num, ctx);
+            if (unlikely(!obj)) goto fail_alloc;
+            val_push(obj);
+            goto obj_val_end;
+        }
         goto fail_number;
     }
     if (*cur == '{') {
@@ -6701,23 +6985,26 @@ obj_val_begin:
         goto arr_begin;
     }
     if (*cur == 't') {
-        val++;
-        ctn_len++;
-        if (likely(read_true(&cur, val))) goto obj_val_end;
+        if (likely(read_true(&cur, &num))) {
+            Py_INCREF(Py_True);
+            val_push(Py_True);
+            goto obj_val_end;
+        }
         goto fail_literal_true;
     }
     if (*cur == 'f') {
-        val++;
-        ctn_len++;
-        if (likely(read_false(&cur, val))) goto obj_val_end;
+        if (likely(read_false(&cur, &num))) {
+            Py_INCREF(Py_False);
+            val_push(Py_False);
+            goto obj_val_end;
+        }
         goto fail_literal_false;
     }
     if (*cur == 'n') {
-        val++;
-        ctn_len++;
-        if (likely(read_null(&cur, val))) goto obj_val_end;
-        if (has_read_flag(ALLOW_INF_AND_NAN)) {
-            if (read_nan(false, &cur, pre, val)) goto obj_val_end;
+        if (likely(read_null(&cur, &num))) {
+            Py_INCREF(Py_None);
+            val_push(Py_None);
+            goto obj_val_end;
         }
         goto fail_literal_null;
     }
@@ -6725,19 +7012,32 @@ obj_val_begin:
         while (char_is_space(*++cur));
         goto obj_val_begin;
     }
-    if (has_read_flag(ALLOW_INF_AND_NAN) &&
-        (*cur == 'i' || *cur == 'I' || *cur == 'N')) {
-        val++;
-        ctn_len++;
-        if (read_inf_or_nan(false, &cur, pre, val)) goto obj_val_end;
-        goto fail_character_val;
-    }
     if (has_read_flag(ALLOW_COMMENTS)) {
         if (skip_spaces_and_comments(&cur)) goto obj_val_begin;
         if (byte_match_2(cur, "/*")) goto fail_comment;
     }
     goto fail_character_val;
-    
+
+obj_val_skip:
+    /* the value of an unknown field is dropped, skip it without building it,
+       only with `skip_unknown` since its grammar is not validated */
+    while (char_is_space(*cur)) cur++;
+    if (*cur == '{' || *cur == '[' || *cur == '"') {
+        const char *skip_pos = (const char *)cur;
+        const char *skip_end = pyyjson_skip_value((const char *)cur,
+                                                  (const char *)end, &msg,
+                                                  &skip_pos);
+        if (unlikely(!skip_end)) {
+            cur = (u8 *)skip_pos;
+            goto fail_skip;
+        }
+        cur = (u8 *)skip_end;
+        Py_INCREF(Py_None);
+        val_push(Py_None);
+        goto obj_val_end;
+    }
+    goto obj_val_begin;
+
 obj_val_end:
     if (likely(*cur == ',')) {
         cur++;
@@ -6756,22 +7056,60 @@ obj_val_end:
         if (byte_match_2(cur, "/*")) goto fail_comment;
     }
     goto fail_character_obj_end;
-    
+
 obj_end:
-    /* pop container */
-    ctn_parent = (yyjson_val *)(void *)((u8 *)ctn - ctn->uni.ofs);
-    /* point to the next value */
-    ctn->uni.ofs = (usize)((u8 *)val - (u8 *)ctn) + sizeof(yyjson_val);
-    ctn->tag = (ctn_len << (YYJSON_TAG_BIT - 1)) | YYJSON_TYPE_OBJ;
-    if (unlikely(ctn == ctn_parent)) goto doc_end;
-    ctn = ctn_parent;
-    ctn_len = (usize)(ctn->tag >> YYJSON_TAG_BIT);
-    if ((ctn->tag & YYJSON_TYPE_MASK) == YYJSON_TYPE_OBJ) {
+    /* pop the key-value pairs and move them into a dict or an instance */
+    item = val_hdr + ctn->ofs;
+    ctn_len = (usize)(val - item) / 2;
+    val = item;
+    if (unlikely(ctn->plan)) {
+        obj = pyyjson_plan_build(ctn->plan, item, (Py_ssize_t)ctn_len);
+        if (unlikely(!obj)) goto fail_python;
+    } else if (unlikely(frozen)) {
+        if (share) {
+            obj = pyyjson_share_object(share, (const char *)hdr + ctn->pos,
+                                       (Py_ssize_t)((usize)(cur - hdr) - ctn->pos),
+                                       item, (Py_ssize_t)ctn_len);
+        } else {
+            obj = pyyjson_frozen_mapping_new(item, (Py_ssize_t)ctn_len);
+        }
+        if (unlikely(!obj)) goto fail_python;
+    } else {
+        obj = _PyDict_NewPresized((Py_ssize_t)ctn_len);
+        if (unlikely(!obj)) {
+            while (ctn_len--) {
+                Py_DECREF(item[0]);
+                Py_DECREF(item[1]);
+                item += 2;
+            }
+            goto fail_alloc;
+        }
+        for (; ctn_len; ctn_len--, item += 2) {
+            int ret = PyDict_SetItem(obj, item[0], item[1]);
+            Py_DECREF(item[0]);
+            Py_DECREF(item[1]);
+            if (unlikely(ret)) {
+                while (--ctn_len) {
+                    item += 2;
+                    Py_DECREF(item[0]);
+                    Py_DECREF(item[1]);
+                }
+                Py_DECREF(obj);
+                goto fail_python;
+            }
+        }
+    }
+    val_push(obj);
+    if (unlikely(ctn == ctn_hdr)) goto doc_end;
+
+    /* pop parent as current container */
+    ctn--;
+    if (ctn->is_obj) {
         goto obj_val_end;
     } else {
         goto arr_val_end;
     }
-    
+
 doc_end:
     /* check invalid contents after json document */
     if (unlikely(cur < end) && !has_read_flag(STOP_WHEN_DONE)) {
@@ -6783,25 +7121,37 @@ doc_end:
         }
         if (unlikely(cur < end)) goto fail_garbage;
     }
-    
-    if (pre && *pre) **pre = '\0';
-    doc = (yyjson_doc *)val_hdr;
-    doc->root = val_hdr + hdr_len;
-    doc->alc = alc;
-    doc->dat_read = (usize)(cur - hdr);
-    doc->val_read = (usize)((val - doc->root) + 1);
-    doc->str_pool = has_read_flag(INSITU) ? NULL : (char *)hdr;
-    return doc;
-    
+
+    assert(val == val_hdr + 1);
+    obj = val_hdr[0];
+    alc.free(alc.ctx, (void *)val_hdr);
+    pyyjson_share_free(share);
+    err->pos = (usize)(cur - hdr);
+    return obj;
+
 fail_string:
     return_err(cur, INVALID_STRING, msg);
 fail_number:
     return_err(cur, INVALID_NUMBER, msg);
 fail_alloc:
-    return_err(cur, MEMORY_ALLOCATION, 
+    return_err(cur, MEMORY_ALLOCATION,
                "memory allocation failed");
+fail_python:
+    return_err(cur, MEMORY_ALLOCATION,
+               "failed to build a Python object");
+fail_depth:
+    return_err(cur, JSON_STRUCTURE,
+               "exceeds the maximum nesting depth");
+fail_plan:
+    return_err(cur, JSON_STRUCTURE,
+               "container type does not match the target type");
+fail_plan_item:
+    return_err(hdr + ctn->pos, JSON_STRUCTURE,
+               "array item type does not match the target type");
+fail_skip:
+    return_err(cur, JSON_STRUCTURE, msg);
 fail_trailing_comma:
-    return_err(cur, JSON_STRUCTURE, 
+    return_err(cur, JSON_STRUCTURE,
                "trailing comma is not allowed");
 fail_literal_true:
     return_err(cur, LITERAL,
@@ -6831,17 +7181,28 @@ fail_comment:
     return_err(cur, INVALID_COMMENT,
                "unclosed multiline comment");
 fail_garbage:
-    return_err(cur, UNEXPECTED_CONTENT, 
+    return_err(cur, UNEXPECTED_CONTENT,
                "unexpected content after document");
-    
-#undef val_incr
+
+#undef ctn_push
+#undef val_push
 #undef return_err
 }
 
-/** Read JSON document (accept all style, but optimized for pretty). */
+/**
+ Read JSON document (accept all style, but optimized for pretty).
+
+ Modified: strings are decoded into the string pool `buf` by
+ `read_string_doc()` and nesting is limited to `YYJSON_READER_DEPTH_LIMIT`.
+ No Python object is created, the GIL is not needed.
+ */
 static_inline yyjson_doc *read_root_pretty(u8 *hdr,
                                            u8 *cur,
                                            u8 *end,
+                                           /* modified BEGIN */
+                                           u8 *buf,
+                                           bool trusted,
+                                           /* modified END */
                                            yyjson_alc alc,
                                            yyjson_read_flag flg,
                                            yyjson_read_err *err) {
@@ -6892,9 +7253,11 @@ static_inline yyjson_doc *read_root_pretty(u8 *hdr,
     const char *msg; /* error message */
     
     bool raw; /* read number as raw */
-    bool inv; /* allow invalid unicode */
     u8 *raw_end; /* raw end for null-terminator */
     u8 **pre; /* previous raw end pointer */
+    /* modified BEGIN */
+    usize depth = 1; /* the number of open containers */
+    /* modified END */
     
     dat_len = has_read_flag(STOP_WHEN_DONE) ? 256 : (usize)(end - cur);
     hdr_len = sizeof(yyjson_doc) / sizeof(yyjson_val);
@@ -6910,7 +7273,6 @@ static_inline yyjson_doc *read_root_pretty(u8 *hdr,
     ctn = val;
     ctn_len = 0;
     raw = has_read_flag(NUMBER_AS_RAW) || has_read_flag(BIGNUM_AS_RAW);
-    inv = has_read_flag(ALLOW_INVALID_UNICODE) != 0;
     raw_end = NULL;
     pre = raw ? &raw_end : NULL;
     
@@ -6927,6 +7289,9 @@ static_inline yyjson_doc *read_root_pretty(u8 *hdr,
     }
     
 arr_begin:
+    /* modified BEGIN */
+    if (unlikely(depth++ == YYJSON_READER_DEPTH_LIMIT)) goto fail_depth;
+    /* modified END */
     /* save current container */
     ctn->tag = (((u64)ctn_len + 1) << YYJSON_TAG_BIT) |
                (ctn->tag & YYJSON_TAG_MASK);
@@ -6971,7 +7336,7 @@ arr_val_begin:
     if (*cur == '"') {
         val_incr();
         ctn_len++;
-        if (likely(read_string(&cur, end, inv, val, &msg))) goto arr_val_end;
+        if (likely(read_string_doc(&cur, end, trusted, hdr, &buf, val, &msg))) goto arr_val_end;
         goto fail_string;
     }
     if (*cur == 't') {
@@ -7050,6 +7415,9 @@ arr_end:
     ctn->uni.ofs = (usize)((u8 *)val - (u8 *)ctn) + sizeof(yyjson_val);
     ctn->tag = ((ctn_len) << YYJSON_TAG_BIT) | YYJSON_TYPE_ARR;
     if (unlikely(ctn == ctn_parent)) goto doc_end;
+    /* modified BEGIN */
+    depth--;
+    /* modified END */
     
     /* pop parent as current container */
     ctn = ctn_parent;
@@ -7062,6 +7430,9 @@ arr_end:
     }
     
 obj_begin:
+    /* modified BEGIN */
+    if (unlikely(depth++ == YYJSON_READER_DEPTH_LIMIT)) goto fail_depth;
+    /* modified END */
     /* push container */
     ctn->tag = (((u64)ctn_len + 1) << YYJSON_TAG_BIT) |
                (ctn->tag & YYJSON_TAG_MASK);
@@ -7088,7 +7459,7 @@ obj_key_begin:
     if (likely(*cur == '"')) {
         val_incr();
         ctn_len++;
-        if (likely(read_string(&cur, end, inv, val, &msg))) goto obj_key_end;
+        if (likely(read_string_doc(&cur, end, trusted, hdr, &buf, val, &msg))) goto obj_key_end;
         goto fail_string;
     }
     if (likely(*cur == '}')) {
@@ -7131,7 +7502,7 @@ obj_val_begin:
     if (*cur == '"') {
         val++;
         ctn_len++;
-        if (likely(read_string(&cur, end, inv, val, &msg))) goto obj_val_end;
+        if (likely(read_string_doc(&cur, end, trusted, hdr, &buf, val, &msg))) goto obj_val_end;
         goto fail_string;
     }
     if (char_is_number(*cur)) {
@@ -7216,6 +7587,9 @@ obj_end:
     ctn->uni.ofs = (usize)((u8 *)val - (u8 *)ctn) + sizeof(yyjson_val);
     ctn->tag = (ctn_len << (YYJSON_TAG_BIT - 1)) | YYJSON_TYPE_OBJ;
     if (unlikely(ctn == ctn_parent)) goto doc_end;
+    /* modified BEGIN */
+    depth--;
+    /* modified END */
     ctn = ctn_parent;
     ctn_len = (usize)(ctn->tag >> YYJSON_TAG_BIT);
     if (*cur == '\n') cur++;
@@ -7253,6 +7627,11 @@ fail_number:
 fail_alloc:
     return_err(cur, MEMORY_ALLOCATION,
                "memory allocation failed");
+/* modified BEGIN */
+fail_depth:
+    return_err(cur, JSON_STRUCTURE,
+               "exceeds the maximum nesting depth");
+/* modified END */
 fail_trailing_comma:
     return_err(cur, JSON_STRUCTURE,
                "trailing comma is not allowed");
@@ -7300,6 +7679,9 @@ fail_garbage:
 PyObject *yyjson_read_opts(char *dat,
                              usize len,
                              yyjson_read_flag flg,
+                             /* modified BEGIN */
+                             pyyjson_read_ctx *ctx,
+                             /* modified END */
                              const yyjson_alc *alc_ptr,
                              yyjson_read_err *err) {
     
@@ -7315,6 +7697,10 @@ PyObject *yyjson_read_opts(char *dat,
     yyjson_alc alc;
     PyObject *doc;
     u8 *hdr = NULL, *end, *cur;
+    /* modified BEGIN */
+    u8 *buf; /* string buffer used by `read_string()` */
+    usize hdr_len, buf_len;
+    /* modified END */
     
     /* validate input parameters */
     if (!err) err = &dummy_err;
@@ -7337,17 +7723,27 @@ PyObject *yyjson_read_opts(char *dat,
         end = (u8 *)dat + len;
         cur = (u8 *)dat;
     } else {
-        if (unlikely(len >= USIZE_MAX - YYJSON_PADDING_SIZE)) {
+        /* modified BEGIN */
+        /*
+         The input is copied with zero padding, followed by the string buffer.
+         A decoded string has at most `len` characters and each character
+         takes at most 4 bytes (UCS4), plus the overrun of `byte_move_16()`.
+         */
+        if (unlikely(len >= (USIZE_MAX - 64) / 5)) {
             return_err(0, MEMORY_ALLOCATION, "memory allocation failed");
         }
-        hdr = (u8 *)alc.malloc(alc.ctx, len * 5);
+        hdr_len = size_align_up(len + YYJSON_PADDING_SIZE, sizeof(u64));
+        buf_len = len * 4 + 32;
+        hdr = (u8 *)alc.malloc(alc.ctx, hdr_len + buf_len);
         if (unlikely(!hdr)) {
             return_err(0, MEMORY_ALLOCATION, "memory allocation failed");
         }
-        end = hdr + len * 5;
-        cur = dat;
-        // memcpy(hdr, dat, len);
-        // memset(hdr, 0, len * 5);
+        end = hdr + len;
+        cur = hdr;
+        buf = hdr + hdr_len;
+        memcpy(hdr, dat, len);
+        memset(end, 0, YYJSON_PADDING_SIZE);
+        /* modified END */
     }
     
     /* skip empty contents before json document */
@@ -7368,21 +7764,25 @@ PyObject *yyjson_read_opts(char *dat,
     }
     
     /* read json document */
+    /* modified BEGIN */
     if (likely(char_is_container(*cur))) {
-        if (char_is_space(cur[1]) && char_is_space(cur[2])) {
-            assert(false);
-            // doc = read_root_pretty(hdr, cur, end, alc, flg, err);
-        } else {
-            assert(false);
-            // doc = read_root_minify(hdr, cur, end, alc, flg, err);
-        }
+        doc = read_root_minify(hdr, cur, end, buf, alc, flg, ctx, err);
     } else {
-        doc = read_root_single(hdr, cur, end, alc, flg, err);
+        if (unlikely(ctx && ctx->plan)) {
+            return_err(cur - hdr, JSON_STRUCTURE,
+                       "container type does not match the target type");
+        }
+        doc = read_root_single(hdr, cur, end, buf, alc, flg, ctx, err);
     }
+    /* modified END */
     
     /* check result */
     if (likely(doc)) {
-        memset(err, 0, sizeof(yyjson_read_err));
+        /* modified BEGIN */
+        /* keep the read position for `YYJSON_READ_STOP_WHEN_DONE` */
+        err->code = YYJSON_READ_SUCCESS;
+        err->msg = NULL;
+        /* modified END */
     } else {
         /* RFC 8259: JSON text MUST be encoded using UTF-8 */
         if (err->pos == 0 && err->code != YYJSON_READ_ERROR_MEMORY_ALLOCATION) {
@@ -7400,14 +7800,380 @@ PyObject *yyjson_read_opts(char *dat,
                 err->msg = "UTF-16 encoding is not supported";
             }
         }
-        if (!has_read_flag(INSITU)) alc.free(alc.ctx, (void *)hdr);
-        else assert(0); // check free, removed after development phrase
     }
+    /* modified BEGIN */
+    if (!has_read_flag(INSITU)) alc.free(alc.ctx, (void *)hdr);
+    else assert(0); // check free, removed after development phrase
+    /* modified END */
     return doc;
     
 #undef return_err
 }
 
+/* modified BEGIN */
+/** Read a JSON document with a scalar root into `yyjson_doc`, the scalar
+    counterpart of `read_root_pretty()`. */
+static_noinline yyjson_doc *read_root_single_doc(u8 *hdr,
+                                                 u8 *cur,
+                                                 u8 *end,
+                                                 u8 *buf,
+                                                 bool trusted,
+                                                 yyjson_alc alc,
+                                                 yyjson_read_flag flg,
+                                                 yyjson_read_err *err) {
+
+#define return_err(_pos, _code, _msg) do { \
+    if (is_truncated_end(hdr, _pos, end, YYJSON_READ_ERROR_##_code, flg)) { \
+        err->pos = (usize)(end - hdr); \
+        err->code = YYJSON_READ_ERROR_UNEXPECTED_END; \
+        err->msg = "unexpected end of data"; \
+    } else { \
+        err->pos = (usize)(_pos - hdr); \
+        err->code = YYJSON_READ_ERROR_##_code; \
+        err->msg = _msg; \
+    } \
+    if (val_hdr) alc.free(alc.ctx, (void *)val_hdr); \
+    return NULL; \
+} while (false)
+
+    usize hdr_len; /* value count used by yyjson_doc */
+    yyjson_val *val_hdr; /* the head of allocated values */
+    yyjson_val *val; /* the root value */
+    yyjson_doc *doc; /* the JSON document, equals to val_hdr */
+    u8 *raw_end = NULL; /* raw end for null-terminator */
+    u8 **pre; /* previous raw end pointer */
+    const char *msg; /* error message */
+
+    hdr_len = sizeof(yyjson_doc) / sizeof(yyjson_val);
+    hdr_len += (sizeof(yyjson_doc) % sizeof(yyjson_val)) > 0;
+    val_hdr = (yyjson_val *)alc.malloc(alc.ctx, (hdr_len + 1) * sizeof(yyjson_val));
+    if (unlikely(!val_hdr)) goto fail_alloc;
+    val = val_hdr + hdr_len;
+    pre = (has_read_flag(NUMBER_AS_RAW) || has_read_flag(BIGNUM_AS_RAW))
+          ? &raw_end : NULL;
+
+    if (char_is_number(*cur)) {
+        if (likely(read_number(&cur, pre, flg, val, &msg))) goto doc_end;
+        goto fail_number;
+    }
+    if (*cur == '"') {
+        if (likely(read_string_doc(&cur, end, trusted, hdr, &buf, val, &msg))) {
+            goto doc_end;
+        }
+        goto fail_string;
+    }
+    if (*cur == 't') {
+        if (likely(read_true(&cur, val))) goto doc_end;
+        goto fail_literal_true;
+    }
+    if (*cur == 'f') {
+        if (likely(read_false(&cur, val))) goto doc_end;
+        goto fail_literal_false;
+    }
+    if (*cur == 'n') {
+        if (likely(read_null(&cur, val))) goto doc_end;
+        goto fail_literal_null;
+    }
+    goto fail_character;
+
+doc_end:
+    /* check invalid contents after json document */
+    if (unlikely(cur < end) && !has_read_flag(STOP_WHEN_DONE)) {
+        if (has_read_flag(ALLOW_COMMENTS)) {
+            if (!skip_spaces_and_comments(&cur)) {
+                if (byte_match_2(cur, "/*")) goto fail_comment;
+            }
+        } else {
+            while (char_is_space(*cur)) cur++;
+        }
+        if (unlikely(cur < end)) goto fail_garbage;
+    }
+
+    if (pre && *pre) **pre = '\0';
+    doc = (yyjson_doc *)val_hdr;
+    doc->root = val;
+    doc->alc = alc;
+    doc->dat_read = (usize)(cur - hdr);
+    doc->val_read = 1;
+    doc->str_pool = (char *)hdr;
+    return doc;
+
+fail_string:
+    return_err(cur, INVALID_STRING, msg);
+fail_number:
+    return_err(cur, INVALID_NUMBER, msg);
+fail_alloc:
+    return_err(cur, MEMORY_ALLOCATION,
+               "memory allocation failed");
+fail_literal_true:
+    return_err(cur, LITERAL,
+               "invalid literal, expected a valid literal such as 'true'");
+fail_literal_false:
+    return_err(cur, LITERAL,
+               "invalid literal, expected a valid literal such as 'false'");
+fail_literal_null:
+    return_err(cur, LITERAL,
+               "invalid literal, expected a valid literal such as 'null'");
+fail_character:
+    return_err(cur, UNEXPECTED_CHARACTER,
+               "unexpected character, expected a valid root value");
+fail_comment:
+    return_err(cur, INVALID_COMMENT,
+               "unclosed multiline comment");
+fail_garbage:
+    return_err(cur, UNEXPECTED_CONTENT,
+               "unexpected content after document");
+
+#undef return_err
+}
+
+yyjson_doc *pyyjson_read_doc(const char *dat,
+                             usize len,
+                             yyjson_read_flag flg,
+                             bool trusted,
+                             yyjson_read_err *err) {
+
+#define return_err(_pos, _code, _msg) do { \
+    err->pos = (usize)(_pos); \
+    err->msg = _msg; \
+    err->code = YYJSON_READ_ERROR_##_code; \
+    if (hdr) alc.free(alc.ctx, (void *)hdr); \
+    return NULL; \
+} while (false)
+
+    yyjson_alc alc = YYJSON_DEFAULT_ALC;
+    yyjson_doc *doc;
+    u8 *hdr = NULL, *end, *cur;
+    u8 *buf; /* string pool of `read_string_doc()` */
+    usize hdr_len, buf_len;
+
+    if (unlikely(!len)) {
+        return_err(0, INVALID_PARAMETER, "input length is 0");
+    }
+
+    /*
+     The input is copied with zero padding, followed by the string pool.
+     A pooled string of `n` input bytes, quotes included, has at least 4
+     bytes and at most `n - 2` characters. It takes a `usize` offset, up to
+     4 bytes per character and its alignment, at most `5 * n` bytes, plus the
+     overrun of `byte_move_16()` after the last one.
+     */
+    if (unlikely(len >= (USIZE_MAX - 64) / 6)) {
+        return_err(0, MEMORY_ALLOCATION, "memory allocation failed");
+    }
+    hdr_len = size_align_up(len + YYJSON_PADDING_SIZE, sizeof(u64));
+    buf_len = len * 5 + 64;
+    hdr = (u8 *)alc.malloc(alc.ctx, hdr_len + buf_len);
+    if (unlikely(!hdr)) {
+        return_err(0, MEMORY_ALLOCATION, "memory allocation failed");
+    }
+    end = hdr + len;
+    cur = hdr;
+    buf = hdr + hdr_len;
+    memcpy(hdr, dat, len);
+    memset(end, 0, YYJSON_PADDING_SIZE);
+
+    /* skip empty contents before json document */
+    if (unlikely(char_is_space_or_comment(*cur))) {
+        if (has_read_flag(ALLOW_COMMENTS)) {
+            if (!skip_spaces_and_comments(&cur)) {
+                return_err(cur - hdr, INVALID_COMMENT,
+                           "unclosed multiline comment");
+            }
+        } else {
+            if (likely(char_is_space(*cur))) {
+                while (char_is_space(*++cur));
+            }
+        }
+        if (unlikely(cur >= end)) {
+            return_err(0, EMPTY_CONTENT, "input data is empty");
+        }
+    }
+
+    /* on success, `hdr` is freed along with the document as its string pool */
+    if (likely(char_is_container(*cur))) {
+        doc = read_root_pretty(hdr, cur, end, buf, trusted, alc, flg, err);
+    } else {
+        doc = read_root_single_doc(hdr, cur, end, buf, trusted, alc, flg, err);
+    }
+    if (unlikely(!doc)) alc.free(alc.ctx, (void *)hdr);
+    return doc;
+
+#undef return_err
+}
+
+/** State of `pyyjson_doc_to_obj()`. */
+typedef struct doc_conv {
+    const pyyjson_read_ctx *ctx;
+    /** the input copy the string offsets are relative to */
+    const char *hdr;
+    /** whether string values go through the string options */
+    bool str_hook;
+    /** whether containers are built as tuples and FrozenMappings */
+    bool frozen;
+} doc_conv;
+
+/** Convert a string of a document, `key` is the object key of a value,
+    or NULL inside an array. Keys go through the key cache instead. */
+static_inline PyObject *doc_str_to_py(const doc_conv *conv, yyjson_val *val,
+                                      PyObject *key, bool is_key) {
+    u8 tag = (u8)val->tag;
+    const char *data = val->uni.str;
+    const char *text = data;
+    Py_ssize_t len = (Py_ssize_t)unsafe_yyjson_get_len(val);
+    PyObject *obj;
+    Py_ssize_t hook_len;
+    int hook = 0;
+    int kind;
+
+    if (tag & DOC_STR_POOL) {
+        text = conv->hdr + ((const usize *)(const void *)data)[-1];
+    }
+    if (is_key) {
+        if (conv->ctx->key_cache) {
+            hook = pyyjson_str_cache_read(conv->ctx->key_cache, text,
+                                          &obj, &hook_len);
+        }
+    } else if (conv->str_hook) {
+        hook = pyyjson_read_str_value(conv->ctx, text, key, &obj, &hook_len);
+    }
+    if (unlikely(hook < 0)) return NULL;
+    if (hook) return obj;
+
+    switch (tag & YYJSON_SUBTYPE_MASK) {
+        case DOC_STR_UCS4: kind = 4; break;
+        case DOC_STR_UCS2: kind = 2; break;
+        default: kind = 1; break;
+    }
+    return create_py_unicode(data, len,
+                             (tag & YYJSON_SUBTYPE_MASK) == DOC_STR_ASCII,
+                             kind);
+}
+
+static PyObject *doc_val_to_py(const doc_conv *conv, yyjson_val *val,
+                               PyObject *key);
+
+/** Convert an array of a document to a list, or a tuple if frozen. */
+static PyObject *doc_arr_to_py(const doc_conv *conv, yyjson_val *val) {
+    usize i, len = unsafe_yyjson_get_len(val);
+    yyjson_val *child = unsafe_yyjson_get_first(val);
+    PyObject *obj, *item;
+
+    obj = conv->frozen ? PyTuple_New((Py_ssize_t)len)
+                       : PyList_New((Py_ssize_t)len);
+    if (unlikely(!obj)) return NULL;
+    for (i = 0; i < len; i++) {
+        item = doc_val_to_py(conv, child, NULL);
+        if (unlikely(!item)) {
+            Py_DECREF(obj);
+            return NULL;
+        }
+        if (conv->frozen) PyTuple_SET_ITEM(obj, (Py_ssize_t)i, item);
+        else PyList_SET_ITEM(obj, (Py_ssize_t)i, item);
+        child = unsafe_yyjson_get_next(child);
+    }
+    return obj;
+}
+
+/** Convert an object of a document to a FrozenMapping. */
+static PyObject *doc_obj_to_frozen(const doc_conv *conv, yyjson_val *val) {
+    usize i, len = unsafe_yyjson_get_len(val);
+    yyjson_val *child = unsafe_yyjson_get_first(val);
+    PyObject **pairs, *obj;
+
+    pairs = PyMem_Malloc((len ? len : 1) * 2 * sizeof(PyObject *));
+    if (unlikely(!pairs)) return PyErr_NoMemory();
+    for (i = 0; i < len; i++) {
+        pairs[2 * i] = doc_str_to_py(conv, child, NULL, true);
+        pairs[2 * i + 1] = pairs[2 * i]
+                           ? doc_val_to_py(conv, child + 1, pairs[2 * i])
+                           : NULL;
+        if (unlikely(!pairs[2 * i + 1])) {
+            Py_XDECREF(pairs[2 * i]);
+            while (i--) {
+                Py_DECREF(pairs[2 * i]);
+                Py_DECREF(pairs[2 * i + 1]);
+            }
+            PyMem_Free(pairs);
+            return NULL;
+        }
+        child = unsafe_yyjson_get_next(child + 1);
+    }
+    /* the mapping steals the pairs, even on failure */
+    obj = pyyjson_frozen_mapping_new(pairs, (Py_ssize_t)len);
+    PyMem_Free(pairs);
+    return obj;
+}
+
+/** Convert an object of a document to a dict. */
+static PyObject *doc_obj_to_dict(const doc_conv *conv, yyjson_val *val) {
+    usize i, len = unsafe_yyjson_get_len(val);
+    yyjson_val *child = unsafe_yyjson_get_first(val);
+    PyObject *obj, *key, *item;
+    int ret;
+
+    obj = _PyDict_NewPresized((Py_ssize_t)len);
+    if (unlikely(!obj)) return NULL;
+    for (i = 0; i < len; i++) {
+        key = doc_str_to_py(conv, child, NULL, true);
+        if (unlikely(!key)) goto fail;
+        item = doc_val_to_py(conv, child + 1, key);
+        if (unlikely(!item)) {
+            Py_DECREF(key);
+            goto fail;
+        }
+        ret = PyDict_SetItem(obj, key, item);
+        Py_DECREF(key);
+        Py_DECREF(item);
+        if (unlikely(ret)) goto fail;
+        child = unsafe_yyjson_get_next(child + 1);
+    }
+    return obj;
+
+fail:
+    Py_DECREF(obj);
+    return NULL;
+}
+
+/** Convert a value of a document, `key` is its object key or NULL. */
+static PyObject *doc_val_to_py(const doc_conv *conv, yyjson_val *val,
+                               PyObject *key) {
+    switch (unsafe_yyjson_get_type(val)) {
+        case YYJSON_TYPE_NULL:
+            Py_RETURN_NONE;
+        case YYJSON_TYPE_BOOL:
+            if (unsafe_yyjson_get_subtype(val) == YYJSON_SUBTYPE_TRUE) {
+                Py_RETURN_TRUE;
+            }
+            Py_RETURN_FALSE;
+        case YYJSON_TYPE_NUM:
+        case YYJSON_TYPE_RAW:
+            return read_py_number(val, conv->ctx);
+        case YYJSON_TYPE_STR:
+            return doc_str_to_py(conv, val, key, false);
+        case YYJSON_TYPE_ARR:
+            return doc_arr_to_py(conv, val);
+        case YYJSON_TYPE_OBJ:
+            return conv->frozen ? doc_obj_to_frozen(conv, val)
+                                : doc_obj_to_dict(conv, val);
+        default:
+            assert(false);
+            PyErr_SetString(PyExc_SystemError, "unexpected JSON value type");
+            return NULL;
+    }
+}
+
+PyObject *pyyjson_doc_to_obj(yyjson_doc *doc, const pyyjson_read_ctx *ctx) {
+    doc_conv conv;
+    assert(!ctx->plan && !(ctx->option & PYYJSON_OPT_PARSE_SHARE_SUBTREES));
+    conv.ctx = ctx;
+    conv.hdr = doc->str_pool;
+    conv.str_hook = (ctx->option & PYYJSON_OPT_STR_HOOK_MASK) != 0;
+    conv.frozen = (ctx->option & PYYJSON_OPT_PARSE_FROZEN) != 0;
+    return doc_val_to_py(&conv, doc->root, NULL);
+}
+/* modified END */
+
 yyjson_doc *yyjson_read_file(const char *path,
                              yyjson_read_flag flg,
                              const yyjson_alc *alc_ptr,
@@ -10120,4 +10886,120 @@ bool yyjson_mut_write_fp(FILE *fp,
     return yyjson_mut_val_write_fp(fp, root, flg, alc_ptr, err);
 }
 
+/* modified BEGIN */
+/*==============================================================================
+ * Python Encoder Primitives
+ * The encoder in `encoder.c` walks Python objects and writes through these,
+ * without building a `yyjson_mut_doc` first.
+ *============================================================================*/
+
+u8 *pyyjson_write_u64(u8 *cur, u64 val) {
+    return write_u64(val, cur);
+}
+
+u8 *pyyjson_write_i64(u8 *cur, i64 val) {
+    u64 pos = (u64)val;
+    u64 neg = ~pos + 1;
+    usize sgn = val < 0;
+    *cur = '-';
+    return write_u64(sgn ? neg : pos, cur + sgn);
+}
+
+u8 *pyyjson_write_f64(u8 *cur, f64 val) {
+    return write_f64_raw(cur, f64_to_raw(val), YYJSON_WRITE_INF_AND_NAN_AS_NULL);
+}
+
+u8 *pyyjson_write_f32(u8 *cur, f32 val) {
+#if YYJSON_HAS_IEEE_754 && !YYJSON_DISABLE_FAST_FP_CONV
+    /*
+     Same output as write_f64_raw(). Schubfach in f64_bin_to_dec() works for
+     any significand width, given the float's own rounding interval it finds
+     the shortest decimal that reads back as the float, of 1 to 9 digits.
+     */
+    u32 raw, sig_raw, exp_raw;
+    u64 sig_bin, sig_dec, tmp;
+    i32 exp_bin, exp_dec, sig_len, dot_pos, i;
+    u8 *end;
+    
+    memcpy(&raw, &val, 4);
+    sig_raw = raw & 0x7FFFFF;
+    exp_raw = (raw >> 23) & 0xFF;
+    
+    /* return inf and nan */
+    if (unlikely(exp_raw == 0xFF)) {
+        byte_copy_4(cur, "null");
+        return cur + 4;
+    }
+    
+    cur[0] = '-';
+    cur += raw >> 31;
+    
+    /* return zero */
+    if ((raw << 1) == 0) {
+        byte_copy_4(cur, "0.0");
+        return cur + 3;
+    }
+    
+    if (likely(exp_raw != 0)) {
+        /* normal number */
+        sig_bin = sig_raw | ((u32)1 << 23);
+        exp_bin = (i32)exp_raw - 127 - 23;
+        
+        /* fast path for small integer number without fraction */
+        if (-23 <= exp_bin && exp_bin <= 0 &&
+            u64_tz_bits(sig_bin) >= (u32)-exp_bin) {
+            cur = write_u32_len_1_8((u32)(sig_bin >> -exp_bin), cur);
+            byte_copy_2(cur, ".0");
+            return cur + 2;
+        }
+    } else {
+        /* subnormal number */
+        sig_bin = sig_raw;
+        exp_bin = 1 - 127 - 23;
+    }
+    
+    /* binary to decimal, without trailing zeros */
+    f64_bin_to_dec(sig_raw, exp_raw, sig_bin, exp_bin, &sig_dec, &exp_dec);
+    while (sig_dec % 10 == 0) {
+        sig_dec /= 10;
+        exp_dec++;
+    }
+    sig_len = 1;
+    for (tmp = sig_dec; tmp >= 10; tmp /= 10) sig_len++;
+    
+    /* the decimal point position relative to the first digit */
+    dot_pos = sig_len + exp_dec;
+    
+    if (-6 < dot_pos && dot_pos <= 0) {
+        /* such as 0.1234, 0.000001234 */
+        byte_copy_8(cur, "0.000000");
+        return write_u64_len_1_to_16(sig_dec, cur + 2 - dot_pos);
+    } else if (0 < dot_pos && dot_pos < sig_len) {
+        /* such as 1.234 */
+        end = write_u64_len_1_to_16(sig_dec, cur + 1);
+        for (i = 0; i < dot_pos; i++) cur[i] = cur[i + 1];
+        cur[dot_pos] = '.';
+        return end;
+    } else if (sig_len <= dot_pos && dot_pos <= 21) {
+        /* such as 1234.0, 123400000000000000000.0 */
+        memset(cur, '0', 24);
+        write_u64_len_1_to_16(sig_dec, cur);
+        cur += dot_pos;
+        byte_copy_2(cur, ".0");
+        return cur + 2;
+    } else {
+        /* such as 1.234e38, 1e-45 */
+        end = write_u64_len_1_to_16(sig_dec, cur + 1);
+        cur[0] = cur[1];
+        cur[1] = '.';
+        end -= (end == cur + 2); /* remove '.', e.g. 1.e-45 -> 1e-45 */
+        end[0] = 'e';
+        return write_f64_exp(dot_pos - 1, end + 1);
+    }
+#else
+    return pyyjson_write_f64(cur, (f64)val);
+#endif
+}
+/* modified END */
+
 #endif /* YYJSON_DISABLE_WRITER */
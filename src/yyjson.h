@@ -729,6 +729,9 @@ typedef struct yyjson_mut_val yyjson_mut_val;
 /** Run-time options for JSON reader. */
 typedef uint32_t yyjson_read_flag;
 
+/** Python-specific reader state, see `decoder.h` (modified). */
+typedef struct pyyjson_read_ctx pyyjson_read_ctx;
+
 /** Default option (RFC 8259 compliant):
     - Read positive integer as uint64_t.
     - Read negative integer as int64_t.
@@ -876,19 +879,49 @@ yyjson_api bool yyjson_locate_pos(const char *str, size_t len, size_t pos,
     If this parameter is 0, the function will fail and return NULL.
  @param flg The JSON read options.
     Multiple options can be combined with `|` operator. 0 means no options.
+ @param ctx The Python-specific reader state, such as the field plan of the
+    root value. Pass NULL to build plain dicts and lists.
  @param alc The memory allocator used by JSON reader.
     Pass NULL to use the libc's default allocator.
  @param err A pointer to receive error information.
     Pass NULL if you don't need error information.
- @return A new JSON document, or NULL if an error occurs.
-    When it's no longer needed, it should be freed with `yyjson_doc_free()`.
+ @return A new Python object, or NULL if an error occurs. If a Python
+    exception is set, it should be reported instead of `err`.
  */
 yyjson_api PyObject *yyjson_read_opts(char *dat,
                                         size_t len,
                                         yyjson_read_flag flg,
+                                        pyyjson_read_ctx *ctx,
                                         const yyjson_alc *alc,
                                         yyjson_read_err *err);
 
+/**
+ Read JSON into a `yyjson_doc` without creating Python objects (modified).
+ The GIL is not needed, convert the document with `pyyjson_doc_to_obj()`.
+ 
+ @param dat The JSON data (UTF-8 without BOM), null-terminator is not required.
+ @param len The length of JSON data in bytes.
+ @param flg The JSON read options, `YYJSON_READ_INSITU` is not supported.
+ @param trusted Skip UTF-8 validation of strings, the input must be valid UTF-8.
+ @param err A pointer to receive error information.
+ @return A new JSON document to be released with `yyjson_doc_free()`,
+    or NULL if an error occurs.
+ */
+yyjson_api yyjson_doc *pyyjson_read_doc(const char *dat,
+                                        size_t len,
+                                        yyjson_read_flag flg,
+                                        bool trusted,
+                                        yyjson_read_err *err);
+
+/**
+ Convert a document read by `pyyjson_read_doc()` to a Python object with the
+ decode options of `ctx` (modified). The plan of `ctx` must be NULL and
+ `PYYJSON_OPT_PARSE_SHARE_SUBTREES` is not supported.
+ @return A new Python object, or NULL with an exception set.
+ */
+yyjson_api PyObject *pyyjson_doc_to_obj(yyjson_doc *doc,
+                                        const pyyjson_read_ctx *ctx);
+
 /**
  Read a JSON file.
  
@@ -955,7 +988,7 @@ yyjson_api_inline PyObject *yyjson_read(const char *dat,
                                           yyjson_read_flag flg) {
     flg &= ~YYJSON_READ_INSITU; /* const string cannot be modified */
     return yyjson_read_opts((char *)(void *)(size_t)(const void *)dat,
-                            len, flg, NULL, NULL);
+                            len, flg, NULL, NULL, NULL);
 }
 
 /**